@@ -6,17 +6,28 @@ This example demonstrates a full campaign optimization cycle using the Binom API
 
 import requests
 import json
+import sys
 import time
 from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'scripts' / 'core'))
+
+from stats_cache import ClosedDayStatsCache, preset_days
 
 class CampaignOptimizer:
-    def __init__(self, api_key):
+    def __init__(self, api_key, stats_cache=None):
         self.api_key = api_key
         self.base_url = "https://pierdun.com/public/api/v1"
         self.headers = {"api-key": api_key}
+        # Optional ClosedDayStatsCache: closed days are read locally, only open days are fetched
+        self.stats_cache = stats_cache
     
     def get_campaign_performance(self, campaign_id, days=7):
         """Get campaign performance data for the last N days"""
+        if self.stats_cache is not None:
+            return self._get_cached_campaign_performance(campaign_id, days)
+        
         endpoint = "/stats/campaign"
         params = {
             "datePreset": f"last_{days}_days",
@@ -42,6 +53,34 @@ class CampaignOptimizer:
             print(f"Request failed: {str(e)}")
             return None
     
+    def _fetch_campaign_day(self, campaign_id, day):
+        """Fetch one UTC day of campaign stats records"""
+        start = datetime(day.year, day.month, day.day)
+        params = {
+            "datePreset": "custom_time",
+            "dateFrom": start.strftime("%Y-%m-%d %H:%M:%S"),
+            "dateTo": (start + timedelta(days=1, seconds=-1)).strftime("%Y-%m-%d %H:%M:%S"),
+            "timezone": "UTC",
+            "campaignId": campaign_id
+        }
+        response = requests.get(f"{self.base_url}/stats/campaign", headers=self.headers,
+                                params=params, timeout=30)
+        response.raise_for_status()
+        return response.json().get("data", [])
+    
+    def _get_cached_campaign_performance(self, campaign_id, days):
+        """Per-day records are additive, so the days are simply concatenated"""
+        try:
+            per_day = self.stats_cache.collect(
+                self.base_url, f"stats/campaign?campaignId={campaign_id}",
+                preset_days(f"last_{days}_days"),
+                lambda day: self._fetch_campaign_day(campaign_id, day)
+            )
+        except requests.exceptions.RequestException as e:
+            print(f"Request failed: {str(e)}")
+            return None
+        return {"data": [record for records in per_day.values() for record in records]}
+    
     def analyze_landing_performance(self, campaign_data):
         """Analyze which landings are performing best"""
         if not campaign_data or 'data' not in campaign_data:
@@ -153,8 +192,8 @@ if __name__ == "__main__":
         print("Please set the binomPublic environment variable")
         exit(1)
     
-    # Initialize optimizer
-    optimizer = CampaignOptimizer(api_key)
+    # Initialize optimizer; closed days are cached in cache/stats_cache.db
+    optimizer = CampaignOptimizer(api_key, stats_cache=ClosedDayStatsCache())
     
     # Run optimization for campaign ID 51 (example)
     campaign_id = 51
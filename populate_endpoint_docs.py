@@ -1,18 +1,29 @@
 #!/usr/bin/env python3
 """
 Populate all endpoint documentation files with detailed information
-from COMPLETE_BINOM_API_ENCYCLOPEDIA.json
+from encyclopedia.json
 """
 
+import argparse
+import hashlib
 import json
 import os
+import sys
+import time
 from pathlib import Path
 import re
 
+sys.path.insert(0, str(Path(__file__).parent / 'scripts' / 'core'))
+
+from encyclopedia_index import EncyclopediaIndex
+
+MANIFEST_PATH = "docs/endpoints/.build_manifest.json"
+# Bump when create_endpoint_doc output changes so every file is regenerated
+GENERATOR_VERSION = 1
+
 def load_encyclopedia():
-    """Load the complete encyclopedia data"""
-    with open('COMPLETE_BINOM_API_ENCYCLOPEDIA.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Load the encyclopedia through the lazy sidecar index"""
+    return EncyclopediaIndex('encyclopedia.json')
 
 def sanitize_filename(endpoint_path, method):
     """Convert endpoint path to filename"""
@@ -121,57 +132,152 @@ def create_endpoint_doc(endpoint_data):
     
     return doc
 
-def find_endpoint_file(docs_path, endpoint_data):
+def find_endpoint_file(docs_path, endpoint_data, filename_index=None):
     """Find the corresponding documentation file for an endpoint"""
     method = endpoint_data.get('method', 'GET')
     path = endpoint_data.get('path', '')
     
     filename = sanitize_filename(path, method)
     
-    # Search in all subdirectories
-    for root, dirs, files in os.walk(docs_path):
-        if filename in files:
-            return os.path.join(root, filename)
+    if filename_index is None:
+        filename_index = build_filename_index(docs_path)
     
-    return None
+    return filename_index.get(filename)
+
+def build_filename_index(docs_path):
+    """Map every file name under docs_path to its path with a single directory walk"""
+    filename_index = {}
+    for root, dirs, files in os.walk(docs_path):
+        for filename in files:
+            # Keep the first match, as the per-endpoint search used to
+            filename_index.setdefault(filename, os.path.join(root, filename))
+    return filename_index
 
-def populate_all_docs():
-    """Populate all endpoint documentation files"""
+def content_hash(data):
+    """SHA-256 hex digest of bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    """Load the build manifest or start a new one"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('generator_version') == GENERATOR_VERSION:
+            return manifest
+    except (OSError, json.JSONDecodeError):
+        pass
+    return {'generator_version': GENERATOR_VERSION, 'files': {}}
+
+def save_manifest(manifest, manifest_path=MANIFEST_PATH):
+    """Atomically write the build manifest"""
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+def write_if_changed(file_path, content):
+    """Write content only when it differs from what is on disk"""
+    data = content.encode('utf-8')
+    try:
+        with open(file_path, 'rb') as f:
+            if content_hash(f.read()) == content_hash(data):
+                return False
+    except OSError:
+        pass
+    with open(file_path, 'wb') as f:
+        f.write(data)
+    return True
+
+def is_up_to_date(file_path, entry, record_hash):
+    """Check that the record is unchanged and the file is still the one we generated"""
+    if not entry or entry.get('record_hash') != record_hash:
+        return False
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return False
+    return stat.st_size == entry.get('size') and stat.st_mtime_ns == entry.get('mtime_ns')
+
+def populate_all_docs(force=False):
+    """Populate endpoint documentation files whose encyclopedia record changed"""
+    timings = {}
+    started = time.perf_counter()
+    
     print("Loading encyclopedia data...")
     encyclopedia = load_encyclopedia()
+    timings['load'] = time.perf_counter() - started
     
     docs_path = Path("docs/endpoints")
     if not docs_path.exists():
         print(f"Error: {docs_path} directory not found!")
         return
     
-    endpoints = encyclopedia.get('endpoints', [])
+    step = time.perf_counter()
+    filename_index = build_filename_index(docs_path)
+    manifest = {'generator_version': GENERATOR_VERSION, 'files': {}} if force else load_manifest()
+    timings['index'] = time.perf_counter() - step
+    
+    endpoints = encyclopedia.keys()
     print(f"Found {len(endpoints)} endpoints to document")
     
     populated_count = 0
+    unchanged_count = 0
     missing_files = []
+    timings['render'] = 0.0
+    timings['write'] = 0.0
     
-    for endpoint in endpoints:
-        file_path = find_endpoint_file(docs_path, endpoint)
+    for method, path in endpoints:
+        file_path = filename_index.get(sanitize_filename(path, method))
+        
+        if not file_path:
+            missing_files.append(f"{method} {path}")
+            continue
+        
+        record_hash = content_hash(encyclopedia.raw(path, method))
+        entry = manifest['files'].get(file_path)
+        if is_up_to_date(file_path, entry, record_hash):
+            unchanged_count += 1
+            continue
         
-        if file_path:
-            try:
-                doc_content = create_endpoint_doc(endpoint)
-                
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(doc_content)
-                
+        try:
+            step = time.perf_counter()
+            doc_bytes = create_endpoint_doc(encyclopedia.get(path, method)).encode('utf-8')
+            doc_hash = content_hash(doc_bytes)
+            timings['render'] += time.perf_counter() - step
+            
+            step = time.perf_counter()
+            with open(file_path, 'rb') as f:
+                current_hash = content_hash(f.read())
+            if current_hash != doc_hash:
+                with open(file_path, 'wb') as f:
+                    f.write(doc_bytes)
                 populated_count += 1
                 print(f"✓ Populated: {file_path}")
-                
-            except Exception as e:
-                print(f"✗ Error writing {file_path}: {e}")
-        else:
-            missing_files.append(f"{endpoint.get('method', 'GET')} {endpoint.get('path', '')}")
+            else:
+                unchanged_count += 1
+            
+            stat = os.stat(file_path)
+            manifest['files'][file_path] = {
+                'endpoint': f"{method} {path}",
+                'record_hash': record_hash,
+                'content_hash': doc_hash,
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns
+            }
+            timings['write'] += time.perf_counter() - step
+            
+        except Exception as e:
+            print(f"✗ Error writing {file_path}: {e}")
+    
+    step = time.perf_counter()
+    save_manifest(manifest)
+    timings['manifest'] = time.perf_counter() - step
+    timings['total'] = time.perf_counter() - started
     
     print(f"\n=== SUMMARY ===")
     print(f"Total endpoints: {len(endpoints)}")
     print(f"Successfully populated: {populated_count}")
+    print(f"Unchanged (skipped): {unchanged_count}")
     print(f"Missing files: {len(missing_files)}")
     
     if missing_files:
@@ -180,13 +286,19 @@ def populate_all_docs():
             print(f"  - {missing}")
         if len(missing_files) > 10:
             print(f"  ... and {len(missing_files) - 10} more")
+    
+    print("\n=== TIMINGS ===")
+    for name, seconds in timings.items():
+        print(f"{name}: {seconds * 1000:.1f} ms")
+    
+    return timings
 
 def create_category_indexes():
     """Create index files for each category"""
     print("\nCreating category indexes...")
     
     encyclopedia = load_encyclopedia()
-    categories = encyclopedia.get('categories', {})
+    categories = encyclopedia.section('categories') or {}
     
     docs_path = Path("docs/endpoints")
     
@@ -227,13 +339,15 @@ Total endpoints in this category: **{category_data.get('endpoints', 0)}**
 *Part of the Complete Binom API Encyclopedia*
 """
             
-            with open(readme_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            
-            print(f"✓ Created index: {readme_path}")
+            if write_if_changed(readme_path, content):
+                print(f"✓ Created index: {readme_path}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Populate endpoint documentation")
+    parser.add_argument('--force', action='store_true', help="Regenerate every file, ignoring the build manifest")
+    args = parser.parse_args()
+    
     print("🚀 Starting Binom API Encyclopedia population...")
-    populate_all_docs()
+    populate_all_docs(force=args.force)
     create_category_indexes()
     print("\n✅ Documentation population completed!")
@@ -5,7 +5,13 @@ Process and categorize extracted Binom API endpoints
 
 import json
 import os
+import sys
 from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'scripts' / 'core'))
+
+from render_pipeline import RenderJob, RenderPipeline, print_stats
 
 def load_extracted_endpoints():
     """Load extracted endpoints from JSON file"""
@@ -253,50 +259,54 @@ This documentation is created for educational and development purposes.
     
     print("✅ README.md создан")
 
-def generate_category_readmes(categories):
-    """Generate README files for each category"""
+def endpoint_filename(method, path):
+    """Build the documentation filename for an endpoint"""
+    return f"{method.lower()}_{path.replace('/', '_').replace('{', '').replace('}', '').replace('__', '_').strip('_')}.md"
+
+def render_category_readme(category, endpoints):
+    """Render README content for a category"""
     
-    print("\n📝 СОЗДАНИЕ README ДЛЯ КАТЕГОРИЙ")
-    print("=" * 40)
+    category_name = category.replace('_', ' ').title()
     
-    for category, endpoints in categories.items():
-        category_name = category.replace('_', ' ').title()
-        
-        readme_content = f"""# {category_name} API Endpoints
+    parts = [f"""# {category_name} API Endpoints
 
 {len(endpoints)} endpoints for {category_name.lower()} operations.
 
 ## Endpoints
 
-"""
-        
-        for endpoint in endpoints:
-            method = endpoint['method']
-            path = endpoint['path']
-            summary = endpoint['summary']
-            
-            # Create filename for individual endpoint documentation
-            endpoint_filename = f"{method.lower()}_{path.replace('/', '_').replace('{', '').replace('}', '').replace('__', '_').strip('_')}.md"
-            
-            readme_content += f"### {method} {path}\n\n"
-            readme_content += f"**Description**: {summary}\n\n"
-            readme_content += f"**Documentation**: [{endpoint_filename}]({endpoint_filename})\n\n"
-            readme_content += "---\n\n"
-        
-        # Save category README
-        category_readme_path = f"docs/endpoints/{category}/README.md"
-        with open(category_readme_path, 'w', encoding='utf-8') as f:
-            f.write(readme_content)
+"""]
+    
+    for endpoint in endpoints:
+        method = endpoint['method']
+        path = endpoint['path']
+        filename = endpoint_filename(method, path)
         
-        print(f"✅ {category_readme_path}")
+        parts.append(f"### {method} {path}\n\n")
+        parts.append(f"**Description**: {endpoint['summary']}\n\n")
+        parts.append(f"**Documentation**: [{filename}]({filename})\n\n")
+        parts.append("---\n\n")
+    
+    return "".join(parts)
 
-def generate_endpoint_templates(categories):
-    """Generate template files for individual endpoints"""
+def generate_category_readmes(categories, pipeline=None):
+    """Generate README files for each category"""
     
-    print("\n📄 СОЗДАНИЕ ШАБЛОНОВ ЭНДПОИНТОВ")
+    print("\n📝 СОЗДАНИЕ README ДЛЯ КАТЕГОРИЙ")
     print("=" * 40)
     
-    template = """# {method} {path}
+    jobs = [
+        RenderJob(f"docs/endpoints/{category}/README.md", render_category_readme, (category, endpoints))
+        for category, endpoints in categories.items()
+    ]
+    
+    stats = (pipeline or RenderPipeline()).run(jobs)
+    for path in stats.written_paths:
+        print(f"✅ {path}")
+    print_stats(stats, "README категорий")
+    
+    return stats
+
+ENDPOINT_TEMPLATE = """# {method} {path}
 
 ## Overview
 
@@ -416,34 +426,37 @@ print(data)
 
 *This documentation is auto-generated and needs manual enrichment*
 """
+
+def render_endpoint_template(method, path, summary):
+    """Render the template documentation for a single endpoint"""
+    return ENDPOINT_TEMPLATE.format(
+        method=method,
+        method_lower=method.lower(),
+        path=path,
+        summary=summary
+    )
+
+def generate_endpoint_templates(categories, pipeline=None):
+    """Generate template files for individual endpoints"""
     
-    created_count = 0
+    print("\n📄 СОЗДАНИЕ ШАБЛОНОВ ЭНДПОИНТОВ")
+    print("=" * 40)
     
-    for category, endpoints in categories.items():
-        for endpoint in endpoints:
-            method = endpoint['method']
-            path = endpoint['path']
-            summary = endpoint['summary']
-            
-            # Create filename
-            endpoint_filename = f"{method.lower()}_{path.replace('/', '_').replace('{', '').replace('}', '').replace('__', '_').strip('_')}.md"
-            endpoint_path = f"docs/endpoints/{category}/{endpoint_filename}"
-            
-            # Fill template
-            filled_template = template.format(
-                method=method,
-                method_lower=method.lower(),
-                path=path,
-                summary=summary
-            )
-            
-            # Save endpoint documentation
-            with open(endpoint_path, 'w', encoding='utf-8') as f:
-                f.write(filled_template)
-            
-            created_count += 1
-    
-    print(f"✅ Создано {created_count} шаблонов эндпоинтов")
+    jobs = [
+        RenderJob(
+            f"docs/endpoints/{category}/{endpoint_filename(endpoint['method'], endpoint['path'])}",
+            render_endpoint_template,
+            (endpoint['method'], endpoint['path'], endpoint['summary'])
+        )
+        for category, endpoints in categories.items()
+        for endpoint in endpoints
+    ]
+    
+    stats = (pipeline or RenderPipeline()).run(jobs)
+    print_stats(stats, "Шаблоны эндпоинтов")
+    print(f"✅ Создано {stats.rendered} шаблонов эндпоинтов")
+    
+    return stats
 
 def save_processed_data(categories, total_endpoints):
     """Save processed data for future use"""
@@ -484,9 +497,10 @@ def main():
     create_directory_structure(categories)
     
     # Generate documentation
+    pipeline = RenderPipeline()
     generate_main_readme(categories, total_endpoints)
-    generate_category_readmes(categories)
-    generate_endpoint_templates(categories)
+    generate_category_readmes(categories, pipeline)
+    generate_endpoint_templates(categories, pipeline)
     
     # Save processed data
     save_processed_data(categories, total_endpoints)
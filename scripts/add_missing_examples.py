@@ -6,17 +6,20 @@ documentation files that are missing them.
 
 import os
 import re
-import json
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent / 'core'))
+
+from encyclopedia_index import EncyclopediaIndex
+
 ENCYCLOPEDIA_PATH = Path("/home/ubuntu/binom-api-encyclopedia/encyclopedia.json")
 ENDPOINTS_DOCS_PATH = Path("/home/ubuntu/binom-api-encyclopedia/docs/endpoints")
 
 def get_endpoint_details():
-    """Loads endpoint details (method) from the encyclopedia."""
-    with open(ENCYCLOPEDIA_PATH, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return {endpoint: details.get("method", "GET") for endpoint, details in data["endpoints"].items()}
+    """Loads endpoint details (method) from the encyclopedia index without decoding records."""
+    index = EncyclopediaIndex(ENCYCLOPEDIA_PATH)
+    return {endpoint: method for method, endpoint in index.keys()}
 
 def generate_python_example(endpoint, method):
     """Generates a boilerplate Python code example."""
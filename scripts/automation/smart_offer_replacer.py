@@ -19,6 +19,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'core'))
 
 from binom_api import BinomAPI
+from bulk_executor import BulkCampaignUpdater
 from transform_campaign_data import transform_campaign_for_update
 
 
@@ -198,7 +199,7 @@ def process_tracker(tracker_name, api_key, base_url, old_pattern, new_pattern, o
     print("="*80)
     
     # Создаем API клиент для этого трекера
-    api = BinomAPI(api_key=api_key, base_url=base_url, debug=False)
+    api = BinomAPI(api_key=api_key, base_url=base_url, debug=False, tracker=tracker_name)
     
     # Создаем умный маппинг
     replacement_map = create_smart_mapping(api, old_pattern, new_pattern)
@@ -241,6 +242,8 @@ def process_tracker(tracker_name, api_key, base_url, old_pattern, new_pattern, o
     errors = []
     
     dry_run = options.get('dry_run', True)
+    # Обновления копятся и отправляются пачкой с адаптивной параллельностью
+    pending_updates = []
     
     for i, campaign in enumerate(campaigns, 1):
         print(f"\n[{i}/{len(campaigns)}] Кампания ID {campaign['id']}: {campaign['name'][:60]}")
@@ -290,13 +293,10 @@ def process_tracker(tracker_name, api_key, base_url, old_pattern, new_pattern, o
             if dry_run:
                 print(f"  🔍 DRY RUN: Будет заменено {replaced} офферов")
             else:
-                # Обновляем кампанию
                 update_data = transform_campaign_for_update(campaign_data)
-                api.update_campaign(campaign['id'], update_data)
-                print(f"  ✅ Обновлено {replaced} офферов")
-                
-                import time
-                time.sleep(options.get('delay', 0.5))
+                pending_updates.append((campaign, replaced, update_data))
+                print(f"  ⏳ В очереди на обновление: {replaced} офферов")
+                continue
             
             total_replaced += replaced
             results.append({
@@ -310,6 +310,25 @@ def process_tracker(tracker_name, api_key, base_url, old_pattern, new_pattern, o
             print(f"  ❌ Ошибка: {error_msg}")
             errors.append(error_msg)
     
+    if pending_updates:
+        print(f"\n🚀 Обновление {len(pending_updates)} кампаний...")
+        queued = {campaign['id']: (campaign, replaced) for campaign, replaced, _ in pending_updates}
+        updater = BulkCampaignUpdater(api, max_concurrency=options.get('max_concurrency', 8))
+        for outcome in updater.run((campaign['id'], data) for campaign, _, data in pending_updates):
+            campaign, replaced = queued[outcome.campaign_id]
+            if outcome.ok:
+                print(f"  ✅ Кампания {campaign['id']}: обновлено {replaced} офферов")
+                total_replaced += replaced
+                results.append({
+                    'id': campaign['id'],
+                    'name': campaign['name'],
+                    'replaced': replaced
+                })
+            else:
+                error_msg = f"Кампания {campaign['id']}: {outcome.error}"
+                print(f"  ❌ Ошибка: {error_msg}")
+                errors.append(error_msg)
+    
     return {
         'tracker': tracker_name,
         'campaigns_processed': len(results),
@@ -328,7 +347,7 @@ def main():
             'min_clicks': 5000,
             'date_preset': 'last_30_days',
             'dry_run': False,  # PRODUCTION режим
-            'delay': 0.5
+            'max_concurrency': 8
         }
     }
     
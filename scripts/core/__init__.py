@@ -4,11 +4,61 @@ Core utilities for Binom API scripts
 This module provides reusable components for working with Binom API:
 - BinomAPI: Main API client with authentication and request handling
 - transform_campaign_for_update: Data transformation for campaign updates
+- EncyclopediaIndex: Lazy indexed loader for encyclopedia.json
+- EndpointRouter: Path-template trie mapping request URLs to endpoints
+- SearchIndex: BM25 full-text search over endpoints and markdown docs
+- RenderPipeline: Parallel documentation renderer with atomic writes
+- MockBinomServer: Local mock API serving encyclopedia response examples
+- MonitoringStore: Append-only time-series store for endpoint health checks
+- LatencySketch: Mergeable streaming quantile sketch (DDSketch) for latencies
+- ClientMetrics: Prometheus metrics for BinomAPI requests (/metrics or textfile)
+- RequestHook: Per-request tracing hooks with JSONL and sampled logging sinks
+- SingleFlight: Coalescing of identical concurrent calls (used for GETs)
+- BulkCampaignUpdater: Bulk campaign updates with AIMD adaptive concurrency
+- LogExporter: Streaming, resumable clicklog / conversions log export
+- ShardedStatsFetcher: Concurrent day/hour sharded stats with re-aggregation
+- ClosedDayStatsCache: Per-tracker, per-day cache for settled stats
+- WorkflowEngine: Concurrent DAG execution of workflows/*.json
+- StepMemo: Content-addressed on-disk memoization of workflow steps
+- ErrorClassifier: Compiled status x endpoint lookup of typed errors and recovery actions
+- ErrorPatternAggregator: Streaming decayed error statistics that rewrite error_patterns.json
 """
 
 from .binom_api import BinomAPI
+from .error_classifier import (ErrorClassifier, ErrorClassification, BinomAPIError,
+                               TransientError, RateLimitError, ClientError, AuthError, NotFoundError)
 from .transform_campaign_data import transform_campaign_for_update
+from .encyclopedia_index import EncyclopediaIndex
+from .endpoint_router import EndpointRouter, RouteMatch
+from .search_index import SearchIndex, SearchHit
+from .render_pipeline import RenderJob, RenderPipeline
+from .mock_server import MockBinomServer
+from .monitoring_store import MonitoringStore
+from .latency_sketch import LatencySketch
+from .metrics import ClientMetrics, MetricsRegistry
+from .tracing import RequestHook, RequestTrace, JsonlTraceSink, SampledLoggingSink
+from .single_flight import SingleFlight
+from .bulk_executor import AIMDLimiter, BulkCampaignUpdater, BulkResult
+from .log_exporter import LogExporter
+from .rate_limiter import TokenBucket
+from .stats_fetcher import ShardedStatsFetcher, StatsFrame
+from .stats_cache import ClosedDayStatsCache
+from .error_patterns import ErrorPatternAggregator, SpaceSaving
+from .step_memo import StepMemo
+from .workflow_engine import WorkflowEngine, WorkflowRun, load_workflow
 
-__all__ = ['BinomAPI', 'transform_campaign_for_update']
+__all__ = [
+    'BinomAPI', 'transform_campaign_for_update', 'EncyclopediaIndex',
+    'EndpointRouter', 'RouteMatch', 'SearchIndex', 'SearchHit',
+    'RenderJob', 'RenderPipeline', 'MockBinomServer', 'MonitoringStore',
+    'LatencySketch', 'ClientMetrics', 'MetricsRegistry',
+    'RequestHook', 'RequestTrace', 'JsonlTraceSink', 'SampledLoggingSink',
+    'SingleFlight', 'AIMDLimiter', 'BulkCampaignUpdater', 'BulkResult',
+    'LogExporter', 'TokenBucket', 'ShardedStatsFetcher', 'StatsFrame',
+    'ClosedDayStatsCache', 'WorkflowEngine', 'WorkflowRun', 'load_workflow',
+    'StepMemo', 'ErrorClassifier', 'ErrorClassification', 'BinomAPIError',
+    'TransientError', 'RateLimitError', 'ClientError', 'AuthError', 'NotFoundError',
+    'ErrorPatternAggregator', 'SpaceSaving'
+]
 __version__ = '1.0.0'
 
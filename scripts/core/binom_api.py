@@ -5,43 +5,160 @@
 """
 
 import os
+import time
 import requests
 import json
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+try:
+    from .error_classifier import ErrorClassification, default_classifier
+    from .metrics import default_metrics
+    from .single_flight import SingleFlight
+    from .stats_cache import preset_days
+    from .stats_fetcher import merge_shards
+    from .tracing import RequestTrace, enable_debug_logging
+except ImportError:
+    from error_classifier import ErrorClassification, default_classifier
+    from metrics import default_metrics
+    from single_flight import SingleFlight
+    from stats_cache import preset_days
+    from stats_fetcher import merge_shards
+    from tracing import RequestTrace, enable_debug_logging
 
 
 class BinomAPI:
     """Класс для работы с Binom API"""
     
-    def __init__(self, api_key=None, base_url=None, debug=False):
+    # Формат dateFrom/dateTo для datePreset=custom_time
+    DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+    # Строк на страницу при полной загрузке статистики дня
+    STATS_PAGE_SIZE = 1000
+    
+    def __init__(self, api_key=None, base_url=None, debug=False, tracker=None, metrics=None, hooks=None,
+                 coalesce_gets=True, stats_cache=None, error_classifier=None, retry_errors=True):
+        """
+        Args:
+            api_key: API ключ (по умолчанию из binomPublic)
+            base_url: базовый URL API трекера
+            debug: логировать все запросы в stderr (через хук трассировки)
+            tracker: имя трекера для меток метрик (по умолчанию хост base_url)
+            metrics: ClientMetrics; по умолчанию включаются только переменными окружения
+            hooks: хуки трассировки (RequestHook) с before_request/after_request
+            coalesce_gets: одинаковые одновременные GET выполняются одним запросом
+            stats_cache: ClosedDayStatsCache для статистики закрытых дней
+            error_classifier: ErrorClassifier; по умолчанию общий, из error_handling/ и энциклопедии
+            retry_errors: повторять временные ошибки по классификации (429, 5xx, таймауты)
+        """
         self.api_key = api_key or os.getenv('binomPublic')
         if not self.api_key:
             raise ValueError("API ключ не найден")
         
         self.base_url = base_url or "https://pierdun.com/public/api/v1"
         self.debug = debug
+        self.tracker = tracker or urlsplit(self.base_url).hostname or ""
+        self.metrics = metrics if metrics is not None else default_metrics()
+        self.hooks = list(hooks or [])
+        if debug:
+            self.hooks.append(enable_debug_logging())
+        self._single_flight = SingleFlight() if coalesce_gets else None
+        self.stats_cache = stats_cache
+        self._error_classifier = error_classifier
+        self.retry_errors = retry_errors
         self.headers = {
             "api-key": self.api_key,
             "Content-Type": "application/json",
             "Accept": "application/json"
         }
     
+    @property
+    def error_classifier(self):
+        # Компилируется только при первой ошибке
+        if self._error_classifier is None:
+            self._error_classifier = default_classifier()
+        return self._error_classifier
+    
     def _make_request(self, method: str, endpoint: str, params: Optional[Dict] = None, 
-                     data: Optional[Dict] = None) -> Dict:
+                     data: Optional[Dict] = None, retry_errors: Optional[bool] = None) -> Dict:
         """
         Выполнить HTTP запрос к API
         
+        Временные ошибки повторяются по классификации error_classifier, остальные
+        поднимаются как BinomAPIError соответствующего типа (ClientError, AuthError, ...).
+        
         Args:
             method: HTTP метод (GET, POST, PUT, DELETE)
             endpoint: Эндпоинт API (без base_url)
             params: Query параметры
             data: Данные для тела запроса
+            retry_errors: повторять ли временные ошибки в этом вызове (None — как задано в клиенте)
             
         Returns:
             Ответ API в виде словаря
         """
+        retry_errors = self.retry_errors if retry_errors is None else retry_errors
+        if method == "GET" and self._single_flight is not None:
+            # Одинаковые одновременные GET делят один запрос (вместе с повторами); тело
+            # разбирается каждым вызывающим отдельно, так что результаты не разделяют изменяемых объектов
+            key = (endpoint, json.dumps(params, sort_keys=True, default=str), retry_errors)
+            response, shared = self._single_flight.do(
+                key, lambda: self._send_with_retries(method, endpoint, params, data, retry_errors)
+            )
+            if shared and self.metrics is not None:
+                self.metrics.cache_hit("single_flight", self.tracker)
+        else:
+            response = self._send_with_retries(method, endpoint, params, data, retry_errors)
+        
+        return response.json() if response.text else {}
+    
+    def _send_with_retries(self, method: str, endpoint: str, params: Optional[Dict],
+                           data: Optional[Dict], retry_errors: bool = True) -> requests.Response:
+        """Отправить запрос, повторяя временные ошибки; ошибка поднимается как BinomAPIError"""
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                response = self._send(method, endpoint, params, data)
+            except requests.exceptions.RequestException as e:
+                classification = self.error_classifier.classify_exception(method, endpoint, e)
+                message = f"Ошибка запроса: {str(e)}"
+                cause = e
+            else:
+                if response.status_code < 400:
+                    return response
+                classification = self.error_classifier.classify(response.status_code, method, endpoint,
+                                                                 response.text)
+                message = f"API Error {response.status_code}: {response.text}"
+                retry_after = response.headers.get("Retry-After")
+                cause = None
+            
+            if not retry_errors or not self._should_retry(method, endpoint, classification, attempt):
+                raise classification.error(message, attempts=attempt + 1) from cause
+            delay = classification.delay(attempt, retry_after)
+            if self.metrics is not None and classification.kind == "rate_limited":
+                self.metrics.rate_limit_wait(self.tracker, delay)
+            time.sleep(delay)
+            attempt += 1
+    
+    def _should_retry(self, method: str, endpoint: str, classification: ErrorClassification,
+                      attempt: int) -> bool:
+        if not self.retry_errors or not classification.retryable or attempt >= classification.max_retries:
+            return False
+        if self.metrics is not None:
+            self.metrics.retry(method, endpoint, self.tracker, classification.kind)
+        return True
+    
+    def _send(self, method: str, endpoint: str, params: Optional[Dict],
+              data: Optional[Dict]) -> requests.Response:
+        """Отправить запрос, записав метрики и трассу"""
         url = f"{self.base_url}{endpoint}"
+        trace = None
+        if self.hooks:
+            trace = RequestTrace(method, endpoint, url, params, data, self.tracker, time.time())
+            for hook in self.hooks:
+                hook.before_request(trace)
+        started = time.perf_counter()
         
         try:
             response = requests.request(
@@ -52,29 +169,58 @@ class BinomAPI:
                 json=data,
                 timeout=30
             )
-            
-            # Логирование для отладки
-            if self.debug:
-                print(f"\n{'='*80}")
-                print(f"Request: {method} {url}")
-                if params:
-                    print(f"Params: {json.dumps(params, indent=2)}")
-                if data:
-                    print(f"Data: {json.dumps(data, indent=2)}")
-                print(f"Status: {response.status_code}")
-                print(f"Response: {response.text[:500]}")
-                print(f"{'='*80}\n")
-            
-            if response.status_code >= 400:
-                error_msg = f"API Error {response.status_code}: {response.text}"
-                raise Exception(error_msg)
-            
-            return response.json() if response.text else {}
-            
         except requests.exceptions.RequestException as e:
-            raise Exception(f"Ошибка запроса: {str(e)}")
+            total = time.perf_counter() - started
+            if self.metrics is not None:
+                self.metrics.observe_request(method, endpoint, "error", self.tracker, total)
+            if trace is not None:
+                trace.error = f"{type(e).__name__}: {e}"
+                trace.timings = {"total": total}
+                self._run_after_hooks(trace)
+            raise
+        
+        if self.metrics is not None or trace is not None:
+            total = time.perf_counter() - started
+            body = response.request.body if response.request is not None else None
+            bytes_out = len(body) if body else 0
+            bytes_in = len(response.content)
+            if self.metrics is not None:
+                self.metrics.observe_request(method, endpoint, response.status_code, self.tracker,
+                                             total, bytes_out, bytes_in)
+            if trace is not None:
+                # requests не раскрывает DNS/connect/TLS: они входят в ttfb
+                ttfb = min(response.elapsed.total_seconds(), total)
+                trace.status = response.status_code
+                trace.bytes_out = bytes_out
+                trace.bytes_in = bytes_in
+                trace.timings = {"dns": None, "connect": None, "tls": None,
+                                 "ttfb": ttfb, "body": total - ttfb, "total": total}
+                self._run_after_hooks(trace)
+        return response
+    
+    def _run_after_hooks(self, trace: RequestTrace):
+        for hook in self.hooks:
+            hook.after_request(trace)
     
-    def get_offers(self, name: Optional[str] = None, status: str = "all", 
+    def request(self, method: str, endpoint: str, params: Optional[Dict] = None,
+                data: Optional[Dict] = None, retry_errors: Optional[bool] = None) -> Any:
+        """
+        Произвольный запрос к эндпоинту (для шагов workflow и утилит)
+
+        Args:
+            method: HTTP метод
+            endpoint: Эндпоинт API ('/info/campaign')
+            params: Query параметры
+            data: Данные для тела запроса
+            retry_errors: повторять ли временные ошибки (None — как задано в клиенте)
+
+        Returns:
+            Ответ API
+        """
+        return self._make_request(method.upper(), "/" + endpoint.lstrip("/"), params=params, data=data,
+                                  retry_errors=retry_errors)
+
+    def get_offers(self, name: Optional[str] = None, status: str = "all",
                    date_preset: str = "last_30_days", limit: int = 1000) -> List[Dict]:
         """
         Получить список офферов
@@ -140,27 +286,35 @@ class BinomAPI:
         """
         return self._make_request("GET", f"/campaign/{campaign_id}")
     
-    def update_campaign(self, campaign_id: int, campaign_data: Dict) -> Dict:
+    def update_campaign(self, campaign_id: int, campaign_data: Dict,
+                        retry_errors: Optional[bool] = None) -> Dict:
         """
         Обновить кампанию
         
         Args:
             campaign_id: ID кампании
             campaign_data: Данные для обновления
+            retry_errors: повторять ли временные ошибки (None — как задано в клиенте);
+                BulkCampaignUpdater передаёт False и повторяет 429 сам
             
         Returns:
             Результат обновления
         """
-        return self._make_request("PUT", f"/campaign/{campaign_id}", data=campaign_data)
+        return self._make_request("PUT", f"/campaign/{campaign_id}", data=campaign_data,
+                                  retry_errors=retry_errors)
     
     def get_stats_campaigns(self, date_preset: str = "last_30_days", 
-                           limit: int = 1000) -> List[Dict]:
+                           limit: int = 1000, date_from: Optional[datetime] = None,
+                           date_to: Optional[datetime] = None, offset: int = 0) -> List[Dict]:
         """
         Получить статистику по кампаниям
         
         Args:
             date_preset: Временной период
             limit: Максимальное количество записей
+            date_from: Начало произвольного периода (вместо date_preset)
+            date_to: Конец произвольного периода
+            offset: Смещение страницы
             
         Returns:
             Статистика кампаний
@@ -169,13 +323,94 @@ class BinomAPI:
             "datePreset": date_preset,
             "timezone": "UTC",
             "limit": limit,
-            "offset": 0,
+            "offset": offset,
             "sortColumn": "clicks",
             "sortType": "desc"
         }
+        if date_from is not None and date_to is not None:
+            params.update(self._date_range_params(date_from, date_to))
+        elif self.stats_cache is not None:
+            days = preset_days(date_preset)
+            if days:
+                return self._get_stats_campaigns_cached(days, limit)
         
         return self._make_request("GET", "/stats/campaign", params=params)
 
+    
+    def _get_stats_campaigns_cached(self, days: List, limit: int) -> List[Dict]:
+        """Статистика по дням: закрытые дни из кеша, открытые из API"""
+        def fetch_day(day):
+            # День загружается целиком: limit применяется после слияния, иначе
+            # кампании вне top-N отдельного дня выпали бы из суммы за период
+            start = datetime(day.year, day.month, day.day)
+            end = start + timedelta(days=1, seconds=-1)
+            rows: List[Dict] = []
+            while True:
+                page = self.get_stats_campaigns(limit=self.STATS_PAGE_SIZE, date_from=start, date_to=end,
+                                                offset=len(rows))
+                page = page if isinstance(page, list) else []
+                rows.extend(page)
+                if len(page) < self.STATS_PAGE_SIZE:
+                    return rows
+        
+        per_day = self.stats_cache.collect(self.tracker, "stats/campaign", days, fetch_day,
+                                           metrics=self.metrics)
+        rows = merge_shards(per_day.values()).to_rows()
+        rows.sort(key=lambda row: row.get("clicks") or 0, reverse=True)
+        return rows[:limit]
+    
+    def _date_range_params(self, date_from: datetime, date_to: datetime) -> Dict:
+        return {
+            "datePreset": "custom_time",
+            "dateFrom": date_from.strftime(self.DATE_FORMAT),
+            "dateTo": date_to.strftime(self.DATE_FORMAT)
+        }
+    
+    def _log_params(self, date_from: datetime, date_to: datetime, limit: int, offset: int,
+                    timezone: str) -> Dict:
+        return {
+            **self._date_range_params(date_from, date_to),
+            "timezone": timezone,
+            "limit": limit,
+            "offset": offset
+        }
+    
+    def get_clicklog(self, date_from: datetime, date_to: datetime, limit: int = 1000,
+                     offset: int = 0, timezone: str = "UTC") -> List[Dict]:
+        """
+        Получить страницу кликлога за период
+        
+        Args:
+            date_from: Начало периода
+            date_to: Конец периода
+            limit: Размер страницы
+            offset: Смещение
+            timezone: Часовой пояс
+            
+        Returns:
+            Клики
+        """
+        return self._make_request("GET", "/clicklog",
+                                  params=self._log_params(date_from, date_to, limit, offset, timezone))
+    
+    def get_conversions_log(self, date_from: datetime, date_to: datetime, limit: int = 1000,
+                            offset: int = 0, timezone: str = "UTC") -> List[Dict]:
+        """
+        Получить страницу лога конверсий за период
+        
+        Args:
+            date_from: Начало периода
+            date_to: Конец периода
+            limit: Размер страницы
+            offset: Смещение
+            timezone: Часовой пояс
+            
+        Returns:
+            Конверсии
+        """
+        return self._make_request("GET", "/conversions/log",
+                                  params=self._log_params(date_from, date_to, limit, offset, timezone))
+
 
 if __name__ == "__main__":
     # Тест подключения
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Массовое обновление кампаний с адаптивной параллельностью
+
+Вместо последовательных update_campaign с фиксированной паузой обновления
+выполняются параллельно, а предел параллельности подстраивается по AIMD:
+каждый быстрый успешный ответ немного повышает предел, а 429 или рост
+задержки выше целевой сразу уменьшает его вдвое. Обновления одной кампании
+выполняются строго по порядку поступления, результаты отдаются потоком по
+мере готовности.
+
+Использование:
+    updater = BulkCampaignUpdater(api)
+    for result in updater.run([(campaign_id, payload), ...]):
+        print(result.campaign_id, result.status)
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterable, Iterator, Optional, Tuple
+
+
+_STATUS_RE = re.compile(r"API Error (\d{3})")
+
+
+def error_status(error: BaseException) -> Optional[int]:
+    """HTTP статус из исключения BinomAPI (BinomAPIError.status или 'API Error 429: ...')"""
+    status = getattr(error, "status", None)
+    if isinstance(status, int):
+        return status
+    match = _STATUS_RE.search(str(error))
+    return int(match.group(1)) if match else None
+
+
+@dataclass
+class BulkResult:
+    """Результат обновления одной кампании"""
+    campaign_id: Any
+    sequence: int
+    status: str  # 'ok' или 'error'
+    result: Any = None
+    error: Optional[str] = None
+    http_status: Optional[int] = None
+    attempts: int = 1
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+class AIMDLimiter:
+    """Предел параллельности: аддитивный рост, мультипликативное снижение"""
+
+    def __init__(self, initial: float = 2, minimum: float = 1, maximum: float = 16,
+                 increase: float = 1.0, decrease: float = 0.5, latency_target: float = 2.0):
+        """
+        Args:
+            initial: стартовый предел
+            minimum, maximum: границы предела
+            increase: прирост предела за «окно» успешных ответов (≈ +increase за limit ответов)
+            decrease: множитель снижения при перегрузке
+            latency_target: задержка (сек), выше которой ответ считается сигналом перегрузки
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self._limit = float(initial)
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        return max(int(self._limit), int(self.minimum))
+
+    def on_success(self, latency: float):
+        if latency > self.latency_target:
+            self.on_overload()
+            return
+        with self._lock:
+            self._limit = min(self.maximum, self._limit + self.increase / max(self._limit, 1))
+
+    def on_overload(self):
+        with self._lock:
+            now = time.monotonic()
+            # Одна реакция на «волну» перегрузки, а не на каждый ответ из неё
+            if now - self._last_decrease < self.latency_target:
+                return
+            self._last_decrease = now
+            self._limit = max(self.minimum, self._limit * self.decrease)
+
+
+class BulkCampaignUpdater:
+    """
+    Исполнитель массовых update_campaign
+
+    Запросы отправляются с retry_errors=False: повторы делает сам исполнитель,
+    поэтому лимитер видит каждый 429, а не только исчерпавшие повторы клиента.
+    """
+
+    def __init__(self, api, max_concurrency: int = 16, initial_concurrency: int = 2,
+                 latency_target: float = 2.0, max_retries: int = 3, backoff: float = 1.0,
+                 limiter: Optional[AIMDLimiter] = None):
+        """
+        Args:
+            api: экземпляр BinomAPI
+            max_concurrency: верхний предел одновременных запросов
+            initial_concurrency: стартовый предел
+            latency_target: целевая задержка ответа в секундах
+            max_retries: число повторов после 429 и других временных ошибок
+            backoff: базовая пауза перед повтором (удваивается)
+            limiter: свой AIMDLimiter вместо создаваемого по параметрам
+        """
+        self.api = api
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.limiter = limiter or AIMDLimiter(initial=initial_concurrency, maximum=max_concurrency,
+                                              latency_target=latency_target)
+
+    def _update(self, campaign_id, payload, sequence: int) -> BulkResult:
+        metrics = getattr(self.api, "metrics", None)
+        tracker = getattr(self.api, "tracker", "")
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            attempt += 1
+            call_started = time.perf_counter()
+            try:
+                # Повторы делает только исполнитель: каждый 429 доходит до лимитера сразу
+                result = self.api.update_campaign(campaign_id, payload, retry_errors=False)
+            except Exception as e:
+                status = error_status(e)
+                if status == 429 or status is None or status >= 500:
+                    self.limiter.on_overload()
+                # Кроме 429 повторяются временные ошибки, которые BinomAPI повторил бы сам
+                classification = getattr(e, "classification", None)
+                retryable = status == 429 or (classification is not None and classification.retryable)
+                if retryable and attempt <= self.max_retries:
+                    delay = self.backoff * 2 ** (attempt - 1)
+                    if metrics is not None:
+                        reason = "429" if status == 429 else classification.kind
+                        metrics.retry("PUT", f"/campaign/{campaign_id}", tracker, reason)
+                        if status == 429:
+                            metrics.rate_limit_wait(tracker, delay)
+                    time.sleep(delay)
+                    continue
+                return BulkResult(campaign_id, sequence, "error", error=str(e), http_status=status,
+                                  attempts=attempt, duration=time.perf_counter() - started)
+
+            self.limiter.on_success(time.perf_counter() - call_started)
+            return BulkResult(campaign_id, sequence, "ok", result=result, attempts=attempt,
+                              duration=time.perf_counter() - started)
+
+    def run(self, items: Iterable[Tuple[Any, Dict]], lookahead: Optional[int] = None) -> Iterator[BulkResult]:
+        """
+        Выполнить обновления, отдавая результаты по мере готовности
+
+        Args:
+            items: итерируемое (campaign_id, payload); читается лениво
+            lookahead: сколько элементов держать прочитанными наперёд
+
+        Returns:
+            Итератор BulkResult. Для одной кампании результаты идут в порядке items.
+        """
+        lookahead = lookahead or self.max_concurrency * 4
+        source = iter(items)
+        exhausted = False
+        sequence = 0
+        # campaign_id → очередь (sequence, payload); порядок ключей — порядок поступления
+        queues: "OrderedDict[Any, Deque[Tuple[int, Dict]]]" = OrderedDict()
+        queued = 0
+        active = set()
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            while True:
+                while not exhausted and queued < lookahead:
+                    try:
+                        campaign_id, payload = next(source)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    queues.setdefault(campaign_id, deque()).append((sequence, payload))
+                    sequence += 1
+                    queued += 1
+
+                # Кампания с запросом в полёте ждёт: так сохраняется порядок её обновлений
+                for campaign_id in list(queues):
+                    if len(running) >= self.limiter.limit:
+                        break
+                    if campaign_id in active:
+                        continue
+                    item_sequence, payload = queues[campaign_id].popleft()
+                    if not queues[campaign_id]:
+                        del queues[campaign_id]
+                    queued -= 1
+                    active.add(campaign_id)
+                    future = pool.submit(self._update, campaign_id, payload, item_sequence)
+                    running[future] = campaign_id
+
+                if not running:
+                    if exhausted and not queues:
+                        return
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    active.discard(running.pop(future))
+                    yield future.result()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Ленивый индексированный доступ к encyclopedia.json
+
+Вместо полного json.load всего файла строится компактный sidecar-индекс
+(METHOD path → смещение в байтах, категория → эндпоинты, тег → эндпоинты).
+Отдельные записи эндпоинтов декодируются по запросу и кешируются в LRU.
+Индекс автоматически перестраивается при изменении mtime/размера файла.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from json.decoder import scanstring
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+INDEX_VERSION = 1
+DEFAULT_ENCYCLOPEDIA_PATH = Path(__file__).resolve().parent.parent.parent / "encyclopedia.json"
+
+_WHITESPACE = " \t\n\r"
+
+
+def _skip_ws(text: str, pos: int) -> int:
+    while text[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def _iter_object(text: str, pos: int, decoder: json.JSONDecoder):
+    """
+    Пройти по JSON-объекту, начинающемуся с позиции pos
+
+    Yields:
+        (key, value, value_start, value_end) — позиции в символах
+    """
+    pos = _skip_ws(text, pos)
+    if text[pos] != "{":
+        raise ValueError(f"Ожидался JSON-объект в позиции {pos}")
+    pos = _skip_ws(text, pos + 1)
+    if text[pos] == "}":
+        return
+    while True:
+        if text[pos] != '"':
+            raise ValueError(f"Ожидался ключ в позиции {pos}")
+        key, pos = scanstring(text, pos + 1)
+        pos = _skip_ws(text, pos)
+        if text[pos] != ":":
+            raise ValueError(f"Ожидалось ':' в позиции {pos}")
+        start = _skip_ws(text, pos + 1)
+        value, end = decoder.raw_decode(text, start)
+        yield key, value, start, end
+        pos = _skip_ws(text, end)
+        if text[pos] == "}":
+            return
+        if text[pos] != ",":
+            raise ValueError(f"Ожидалось ',' в позиции {pos}")
+        pos = _skip_ws(text, pos + 1)
+
+
+class _ByteOffsets:
+    """Инкрементальный перевод позиций символов в смещения байтов UTF-8"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.char_pos = 0
+        self.byte_pos = 0
+
+    def __call__(self, char_pos: int) -> int:
+        if char_pos < self.char_pos:
+            return len(self.text[:char_pos].encode("utf-8"))
+        self.byte_pos += len(self.text[self.char_pos:char_pos].encode("utf-8"))
+        self.char_pos = char_pos
+        return self.byte_pos
+
+
+def build_index(source_path) -> Dict:
+    """
+    Построить индекс для файла энциклопедии
+
+    Args:
+        source_path: путь к encyclopedia.json
+
+    Returns:
+        Словарь индекса (сериализуется в sidecar-файл)
+    """
+    source_path = Path(source_path)
+    stat = source_path.stat()
+    raw = source_path.read_bytes()
+    text = raw.decode("utf-8")
+    to_bytes = _ByteOffsets(text)
+    decoder = json.JSONDecoder()
+
+    sections = {}
+    endpoints = {}
+    categories = {}
+    tags = {}
+
+    for key, value, start, end in _iter_object(text, 0, decoder):
+        if key != "endpoints":
+            b_start = to_bytes(start)
+            sections[key] = [b_start, to_bytes(end) - b_start]
+            continue
+
+        for path, record, r_start, r_end in _iter_object(text, start, decoder):
+            method = str(record.get("method", "GET")).upper()
+            b_start = to_bytes(r_start)
+            endpoint_key = f"{method} {path}"
+            endpoints[endpoint_key] = [b_start, to_bytes(r_end) - b_start]
+
+            category = record.get("category")
+            if category:
+                categories.setdefault(category, []).append(endpoint_key)
+            for tag in record.get("tags") or []:
+                tags.setdefault(tag, []).append(endpoint_key)
+
+    return {
+        "version": INDEX_VERSION,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_size": stat.st_size,
+        "sections": sections,
+        "endpoints": endpoints,
+        "categories": categories,
+        "tags": tags,
+    }
+
+
+def split_key(endpoint_key: str) -> Tuple[str, str]:
+    """Разбить ключ 'METHOD /path' на (method, path)"""
+    method, _, path = endpoint_key.partition(" ")
+    return method, path
+
+
+class EncyclopediaIndex:
+    """Индексированный ленивый загрузчик encyclopedia.json"""
+
+    def __init__(self, source_path=None, index_path=None, cache_size: int = 128):
+        """
+        Args:
+            source_path: путь к encyclopedia.json (по умолчанию — корень репозитория)
+            index_path: путь к sidecar-индексу (по умолчанию <source>.idx.json рядом)
+            cache_size: размер LRU-кеша декодированных записей
+        """
+        self.source_path = Path(source_path or DEFAULT_ENCYCLOPEDIA_PATH)
+        self.index_path = Path(index_path or self.source_path.with_suffix(".idx.json"))
+        self.cache_size = cache_size
+
+        self._lock = threading.RLock()
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._index: Dict = {}
+        self._paths: Dict[str, List[str]] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Загрузка и инвалидация
+    # ------------------------------------------------------------------
+
+    def _is_stale(self, index: Dict) -> bool:
+        try:
+            stat = self.source_path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Файл энциклопедии не найден: {self.source_path}")
+        return (
+            index.get("version") != INDEX_VERSION
+            or index.get("source_mtime_ns") != stat.st_mtime_ns
+            or index.get("source_size") != stat.st_size
+        )
+
+    def _load(self):
+        index = None
+        if self.index_path.exists():
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                index = None
+
+        if index is None or self._is_stale(index):
+            index = self.rebuild()
+        else:
+            self._set_index(index)
+
+    def _set_index(self, index: Dict):
+        paths: Dict[str, List[str]] = {}
+        for endpoint_key in index["endpoints"]:
+            method, path = split_key(endpoint_key)
+            paths.setdefault(path, []).append(method)
+        self._index = index
+        self._paths = paths
+        self._cache.clear()
+
+    def rebuild(self) -> Dict:
+        """Принудительно перестроить индекс и записать sidecar-файл"""
+        with self._lock:
+            index = build_index(self.source_path)
+            tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(index, f, separators=(",", ":"), ensure_ascii=False)
+                os.replace(tmp_path, self.index_path)
+            except OSError:
+                # Каталог может быть только для чтения — работаем с индексом в памяти
+                pass
+            self._set_index(index)
+            return index
+
+    def refresh(self) -> bool:
+        """
+        Проверить mtime источника и перестроить индекс при необходимости
+
+        Returns:
+            True, если индекс был перестроен
+        """
+        with self._lock:
+            if self._is_stale(self._index):
+                self.rebuild()
+                return True
+            return False
+
+    # ------------------------------------------------------------------
+    # Доступ к данным
+    # ------------------------------------------------------------------
+
+    def _read_raw(self, span: List[int]) -> bytes:
+        offset, length = span
+        with open(self.source_path, "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def _read(self, span: List[int]):
+        return json.loads(self._read_raw(span))
+
+    def _resolve_key(self, path: str, method: Optional[str]) -> Optional[str]:
+        methods = self._paths.get(path)
+        if not methods:
+            return None
+        if method is None:
+            return f"{methods[0]} {path}"
+        method = method.upper()
+        return f"{method} {path}" if method in methods else None
+
+    def get(self, path: str, method: Optional[str] = None) -> Optional[Dict]:
+        """
+        Получить запись эндпоинта
+
+        Args:
+            path: путь эндпоинта (шаблон, например /rotation/{id}/clone)
+            method: HTTP метод; если не указан — первый метод для пути
+
+        Returns:
+            Запись эндпоинта или None
+        """
+        with self._lock:
+            self.refresh()
+            endpoint_key = self._resolve_key(path, method)
+            if endpoint_key is None:
+                return None
+
+            record = self._cache.get(endpoint_key)
+            if record is not None:
+                self._cache.move_to_end(endpoint_key)
+                self.cache_hits += 1
+                return record
+
+            self.cache_misses += 1
+            record = self._read(self._index["endpoints"][endpoint_key])
+            self._cache[endpoint_key] = record
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return record
+
+    def raw(self, path: str, method: Optional[str] = None) -> Optional[bytes]:
+        """
+        Исходные байты записи эндпоинта без декодирования
+
+        Удобно для хеширования записи при инкрементальной генерации документации.
+        """
+        with self._lock:
+            self.refresh()
+            endpoint_key = self._resolve_key(path, method)
+            if endpoint_key is None:
+                return None
+            return self._read_raw(self._index["endpoints"][endpoint_key])
+
+    def section(self, name: str):
+        """Получить секцию верхнего уровня (metadata, categories, ai_instructions...)"""
+        with self._lock:
+            self.refresh()
+            span = self._index["sections"].get(name)
+            return self._read(span) if span else None
+
+    def method_of(self, path: str) -> Optional[str]:
+        """HTTP метод эндпоинта без декодирования записи"""
+        with self._lock:
+            self.refresh()
+            methods = self._paths.get(path)
+            return methods[0] if methods else None
+
+    def keys(self) -> List[Tuple[str, str]]:
+        """Список (method, path) всех эндпоинтов"""
+        with self._lock:
+            self.refresh()
+            return [split_key(k) for k in self._index["endpoints"]]
+
+    def paths(self) -> List[str]:
+        """Список путей всех эндпоинтов"""
+        with self._lock:
+            self.refresh()
+            return list(self._paths)
+
+    def categories(self) -> List[str]:
+        with self._lock:
+            self.refresh()
+            return list(self._index["categories"])
+
+    def tags(self) -> List[str]:
+        with self._lock:
+            self.refresh()
+            return list(self._index["tags"])
+
+    def by_category(self, category: str) -> List[Tuple[str, str]]:
+        """(method, path) эндпоинтов категории"""
+        with self._lock:
+            self.refresh()
+            return [split_key(k) for k in self._index["categories"].get(category, [])]
+
+    def by_tag(self, tag: str) -> List[Tuple[str, str]]:
+        """(method, path) эндпоинтов с тегом"""
+        with self._lock:
+            self.refresh()
+            return [split_key(k) for k in self._index["tags"].get(tag, [])]
+
+    def iter_endpoints(self) -> Iterator[Dict]:
+        """Лениво перебрать все записи эндпоинтов"""
+        for method, path in self.keys():
+            record = self.get(path, method)
+            if record is not None:
+                yield record
+
+    def __contains__(self, path: str) -> bool:
+        with self._lock:
+            return path in self._paths
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._index["endpoints"])
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    source = sys.argv[1] if len(sys.argv) > 1 else None
+    start = time.perf_counter()
+    index = EncyclopediaIndex(source)
+    index.rebuild()
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"✅ Индекс построен: {index.index_path}")
+    print(f"   Эндпоинтов: {len(index)}, категорий: {len(index.categories())}, тегов: {len(index.tags())}")
+    print(f"   Время: {elapsed:.1f} мс")
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Роутер шаблонов путей Binom API
+
+Сопоставляет конкретный URL запроса (например /campaign/82) с шаблоном
+эндпоинта из encyclopedia.json (/campaign/{id}) через скомпилированное
+дерево сегментов. Стоимость поиска — O(число сегментов пути).
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+API_BASE_PATH = "/public/api/v1"
+
+# Сегменты, похожие на идентификаторы (числа, UUID, hex-хеши)
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F-]{27}|[0-9a-fA-F]{16,})$")
+
+
+@dataclass(frozen=True)
+class RouteMatch:
+    """Результат сопоставления URL с шаблоном"""
+    method: str
+    template: str
+    params: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        """Ключ эндпоинта в формате 'METHOD /template'"""
+        return f"{self.method} {self.template}"
+
+
+class _Node:
+    __slots__ = ("static", "param", "routes")
+
+    def __init__(self):
+        self.static: Dict[str, "_Node"] = {}
+        self.param: Optional["_Node"] = None
+        # method -> (template, имена плейсхолдеров по порядку)
+        self.routes: Dict[str, Tuple[str, Tuple[str, ...]]] = {}
+
+
+def _is_placeholder(segment: str) -> bool:
+    return len(segment) > 2 and segment[0] == "{" and segment[-1] == "}"
+
+
+def split_path(path: str) -> List[str]:
+    """Разбить путь на непустые сегменты"""
+    return [segment for segment in path.split("/") if segment]
+
+
+class EndpointRouter:
+    """Дерево сегментов для сопоставления URL с шаблонами эндпоинтов"""
+
+    def __init__(self, routes: Iterable[Tuple[str, str]] = (), base_path: str = API_BASE_PATH):
+        """
+        Args:
+            routes: пары (method, template)
+            base_path: префикс API, отрезаемый от входящих URL
+        """
+        self.base_path = base_path.rstrip("/")
+        self._root = _Node()
+        # Быстрый путь для шаблонов без плейсхолдеров
+        self._static_routes: Dict[str, Dict[str, str]] = {}
+        self._count = 0
+        for method, template in routes:
+            self.add(method, template)
+
+    @classmethod
+    def from_index(cls, index, **kwargs) -> "EndpointRouter":
+        """Построить роутер по EncyclopediaIndex без декодирования записей"""
+        return cls(index.keys(), **kwargs)
+
+    def add(self, method: str, template: str):
+        """Зарегистрировать шаблон эндпоинта"""
+        method = method.upper()
+        segments = split_path(template)
+        normalized = "/" + "/".join(segments)
+        names = []
+        node = self._root
+        for segment in segments:
+            if _is_placeholder(segment):
+                names.append(segment[1:-1])
+                if node.param is None:
+                    node.param = _Node()
+                node = node.param
+            else:
+                node = node.static.setdefault(segment, _Node())
+
+        if method not in node.routes:
+            self._count += 1
+        node.routes[method] = (normalized, tuple(names))
+        if not names:
+            self._static_routes.setdefault(normalized, {})[method] = normalized
+
+    def normalize(self, url: str) -> str:
+        """Отрезать схему, хост, base_path, query и хвостовой слэш"""
+        path = urlsplit(url).path if "://" in url or "?" in url or "#" in url else url
+        if self.base_path and (path == self.base_path or path.startswith(self.base_path + "/")):
+            path = path[len(self.base_path):]
+        return "/" + "/".join(split_path(path))
+
+    def match(self, url: str, method: Optional[str] = None) -> Optional[RouteMatch]:
+        """
+        Найти шаблон для конкретного URL
+
+        Args:
+            url: URL или путь запроса (/campaign/82, https://host/public/api/v1/campaign/82?x=1)
+            method: HTTP метод; если не указан — подходит любой
+
+        Returns:
+            RouteMatch или None
+        """
+        method = method.upper() if method else None
+        path = self.normalize(url)
+
+        static = self._static_routes.get(path)
+        if static:
+            if method is None:
+                found_method = next(iter(static))
+                return RouteMatch(found_method, static[found_method])
+            if method in static:
+                return RouteMatch(method, static[method])
+
+        segments = split_path(path)
+        values: List[str] = []
+        result = self._walk(self._root, segments, 0, values, method)
+        if result is None:
+            return None
+        found_method, (template, names) = result
+        return RouteMatch(found_method, template, dict(zip(names, values)))
+
+    def template_for(self, url: str, method: Optional[str] = None) -> str:
+        """
+        Шаблон пути для URL с запасным вариантом для незадокументированных путей
+
+        Если URL не найден в дереве, сегменты-идентификаторы заменяются на {id},
+        чтобы метки метрик и логов не разрастались по числу ресурсов.
+        """
+        found = self.match(url, method)
+        if found is not None:
+            return found.template
+        segments = split_path(self.normalize(url))
+        return "/" + "/".join("{id}" if _ID_SEGMENT.match(s) else s for s in segments)
+
+    def _walk(self, node: _Node, segments: List[str], position: int,
+              values: List[str], method: Optional[str]):
+        if position == len(segments):
+            if not node.routes:
+                return None
+            if method is None:
+                return next(iter(node.routes.items()))
+            route = node.routes.get(method)
+            return (method, route) if route else None
+
+        segment = segments[position]
+        child = node.static.get(segment)
+        if child is not None:
+            result = self._walk(child, segments, position + 1, values, method)
+            if result is not None:
+                return result
+
+        # Статический сегмент не подошёл — пробуем плейсхолдер
+        if node.param is not None:
+            values.append(segment)
+            result = self._walk(node.param, segments, position + 1, values, method)
+            if result is not None:
+                return result
+            values.pop()
+        return None
+
+    def __len__(self) -> int:
+        return self._count
+
+
+def load_router(source_path=None) -> EndpointRouter:
+    """Построить роутер по encyclopedia.json через sidecar-индекс"""
+    try:
+        from .encyclopedia_index import EncyclopediaIndex
+    except ImportError:
+        from encyclopedia_index import EncyclopediaIndex
+    return EndpointRouter.from_index(EncyclopediaIndex(source_path))
+
+
+if __name__ == "__main__":
+    import sys
+
+    router = load_router()
+    print(f"✅ Роутер скомпилирован: {len(router)} шаблонов")
+    for url in sys.argv[1:]:
+        found = router.match(url)
+        if found:
+            print(f"   {url} → {found.key} {found.params}")
+        else:
+            print(f"   {url} → не найден")
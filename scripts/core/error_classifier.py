@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+"""
+Классификатор ошибок Binom API
+
+Знания об ошибках из error_handling/catalog.json, error_handling/error_patterns.json
+и блоков error_handling энциклопедии компилируются при загрузке в таблицу
+(статус, 'METHOD /template') → ErrorClassification и в одно регулярное
+выражение на статус для уточнения по телу ответа. Классификация ответа —
+сопоставление пути с шаблоном через EndpointRouter, поиск в словаре и один
+проход регулярки по началу тела, без перебора правил.
+
+Классификация задаёт действие:
+    retry — временная ошибка, повторить с паузой (429, 5xx, таймауты);
+    skip  — запрос в таком виде не пройдёт, перейти к следующему (4xx);
+    fail  — проблема конфигурации, продолжать бессмысленно (401/403).
+
+Использование:
+    classifier = ErrorClassifier()
+    error = classifier.classify(502, "GET", "/campaign/82", "Bad Gateway")
+    error.action, error.max_retries, error.delay(0)
+"""
+
+import json
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .endpoint_router import EndpointRouter
+except ImportError:
+    from endpoint_router import EndpointRouter
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+ENCYCLOPEDIA_PATH = REPO_ROOT / "encyclopedia.json"
+CATALOG_PATH = REPO_ROOT / "error_handling" / "catalog.json"
+PATTERNS_PATH = REPO_ROOT / "error_handling" / "error_patterns.json"
+
+RETRY = "retry"
+SKIP = "skip"
+FAIL = "fail"
+
+# Повторы временных ошибок, если каталог не задаёт своих
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF = 1.0
+# Дольше не ждём даже по Retry-After
+MAX_DELAY = 60.0
+# Доля ошибок, начиная с которой известная ошибка эндпоинта не повторяется
+KNOWN_FAILURE_RATE = 0.9
+# Сколько символов тела просматривают регулярки
+BODY_SCAN_LIMIT = 2048
+
+# Статус → вид ошибки
+STATUS_KINDS = {
+    400: "bad_request",
+    401: "auth",
+    403: "auth",
+    404: "not_found",
+    408: "timeout",
+    409: "conflict",
+    422: "validation",
+    429: "rate_limited",
+    500: "server_error",
+    502: "server_error",
+    503: "server_error",
+    504: "timeout",
+}
+
+KIND_ACTIONS = {
+    "rate_limited": RETRY,
+    "server_error": RETRY,
+    "timeout": RETRY,
+    "connect": RETRY,
+    "connection": RETRY,
+    "auth": FAIL,
+    "bad_request": SKIP,
+    "validation": SKIP,
+    "conflict": SKIP,
+    "not_found": SKIP,
+    "client_error": SKIP,
+    "unknown": FAIL,
+}
+
+# Запрос отклонён до обработки — повтор безопасен для любого метода.
+# "connection" сюда не входит: обрыв мог случиться уже после отправки тела.
+_REJECTED_KINDS = ("rate_limited", "connect")
+_IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+_METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+
+# Соединение не установлено — запрос до сервера не дошёл
+_CONNECT_PHASE_ERRORS = ("ConnectTimeout", "ConnectTimeoutError", "NewConnectionError",
+                         "NameResolutionError", "ConnectionRefusedError", "gaierror")
+
+# Уточнение вида по телу ответа: (группа статусов, вид, выражение).
+# Для 4xx применяется только к общим статусам (400 и 4xx вне STATUS_KINDS):
+# вид 401/403/404/429 определяется статусом, а не текстом ошибки.
+BODY_RULES = [
+    ("4xx", "conflict", r"already exists|duplicate|уже существует"),
+    ("4xx", "validation", r"\brequired\b|\bmissing\b|must not be|is not valid|invalid|обязательн"),
+    ("4xx", "bad_request", r"bad request"),
+    ("5xx", "timeout", r"timed? ?out|gateway timeout"),
+]
+
+_STATUS_KEY_RE = re.compile(r"^HTTP (\d{3})$")
+_ATTEMPTS_RE = re.compile(r"(\d+)\s+попыт", re.IGNORECASE)
+_RATE_RE = re.compile(r"([\d.]+)\s*%")
+
+
+class BinomAPIError(Exception):
+    """Ошибка запроса к Binom API с классификацией"""
+
+    def __init__(self, message: str, classification: "ErrorClassification", attempts: int = 1):
+        super().__init__(message)
+        self.classification = classification
+        self.status = classification.status
+        self.attempts = attempts
+
+    @property
+    def action(self) -> str:
+        return self.classification.action
+
+
+class TransientError(BinomAPIError):
+    """Временная ошибка, повторы исчерпаны"""
+
+
+class RateLimitError(TransientError):
+    """429 Too Many Requests"""
+
+
+class ClientError(BinomAPIError):
+    """Ошибка в самом запросе (4xx)"""
+
+
+class AuthError(ClientError):
+    """Неверный ключ или нет прав (401/403)"""
+
+
+class NotFoundError(ClientError):
+    """Эндпоинт или ресурс не найден (404)"""
+
+
+_KIND_ERRORS = {
+    "rate_limited": RateLimitError,
+    "server_error": TransientError,
+    "timeout": TransientError,
+    "connect": TransientError,
+    "connection": TransientError,
+    "auth": AuthError,
+    "not_found": NotFoundError,
+    "bad_request": ClientError,
+    "validation": ClientError,
+    "conflict": ClientError,
+    "client_error": ClientError,
+}
+
+
+@dataclass(frozen=True)
+class ErrorClassification:
+    """Скомпилированная классификация ошибки"""
+    kind: str
+    action: str
+    status: Optional[int] = None
+    endpoint: Optional[str] = None
+    name: str = ""
+    description: str = ""
+    solution: str = ""
+    strategies: Tuple[str, ...] = ()
+    max_retries: int = 0
+    backoff: float = DEFAULT_BACKOFF
+    catalog_key: Optional[str] = None
+    known_error_rate: Optional[float] = None
+
+    @property
+    def retryable(self) -> bool:
+        return self.action == RETRY and self.max_retries > 0
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        Пауза перед повтором
+
+        Args:
+            attempt: номер уже сделанного повтора (0 — перед первым)
+            retry_after: заголовок Retry-After, если сервер его прислал
+
+        Returns:
+            Секунды ожидания
+        """
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), MAX_DELAY)
+            except ValueError:
+                pass
+        return min(self.backoff * 2 ** attempt, MAX_DELAY)
+
+    def error(self, message: str, attempts: int = 1) -> BinomAPIError:
+        """Исключение типа, соответствующего виду ошибки"""
+        return _KIND_ERRORS.get(self.kind, BinomAPIError)(message, self, attempts)
+
+
+def catalog_target(key: str):
+    """Статус (или 'timeout') для ключа каталога: 'HTTP 502' → 502, 'Bad request' → 400"""
+    match = _STATUS_KEY_RE.match(key.strip())
+    if match:
+        return int(match.group(1))
+    lowered = key.lower()
+    if lowered.startswith("bad request"):
+        return 400
+    if "timeout" in lowered:
+        return "timeout"
+    return None
+
+
+def _parse_rate(value) -> Optional[float]:
+    match = _RATE_RE.search(str(value or ""))
+    return float(match.group(1)) / 100 if match else None
+
+
+def _load_json(path) -> Dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def _unknown_key(method: str) -> str:
+    return f"{method} ?"
+
+
+def _status_group(status: Optional[int]) -> Optional[str]:
+    if status is None:
+        return None
+    return f"{status // 100}xx"
+
+
+def _refinable(status: Optional[int]) -> bool:
+    """Можно ли уточнять вид по телу: 5xx и общие 4xx (400 и неизвестные)"""
+    if status is None:
+        return False
+    if 400 <= status < 500:
+        return status == 400 or status not in STATUS_KINDS
+    return status >= 500
+
+
+def _connect_phase(error: BaseException) -> bool:
+    """Ошибка возникла до установки соединения (по цепочке причин и reason urllib3)"""
+    seen = set()
+    pending = [error]
+    while pending:
+        current = pending.pop()
+        if current is None or id(current) in seen or len(seen) > 16:
+            continue
+        seen.add(id(current))
+        if any(cls.__name__ in _CONNECT_PHASE_ERRORS for cls in type(current).__mro__):
+            return True
+        pending.extend([current.__cause__, current.__context__, getattr(current, "reason", None)])
+        pending.extend(arg for arg in getattr(current, "args", ()) if isinstance(arg, BaseException))
+    return False
+
+
+@dataclass
+class _CatalogEntry:
+    key: str
+    name: str
+    description: str
+    strategies: Tuple[str, ...]
+    max_retries: Optional[int] = None
+
+
+class ErrorClassifier:
+    """Таблица классификаций, скомпилированная из каталога ошибок и энциклопедии"""
+
+    def __init__(self, encyclopedia_path=ENCYCLOPEDIA_PATH, catalog_path=CATALOG_PATH,
+                 patterns_path=PATTERNS_PATH, backoff: float = DEFAULT_BACKOFF,
+                 router: Optional[EndpointRouter] = None):
+        """
+        Args:
+            encyclopedia_path: encyclopedia.json (шаблоны и error_handling.common_errors)
+            catalog_path: error_handling/catalog.json (описания и recovery_strategies)
+            patterns_path: error_handling/error_patterns.json (частые ошибки эндпоинтов)
+            backoff: базовая пауза экспоненциальных повторов в секундах
+            router: готовый EndpointRouter вместо построенного по энциклопедии
+        """
+        self.backoff = backoff
+        endpoints = _load_json(encyclopedia_path).get("endpoints", {})
+        records = [r for r in endpoints.values() if isinstance(r, dict) and r.get("path")]
+        self.router = router or EndpointRouter(
+            (r.get("method", "GET"), r["path"]) for r in records
+        )
+        self._catalog = self._compile_catalog(_load_json(catalog_path))
+        self._patterns = self._compile_patterns(_load_json(patterns_path))
+        self._body_rules = self._compile_body_rules()
+        self._table: Dict[Tuple, ErrorClassification] = {}
+        self._compile_table(records)
+
+    def _compile_catalog(self, catalog: Dict) -> Dict:
+        """Записи каталога по статусу (или 'timeout')"""
+        compiled = {}
+        for key, entry in catalog.items():
+            target = catalog_target(key)
+            if target is None or not isinstance(entry, dict):
+                continue
+            strategies = entry.get("recovery_strategies") or []
+            max_retries = None
+            for strategy in strategies:
+                match = _ATTEMPTS_RE.search(strategy.get("details", ""))
+                if match:
+                    max_retries = int(match.group(1))
+                    break
+            compiled[target] = _CatalogEntry(
+                key=key,
+                name=entry.get("name", key),
+                description=entry.get("description", ""),
+                strategies=tuple(s.get("strategy", "") for s in strategies if s.get("strategy")),
+                max_retries=max_retries,
+            )
+        return compiled
+
+    @staticmethod
+    def _compile_patterns(patterns: Dict) -> Dict[Tuple, float]:
+        """(статус, 'METHOD /template') → доля ошибок для самых частых ошибок эндпоинтов"""
+        compiled = {}
+        for endpoint, pattern in patterns.items():
+            if not isinstance(pattern, dict) or " " not in endpoint:
+                continue
+            method, path = endpoint.split(" ", 1)
+            target = catalog_target(pattern.get("most_common_error", ""))
+            rate = _parse_rate(pattern.get("error_rate"))
+            if target is not None and rate is not None:
+                compiled[(target, f"{method.upper()} {path}")] = rate
+        return compiled
+
+    @staticmethod
+    def _compile_body_rules() -> Dict[str, re.Pattern]:
+        """Одно выражение на группу статусов; вид берётся из имени сработавшей группы"""
+        grouped: Dict[str, List[str]] = {}
+        for group, kind, pattern in BODY_RULES:
+            grouped.setdefault(group, []).append(f"(?P<{kind}>{pattern})")
+        return {group: re.compile("|".join(parts), re.IGNORECASE) for group, parts in grouped.items()}
+
+    def _statuses(self, records: List[Dict]) -> List[int]:
+        statuses = set(STATUS_KINDS)
+        statuses.update(t for t in self._catalog if isinstance(t, int))
+        for record in records:
+            common = (record.get("error_handling") or {}).get("common_errors") or {}
+            statuses.update(int(s) for s in common if str(s).isdigit())
+        return sorted(statuses)
+
+    def _compile_table(self, records: List[Dict]):
+        statuses = self._statuses(records)
+        body_kinds = {}
+        for group, kind, _ in BODY_RULES:
+            body_kinds.setdefault(group, []).append(kind)
+
+        # Незадокументированные пути получают общие записи по методу
+        endpoints: List[Tuple[str, Optional[str], str, Dict]] = [
+            (_unknown_key(method), None, method, {}) for method in _METHODS
+        ]
+        for record in records:
+            method = record.get("method", "GET").upper()
+            endpoint = f"{method} /{record['path'].strip('/')}"
+            common = (record.get("error_handling") or {}).get("common_errors") or {}
+            endpoints.append((endpoint, endpoint, method, common))
+
+        for key, endpoint, method, common in endpoints:
+            for status in statuses:
+                documented = common.get(str(status)) or {}
+                refined = body_kinds.get(_status_group(status), []) if _refinable(status) else []
+                for kind in [None] + refined:
+                    self._table[(status, key, kind)] = self._build(
+                        status, kind or self._kind(status), endpoint, method, documented
+                    )
+            for kind in ("timeout", "connect", "connection"):
+                self._table[(None, key, kind)] = self._build(None, kind, endpoint, method, {})
+
+    @staticmethod
+    def _kind(status: int) -> str:
+        kind = STATUS_KINDS.get(status)
+        if kind:
+            return kind
+        if 400 <= status < 500:
+            return "client_error"
+        if status >= 500:
+            return "server_error"
+        return "unknown"
+
+    def _build(self, status: Optional[int], kind: str, endpoint: Optional[str], method: str,
+               documented: Dict) -> ErrorClassification:
+        entry = self._catalog.get(status) or (self._catalog.get("timeout") if kind == "timeout" else None)
+        if entry is None and kind == "server_error":
+            entry = next((e for t, e in self._catalog.items() if isinstance(t, int) and t >= 500), None)
+
+        action = KIND_ACTIONS.get(kind, FAIL)
+        max_retries = 0
+        if action == RETRY:
+            if method not in _IDEMPOTENT_METHODS and kind not in _REJECTED_KINDS:
+                # Запрос мог быть выполнен — повтор создал бы дубликат
+                action = SKIP
+            else:
+                max_retries = entry.max_retries if entry and entry.max_retries is not None \
+                    else DEFAULT_MAX_RETRIES
+
+        known_rate = None
+        if endpoint is not None:
+            known_rate = self._patterns.get((status, endpoint))
+            if known_rate is None and kind == "timeout":
+                known_rate = self._patterns.get(("timeout", endpoint))
+            if known_rate is not None and known_rate >= KNOWN_FAILURE_RATE and action == RETRY:
+                # Эндпоинт стабильно падает с этой ошибкой — повторы только тратят время
+                action, max_retries = SKIP, 0
+
+        return ErrorClassification(
+            kind=kind,
+            action=action,
+            status=status,
+            endpoint=endpoint,
+            name=entry.name if entry else documented.get("description", "").split(" - ")[0] or kind,
+            description=entry.description if entry else documented.get("description", ""),
+            solution=documented.get("solution", ""),
+            strategies=entry.strategies if entry else (),
+            max_retries=max_retries,
+            backoff=self.backoff,
+            catalog_key=entry.key if entry else None,
+            known_error_rate=known_rate,
+        )
+
+    def endpoint_key(self, method: str, path: str) -> Optional[str]:
+        """'METHOD /template' для пути запроса или None, если путь не задокументирован"""
+        found = self.router.match(path, method)
+        return found.key if found else None
+
+    def _lookup(self, status: Optional[int], method: str, endpoint: Optional[str],
+                kind: Optional[str]) -> ErrorClassification:
+        classification = self._table.get((status, endpoint or _unknown_key(method), kind))
+        if classification is None:
+            # Статус вне таблицы (например 418): вид по классу статуса
+            classification = self._build(status, kind or self._kind(status or 0), endpoint, method, {})
+        return classification
+
+    def classify(self, status: int, method: str, path: str, body: str = "") -> ErrorClassification:
+        """
+        Классифицировать ответ с ошибкой
+
+        Args:
+            status: HTTP статус
+            method: HTTP метод запроса
+            path: путь или URL запроса (/campaign/82)
+            body: тело ответа
+
+        Returns:
+            ErrorClassification
+        """
+        method = method.upper()
+        kind = None
+        rule = self._body_rules.get(_status_group(status)) if _refinable(status) else None
+        if rule is not None and body:
+            match = rule.search(body[:BODY_SCAN_LIMIT])
+            if match:
+                kind = match.lastgroup
+        return self._lookup(status, method, self.endpoint_key(method, path), kind)
+
+    def classify_exception(self, method: str, path: str, error: BaseException) -> ErrorClassification:
+        """
+        Классифицировать сетевую ошибку
+
+        Ошибки установки соединения (connect) повторяются для любого метода,
+        таймауты чтения и обрывы после отправки (timeout, connection) — только
+        для идемпотентных: POST мог уже создать сущность.
+        """
+        method = method.upper()
+        if _connect_phase(error):
+            kind = "connect"
+        elif "timeout" in type(error).__name__.lower():
+            kind = "timeout"
+        else:
+            kind = "connection"
+        return self._lookup(None, method, self.endpoint_key(method, path), kind)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_classifier() -> ErrorClassifier:
+    """Общий классификатор по файлам репозитория (компилируется при первой ошибке)"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ErrorClassifier()
+        return _default
+
+
+if __name__ == "__main__":
+    import sys
+
+    classifier = ErrorClassifier()
+    print(f"✅ Классификатор скомпилирован: {len(classifier)} записей")
+    if len(sys.argv) >= 4:
+        status, method, path = int(sys.argv[1]), sys.argv[2], sys.argv[3]
+        result = classifier.classify(status, method, path, " ".join(sys.argv[4:]))
+        print(f"   {result.endpoint or path}: {result.kind} → {result.action} "
+              f"(повторов: {result.max_retries})")
+        for strategy in result.strategies:
+            print(f"   • {strategy}")
+        if result.solution:
+            print(f"   Решение: {result.solution}")
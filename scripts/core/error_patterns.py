@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Потоковая агрегация шаблонов ошибок из трасс запросов
+
+Трассы JsonlTraceSink (или строки SampledLoggingSink) читаются построчно,
+запросы группируются по 'METHOD /template'. Для каждого эндпоинта хранятся
+экспоненциально затухающие счётчики запросов и ошибок и top-k сообщений
+об ошибках (space-saving): не больше top_k счётчиков на эндпоинт и не
+больше max_endpoints эндпоинтов, поэтому память не зависит от размера логов.
+
+Затухание прямое (forward decay): событие в момент t добавляет вес
+2^((t - landmark) / half_life), а при чтении всё делится на вес текущего
+момента. Добавление — O(1) без пересчёта остальных счётчиков; при большом
+показателе landmark сдвигается и все счётчики один раз масштабируются.
+
+Строки выборочных приёмников несут sample_rate — вероятность, с которой
+запись попала в трассу (ошибки пишутся всегда, успешные запросы — по выборке).
+Каждая запись учитывается с весом 1/sample_rate, иначе при выборке 1%
+успешных запросов доля ошибок завышалась бы в десятки раз. Записи без
+sample_rate считаются полными (вес 1), записи с некорректным — пропускаются.
+
+Результат периодически перезаписывается в error_handling/error_patterns.json
+в прежнем формате (most_common_error, frequency, error_rate), так что его
+читает ErrorClassifier, плюс подробности: затухающие счётчики и top-k.
+
+Использование:
+    python scripts/core/error_patterns.py traces.jsonl --half-life-hours 24
+    python scripts/core/error_patterns.py traces.jsonl --follow --flush-seconds 60
+
+    api = BinomAPI(hooks=[ErrorPatternAggregator(flush_seconds=300)])
+"""
+
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .error_classifier import CATALOG_PATH, catalog_target
+    from .tracing import RequestHook, RequestTrace
+except ImportError:
+    from error_classifier import CATALOG_PATH, catalog_target
+    from tracing import RequestHook, RequestTrace
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_OUTPUT = REPO_ROOT / "error_handling" / "error_patterns.json"
+
+DEFAULT_HALF_LIFE = 24 * 3600.0
+DEFAULT_TOP_K = 5
+DEFAULT_MAX_ENDPOINTS = 2000
+# Показатель веса, после которого landmark сдвигается (2^512 далеко от переполнения float)
+RESCALE_EXPONENT = 512.0
+MESSAGE_LIMIT = 200
+# Сколько шаблонов путей кешировать (кеш сбрасывается при заполнении)
+TEMPLATE_CACHE_SIZE = 4096
+
+# Строка SampledLoggingSink: '... GET /campaign/82 -> 502 total=12.0ms out=0B in=10B rate=1'
+_LOG_LINE_RE = re.compile(
+    r"^(?:(?P<time>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\S*\s.*?)?"
+    r"(?P<method>GET|POST|PUT|PATCH|DELETE|HEAD) (?P<endpoint>/\S*) -> (?P<result>.+?)"
+    r"(?: \w+=[\d.]+ms)* out=\d+B(?: in=\d+B)?(?: rate=(?P<rate>\S+))?"
+)
+_NUMBER_RE = re.compile(r"\d+")
+# Числовые ID в пути: /campaign/82 и /campaign/83 делят одну запись кеша шаблонов
+_ID_SEGMENT_RE = re.compile(r"/\d+(?=/|$|\?)")
+
+
+def _sample_rate(value) -> Optional[float]:
+    """sample_rate записи (по умолчанию 1) или None, если значение некорректно"""
+    if value is None:
+        return 1.0
+    try:
+        rate = float(value)
+    except (TypeError, ValueError):
+        return None
+    return rate if 0 < rate <= 1 else None
+
+
+def _default_error_keys() -> Dict[Any, str]:
+    """Имена ошибок из каталога: {400: 'Bad request', 'timeout': 'Request timeout (30s)', ...}"""
+    try:
+        with open(CATALOG_PATH, "r", encoding="utf-8") as f:
+            catalog = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    keys = {}
+    for key in catalog:
+        target = catalog_target(key)
+        if target is not None:
+            keys.setdefault(target, key)
+    return keys
+
+
+class SpaceSaving:
+    """
+    Top-k тяжёлых элементов (Metwally et al.) со взвешенными добавлениями
+
+    Хранит не больше k счётчиков. Новый элемент при заполненной таблице
+    вытесняет минимальный и наследует его счёт как погрешность, поэтому
+    count - error ≤ истинный вес ≤ count.
+    """
+
+    __slots__ = ("k", "counts")
+
+    def __init__(self, k: int):
+        self.k = k
+        # элемент -> [count, error]
+        self.counts: Dict[str, List[float]] = {}
+
+    def add(self, item: str, weight: float = 1.0):
+        entry = self.counts.get(item)
+        if entry is not None:
+            entry[0] += weight
+            return
+        if len(self.counts) < self.k:
+            self.counts[item] = [weight, 0.0]
+            return
+        # k небольшое — линейный поиск минимума дешевле поддержки кучи
+        victim = min(self.counts, key=lambda key: self.counts[key][0])
+        floor = self.counts.pop(victim)[0]
+        self.counts[item] = [floor + weight, floor]
+
+    def scale(self, factor: float):
+        for entry in self.counts.values():
+            entry[0] *= factor
+            entry[1] *= factor
+
+    def top(self) -> List[Tuple[str, float, float]]:
+        """(элемент, count, error) по убыванию count"""
+        return sorted(((item, c, e) for item, (c, e) in self.counts.items()),
+                      key=lambda row: (-row[1], row[0]))
+
+
+class _EndpointStats:
+    __slots__ = ("requests", "errors", "total_requests", "total_errors", "messages", "last_seen")
+
+    def __init__(self, top_k: int):
+        self.requests = 0.0
+        self.errors = 0.0
+        self.total_requests = 0.0
+        self.total_errors = 0.0
+        self.messages = SpaceSaving(top_k)
+        self.last_seen = 0.0
+
+    def scale(self, factor: float):
+        self.requests *= factor
+        self.errors *= factor
+        self.messages.scale(factor)
+
+
+class ErrorPatternAggregator(RequestHook):
+    """Затухающая статистика ошибок по эндпоинтам с периодической записью в JSON"""
+
+    def __init__(self, output_path=DEFAULT_OUTPUT, half_life: float = DEFAULT_HALF_LIFE,
+                 top_k: int = DEFAULT_TOP_K, max_endpoints: int = DEFAULT_MAX_ENDPOINTS,
+                 flush_seconds: Optional[float] = None, router=None,
+                 error_keys: Optional[Dict[Any, str]] = None):
+        """
+        Args:
+            output_path: куда писать error_patterns.json (None — не писать)
+            half_life: период полураспада счётчиков в секундах
+            top_k: сколько сообщений об ошибках хранить на эндпоинт
+            max_endpoints: сколько эндпоинтов хранить (вытесняются самые редкие)
+            flush_seconds: как часто перезаписывать output_path при потоковой подаче
+            router: EndpointRouter для шаблонов путей (по умолчанию из encyclopedia.json, лениво)
+            error_keys: имена ошибок по статусу/'timeout' (по умолчанию из catalog.json)
+        """
+        if half_life <= 0:
+            raise ValueError("half_life должен быть положительным")
+        self.output_path = Path(output_path) if output_path is not None else None
+        self.half_life = half_life
+        self.top_k = top_k
+        self.max_endpoints = max_endpoints
+        self.flush_seconds = flush_seconds
+        self.error_keys = _default_error_keys() if error_keys is None else error_keys
+        self.records = 0
+        self.skipped = 0
+        self._router = router
+        self._templates: Dict[Tuple[str, str], str] = {}
+        self._stats: Dict[str, _EndpointStats] = {}
+        self._landmark: Optional[float] = None
+        self._latest = 0.0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def router(self):
+        if self._router is None:
+            try:
+                from .endpoint_router import EndpointRouter, load_router
+            except ImportError:
+                from endpoint_router import EndpointRouter, load_router
+            try:
+                self._router = load_router()
+            except (OSError, ValueError):
+                # Без энциклопедии остаётся замена ID-сегментов на {id}
+                self._router = EndpointRouter()
+        return self._router
+
+    def endpoint_key(self, method: str, endpoint: str) -> str:
+        """'METHOD /template' для пути запроса (кешируется)"""
+        cache_key = (method, _ID_SEGMENT_RE.sub("/{id}", endpoint))
+        key = self._templates.get(cache_key)
+        if key is None:
+            key = f"{method} {self.router.template_for(cache_key[1], method)}"
+            if len(self._templates) >= TEMPLATE_CACHE_SIZE:
+                self._templates.clear()
+            self._templates[cache_key] = key
+        return key
+
+    def error_key(self, status: Optional[int], error: Optional[str]) -> Optional[str]:
+        """Имя ошибки в терминах каталога ('HTTP 502', 'Bad request') или None для успеха"""
+        if error:
+            kind = error.split(":", 1)[0]
+            if "timeout" in kind.lower():
+                return self.error_keys.get("timeout", "Request timeout")
+            return _NUMBER_RE.sub("N", error)[:MESSAGE_LIMIT]
+        if status is not None and status >= 400:
+            return self.error_keys.get(status, f"HTTP {status}")
+        return None
+
+    def _weight(self, timestamp: float) -> float:
+        if self._landmark is None:
+            self._landmark = timestamp
+        exponent = (timestamp - self._landmark) / self.half_life
+        if exponent > RESCALE_EXPONENT:
+            factor = 2.0 ** -exponent
+            for stats in self._stats.values():
+                stats.scale(factor)
+            self._landmark = timestamp
+            exponent = 0.0
+        return 2.0 ** exponent
+
+    def _endpoint_stats(self, key: str) -> _EndpointStats:
+        stats = self._stats.get(key)
+        if stats is None:
+            if len(self._stats) >= self.max_endpoints:
+                rarest = min(self._stats, key=lambda k: self._stats[k].requests)
+                del self._stats[rarest]
+            stats = self._stats[key] = _EndpointStats(self.top_k)
+        return stats
+
+    def add(self, method: str, endpoint: str, status: Optional[int] = None, error: Optional[str] = None,
+            timestamp: Optional[float] = None, sample_rate: float = 1.0):
+        """
+        Учесть один запрос
+
+        Args:
+            method: HTTP метод
+            endpoint: путь запроса (/campaign/82) — приводится к шаблону
+            status: HTTP статус ответа
+            error: ошибка транспорта ('ReadTimeout: ...'), если ответа не было
+            timestamp: время запроса (epoch); по умолчанию текущее
+            sample_rate: вероятность, с которой запись попала в выборку (вес записи — 1/sample_rate)
+        """
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate должен быть в интервале (0, 1]")
+        method = method.upper()
+        key = self.endpoint_key(method, endpoint)
+        message = self.error_key(status, error)
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            weight = self._weight(timestamp) / sample_rate
+            stats = self._endpoint_stats(key)
+            stats.requests += weight
+            stats.total_requests += 1 / sample_rate
+            stats.last_seen = max(stats.last_seen, timestamp)
+            if message is not None:
+                stats.errors += weight
+                stats.total_errors += 1 / sample_rate
+                stats.messages.add(message, weight)
+            self.records += 1
+            self._latest = max(self._latest, timestamp)
+
+    def add_record(self, record: Dict[str, Any]) -> bool:
+        """Учесть запись трассы (RequestTrace.to_dict); False, если запись не похожа на трассу"""
+        method = record.get("method")
+        endpoint = record.get("endpoint")
+        rate = _sample_rate(record.get("sample_rate"))
+        if not method or not endpoint or rate is None:
+            self.skipped += 1
+            return False
+        self.add(method, endpoint, record.get("status"), record.get("error"), record.get("started_at"), rate)
+        return True
+
+    def add_line(self, line: str) -> bool:
+        """Учесть строку JSONL-трассы или лога SampledLoggingSink"""
+        line = line.strip()
+        if not line:
+            return False
+        if line.startswith("{"):
+            try:
+                return self.add_record(json.loads(line))
+            except (json.JSONDecodeError, AttributeError):
+                self.skipped += 1
+                return False
+        match = _LOG_LINE_RE.search(line)
+        rate = _sample_rate(match.group("rate")) if match is not None else None
+        if rate is None:
+            self.skipped += 1
+            return False
+        result = match.group("result")
+        status = int(result) if result.isdigit() else None
+        timestamp = None
+        if match.group("time"):
+            timestamp = datetime.strptime(match.group("time"), "%Y-%m-%d %H:%M:%S").timestamp()
+        self.add(match.group("method"), match.group("endpoint"), status,
+                 None if status is not None or result == "None" else result, timestamp, rate)
+        return True
+
+    def consume(self, lines: Iterable[str]) -> int:
+        """Учесть поток строк, перезаписывая результат раз в flush_seconds; возвращает число записей"""
+        counted = 0
+        for line in lines:
+            counted += self.add_line(line)
+            self._maybe_flush()
+        return counted
+
+    def consume_file(self, path, follow: bool = False, poll_seconds: float = 1.0,
+                     stop: Optional[threading.Event] = None) -> int:
+        """
+        Учесть файл трасс построчно (.gz читается как gzip)
+
+        Args:
+            path: JSONL-трассы или лог
+            follow: после конца файла ждать новых строк (как tail -f) до stop
+            poll_seconds: пауза между проверками файла в режиме follow
+            stop: событие остановки режима follow
+        """
+        path = Path(path)
+        opener = gzip.open if path.suffix == ".gz" else open
+        counted = 0
+        with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+            counted += self.consume(f)
+            while follow and not (stop is not None and stop.is_set()):
+                line = f.readline()
+                if not line:
+                    self._maybe_flush()
+                    time.sleep(poll_seconds)
+                    continue
+                counted += self.add_line(line)
+        return counted
+
+    def after_request(self, trace: RequestTrace):
+        self.add(trace.method, trace.endpoint, trace.status, trace.error, trace.started_at or None)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if self.flush_seconds is None or self.output_path is None:
+            return
+        if time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.write()
+
+    def patterns(self, now: Optional[float] = None, min_errors: float = 0.0) -> Dict[str, Dict[str, Any]]:
+        """
+        Шаблоны ошибок по эндпоинтам на момент now (по умолчанию — последняя запись)
+
+        Args:
+            now: момент, к которому приводятся затухающие счётчики
+            min_errors: не включать эндпоинты с меньшим затухшим числом ошибок
+        """
+        with self._lock:
+            if self._landmark is None:
+                return {}
+            now = self._latest if now is None else now
+            scale = 2.0 ** -((now - self._landmark) / self.half_life)
+            patterns = {}
+            for key in sorted(self._stats):
+                stats = self._stats[key]
+                errors = stats.errors * scale
+                if stats.total_errors == 0 or errors < min_errors:
+                    continue
+                requests = stats.requests * scale
+                top = [{"error": message, "count": round(count * scale, 3),
+                        "max_overcount": round(error * scale, 3)}
+                       for message, count, error in stats.messages.top()]
+                patterns[key] = {
+                    "most_common_error": top[0]["error"],
+                    "frequency": f"{top[0]['count']:g}/{round(requests, 3):g} times",
+                    "error_rate": f"{100 * errors / requests:.1f}%" if requests else "0.0%",
+                    "decayed_requests": round(requests, 3),
+                    "decayed_errors": round(errors, 3),
+                    "total_requests": round(stats.total_requests),
+                    "total_errors": round(stats.total_errors),
+                    "top_errors": top,
+                    "last_seen": datetime.fromtimestamp(stats.last_seen).isoformat(timespec="seconds"),
+                }
+            return patterns
+
+    def write(self, path=None) -> Path:
+        """Атомарно перезаписать error_patterns.json"""
+        path = Path(path) if path is not None else self.output_path
+        if path is None:
+            raise ValueError("Не задан путь для error_patterns.json")
+        data = json.dumps(self.patterns(), ensure_ascii=False, indent=2)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self._last_flush = time.monotonic()
+        return path
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Шаблоны ошибок Binom API из трасс запросов")
+    parser.add_argument("paths", nargs="+", help="JSONL-трассы (JsonlTraceSink) или логи, можно .gz")
+    parser.add_argument("--out", default=str(DEFAULT_OUTPUT), help="Куда писать error_patterns.json")
+    parser.add_argument("--half-life-hours", type=float, default=DEFAULT_HALF_LIFE / 3600)
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--max-endpoints", type=int, default=DEFAULT_MAX_ENDPOINTS)
+    parser.add_argument("--flush-seconds", type=float, default=60.0, help="Как часто перезаписывать результат")
+    parser.add_argument("--follow", action="store_true", help="Следить за последним файлом (tail -f)")
+    args = parser.parse_args(argv)
+
+    aggregator = ErrorPatternAggregator(args.out, half_life=args.half_life_hours * 3600,
+                                        top_k=args.top_k, max_endpoints=args.max_endpoints,
+                                        flush_seconds=args.flush_seconds)
+    started = time.perf_counter()
+    try:
+        for n, path in enumerate(args.paths):
+            aggregator.consume_file(path, follow=args.follow and n == len(args.paths) - 1)
+    except KeyboardInterrupt:
+        pass
+    aggregator.write()
+    elapsed = time.perf_counter() - started
+    print(f"✅ {aggregator.records} записей ({aggregator.skipped} пропущено), "
+          f"эндпоинтов: {len(aggregator)}, {elapsed:.1f}s → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Песочница для параллельного запуска примеров кода из документации
+
+Python-примеры исполняются в отдельных процессах, порождаемых прогретым
+forkserver'ом (requests уже импортирован), поэтому каждый запуск не платит
+за старт интерпретатора. cURL-примеры запускаются через shell. Базовый URL
+боевого трекера подменяется на mock, API-ключ передаётся через окружение.
+"""
+
+import hashlib
+import io
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+PRODUCTION_BASE_URL = "https://pierdun.com/public/api/v1"
+PRODUCTION_ORIGIN = "https://pierdun.com"
+
+
+@dataclass
+class Snippet:
+    """Уникальный пример кода и все места, где он встречается"""
+    lang: str
+    code: str
+    locations: List[str] = field(default_factory=list)
+
+    @property
+    def digest(self) -> str:
+        return snippet_digest(self.lang, self.code)
+
+
+@dataclass
+class SnippetResult:
+    """Результат запуска примера"""
+    digest: str
+    lang: str
+    passed: bool
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    duration: float
+    timed_out: bool = False
+
+
+def snippet_digest(lang: str, code: str) -> str:
+    """Хеш примера для дедупликации (пробелы по краям строк не учитываются)"""
+    normalized = "\n".join(line.rstrip() for line in code.strip().splitlines())
+    return hashlib.sha256(f"{lang}\0{normalized}".encode("utf-8")).hexdigest()
+
+
+def rewrite_base_url(code: str, base_url: str) -> str:
+    """Направить пример на другой базовый URL (например, mock-сервер)"""
+    if base_url == PRODUCTION_BASE_URL:
+        return code
+    origin = base_url.split("/public/api/v1")[0]
+    return code.replace(PRODUCTION_BASE_URL, base_url).replace(PRODUCTION_ORIGIN, origin)
+
+
+def _exec_python(code: str, env: Dict[str, str], conn):
+    """Выполнить Python-пример в дочернем процессе и вернуть вывод через pipe"""
+    os.environ.update(env)
+    stdout, stderr = io.StringIO(), io.StringIO()
+    returncode = 0
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            exec(compile(code, "<example>", "exec"), {"__name__": "__main__"})
+        except SystemExit as e:
+            if isinstance(e.code, int):
+                returncode = e.code
+            elif e.code is not None:
+                print(e.code, file=sys.stderr)
+                returncode = 1
+        except BaseException:
+            traceback.print_exc()
+            returncode = 1
+    conn.send((returncode, stdout.getvalue(), stderr.getvalue()))
+    conn.close()
+
+
+def _get_context():
+    try:
+        ctx = multiprocessing.get_context("forkserver")
+    except ValueError:
+        # forkserver недоступен (Windows) — используем метод по умолчанию
+        return multiprocessing.get_context()
+    ctx.set_forkserver_preload(["json", "requests", __name__])
+    return ctx
+
+
+class SnippetRunner:
+    """Пул параллельного запуска примеров"""
+
+    def __init__(self, workers: int = 8, timeout: float = 30, env: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            workers: число одновременно исполняемых примеров
+            timeout: таймаут одного примера в секундах
+            env: переменные окружения, внедряемые в пример
+        """
+        self.workers = workers
+        self.timeout = timeout
+        self.env = dict(env or {})
+        self._ctx = _get_context()
+
+    def _run_python(self, snippet: Snippet) -> SnippetResult:
+        started = time.perf_counter()
+        receiver, sender = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(target=_exec_python, args=(snippet.code, self.env, sender))
+        process.start()
+        sender.close()
+
+        payload = None
+        if receiver.poll(self.timeout):
+            try:
+                payload = receiver.recv()
+            except EOFError:
+                payload = None
+        process.join(1 if payload is not None else 0)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        receiver.close()
+        duration = time.perf_counter() - started
+
+        if payload is None:
+            timed_out = duration >= self.timeout
+            message = (f"Test timed out after {self.timeout:g} seconds." if timed_out
+                       else f"Process exited with code {process.exitcode}")
+            return SnippetResult(snippet.digest, snippet.lang, False, process.exitcode,
+                                 "", message, duration, timed_out)
+
+        returncode, stdout, stderr = payload
+        return SnippetResult(snippet.digest, snippet.lang, returncode == 0, returncode,
+                             stdout, stderr, duration)
+
+    def _run_shell(self, snippet: Snippet) -> SnippetResult:
+        started = time.perf_counter()
+        try:
+            result = subprocess.run(
+                snippet.code, shell=True, capture_output=True, text=True,
+                timeout=self.timeout, env={**os.environ, **self.env}
+            )
+            return SnippetResult(snippet.digest, snippet.lang, result.returncode == 0,
+                                 result.returncode, result.stdout, result.stderr,
+                                 time.perf_counter() - started)
+        except subprocess.TimeoutExpired:
+            return SnippetResult(snippet.digest, snippet.lang, False, None, "",
+                                 f"Test timed out after {self.timeout:g} seconds.",
+                                 time.perf_counter() - started, timed_out=True)
+
+    def run(self, snippet: Snippet) -> SnippetResult:
+        """Запустить один пример"""
+        if snippet.lang == "python":
+            return self._run_python(snippet)
+        return self._run_shell(snippet)
+
+    def run_all(self, snippets: Iterable[Snippet]) -> Iterator[SnippetResult]:
+        """Запустить примеры параллельно, отдавая результаты по мере готовности"""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self.run, snippet) for snippet in snippets]
+            for future in as_completed(futures):
+                yield future.result()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Потоковые квантильные скетчи задержек (DDSketch)
+
+Скетч хранит логарифмические корзины с гарантированной относительной
+точностью квантилей (по умолчанию 1%) в ограниченной памяти. Скетчи
+сливаются без потери точности, поэтому их можно считать независимо в
+разных воркерах и временных окнах, а затем объединять.
+"""
+
+import marshal
+import math
+from typing import Dict, Iterable, Optional
+
+
+SKETCH_VERSION = 1
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_MAX_BINS = 2048
+# Значения меньше этого (мс) попадают в нулевую корзину
+MIN_TRACKED_VALUE = 1e-3
+
+
+class LatencySketch:
+    """DDSketch для неотрицательных значений (время ответа в мс)"""
+
+    __slots__ = ("relative_accuracy", "max_bins", "_gamma", "_log_gamma",
+                 "bins", "zero_count", "count", "sum", "min", "max")
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+                 max_bins: int = DEFAULT_MAX_BINS):
+        """
+        Args:
+            relative_accuracy: допустимая относительная ошибка квантиля
+            max_bins: предел числа корзин (младшие корзины схлопываются)
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy должен быть в интервале (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        # Середина корзины (gamma^(k-1), gamma^k] с относительной ошибкой <= alpha
+        return 2 * self._gamma ** key / (1 + self._gamma)
+
+    def add(self, value: float, weight: int = 1):
+        """Добавить наблюдение"""
+        if value < 0:
+            raise ValueError("LatencySketch принимает только неотрицательные значения")
+        if value < MIN_TRACKED_VALUE:
+            self.zero_count += weight
+        else:
+            key = self._key(value)
+            self.bins[key] = self.bins.get(key, 0) + weight
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        self.count += weight
+        self.sum += value * weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def update(self, values: Iterable[float]):
+        for value in values:
+            self.add(value)
+
+    def _collapse(self):
+        # Схлопываем самые младшие корзины: страдают только нижние квантили
+        keys = sorted(self.bins)
+        excess = len(keys) - self.max_bins
+        target = keys[excess]
+        self.bins[target] += sum(self.bins.pop(key) for key in keys[:excess])
+
+    def merge(self, other: "LatencySketch") -> "LatencySketch":
+        """Влить другой скетч с той же точностью (на месте)"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Нельзя сливать скетчи с разной relative_accuracy")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Значение квантиля q (0..1) или None для пустого скетча"""
+        if not 0 <= q <= 1:
+            raise ValueError("q должен быть в интервале [0, 1]")
+        if self.count == 0:
+            return None
+        if q == 0:
+            return self.min
+        if q == 1:
+            return self.max
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if rank < seen:
+                return min(max(self._value(key), self.min), self.max)
+        return self.max
+
+    def quantiles(self, qs=(0.5, 0.95, 0.99)) -> Dict[str, Optional[float]]:
+        """Словарь {'p50': ..., 'p95': ..., 'p99': ...}"""
+        return {f"p{round(q * 100):g}": self.quantile(q) for q in qs}
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def to_bytes(self) -> bytes:
+        """Компактная сериализация для хранения в БД"""
+        return marshal.dumps((
+            SKETCH_VERSION, self.relative_accuracy, self.max_bins, self.bins,
+            self.zero_count, self.count, self.sum, self.min, self.max
+        ))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "LatencySketch":
+        (version, relative_accuracy, max_bins, bins,
+         zero_count, count, total, minimum, maximum) = marshal.loads(data)
+        if version != SKETCH_VERSION:
+            raise ValueError(f"Неподдерживаемая версия скетча: {version}")
+        sketch = cls(relative_accuracy, max_bins)
+        sketch.bins = bins
+        sketch.zero_count = zero_count
+        sketch.count = count
+        sketch.sum = total
+        sketch.min = minimum
+        sketch.max = maximum
+        return sketch
+
+
+def merge_all(sketches: Iterable[LatencySketch], relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY) -> LatencySketch:
+    """Слить набор скетчей в новый"""
+    merged = LatencySketch(relative_accuracy)
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
+
+
+def distribution_shift(recent: LatencySketch, baseline: LatencySketch, min_count: int = 5,
+                       threshold: float = 0.25) -> str:
+    """
+    Сравнить распределения задержек двух окон
+
+    Returns:
+        'degrading', 'improving', 'stable' или 'insufficient_data'
+    """
+    if recent.count < min_count or baseline.count < min_count:
+        return "insufficient_data"
+    ratios = []
+    for q in (0.5, 0.95):
+        before, after = baseline.quantile(q), recent.quantile(q)
+        if not before:
+            return "insufficient_data"
+        ratios.append(after / before)
+    if max(ratios) > 1 + threshold:
+        return "degrading"
+    if max(ratios) < 1 - threshold:
+        return "improving"
+    return "stable"
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Потоковая выгрузка кликлога и лога конверсий
+
+Диапазон дат режется на окна (по умолчанию сутки), окна выгружаются
+параллельно, каждое постранично пишется в свой сжатый файл. В памяти
+одновременно находится не больше страницы на воркер, поэтому месяц кликов
+выгружается без загрузки целиком.
+
+Окно [начало, конец) запрашивается с dateTo = конец - 1 секунда: API считает
+dateTo включительно, а конец окна — начало следующего.
+
+Форматы: jsonl.gz, csv.gz и parquet (если установлен pyarrow). Файлы окон
+лежат в подкаталоге диапазона выгрузки. Курсор (cursor.json в каталоге
+выгрузки) после каждой страницы запоминает offset и размер файла; записи
+курсора разделены по формату и диапазону выгрузки. При перезапуске файл
+обрезается до последней записанной страницы и выгрузка продолжается с неё.
+Parquet продолжается с начала незавершённого окна.
+
+В CSV колонки, впервые появившиеся на поздней странице, расширяют
+заголовок: уже записанная часть файла переписывается с новым заголовком.
+
+Использование:
+    python scripts/core/log_exporter.py clicks --from 2025-09-01 --to 2025-10-01 --out exports
+    python scripts/core/log_exporter.py conversions --from 2025-09-01 --to 2025-09-08 --format csv
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# Источник → имя метода BinomAPI
+SOURCES = {
+    "clicks": "get_clicklog",
+    "conversions": "get_conversions_log",
+}
+
+FORMATS = {"jsonl": ".jsonl.gz", "csv": ".csv.gz", "parquet": ".parquet"}
+
+CURSOR_NAME = "cursor.json"
+WINDOW_FORMAT = "%Y%m%dT%H%M"
+# Ключи, под которыми API может вернуть строки, если ответ — объект
+ROWS_KEYS = ("data", "rows", "items", "clicks", "conversions")
+
+
+def date_windows(start: datetime, end: datetime, window: timedelta = timedelta(days=1)) -> List[Tuple[datetime, datetime]]:
+    """Разбить [start, end) на окна длиной window (последнее может быть короче)"""
+    if window <= timedelta(0):
+        raise ValueError("window должен быть положительным")
+    windows = []
+    current = start
+    while current < end:
+        upper = min(current + window, end)
+        windows.append((current, upper))
+        current = upper
+    return windows
+
+
+def extract_rows(response) -> List[Dict]:
+    """Строки из ответа API: список или список под одним из ROWS_KEYS"""
+    if isinstance(response, list):
+        return response
+    if isinstance(response, dict):
+        for key in ROWS_KEYS:
+            if isinstance(response.get(key), list):
+                return response[key]
+    return []
+
+
+class _GzipJsonlFormat:
+    """Каждая страница — отдельный gzip-member: файл можно обрезать по границе страницы"""
+
+    suffix = FORMATS["jsonl"]
+
+    def encode(self, rows: List[Dict], first_page: bool) -> bytes:
+        text = "".join(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in rows)
+        return gzip.compress(text.encode("utf-8"), compresslevel=6)
+
+
+class _GzipCsvFormat:
+    suffix = FORMATS["csv"]
+
+    def __init__(self):
+        self.fieldnames: Optional[List[str]] = None
+
+    def new_fields(self, rows: List[Dict]) -> List[str]:
+        """Колонки страницы, которых ещё нет в заголовке, в порядке появления"""
+        known = set(self.fieldnames or ())
+        extra = []
+        for row in rows:
+            for name in row:
+                if name not in known:
+                    known.add(name)
+                    extra.append(name)
+        return extra
+
+    def encode(self, rows: List[Dict], first_page: bool) -> bytes:
+        if first_page:
+            self.fieldnames = (self.fieldnames or []) + self.new_fields(rows)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.fieldnames, extrasaction="ignore")
+        if first_page:
+            writer.writeheader()
+        writer.writerows(rows)
+        return gzip.compress(buffer.getvalue().encode("utf-8"), compresslevel=6)
+
+
+class LogExporter:
+    """Параллельная постраничная выгрузка логов по окнам дат"""
+
+    def __init__(self, api, source: str, out_dir, fmt: str = "jsonl", window: timedelta = timedelta(days=1),
+                 page_size: int = 1000, workers: int = 4, timezone: str = "UTC"):
+        """
+        Args:
+            api: экземпляр BinomAPI
+            source: 'clicks' или 'conversions'
+            out_dir: каталог выгрузки (создаётся подкаталог source)
+            fmt: 'jsonl', 'csv' или 'parquet'
+            window: длина окна дат
+            page_size: строк на запрос
+            workers: окон, выгружаемых одновременно
+            timezone: часовой пояс дат
+        """
+        if source not in SOURCES:
+            raise ValueError(f"Неизвестный источник: {source}")
+        if fmt not in FORMATS:
+            raise ValueError(f"Неизвестный формат: {fmt}")
+        if fmt == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise RuntimeError("Для parquet нужен pyarrow: pip install pyarrow")
+
+        self.api = api
+        self.source = source
+        self.fetch = getattr(api, SOURCES[source])
+        self.fmt = fmt
+        self.window = window
+        self.page_size = page_size
+        self.workers = workers
+        self.timezone = timezone
+        self.out_dir = Path(out_dir) / source
+        self.cursor_path = self.out_dir / CURSOR_NAME
+        self._cursor_lock = threading.Lock()
+        self._cursor: Dict[str, Dict] = {}
+        self._range = ""
+
+    # ------------------------------------------------------------------
+    # Курсор
+    # ------------------------------------------------------------------
+
+    def _load_cursor(self):
+        try:
+            with open(self.cursor_path, "r", encoding="utf-8") as f:
+                self._cursor = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self._cursor = {}
+
+    def _update_cursor(self, key: str, **state):
+        with self._cursor_lock:
+            self._cursor.setdefault(key, {}).update(state)
+            tmp_path = self.cursor_path.with_name(CURSOR_NAME + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._cursor, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.cursor_path)
+
+    # ------------------------------------------------------------------
+    # Выгрузка
+    # ------------------------------------------------------------------
+
+    def _cursor_key(self, window: str) -> str:
+        """Ключ курсора: формат, диапазон выгрузки и окно"""
+        return f"{self.fmt}:{self._range}:{window}"
+
+    def _pages(self, date_from: datetime, date_to: datetime, offset: int) -> Iterator[List[Dict]]:
+        # dateTo включительный: конец окна принадлежит следующему окну
+        inclusive_to = date_to - timedelta(seconds=1)
+        while True:
+            rows = extract_rows(self.fetch(date_from, inclusive_to, limit=self.page_size,
+                                           offset=offset, timezone=self.timezone))
+            if rows:
+                yield rows
+            if len(rows) < self.page_size:
+                return
+            offset += len(rows)
+
+    def _export_window(self, date_from: datetime, date_to: datetime) -> Dict:
+        window = f"{date_from.strftime(WINDOW_FORMAT)}-{date_to.strftime(WINDOW_FORMAT)}"
+        path = self.out_dir / self._range / (window + FORMATS[self.fmt])
+        key = self._cursor_key(window)
+        state = dict(self._cursor.get(key, {}))
+        if state.get("pending"):
+            # Сбой между записью курсора и заменой файла при расширении заголовка CSV
+            pending = path.with_name(state["pending"])
+            if pending.exists():
+                os.replace(pending, path)
+            self._update_cursor(key, pending=None)
+        if state.get("done"):
+            return {"window": window, "rows": state.get("rows", 0), "path": str(path), "skipped": True}
+
+        if self.fmt == "parquet":
+            return self._export_window_parquet(window, path, date_from, date_to)
+
+        offset = state.get("offset", 0)
+        rows_written = state.get("rows", 0)
+        size = state.get("bytes", 0)
+        encoder = _GzipCsvFormat() if self.fmt == "csv" else _GzipJsonlFormat()
+        if self.fmt == "csv" and state.get("fieldnames"):
+            encoder.fieldnames = state["fieldnames"]
+
+        # Отбрасываем хвост страницы, записанной до сбоя, но не отмеченной в курсоре
+        mode = "r+b" if path.exists() else "wb"
+        f = open(path, mode)
+        try:
+            f.truncate(size)
+            f.seek(size)
+            for rows in self._pages(date_from, date_to, offset):
+                new_columns = encoder.new_fields(rows) if self.fmt == "csv" and offset else []
+                if new_columns:
+                    f.close()
+                    size = self._widen_csv(key, path, encoder, encoder.fieldnames + new_columns,
+                                           offset, rows_written)
+                    f = open(path, "r+b")
+                    f.seek(size)
+                f.write(encoder.encode(rows, first_page=(offset == 0)))
+                f.flush()
+                os.fsync(f.fileno())
+                offset += len(rows)
+                rows_written += len(rows)
+                size = f.tell()
+                extra = {"fieldnames": encoder.fieldnames} if self.fmt == "csv" else {}
+                self._update_cursor(key, offset=offset, rows=rows_written, bytes=size, **extra)
+        finally:
+            f.close()
+
+        self._update_cursor(key, offset=offset, rows=rows_written, bytes=size, done=True)
+        return {"window": window, "rows": rows_written, "path": str(path), "skipped": False}
+
+    def _widen_csv(self, key: str, path: Path, encoder: "_GzipCsvFormat", fieldnames: List[str],
+                   offset: int, rows_written: int) -> int:
+        """
+        Переписать записанную часть CSV с расширенным заголовком
+
+        Новый файл пишется рядом; курсор сначала запоминает его имя (pending),
+        затем файл атомарно заменяет старый — перезапуск после сбоя доводит
+        замену до конца. Возвращает новый размер файла.
+        """
+        tmp_path = path.with_name(path.name + ".widen")
+        with gzip.open(path, "rt", encoding="utf-8", newline="") as src, open(tmp_path, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as compressed:
+                text = io.TextIOWrapper(compressed, encoding="utf-8", newline="")
+                writer = csv.DictWriter(text, fieldnames=fieldnames)
+                writer.writeheader()
+                for row in csv.DictReader(src):
+                    writer.writerow(row)
+                text.flush()
+                text.detach()
+            raw.flush()
+            os.fsync(raw.fileno())
+            size = raw.tell()
+        encoder.fieldnames = fieldnames
+        self._update_cursor(key, offset=offset, rows=rows_written, bytes=size, fieldnames=fieldnames,
+                            pending=tmp_path.name)
+        os.replace(tmp_path, path)
+        self._update_cursor(key, pending=None)
+        return size
+
+    def _export_window_parquet(self, window: str, path: Path, date_from: datetime, date_to: datetime) -> Dict:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        rows_written = 0
+        writer = None
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            for rows in self._pages(date_from, date_to, 0):
+                table = pa.Table.from_pylist(rows)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema, compression="zstd")
+                else:
+                    table = table.select(writer.schema.names).cast(writer.schema)
+                writer.write_table(table)
+                rows_written += len(rows)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is not None:
+            os.replace(tmp_path, path)
+        self._update_cursor(self._cursor_key(window), rows=rows_written, done=True)
+        return {"window": window, "rows": rows_written, "path": str(path), "skipped": False}
+
+    def export(self, start: datetime, end: datetime) -> Dict:
+        """
+        Выгрузить диапазон [start, end)
+
+        Returns:
+            Сводка: окна, строки, файлы, время
+        """
+        started = time.perf_counter()
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self._load_cursor()
+        self._range = f"{start.strftime(WINDOW_FORMAT)}-{end.strftime(WINDOW_FORMAT)}"
+        (self.out_dir / self._range).mkdir(exist_ok=True)
+        windows = date_windows(start, end, self.window)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = list(pool.map(lambda w: self._export_window(*w), windows))
+
+        return {
+            "source": self.source,
+            "windows": len(windows),
+            "skipped_windows": sum(1 for r in results if r["skipped"]),
+            "rows": sum(r["rows"] for r in results),
+            "files": [r["path"] for r in results if r["rows"]],
+            "seconds": time.perf_counter() - started,
+        }
+
+
+def _parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def main(argv=None):
+    import argparse
+    import sys
+
+    sys.path.insert(0, str(Path(__file__).parent))
+    from binom_api import BinomAPI
+
+    parser = argparse.ArgumentParser(description="Выгрузка кликлога и лога конверсий Binom")
+    parser.add_argument("source", choices=sorted(SOURCES))
+    parser.add_argument("--from", dest="start", required=True, type=_parse_date, help="Начало (ISO, включительно)")
+    parser.add_argument("--to", dest="end", required=True, type=_parse_date, help="Конец (ISO, не включительно)")
+    parser.add_argument("--out", default="exports", help="Каталог выгрузки")
+    parser.add_argument("--format", default="jsonl", choices=sorted(FORMATS))
+    parser.add_argument("--window-hours", type=float, default=24, help="Длина окна дат в часах")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    exporter = LogExporter(BinomAPI(), args.source, args.out, fmt=args.format,
+                           window=timedelta(hours=args.window_hours),
+                           page_size=args.page_size, workers=args.workers)
+    summary = exporter.export(args.start, args.end)
+    print(f"✅ {summary['source']}: {summary['rows']} строк, окон {summary['windows']} "
+          f"(пропущено {summary['skipped_windows']}), {summary['seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
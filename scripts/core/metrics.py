@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Метрики клиента Binom API в формате Prometheus
+
+Счётчики и гистограммы запросов с метками шаблона эндпоинта, метода,
+статуса и трекера, а также байты, повторы, попадания в кеш и ожидания
+rate-limit. Метрики отдаются через локальный HTTP /metrics или пишутся в
+файл для textfile-коллектора node_exporter (удобно для cron).
+
+По умолчанию метрики выключены: BinomAPI хранит metrics=None и не делает
+ничего, кроме одной проверки на None. Включение для cron-скриптов без
+правки кода — через переменные окружения:
+    BINOM_METRICS_TEXTFILE=/var/lib/node_exporter/binom.prom
+    BINOM_METRICS_PORT=9108
+"""
+
+import atexit
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DEFAULT_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Предел кеша «метод + путь → шаблон»: пути с ID не должны раздувать память
+TEMPLATE_CACHE_SIZE = 4096
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """
+    Монотонный счётчик с метками
+
+    Сэмплы называются name_total; в формате 0.0.4 имя в HELP/TYPE должно
+    совпадать с именем сэмплов, поэтому family — тоже name_total.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.family = name if name.endswith("_total") else f"{name}_total"
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1):
+        if amount < 0:
+            raise ValueError("Счётчик не может уменьшаться")
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Tuple[str, ...] = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield self.family, _format_labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами и метками"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.family = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # labels → [счётчики корзин..., сумма]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * len(self.buckets) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-1] += value
+
+    def count(self, labels: Tuple[str, ...] = ()) -> int:
+        state = self._values.get(labels)
+        return sum(state[:-1]) if state else 0
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        with self._lock:
+            items = sorted((labels, list(state)) for labels, state in self._values.items())
+        for labels, state in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, state):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, labels, le), cumulative
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum", label_text, state[-1]
+            yield f"{self.name}_count", label_text, cumulative
+
+
+class MetricsRegistry:
+    """Набор метрик с выводом в текстовом формате Prometheus"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Текст в формате Prometheus exposition 0.0.4"""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.family} {metric.documentation}")
+            lines.append(f"# TYPE {metric.family} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """Атомарно записать метрики для textfile-коллектора"""
+        path = Path(path)
+        tmp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+        tmp_path.write_text(self.render(), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int = 9108, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Поднять HTTP /metrics в фоновом потоке"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+class ClientMetrics:
+    """Метрики клиента Binom API"""
+
+    REQUEST_LABELS = ("endpoint", "method", "status", "tracker")
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None, router=None):
+        """
+        Args:
+            registry: реестр метрик (по умолчанию новый)
+            router: EndpointRouter для шаблонов путей (по умолчанию из encyclopedia.json, лениво)
+        """
+        self.registry = registry or MetricsRegistry()
+        self._router = router
+        self._templates: Dict[Tuple[str, str], str] = {}
+        self._template_lock = threading.Lock()
+
+        r = self.registry
+        self.requests = r.counter("binom_api_requests", "Запросы к Binom API", self.REQUEST_LABELS)
+        self.latency = r.histogram("binom_api_request_duration_seconds", "Время запроса к Binom API",
+                                   self.REQUEST_LABELS)
+        self.bytes_out = r.counter("binom_api_request_bytes", "Отправлено байт в теле запросов",
+                                   ("endpoint", "method", "tracker"))
+        self.bytes_in = r.counter("binom_api_response_bytes", "Получено байт в телах ответов",
+                                  ("endpoint", "method", "tracker"))
+        self.response_size = r.histogram("binom_api_response_size_bytes", "Размер ответа",
+                                         ("endpoint", "method", "tracker"), DEFAULT_SIZE_BUCKETS)
+        self.retries = r.counter("binom_api_retries", "Повторы запросов",
+                                 ("endpoint", "method", "tracker", "reason"))
+        self.cache = r.counter("binom_api_cache_requests", "Обращения к кешам клиента",
+                               ("cache", "result", "tracker"))
+        self.rate_limit_waits = r.counter("binom_api_rate_limit_waits", "Ожидания rate-limit", ("tracker",))
+        self.rate_limit_wait_seconds = r.counter("binom_api_rate_limit_wait_seconds",
+                                                 "Суммарное время ожидания rate-limit", ("tracker",))
+
+    @property
+    def router(self):
+        if self._router is None:
+            try:
+                from .endpoint_router import EndpointRouter, load_router
+            except ImportError:
+                from endpoint_router import EndpointRouter, load_router
+            try:
+                self._router = load_router()
+            except (OSError, ValueError):
+                # Без энциклопедии остаётся замена ID-сегментов на {id}
+                self._router = EndpointRouter()
+        return self._router
+
+    def template(self, method: str, endpoint: str) -> str:
+        """Шаблон эндпоинта для меток (кешируется)"""
+        key = (method, endpoint)
+        template = self._templates.get(key)
+        if template is None:
+            template = self.router.template_for(endpoint, method)
+            with self._template_lock:
+                if len(self._templates) >= TEMPLATE_CACHE_SIZE:
+                    self._templates.clear()
+                self._templates[key] = template
+        return template
+
+    def observe_request(self, method: str, endpoint: str, status, tracker: str, seconds: float,
+                        bytes_out: int = 0, bytes_in: int = 0):
+        """
+        Учесть выполненный запрос
+
+        Args:
+            method: HTTP метод
+            endpoint: путь запроса (будет сведён к шаблону)
+            status: HTTP код или 'error' для сетевых ошибок
+            tracker: имя трекера
+            seconds: длительность запроса
+            bytes_out, bytes_in: размеры тела запроса и ответа
+        """
+        template = self.template(method, endpoint)
+        labels = (template, method, str(status), tracker)
+        self.requests.inc(labels)
+        self.latency.observe(labels, seconds)
+        size_labels = (template, method, tracker)
+        if bytes_out:
+            self.bytes_out.inc(size_labels, bytes_out)
+        self.bytes_in.inc(size_labels, bytes_in)
+        self.response_size.observe(size_labels, bytes_in)
+
+    def retry(self, method: str, endpoint: str, tracker: str, reason: str = "error"):
+        self.retries.inc((self.template(method, endpoint), method, tracker, reason))
+
+    def cache_hit(self, cache: str, tracker: str = ""):
+        self.cache.inc((cache, "hit", tracker))
+
+    def cache_miss(self, cache: str, tracker: str = ""):
+        self.cache.inc((cache, "miss", tracker))
+
+    def rate_limit_wait(self, tracker: str, seconds: float):
+        self.rate_limit_waits.inc((tracker,))
+        self.rate_limit_wait_seconds.inc((tracker,), seconds)
+
+
+_default_metrics: Optional[ClientMetrics] = None
+_default_lock = threading.Lock()
+
+
+def default_metrics() -> Optional[ClientMetrics]:
+    """
+    Общие метрики процесса, если они включены переменными окружения
+
+    BINOM_METRICS_TEXTFILE — записать метрики в файл при выходе из процесса,
+    BINOM_METRICS_PORT — отдавать /metrics по HTTP. Без них возвращает None.
+    """
+    global _default_metrics
+    textfile = os.getenv("BINOM_METRICS_TEXTFILE")
+    port = os.getenv("BINOM_METRICS_PORT")
+    if not textfile and not port:
+        return None
+
+    with _default_lock:
+        if _default_metrics is None:
+            metrics = ClientMetrics()
+            if textfile:
+                atexit.register(metrics.registry.write_textfile, textfile)
+            if port:
+                metrics.registry.serve(int(port), os.getenv("BINOM_METRICS_HOST", "127.0.0.1"))
+            _default_metrics = metrics
+    return _default_metrics
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Локальный mock-сервер Binom API
+
+Отвечает на любой документированный эндпоинт примером response_example из
+encyclopedia.json (шаблон пути определяется через EndpointRouter). Нужен
+для прогона примеров кода и тестов без обращения к боевому трекеру.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+try:
+    from .encyclopedia_index import EncyclopediaIndex
+    from .endpoint_router import EndpointRouter, API_BASE_PATH
+except ImportError:
+    from encyclopedia_index import EncyclopediaIndex
+    from endpoint_router import EndpointRouter, API_BASE_PATH
+
+
+class MockBinomServer:
+    """Mock Binom API на 127.0.0.1 в фоновом потоке"""
+
+    def __init__(self, index: Optional[EncyclopediaIndex] = None, host: str = "127.0.0.1",
+                 port: int = 0, require_api_key: bool = True,
+                 overrides: Optional[Dict[Tuple[str, str], Tuple[int, object]]] = None):
+        """
+        Args:
+            index: EncyclopediaIndex (по умолчанию — encyclopedia.json репозитория)
+            host: адрес для прослушивания
+            port: порт (0 — выбрать свободный)
+            require_api_key: отвечать 401 без заголовка api-key, как боевой API
+            overrides: {(METHOD, template): (status, body)} для подмены ответов
+        """
+        self.index = index or EncyclopediaIndex()
+        self.router = EndpointRouter.from_index(self.index)
+        self.require_api_key = require_api_key
+        self.overrides = dict(overrides or {})
+        self.requests_served = 0
+        self._lock = threading.Lock()
+
+        handler = self._make_handler()
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_BASE_PATH}"
+
+    def respond(self, method: str, path: str, api_key: Optional[str]) -> Tuple[int, object]:
+        """Сформировать ответ (status, body) для запроса"""
+        with self._lock:
+            self.requests_served += 1
+
+        if self.require_api_key and not api_key:
+            return 401, {"error": "Unauthorized - missing api-key header"}
+
+        found = self.router.match(path, method)
+        if found is None:
+            return 404, {"error": f"Not Found - {method} {path}"}
+
+        override = self.overrides.get((found.method, found.template))
+        if override is not None:
+            return override
+
+        record = self.index.get(found.template, found.method) or {}
+        example = record.get("response_example")
+        return 200, example if example is not None else {}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                status, body = server.respond(self.command, self.path, self.headers.get("api-key"))
+                payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "MockBinomServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "MockBinomServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    with MockBinomServer(port=port) as mock:
+        print(f"✅ Mock Binom API: {mock.base_url}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,574 @@
+#!/usr/bin/env python3
+"""
+Хранилище временных рядов для мониторинга эндпоинтов
+
+Заменяет перезапись целиком monitoring_history.json и current_status.json:
+каждая проверка дописывается в SQLite (WAL), одновременно обновляются
+агрегаты 1m/1h/1d и текущий статус эндпоинта. Стоимость проверки — O(1)
+вместо O(размер истории). Политики хранения ограничивают рост базы, а
+диапазонные запросы автоматически выбирают подходящее разрешение.
+Для часовых и суточных корзин хранятся сливаемые DDSketch-скетчи задержек
+по эндпоинту и трекеру: из них считаются p50/p95/p99 и тренд.
+
+Использование:
+    python scripts/core/monitoring_store.py import monitoring/monitoring_history.json
+    python scripts/core/monitoring_store.py status monitoring/current_status.json
+    python scripts/core/monitoring_store.py query "GET /info/offer" --hours 24
+    python scripts/core/monitoring_store.py latency "GET /info/offer" --tracker PierDun
+    python scripts/core/monitoring_store.py dashboard monitoring/dashboard_data.json
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .latency_sketch import LatencySketch, distribution_shift, merge_all
+except ImportError:
+    from latency_sketch import LatencySketch, distribution_shift, merge_all
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_DB_PATH = REPO_ROOT / "monitoring" / "monitoring.db"
+
+RAW = "raw"
+# Разрешение агрегата → длина корзины в секундах
+ROLLUPS = {"1m": 60, "1h": 3600, "1d": 86400}
+# Разрешения, для которых хранятся скетчи задержек
+SKETCH_RESOLUTIONS = ("1h", "1d")
+DEFAULT_TRACKER = ""
+
+# Сколько хранить данные каждого разрешения (None — бессрочно)
+DEFAULT_RETENTION = {
+    RAW: 7 * 86400,
+    "1m": 30 * 86400,
+    "1h": 365 * 86400,
+    "1d": None,
+}
+
+HEALTHY_STATUSES = {"healthy"}
+UNHEALTHY_STATUSES = {"server_error", "timeout", "connection_error", "error"}
+
+# Диапазоны, которые дашборд переключает без сервера: подпись → часы
+DASHBOARD_RANGES = {"24h": 24, "7d": 7 * 24, "30d": 30 * 24}
+
+# Окно «недавних» проверок для тренда и минимальный объём выборок
+TREND_RECENT_WINDOW = 3600
+TREND_MIN_SAMPLES = 5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checks (
+    endpoint TEXT NOT NULL,
+    ts REAL NOT NULL,
+    status TEXT NOT NULL,
+    response_time_ms REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_checks_endpoint_ts ON checks (endpoint, ts);
+CREATE INDEX IF NOT EXISTS idx_checks_ts ON checks (ts);
+
+CREATE TABLE IF NOT EXISTS rollups (
+    resolution TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    checks INTEGER NOT NULL,
+    healthy INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    rt_count INTEGER NOT NULL,
+    rt_sum REAL NOT NULL,
+    rt_min REAL,
+    rt_max REAL,
+    PRIMARY KEY (resolution, endpoint, bucket)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_rollups_bucket ON rollups (resolution, bucket);
+
+CREATE TABLE IF NOT EXISTS sketches (
+    resolution TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    tracker TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    sketch BLOB NOT NULL,
+    PRIMARY KEY (resolution, endpoint, tracker, bucket)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS endpoints (
+    endpoint TEXT PRIMARY KEY,
+    last_ts REAL NOT NULL,
+    last_status TEXT NOT NULL,
+    last_response_time_ms REAL,
+    last_error TEXT,
+    checks_count INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+_UPSERT_ROLLUP = """
+INSERT INTO rollups (resolution, endpoint, bucket, checks, healthy, errors, rt_count, rt_sum, rt_min, rt_max)
+VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (resolution, endpoint, bucket) DO UPDATE SET
+    checks = checks + 1,
+    healthy = healthy + excluded.healthy,
+    errors = errors + excluded.errors,
+    rt_count = rt_count + excluded.rt_count,
+    rt_sum = rt_sum + excluded.rt_sum,
+    rt_min = CASE WHEN rt_min IS NULL OR excluded.rt_min < rt_min THEN excluded.rt_min ELSE rt_min END,
+    rt_max = CASE WHEN rt_max IS NULL OR excluded.rt_max > rt_max THEN excluded.rt_max ELSE rt_max END
+"""
+
+_UPSERT_ENDPOINT = """
+INSERT INTO endpoints (endpoint, last_ts, last_status, last_response_time_ms, last_error, checks_count)
+VALUES (?, ?, ?, ?, ?, 1)
+ON CONFLICT (endpoint) DO UPDATE SET
+    checks_count = checks_count + 1,
+    last_ts = CASE WHEN excluded.last_ts >= last_ts THEN excluded.last_ts ELSE last_ts END,
+    last_status = CASE WHEN excluded.last_ts >= last_ts THEN excluded.last_status ELSE last_status END,
+    last_response_time_ms = CASE WHEN excluded.last_ts >= last_ts
+        THEN excluded.last_response_time_ms ELSE last_response_time_ms END,
+    last_error = CASE WHEN excluded.last_ts >= last_ts THEN excluded.last_error ELSE last_error END
+"""
+
+
+def _to_epoch(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        # Исторические файлы писались в локальном времени без зоны — считаем их UTC
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _to_iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None).isoformat()
+
+
+def health_class(status: str) -> str:
+    """healthy / unhealthy / unknown для сводки current_status"""
+    if status in HEALTHY_STATUSES:
+        return "healthy"
+    if status in UNHEALTHY_STATUSES:
+        return "unhealthy"
+    return "unknown"
+
+
+class MonitoringStore:
+    """Append-only хранилище проверок с агрегатами и политиками хранения"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, retention: Optional[Dict[str, Optional[int]]] = None,
+                 retention_every: int = 1000):
+        """
+        Args:
+            db_path: путь к SQLite базе (":memory:" для тестов)
+            retention: срок хранения по разрешениям в секундах
+            retention_every: применять политики хранения каждые N записей
+        """
+        self.db_path = str(db_path)
+        self.retention = {**DEFAULT_RETENTION, **(retention or {})}
+        self.retention_every = retention_every
+        self._appends_since_retention = 0
+        self._lock = threading.Lock()
+
+        if self.db_path != ":memory:":
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self) -> "MonitoringStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Запись
+    # ------------------------------------------------------------------
+
+    def _append_one(self, endpoint: str, ts: float, status: str,
+                    response_time_ms: Optional[float], error: Optional[str], tracker: str,
+                    pending_sketches: Dict[Tuple, LatencySketch]):
+        self._conn.execute(
+            "INSERT INTO checks (endpoint, ts, status, response_time_ms, error) VALUES (?, ?, ?, ?, ?)",
+            (endpoint, ts, status, response_time_ms, error)
+        )
+        healthy = 1 if status in HEALTHY_STATUSES else 0
+        has_rt = response_time_ms is not None
+        for resolution, seconds in ROLLUPS.items():
+            self._conn.execute(_UPSERT_ROLLUP, (
+                resolution, endpoint, int(ts // seconds) * seconds,
+                healthy, 1 - healthy, 1 if has_rt else 0,
+                response_time_ms if has_rt else 0.0, response_time_ms, response_time_ms
+            ))
+        self._conn.execute(_UPSERT_ENDPOINT, (endpoint, ts, status, response_time_ms, error))
+
+        if has_rt:
+            for resolution in SKETCH_RESOLUTIONS:
+                seconds = ROLLUPS[resolution]
+                key = (resolution, endpoint, tracker, int(ts // seconds) * seconds)
+                sketch = pending_sketches.get(key)
+                if sketch is None:
+                    sketch = pending_sketches[key] = LatencySketch()
+                sketch.add(response_time_ms)
+
+    def _flush_sketches(self, pending_sketches: Dict[Tuple, LatencySketch]):
+        # Один read-modify-write на корзину за пачку, а не на каждую проверку
+        for key, sketch in pending_sketches.items():
+            row = self._conn.execute(
+                "SELECT sketch FROM sketches WHERE resolution = ? AND endpoint = ? AND tracker = ? AND bucket = ?",
+                key
+            ).fetchone()
+            if row is not None:
+                sketch.merge(LatencySketch.from_bytes(row[0]))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sketches (resolution, endpoint, tracker, bucket, sketch) VALUES (?, ?, ?, ?, ?)",
+                (*key, sketch.to_bytes())
+            )
+
+    def append(self, endpoint: str, status: str, response_time_ms: Optional[float] = None,
+               error: Optional[str] = None, timestamp=None, tracker: str = DEFAULT_TRACKER):
+        """
+        Записать результат проверки эндпоинта
+
+        Args:
+            endpoint: ключ эндпоинта ('GET /info/offer')
+            status: healthy, client_error, server_error...
+            response_time_ms: время ответа
+            error: текст ошибки
+            timestamp: epoch-секунды или ISO-строка (по умолчанию — сейчас)
+            tracker: имя трекера, для разбивки скетчей задержек
+        """
+        self.append_many([{
+            "endpoint": endpoint,
+            "status": status,
+            "response_time_ms": response_time_ms,
+            "error": error,
+            "timestamp": timestamp,
+            "tracker": tracker,
+        }])
+
+    def append_many(self, checks: Iterable[Dict]):
+        """Записать пачку проверок одной транзакцией"""
+        with self._lock:
+            count = 0
+            pending_sketches = {}
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for check in checks:
+                    timestamp = check.get("timestamp")
+                    ts = time.time() if timestamp is None else _to_epoch(timestamp)
+                    self._append_one(check["endpoint"], ts, check["status"],
+                                     check.get("response_time_ms"), check.get("error"),
+                                     check.get("tracker") or DEFAULT_TRACKER, pending_sketches)
+                    count += 1
+                self._flush_sketches(pending_sketches)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            self._appends_since_retention += count
+            if self._appends_since_retention >= self.retention_every:
+                self._apply_retention_locked(time.time())
+
+    def import_history(self, history: Dict[str, List[Dict]]) -> int:
+        """Импортировать историю в формате monitoring_history.json"""
+        checks = [
+            {**entry, "endpoint": endpoint}
+            for endpoint, entries in history.items()
+            for entry in entries
+        ]
+        self.append_many(checks)
+        return len(checks)
+
+    # ------------------------------------------------------------------
+    # Хранение
+    # ------------------------------------------------------------------
+
+    def _apply_retention_locked(self, now: float) -> int:
+        deleted = 0
+        raw_limit = self.retention.get(RAW)
+        if raw_limit is not None:
+            deleted += self._conn.execute("DELETE FROM checks WHERE ts < ?", (now - raw_limit,)).rowcount
+        for resolution in ROLLUPS:
+            limit = self.retention.get(resolution)
+            if limit is not None:
+                deleted += self._conn.execute(
+                    "DELETE FROM rollups WHERE resolution = ? AND bucket < ?", (resolution, now - limit)
+                ).rowcount
+                deleted += self._conn.execute(
+                    "DELETE FROM sketches WHERE resolution = ? AND bucket < ?", (resolution, now - limit)
+                ).rowcount
+        self._appends_since_retention = 0
+        return deleted
+
+    def apply_retention(self, now: Optional[float] = None) -> int:
+        """Удалить данные старше сроков хранения; возвращает число удалённых строк"""
+        with self._lock:
+            return self._apply_retention_locked(time.time() if now is None else now)
+
+    # ------------------------------------------------------------------
+    # Запросы
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def pick_resolution(span_seconds: float, max_points: int = 500) -> str:
+        """Наименее грубое разрешение, дающее не больше max_points точек"""
+        for resolution, seconds in ROLLUPS.items():
+            if span_seconds / seconds <= max_points:
+                return resolution
+        return "1d"
+
+    def query(self, endpoint: str, start=None, end=None, resolution: str = "auto",
+              max_points: int = 500) -> List[Dict]:
+        """
+        Диапазонный запрос по эндпоинту
+
+        Args:
+            endpoint: ключ эндпоинта
+            start, end: границы (epoch-секунды или ISO); по умолчанию последние 24 часа
+            resolution: 'raw', '1m', '1h', '1d' или 'auto'
+            max_points: предел точек для resolution='auto'
+
+        Returns:
+            Список точек по возрастанию времени
+        """
+        end_ts = time.time() if end is None else _to_epoch(end)
+        start_ts = end_ts - 86400 if start is None else _to_epoch(start)
+        if resolution == "auto":
+            resolution = self.pick_resolution(end_ts - start_ts, max_points)
+
+        if resolution == RAW:
+            rows = self._conn.execute(
+                "SELECT ts, status, response_time_ms, error FROM checks "
+                "WHERE endpoint = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                (endpoint, start_ts, end_ts)
+            ).fetchall()
+            return [{
+                "timestamp": _to_iso(row["ts"]),
+                "status": row["status"],
+                "response_time_ms": row["response_time_ms"],
+                "error": row["error"],
+            } for row in rows]
+
+        seconds = ROLLUPS[resolution]
+        rows = self._conn.execute(
+            "SELECT bucket, checks, healthy, errors, rt_count, rt_sum, rt_min, rt_max FROM rollups "
+            "WHERE resolution = ? AND endpoint = ? AND bucket >= ? AND bucket < ? ORDER BY bucket",
+            (resolution, endpoint, int(start_ts // seconds) * seconds, end_ts)
+        ).fetchall()
+        return [{
+            "timestamp": _to_iso(row["bucket"]),
+            "resolution": resolution,
+            "checks": row["checks"],
+            "healthy": row["healthy"],
+            "errors": row["errors"],
+            "availability": 100.0 * row["healthy"] / row["checks"],
+            "avg_response_time_ms": row["rt_sum"] / row["rt_count"] if row["rt_count"] else None,
+            "min_response_time_ms": row["rt_min"],
+            "max_response_time_ms": row["rt_max"],
+        } for row in rows]
+
+    def endpoints(self) -> List[str]:
+        return [row[0] for row in self._conn.execute("SELECT endpoint FROM endpoints ORDER BY endpoint")]
+
+    def _window(self, endpoint: str, resolution: str, start: float, end: float) -> Dict:
+        row = self._conn.execute(
+            "SELECT SUM(checks), SUM(healthy), SUM(rt_count), SUM(rt_sum) FROM rollups "
+            "WHERE resolution = ? AND endpoint = ? AND bucket >= ? AND bucket < ?",
+            (resolution, endpoint, start, end)
+        ).fetchone()
+        checks, healthy, rt_count, rt_sum = (value or 0 for value in row)
+        return {
+            "checks": checks,
+            "healthy": healthy,
+            "avg_rt": (rt_sum / rt_count) if rt_count else None,
+        }
+
+    def sketch(self, endpoint: Optional[str] = None, tracker: Optional[str] = None,
+               start=None, end=None, resolution: Optional[str] = None) -> LatencySketch:
+        """
+        Слитый скетч задержек за диапазон
+
+        Args:
+            endpoint: ключ эндпоинта (None — все эндпоинты)
+            tracker: имя трекера (None — все трекеры)
+            start, end: границы (epoch-секунды или ISO); по умолчанию последние 24 часа
+            resolution: '1h' или '1d' (по умолчанию выбирается по длине диапазона)
+        """
+        end_ts = time.time() if end is None else _to_epoch(end)
+        start_ts = end_ts - 86400 if start is None else _to_epoch(start)
+        if resolution is None:
+            resolution = "1h" if end_ts - start_ts <= 31 * 86400 else "1d"
+        seconds = ROLLUPS[resolution]
+
+        sql = "SELECT sketch FROM sketches WHERE resolution = ? AND bucket >= ? AND bucket < ?"
+        args = [resolution, int(start_ts // seconds) * seconds, end_ts]
+        if endpoint is not None:
+            sql += " AND endpoint = ?"
+            args.append(endpoint)
+        if tracker is not None:
+            sql += " AND tracker = ?"
+            args.append(tracker)
+        return merge_all(LatencySketch.from_bytes(row[0]) for row in self._conn.execute(sql, args))
+
+    def latency(self, endpoint: Optional[str] = None, tracker: Optional[str] = None,
+                start=None, end=None) -> Dict[str, Optional[float]]:
+        """p50/p95/p99 задержки (мс) за диапазон"""
+        return self.sketch(endpoint, tracker, start, end).quantiles()
+
+    def latency_by_tracker(self, start=None, end=None) -> Dict[str, Dict[str, Optional[float]]]:
+        """p50/p95/p99 по каждому трекеру"""
+        trackers = [row[0] for row in self._conn.execute("SELECT DISTINCT tracker FROM sketches")]
+        return {tracker: self.latency(tracker=tracker, start=start, end=end) for tracker in trackers}
+
+    def _trend(self, endpoint: str, now: float) -> str:
+        # Недавние проверки (текущая и предыдущая часовые корзины) против остатка суток
+        recent_start = int((now - TREND_RECENT_WINDOW) // 3600) * 3600
+        recent = self.sketch(endpoint, start=recent_start, end=now + 1, resolution="1h")
+        baseline = self.sketch(endpoint, start=now - 86400, end=recent_start, resolution="1h")
+        return distribution_shift(recent, baseline, min_count=TREND_MIN_SAMPLES)
+
+    def current_status(self, now: Optional[float] = None, stability_window: int = 86400) -> Dict:
+        """
+        Снимок текущего состояния в формате monitoring/current_status.json
+
+        stability_score — доля успешных проверок за stability_window (по агрегатам 1h),
+        latency_ms — p50/p95/p99 за то же окно, trend — сдвиг распределения задержек.
+        """
+        now = time.time() if now is None else now
+        summary = {"total_endpoints": 0, "healthy": 0, "unhealthy": 0, "unknown": 0}
+        endpoints = {}
+        for row in self._conn.execute("SELECT * FROM endpoints ORDER BY endpoint"):
+            endpoint = row["endpoint"]
+            window = self._window(endpoint, "1h", now - stability_window, now + 3600)
+            stability = 100.0 * window["healthy"] / window["checks"] if window["checks"] else 0.0
+            endpoints[endpoint] = {
+                "current_status": row["last_status"],
+                "last_check": _to_iso(row["last_ts"]),
+                "response_time_ms": row["last_response_time_ms"],
+                "error": row["last_error"],
+                "stability_score": stability,
+                "latency_ms": self.latency(endpoint, start=now - stability_window, end=now + 1),
+                "trend": self._trend(endpoint, now),
+                "checks_count": row["checks_count"],
+            }
+            summary["total_endpoints"] += 1
+            summary[health_class(row["last_status"])] += 1
+
+        return {
+            "timestamp": _to_iso(now),
+            "summary": summary,
+            "endpoints": endpoints,
+            "trackers": self.latency_by_tracker(now - stability_window, now + 1),
+        }
+
+    def dashboard_data(self, ranges: Optional[Dict[str, float]] = None, max_points: int = 500,
+                       now: Optional[float] = None) -> Dict:
+        """
+        Данные monitoring/dashboard.html: снимок current_status и ряды по диапазонам
+
+        Args:
+            ranges: подпись → длина диапазона в часах (по умолчанию DASHBOARD_RANGES)
+            max_points: предел точек ряда; разрешение выбирается по длине диапазона
+            now: конец диапазонов (по умолчанию текущее время)
+        """
+        end = time.time() if now is None else now
+        endpoints = self.endpoints()
+        status = self.current_status(end)
+        data = {
+            "generated_at": _to_iso(end),
+            "status": status,
+            "health": {endpoint: health_class(state["current_status"])
+                       for endpoint, state in status["endpoints"].items()},
+            "ranges": {},
+        }
+        for label, hours in (ranges or DASHBOARD_RANGES).items():
+            start = end - hours * 3600
+            resolution = self.pick_resolution(end - start, max_points)
+            data["ranges"][label] = {
+                "hours": hours,
+                "resolution": resolution,
+                "series": {endpoint: self.query(endpoint, start, end, resolution) for endpoint in endpoints},
+            }
+        return data
+
+    def export_current_status(self, path, now: Optional[float] = None) -> Dict:
+        """Атомарно записать снимок current_status.json (размер O(число эндпоинтов))"""
+        status = self.current_status(now)
+        _write_json(path, status)
+        return status
+
+
+def _write_json(path, data):
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    tmp_path.replace(path)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Хранилище истории мониторинга Binom API")
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH), help="Путь к SQLite базе")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Импортировать monitoring_history.json")
+    import_parser.add_argument("path")
+
+    status_parser = subparsers.add_parser("status", help="Записать current_status.json")
+    status_parser.add_argument("path", nargs="?", default=str(REPO_ROOT / "monitoring" / "current_status.json"))
+
+    query_parser = subparsers.add_parser("query", help="Диапазонный запрос по эндпоинту")
+    query_parser.add_argument("endpoint")
+    query_parser.add_argument("--hours", type=float, default=24)
+    query_parser.add_argument("--resolution", default="auto", choices=["auto", RAW, *ROLLUPS])
+
+    latency_parser = subparsers.add_parser("latency", help="p50/p95/p99 задержки")
+    latency_parser.add_argument("endpoint", nargs="?")
+    latency_parser.add_argument("--tracker")
+    latency_parser.add_argument("--hours", type=float, default=24)
+
+    dashboard_parser = subparsers.add_parser("dashboard", help="Записать ряды для дашборда")
+    dashboard_parser.add_argument("path", nargs="?", default=str(REPO_ROOT / "monitoring" / "dashboard_data.json"))
+    dashboard_parser.add_argument("--hours", type=float, action="append",
+                                  help="Длина диапазона в часах (можно несколько; по умолчанию 24h, 7d, 30d)")
+
+    subparsers.add_parser("retention", help="Применить политики хранения")
+
+    args = parser.parse_args(argv)
+    with MonitoringStore(args.db) as store:
+        if args.command == "import":
+            with open(args.path, "r", encoding="utf-8") as f:
+                count = store.import_history(json.load(f))
+            print(f"✅ Импортировано проверок: {count}")
+        elif args.command == "status":
+            status = store.export_current_status(args.path)
+            print(f"✅ {args.path}: {status['summary']}")
+        elif args.command == "query":
+            now = time.time()
+            points = store.query(args.endpoint, now - args.hours * 3600, now, args.resolution)
+            print(json.dumps(points, indent=2, ensure_ascii=False))
+        elif args.command == "latency":
+            now = time.time()
+            sketch = store.sketch(args.endpoint, args.tracker, now - args.hours * 3600, now + 1)
+            print(json.dumps({"count": sketch.count, **sketch.quantiles()}, indent=2))
+        elif args.command == "dashboard":
+            ranges = {f"{hours:g}h": hours for hours in args.hours} if args.hours else None
+            _write_json(args.path, store.dashboard_data(ranges))
+            print(f"✅ {args.path}")
+        elif args.command == "retention":
+            print(f"✅ Удалено строк: {store.apply_retention()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Ограничитель частоты запросов (token bucket)
+
+Общий для потоков лимит запросов в секунду к одному трекеру: burst
+запросов проходят сразу, дальше — не чаще rate в секунду.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """Потокобезопасный token bucket"""
+
+    def __init__(self, rate: float = 5.0, burst: int = 5):
+        """
+        Args:
+            rate: токенов в секунду
+            burst: ёмкость ведра
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate должен быть > 0, burst >= 1")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Взять токен, при необходимости подождав; возвращает время ожидания в секундах"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # Долг ведра резервирует очередь: каждый следующий ждёт на 1/rate дольше
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Конвейер генерации документации
+
+Рендерит markdown-файлы, пропускает файлы, содержимое которых не
+изменилось, и записывает остальные пакетами через временный файл и
+атомарный os.replace.
+
+Пул процессов стоит десятки миллисекунд на запуск и pickling заданий,
+поэтому конвейер сначала рендерит несколько заданий в текущем процессе,
+оценивает по ним стоимость остальных и уходит в пул, только если их
+рендеринг дольше min_pool_seconds. Обычный markdown рендерится быстрее
+запуска пула и остаётся в процессе.
+"""
+
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass
+class RenderJob:
+    """Задание на рендеринг одного файла"""
+    output_path: str
+    render: Callable[..., str]
+    args: Tuple = ()
+    kwargs: Dict = field(default_factory=dict)
+
+
+@dataclass
+class RenderStats:
+    """Итоги прогона конвейера"""
+    rendered: int = 0
+    written: int = 0
+    unchanged: int = 0
+    errors: List[str] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
+    written_paths: List[str] = field(default_factory=list)
+    parallel: bool = False
+
+
+def _render_job(job: RenderJob) -> Tuple[str, Optional[bytes], Optional[str]]:
+    """Выполнить рендеринг в рабочем процессе"""
+    try:
+        content = job.render(*job.args, **job.kwargs)
+        return job.output_path, content.encode("utf-8"), None
+    except Exception as e:
+        return job.output_path, None, f"{job.output_path}: {e}"
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def is_unchanged(path: str, data: bytes) -> bool:
+    """Совпадает ли файл на диске с новым содержимым"""
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, "rb") as f:
+            return _digest(f.read()) == _digest(data)
+    except OSError:
+        return False
+
+
+def atomic_write(path: str, data: bytes):
+    """Записать файл через временный файл и атомарное переименование"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb", buffering=1024 * 1024) as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _write_batch(batch: List[Tuple[str, bytes]]) -> List[str]:
+    for path, data in batch:
+        atomic_write(path, data)
+    return [path for path, _ in batch]
+
+
+class RenderPipeline:
+    """Параллельный рендеринг и пакетная запись файлов документации"""
+
+    def __init__(self, workers: Optional[int] = None, min_parallel: int = 64,
+                 chunksize: int = 16, write_batch_size: int = 32, write_threads: int = 4,
+                 min_pool_seconds: float = 0.5, sample_size: int = 8):
+        """
+        Args:
+            workers: число процессов для рендеринга (по умолчанию os.cpu_count())
+            min_parallel: минимум заданий, при котором имеет смысл пул процессов
+            chunksize: размер порции заданий на процесс
+            min_pool_seconds: оценка времени рендеринга в процессе, начиная с которой нужен пул
+            sample_size: заданий, рендерящихся в процессе для оценки стоимости
+            write_batch_size: файлов в одном пакете записи
+            write_threads: потоков для записи пакетов
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.min_parallel = min_parallel
+        self.chunksize = chunksize
+        self.write_batch_size = write_batch_size
+        self.write_threads = write_threads
+        self.min_pool_seconds = min_pool_seconds
+        self.sample_size = sample_size
+
+    def _render(self, jobs: List[RenderJob]) -> Tuple[List[Tuple[str, Optional[bytes], Optional[str]]], bool]:
+        """Результаты рендеринга и признак того, что использовался пул процессов"""
+        if self.workers <= 1 or len(jobs) < self.min_parallel:
+            return [_render_job(job) for job in jobs], False
+
+        started = time.perf_counter()
+        sample = jobs[:self.sample_size]
+        results = [_render_job(job) for job in sample]
+        rest = jobs[len(sample):]
+        per_job = (time.perf_counter() - started) / len(sample) if sample else 0.0
+        if not rest or per_job * len(rest) < self.min_pool_seconds:
+            return results + [_render_job(job) for job in rest], False
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            results.extend(pool.map(_render_job, rest, chunksize=self.chunksize))
+        return results, True
+
+    def run(self, jobs: Iterable[RenderJob]) -> RenderStats:
+        """
+        Отрендерить задания и записать изменившиеся файлы
+
+        Returns:
+            RenderStats со счётчиками и временем этапов
+        """
+        jobs = list(jobs)
+        stats = RenderStats()
+        started = time.perf_counter()
+
+        rendered, stats.parallel = self._render(jobs)
+        stats.timings["render"] = time.perf_counter() - started
+
+        step = time.perf_counter()
+        pending: List[Tuple[str, bytes]] = []
+        for path, data, error in rendered:
+            if error:
+                stats.errors.append(error)
+                continue
+            stats.rendered += 1
+            if is_unchanged(path, data):
+                stats.unchanged += 1
+            else:
+                pending.append((path, data))
+        stats.timings["compare"] = time.perf_counter() - step
+
+        step = time.perf_counter()
+        batches = [pending[i:i + self.write_batch_size]
+                   for i in range(0, len(pending), self.write_batch_size)]
+        if len(batches) > 1 and self.write_threads > 1:
+            with ThreadPoolExecutor(max_workers=self.write_threads) as pool:
+                for written in pool.map(_write_batch, batches):
+                    stats.written_paths.extend(written)
+        else:
+            for batch in batches:
+                stats.written_paths.extend(_write_batch(batch))
+        stats.written = len(stats.written_paths)
+        stats.timings["write"] = time.perf_counter() - step
+        stats.timings["total"] = time.perf_counter() - started
+        return stats
+
+
+def print_stats(stats: RenderStats, label: str = "Документация"):
+    """Вывести итоги прогона конвейера"""
+    print(f"✅ {label}: отрендерено {stats.rendered}, записано {stats.written}, "
+          f"без изменений {stats.unchanged}")
+    timings = ", ".join(f"{name} {seconds * 1000:.1f} мс" for name, seconds in stats.timings.items())
+    print(f"   ⏱  {timings}")
+    for error in stats.errors:
+        print(f"   ❌ {error}")
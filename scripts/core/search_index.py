@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Полнотекстовый поиск по энциклопедии Binom API
+
+Инвертированный индекс с ранжированием BM25 по summary, description, tags,
+parameters, ai_instructions и use_cases эндпоинтов, а также по markdown
+документации (docs/endpoints, ai-guides). Индекс сохраняется в компактном
+бинарном виде (marshal + zlib) и загружается за единицы миллисекунд. Вместе с
+индексом хранятся mtime и размер источников: load_or_build перестраивает его,
+если encyclopedia.json или markdown изменились.
+
+Использование:
+    python scripts/core/search_index.py build
+    python scripts/core/search_index.py query "how do I pause an offer in a rotation"
+"""
+
+import marshal
+import math
+import re
+import zlib
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+INDEX_MAGIC = b"BAES"
+INDEX_VERSION = 2
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_INDEX_PATH = REPO_ROOT / "encyclopedia.search.bin"
+DEFAULT_DOC_ROOTS = ("docs/endpoints", "ai-guides")
+
+# Веса полей (BM25F-упрощение: токены поля повторяются weight раз)
+FIELD_WEIGHTS = {
+    "path": 3,
+    "summary": 3,
+    "tags": 2,
+    "description": 1,
+    "parameters": 1,
+    "ai_instructions": 1,
+    "use_cases": 1,
+}
+
+STOPWORDS = frozenset(
+    "a an and are as at be by do does for from get how i in into is it me my "
+    "of on or the this to use using what when which with you your".split()
+)
+
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+_CAMEL = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+_CODE_BLOCK = re.compile(r"```.*?```", re.DOTALL)
+
+
+def source_signature(encyclopedia_path: Path, doc_roots: Iterable[str] = DEFAULT_DOC_ROOTS,
+                     root: Path = REPO_ROOT) -> Dict[str, List[int]]:
+    """Путь → [mtime_ns, размер] для encyclopedia.json и всех markdown источников"""
+    signature = {}
+    for source in [Path(encyclopedia_path)] + [
+        md_file for doc_root in doc_roots for md_file in (root / doc_root).rglob("*.md")
+    ]:
+        try:
+            stat = source.stat()
+        except OSError:
+            continue
+        signature[source.as_posix()] = [stat.st_mtime_ns, stat.st_size]
+    return signature
+
+
+def _stem(token: str) -> str:
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Разбить текст на нормализованные токены
+
+    snake_case и camelCase разбиваются на части, стоп-слова удаляются,
+    множественное число приводится к единственному.
+    """
+    tokens = []
+    for word in _WORD.findall(text or ""):
+        parts = _CAMEL.findall(word) if not word.islower() else [word]
+        if len(parts) > 1:
+            tokens.append(_stem(word.lower()))
+        for part in parts or [word]:
+            part = part.lower()
+            if part not in STOPWORDS:
+                tokens.append(_stem(part))
+    return tokens
+
+
+def _flatten(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return " ".join(f"{k} {_flatten(v)}" for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return " ".join(_flatten(v) for v in value)
+    return str(value)
+
+
+def endpoint_tokens(record: Dict) -> List[str]:
+    """Токены записи эндпоинта с учётом весов полей"""
+    fields = {
+        "path": record.get("path", ""),
+        "summary": record.get("summary", ""),
+        "tags": _flatten(record.get("tags")),
+        "description": record.get("description", ""),
+        "parameters": " ".join(
+            f"{p.get('name', '')} {p.get('description', '')}"
+            for p in record.get("parameters") or [] if isinstance(p, dict)
+        ),
+        "ai_instructions": _flatten(record.get("ai_instructions")),
+        "use_cases": _flatten(record.get("use_cases")),
+    }
+    tokens = []
+    for name, text in fields.items():
+        tokens.extend(tokenize(text) * FIELD_WEIGHTS[name])
+    return tokens
+
+
+def markdown_tokens(text: str) -> Tuple[str, List[str]]:
+    """Заголовок и токены markdown-документа (блоки кода не индексируются)"""
+    title = ""
+    for line in text.splitlines():
+        if line.startswith("# "):
+            title = line[2:].strip()
+            break
+    body = _CODE_BLOCK.sub(" ", text)
+    return title, tokenize(title) * FIELD_WEIGHTS["summary"] + tokenize(body)
+
+
+@dataclass
+class SearchHit:
+    """Результат поиска"""
+    doc_id: str
+    kind: str
+    title: str
+    score: float
+
+
+class SearchIndex:
+    """Инвертированный индекс с ранжированием BM25"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: List[str] = []
+        self.doc_kinds: List[str] = []
+        self.doc_titles: List[str] = []
+        self.doc_lengths = array("I")
+        # term -> (array doc_idx, array term_freq)
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self._avg_length = 0.0
+        self._norms: Optional[List[float]] = None
+        # Источники, по которым построен индекс (см. source_signature)
+        self.sources: Dict[str, List[int]] = {}
+
+    # ------------------------------------------------------------------
+    # Построение
+    # ------------------------------------------------------------------
+
+    def add_document(self, doc_id: str, kind: str, title: str, tokens: Iterable[str]):
+        """Добавить документ в индекс"""
+        doc_idx = len(self.doc_ids)
+        self.doc_ids.append(doc_id)
+        self.doc_kinds.append(kind)
+        self.doc_titles.append(title)
+
+        counts: Dict[str, int] = {}
+        length = 0
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+            length += 1
+        self.doc_lengths.append(length)
+
+        for term, tf in counts.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = (array("I"), array("I"))
+            posting[0].append(doc_idx)
+            posting[1].append(tf)
+
+        self._norms = None
+
+    def _prepare(self):
+        total = len(self.doc_lengths)
+        self._avg_length = (sum(self.doc_lengths) / total) if total else 0.0
+        avg = self._avg_length or 1.0
+        self._norms = [self.k1 * (1 - self.b + self.b * length / avg) for length in self.doc_lengths]
+
+    @classmethod
+    def build(cls, encyclopedia_index=None, doc_roots: Iterable[str] = DEFAULT_DOC_ROOTS,
+              root: Path = REPO_ROOT) -> "SearchIndex":
+        """
+        Построить индекс по эндпоинтам энциклопедии и markdown-документации
+
+        Args:
+            encyclopedia_index: EncyclopediaIndex (по умолчанию — encyclopedia.json репозитория)
+            doc_roots: каталоги markdown относительно root
+            root: корень репозитория
+        """
+        if encyclopedia_index is None:
+            try:
+                from .encyclopedia_index import EncyclopediaIndex
+            except ImportError:
+                from encyclopedia_index import EncyclopediaIndex
+            encyclopedia_index = EncyclopediaIndex(root / "encyclopedia.json")
+
+        index = cls()
+        # Подпись снимается до чтения: правка во время сборки сделает индекс устаревшим
+        source_path = getattr(encyclopedia_index, "source_path", root / "encyclopedia.json")
+        index.sources = source_signature(source_path, doc_roots, root)
+        for record in encyclopedia_index.iter_endpoints():
+            method = record.get("method", "GET")
+            path = record.get("path", "")
+            title = f"{method} {path} — {record.get('summary', '')}".strip(" —")
+            index.add_document(f"{method} {path}", "endpoint", title, endpoint_tokens(record))
+
+        for doc_root in doc_roots:
+            for md_file in sorted((root / doc_root).rglob("*.md")):
+                text = md_file.read_text(encoding="utf-8", errors="replace")
+                title, tokens = markdown_tokens(text)
+                relative = md_file.relative_to(root).as_posix()
+                index.add_document(relative, "doc", title or md_file.stem, tokens)
+        return index
+
+    # ------------------------------------------------------------------
+    # Сериализация
+    # ------------------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        """Сериализовать индекс в компактный бинарный вид"""
+        terms = sorted(self.postings)
+        payload = (
+            INDEX_VERSION,
+            self.k1,
+            self.b,
+            self.doc_ids,
+            self.doc_kinds,
+            self.doc_titles,
+            self.doc_lengths.tobytes(),
+            terms,
+            [self.postings[t][0].tobytes() for t in terms],
+            [self.postings[t][1].tobytes() for t in terms],
+            self.sources,
+        )
+        return INDEX_MAGIC + zlib.compress(marshal.dumps(payload), 6)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "SearchIndex":
+        """Загрузить индекс из бинарного вида"""
+        if data[:4] != INDEX_MAGIC:
+            raise ValueError("Неверный формат поискового индекса")
+        (version, k1, b, doc_ids, doc_kinds, doc_titles, lengths,
+         terms, doc_blobs, tf_blobs, sources) = marshal.loads(zlib.decompress(data[4:]))
+        if version != INDEX_VERSION:
+            raise ValueError(f"Неподдерживаемая версия индекса: {version}")
+
+        index = cls(k1=k1, b=b)
+        index.doc_ids = doc_ids
+        index.doc_kinds = doc_kinds
+        index.doc_titles = doc_titles
+        index.sources = sources
+        index.doc_lengths = array("I")
+        index.doc_lengths.frombytes(lengths)
+        for term, doc_blob, tf_blob in zip(terms, doc_blobs, tf_blobs):
+            docs, tfs = array("I"), array("I")
+            docs.frombytes(doc_blob)
+            tfs.frombytes(tf_blob)
+            index.postings[term] = (docs, tfs)
+        index._prepare()
+        return index
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_bytes(self.to_bytes())
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH) -> "SearchIndex":
+        return cls.from_bytes(Path(path).read_bytes())
+
+    # ------------------------------------------------------------------
+    # Поиск
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, limit: int = 10, kind: Optional[str] = None) -> List[SearchHit]:
+        """
+        Найти документы по запросу
+
+        Args:
+            query: текст запроса на естественном языке
+            limit: максимальное число результатов
+            kind: 'endpoint' или 'doc' для фильтрации
+
+        Returns:
+            Список SearchHit по убыванию релевантности
+        """
+        total = len(self.doc_ids)
+        if not total:
+            return []
+
+        if self._norms is None:
+            self._prepare()
+        scores: Dict[int, float] = {}
+        norms = self._norms
+        k1_plus = self.k1 + 1
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            docs, tfs = posting
+            df = len(docs)
+            idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for doc_idx, tf in zip(docs, tfs):
+                scores[doc_idx] = scores.get(doc_idx, 0.0) + idf * tf * k1_plus / (tf + norms[doc_idx])
+
+        if kind is not None:
+            scores = {i: s for i, s in scores.items() if self.doc_kinds[i] == kind}
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [
+            SearchHit(self.doc_ids[i], self.doc_kinds[i], self.doc_titles[i], score)
+            for i, score in ranked
+        ]
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+
+def load_or_build(path=DEFAULT_INDEX_PATH, root: Path = REPO_ROOT,
+                  doc_roots: Iterable[str] = DEFAULT_DOC_ROOTS) -> SearchIndex:
+    """Загрузить сохранённый индекс или построить и сохранить новый, если источники изменились"""
+    path = Path(path)
+    root = Path(root)
+    if path.exists():
+        try:
+            index = SearchIndex.load(path)
+        except (ValueError, EOFError, TypeError, zlib.error):
+            index = None
+        if index is not None and index.sources == source_signature(root / "encyclopedia.json", doc_roots, root):
+            return index
+    index = SearchIndex.build(doc_roots=doc_roots, root=root)
+    index.save(path)
+    return index
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Поиск по энциклопедии Binom API")
+    parser.add_argument("--index", default=str(DEFAULT_INDEX_PATH), help="Путь к бинарному индексу")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("build", help="Построить индекс")
+
+    query_parser = subparsers.add_parser("query", help="Выполнить поиск")
+    query_parser.add_argument("text", help="Текст запроса")
+    query_parser.add_argument("-k", "--limit", type=int, default=5)
+    query_parser.add_argument("--kind", choices=["endpoint", "doc"])
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        index = SearchIndex.build()
+        index.save(args.index)
+        elapsed = (time.perf_counter() - start) * 1000
+        size_kb = Path(args.index).stat().st_size / 1024
+        print(f"✅ Индекс построен: {args.index}")
+        print(f"   Документов: {len(index)}, термов: {len(index.postings)}, размер: {size_kb:.1f} KB")
+        print(f"   Время: {elapsed:.1f} мс")
+        return
+
+    start = time.perf_counter()
+    index = load_or_build(args.index)
+    loaded = time.perf_counter()
+    hits = index.search(args.text, limit=args.limit, kind=args.kind)
+    finished = time.perf_counter()
+
+    for position, hit in enumerate(hits, 1):
+        print(f"{position}. [{hit.kind}] {hit.doc_id}  ({hit.score:.2f})")
+        if hit.title and hit.title != hit.doc_id:
+            print(f"   {hit.title}")
+    print(f"\nЗагрузка: {(loaded - start) * 1000:.2f} мс, поиск: {(finished - loaded) * 1000:.3f} мс")
+
+
+if __name__ == "__main__":
+    main()
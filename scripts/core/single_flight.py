@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Single-flight: объединение одинаковых одновременных вызовов
+
+Пока вызов с ключом выполняется, остальные потоки с тем же ключом не
+запускают его повторно, а ждут и получают тот же результат (или то же
+исключение). После завершения ключ освобождается — это не кеш.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Группа вызовов, объединяемых по ключу"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Выполнить fn или дождаться уже идущего вызова с тем же ключом
+
+        Returns:
+            (результат, shared) — shared=True, если результат получен от чужого вызова
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        """Число выполняемых сейчас уникальных вызовов"""
+        with self._lock:
+            return len(self._calls)
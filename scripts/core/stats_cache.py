@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Кеш статистики закрытых дней
+
+Статистика полностью прошедших суток (UTC) после дозаезда поздних
+конверсий больше не меняется. Кеш хранит строки статистики по ключу
+(трекер, сущность, день) в SQLite и отдаёт закрытые дни локально; из API
+загружаются только открытые дни (сегодня и дни внутри settlement_lag) и
+ещё не закешированные закрытые. С лагом по умолчанию (24 ч) открыты сегодня
+и вчера, поэтому отчёт за 30 дней — 2 запроса вместо полного периода.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_DB_PATH = REPO_ROOT / "cache" / "stats_cache.db"
+# Сутки закрываются через 24 ч после окончания: открыты только сегодня и вчера
+DEFAULT_SETTLEMENT_LAG = timedelta(hours=24)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS day_stats (
+    tracker TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    day TEXT NOT NULL,
+    rows TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (tracker, entity, day)
+) WITHOUT ROWID;
+"""
+
+
+def utc_today(now: Optional[datetime] = None) -> date:
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is not None:
+        now = now.astimezone(timezone.utc)
+    return now.date()
+
+
+def preset_days(date_preset: str, now: Optional[datetime] = None) -> Optional[List[date]]:
+    """
+    Дни (UTC), покрываемые datePreset
+
+    last_N_days — N суток, заканчивая сегодняшними. Для пресетов, которые
+    не выражаются списком дней, возвращает None.
+    """
+    today = utc_today(now)
+    if date_preset == "today":
+        return [today]
+    if date_preset == "yesterday":
+        return [today - timedelta(days=1)]
+    if date_preset.startswith("last_") and date_preset.endswith("_days"):
+        try:
+            count = int(date_preset[len("last_"):-len("_days")])
+        except ValueError:
+            return None
+        return [today - timedelta(days=offset) for offset in range(count - 1, -1, -1)]
+    return None
+
+
+class ClosedDayStatsCache:
+    """Кеш строк статистики по (трекер, сущность, день)"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, settlement_lag: timedelta = DEFAULT_SETTLEMENT_LAG):
+        """
+        Args:
+            db_path: путь к SQLite базе (":memory:" для тестов)
+            settlement_lag: сколько ждать после конца суток, прежде чем считать их закрытыми
+        """
+        self.db_path = str(db_path)
+        self.settlement_lag = settlement_lag
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if self.db_path != ":memory:":
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def is_closed(self, day: date, now: Optional[datetime] = None) -> bool:
+        """Сутки закончились и прошло settlement_lag"""
+        now = now or datetime.now(timezone.utc)
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=timezone.utc)
+        day_end = datetime(day.year, day.month, day.day, tzinfo=timezone.utc) + timedelta(days=1)
+        return day_end + self.settlement_lag <= now
+
+    def get(self, tracker: str, entity: str, day: date) -> Optional[List[Dict]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT rows FROM day_stats WHERE tracker = ? AND entity = ? AND day = ?",
+                (tracker, entity, day.isoformat())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, tracker: str, entity: str, day: date, rows: List[Dict]):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO day_stats (tracker, entity, day, rows, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (tracker, entity, day.isoformat(), json.dumps(rows, ensure_ascii=False), time.time())
+            )
+
+    def collect(self, tracker: str, entity: str, days: List[date], fetch_day: Callable[[date], List[Dict]],
+                workers: int = 4, now: Optional[datetime] = None, metrics=None) -> Dict[date, List[Dict]]:
+        """
+        Строки за каждый день: закрытые из кеша, остальные через fetch_day
+
+        Args:
+            tracker: имя трекера
+            entity: сущность и её фильтры ('stats/campaign', 'stats/campaign?campaignId=5')
+            days: нужные дни (UTC)
+            fetch_day: загрузка строк одного дня из API
+            workers: одновременных загрузок
+            now: текущее время (для тестов)
+            metrics: ClientMetrics для учёта попаданий
+
+        Returns:
+            {день: строки} в порядке days
+        """
+        result: Dict[date, List[Dict]] = {}
+        missing: List[Tuple[date, bool]] = []
+        for day in days:
+            closed = self.is_closed(day, now)
+            cached = self.get(tracker, entity, day) if closed else None
+            if cached is not None:
+                result[day] = cached
+            else:
+                missing.append((day, closed))
+
+        with self._lock:
+            self.hits += len(result)
+            self.misses += len(missing)
+        if metrics is not None:
+            for _ in result:
+                metrics.cache_hit("stats_day", tracker)
+            for _ in missing:
+                metrics.cache_miss("stats_day", tracker)
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                fetched = list(pool.map(lambda item: fetch_day(item[0]), missing))
+            for (day, closed), rows in zip(missing, fetched):
+                if closed:
+                    self.put(tracker, entity, day, rows)
+                result[day] = rows
+
+        return {day: result[day] for day in days}
+
+    def prune(self, older_than: timedelta) -> int:
+        """Удалить дни старше older_than; возвращает число удалённых записей"""
+        cutoff = (utc_today() - older_than).isoformat()
+        with self._lock:
+            return self._conn.execute("DELETE FROM day_stats WHERE day < ?", (cutoff,)).rowcount
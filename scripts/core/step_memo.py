@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Мемоизация результатов шагов workflow на диске
+
+Результат шага хранится по адресу содержимого: sha256 от определения шага
+(без номера и описания) и того, от чего зависит результат — значений
+подстановок и трекера (base URL и отпечаток API-ключа, см. api_identity)
+для API-шагов или дайджестов входов для локальных. Ответы API
+считаются свежими freshness (по умолчанию 15 минут); результаты локальных
+шагов не устаревают, пока не изменились входы.
+
+Поэтому при повторном запуске, где изменился только LOCAL_ANALYSIS, API-шаги
+берутся из кеша, а пересчитывается только затронутый хвост DAG.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_ROOT = REPO_ROOT / "cache" / "workflow_steps"
+DEFAULT_FRESHNESS = timedelta(minutes=15)
+
+# Поля шага, не влияющие на результат
+_IGNORED_FIELDS = ("step", "description")
+
+
+def digest(value: Any) -> str:
+    """Дайджест содержимого (нестандартные типы — через str)"""
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def api_identity(api) -> Dict[str, Optional[str]]:
+    """Трекер, к которому обращается клиент: base URL и отпечаток ключа (сам ключ не сохраняется)"""
+    api_key = getattr(api, "api_key", None)
+    return {
+        "base_url": getattr(api, "base_url", None),
+        "key": hashlib.sha256(str(api_key).encode("utf-8")).hexdigest()[:16] if api_key else None,
+    }
+
+
+class StepMemo:
+    """Кеш результатов шагов в каталоге root (по файлу на ключ)"""
+
+    def __init__(self, root=DEFAULT_ROOT, freshness: timedelta = DEFAULT_FRESHNESS):
+        """
+        Args:
+            root: каталог кеша
+            freshness: сколько ответы API считаются актуальными
+        """
+        self.root = Path(root)
+        self.freshness = freshness
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, definition: Dict[str, Any], material: Dict[str, Any]) -> str:
+        """
+        Ключ результата
+
+        Args:
+            definition: определение шага из workflow (номер и описание не учитываются)
+            material: то, от чего ещё зависит результат (параметры, дайджесты входов)
+        """
+        definition = {k: v for k, v in definition.items() if k not in _IGNORED_FIELDS}
+        return digest({"definition": definition, "material": material})
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str, expires: bool = True) -> Tuple[bool, Any]:
+        """
+        Результат по ключу
+
+        Args:
+            key: ключ из key()
+            expires: учитывать freshness (False для локальных шагов)
+
+        Returns:
+            (найден, результат)
+        """
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            entry = None
+        fresh = entry is not None and (
+            not expires or time.time() - entry["created"] <= self.freshness.total_seconds()
+        )
+        with self._lock:
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return (True, entry["output"]) if fresh else (False, None)
+
+    def put(self, key: str, output: Any) -> bool:
+        """Сохранить результат; False, если он не сериализуется в JSON"""
+        try:
+            data = json.dumps({"created": time.time(), "output": output}, ensure_ascii=False)
+        except (TypeError, ValueError):
+            return False
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return True
+
+    def prune(self, older_than: Optional[timedelta] = None) -> int:
+        """Удалить записи старше older_than (по умолчанию freshness); возвращает число удалённых"""
+        cutoff = time.time() - (older_than or self.freshness).total_seconds()
+        removed = 0
+        for path in self.root.glob("*/*.json"):
+            if path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Трассировка запросов BinomAPI
+
+Хуки получают RequestTrace до отправки запроса и после получения ответа:
+метод, путь, статус, размеры тела запроса и ответа и разбивку времени.
+Хуки ничего не сериализуют сами по себе — встроенные приёмники
+(JSONL-файл и выборочное логирование) форматируют только отобранные записи,
+поэтому трассировка не искажает замеряемые вызовы.
+
+Использование:
+    api = BinomAPI(hooks=[JsonlTraceSink("traces.jsonl"), SampledLoggingSink(sample_rate=0.01, slow_ms=2000)])
+"""
+
+import json
+import logging
+import random
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+logger = logging.getLogger("binom_api")
+
+
+@dataclass
+class RequestTrace:
+    """
+    Трасса одного запроса
+
+    timings (секунды): total — весь вызов, ttfb — от отправки до разбора
+    заголовков ответа (включает DNS, connect и TLS), body — чтение тела.
+    dns/connect/tls заполняются, только если транспорт их сообщает
+    (requests этого не делает).
+    """
+    method: str
+    endpoint: str
+    url: str
+    params: Optional[Dict[str, Any]] = None
+    data: Optional[Any] = None
+    tracker: str = ""
+    started_at: float = 0.0
+    status: Optional[int] = None
+    error: Optional[str] = None
+    bytes_out: int = 0
+    bytes_in: int = 0
+    timings: Dict[str, Optional[float]] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        total = self.timings.get("total")
+        return total * 1000 if total is not None else None
+
+    def to_dict(self, include_payload: bool = False) -> Dict[str, Any]:
+        record = asdict(self)
+        if not include_payload:
+            record.pop("data")
+        return record
+
+
+class RequestHook:
+    """Базовый хук: переопределите нужные методы"""
+
+    def before_request(self, trace: RequestTrace):
+        pass
+
+    def after_request(self, trace: RequestTrace):
+        pass
+
+
+class _Sampler:
+    def __init__(self, sample_rate: float, slow_ms: Optional[float], seed: Optional[int]):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate должен быть в интервале [0, 1]")
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self._random = random.Random(seed)
+
+    def rate(self, trace: RequestTrace) -> float:
+        """Вероятность записи трассы: ошибки и медленные вызовы пишутся всегда, остальное — по выборке"""
+        if trace.error is not None or (trace.status is not None and trace.status >= 400):
+            return 1.0
+        if self.slow_ms is not None and (trace.duration_ms or 0) >= self.slow_ms:
+            return 1.0
+        return min(self.sample_rate, 1.0)
+
+    def __call__(self, trace: RequestTrace) -> Optional[float]:
+        """Вероятность, с которой трасса отобрана, или None, если она не отобрана"""
+        rate = self.rate(trace)
+        if rate >= 1 or self._random.random() < rate:
+            return rate
+        return None
+
+
+class JsonlTraceSink(RequestHook):
+    """
+    Запись трасс в JSONL-файл (одна строка на запрос)
+
+    В каждую строку пишется sample_rate — вероятность, с которой запись
+    попала в файл, чтобы по выборке можно было восстановить полные счётчики.
+    """
+
+    def __init__(self, path, sample_rate: float = 1.0, slow_ms: Optional[float] = None,
+                 include_payload: bool = False, seed: Optional[int] = None):
+        """
+        Args:
+            path: путь к файлу трасс (дописывается)
+            sample_rate: доля записываемых успешных запросов
+            slow_ms: запросы не быстрее этого порога пишутся всегда
+            include_payload: писать тело запроса
+            seed: seed выборки (для воспроизводимости)
+        """
+        self.path = Path(path)
+        self.include_payload = include_payload
+        self._sample = _Sampler(sample_rate, slow_ms, seed)
+        self._lock = threading.Lock()
+        self._file = None
+
+    def after_request(self, trace: RequestTrace):
+        rate = self._sample(trace)
+        if rate is None:
+            return
+        record = trace.to_dict(self.include_payload)
+        record["sample_rate"] = rate
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+            self._file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class SampledLoggingSink(RequestHook):
+    """Выборочное логирование запросов через logging (rate= в строке — вероятность её записи)"""
+
+    def __init__(self, log: Optional[logging.Logger] = None, sample_rate: float = 0.01,
+                 slow_ms: Optional[float] = None, level: int = logging.INFO,
+                 include_payload: bool = False, seed: Optional[int] = None):
+        """
+        Args:
+            log: логгер (по умолчанию 'binom_api')
+            sample_rate: доля логируемых успешных запросов
+            slow_ms: запросы не быстрее этого порога логируются всегда
+            level: уровень для успешных запросов (ошибки — WARNING)
+            include_payload: логировать параметры и тело запроса
+            seed: seed выборки
+        """
+        self.log = log or logger
+        self.level = level
+        self.include_payload = include_payload
+        self._sample = _Sampler(sample_rate, slow_ms, seed)
+
+    def after_request(self, trace: RequestTrace):
+        failed = trace.error is not None or (trace.status is not None and trace.status >= 400)
+        level = logging.WARNING if failed else self.level
+        if not self.log.isEnabledFor(level):
+            return
+        rate = self._sample(trace)
+        if rate is None:
+            return
+
+        timings = " ".join(f"{name}={value * 1000:.1f}ms"
+                           for name, value in trace.timings.items() if value is not None)
+        message = (f"{trace.method} {trace.endpoint} -> {trace.status or trace.error} "
+                   f"{timings} out={trace.bytes_out}B in={trace.bytes_in}B rate={rate:g}")
+        if self.include_payload:
+            if trace.params:
+                message += f" params={json.dumps(trace.params, ensure_ascii=False, default=str)}"
+            if trace.data is not None:
+                message += f" data={json.dumps(trace.data, ensure_ascii=False, default=str)}"
+        self.log.log(level, message)
+
+
+_debug_logger: Optional[logging.Logger] = None
+_debug_logger_lock = threading.Lock()
+
+
+def debug_logger() -> logging.Logger:
+    """
+    Отдельный логгер отладочного вывода в stderr
+
+    Создаётся один раз и не регистрируется в logging: уровень и обработчики
+    общего логгера 'binom_api' не меняются, поэтому debug=True одного клиента
+    не включает отладку остальным экземплярам и коду, использующему библиотеку.
+    """
+    global _debug_logger
+    with _debug_logger_lock:
+        if _debug_logger is None:
+            log = logging.Logger("binom_api.debug", logging.DEBUG)
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s"))
+            log.addHandler(handler)
+            _debug_logger = log
+        return _debug_logger
+
+
+def enable_debug_logging():
+    """Хук, выводящий все трассы клиента в stderr (замена прежнего debug=True с print)"""
+    return SampledLoggingSink(debug_logger(), sample_rate=1.0, level=logging.DEBUG, include_payload=True)
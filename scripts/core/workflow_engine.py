@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+Исполнение workflow из workflows/*.json
+
+Шаги workflow превращаются в DAG. Зависимости выводятся из подстановок
+{placeholder} в params и пути шага:
+
+- {campaign_id} — поле id из ответа ближайшего предыдущего шага, который
+  отдаёт кампании (GET /info/campaign, /campaign/list/filtered и т.п.);
+- {step1.id} — поле id из ответа шага 1 явно;
+- переменные запуска (variables) подставляются как есть и зависимостей не
+  создают.
+
+Если подстановка связана со списком строк, шаг выполняется для каждого
+значения (fan-out) с ограниченной параллельностью. Независимые шаги идут
+одновременно. LOCAL_ANALYSIS зависит от всех предыдущих шагов и
+выполняется локальным обработчиком. MANUAL_CREATION_AND_VERIFICATION
+означает ручное создание сущности; движок выполняет только проверку —
+список сущностей через GET /info/<entity>.
+
+С StepMemo результаты GET-запросов и локальных шагов кешируются на диске
+(см. step_memo.py): повторный запуск выполняет только шаги, чьё
+определение или входы изменились, и их потомков.
+
+Использование:
+    python scripts/core/workflow_engine.py workflows/analytics_workflow.json
+    python scripts/core/workflow_engine.py workflows/analytics_workflow.json --var campaign_id=12 --plan
+"""
+
+import inspect
+import itertools
+import json
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from .log_exporter import extract_rows
+    from .stats_fetcher import merge_shards
+    from .step_memo import StepMemo, api_identity, digest
+except ImportError:
+    from log_exporter import extract_rows
+    from stats_fetcher import merge_shards
+    from step_memo import StepMemo, api_identity, digest
+
+
+LOCAL_ACTION = "LOCAL_ANALYSIS"
+MANUAL_ACTION = "MANUAL_CREATION_AND_VERIFICATION"
+
+_ACTION_RE = re.compile(r"^(GET|POST|PUT|PATCH|DELETE)\s+(/\S*)$")
+_PLACEHOLDER_RE = re.compile(r"\{([A-Za-z_][A-Za-z0-9_.]*)\}")
+_STEP_REF_RE = re.compile(r"^step(\d+)\.(\w+)$")
+# Названия сущностей из ручных шагов → сущность в путях API
+_ENTITY_ALIASES = {"landing_page": "landing"}
+# Префиксы пути, после которых идёт имя сущности, а не сама сущность
+_VIEW_PREFIXES = ("info", "stats")
+
+
+class WorkflowError(ValueError):
+    """Workflow не удаётся разобрать или связать"""
+
+
+def _snake(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name.replace(" ", "_")).lower().replace("__", "_")
+
+
+def step_resource(path: str) -> str:
+    """Сущность, которую отдаёт путь: /info/campaign → campaign, /offer/list/filtered → offer"""
+    segments = [s for s in path.strip("/").split("/") if s]
+    if len(segments) > 1 and segments[0] in _VIEW_PREFIXES:
+        segments = segments[1:]
+    return segments[0] if segments else ""
+
+
+@dataclass
+class Binding:
+    """Откуда берётся значение подстановки"""
+    name: str
+    step: Optional[int] = None  # None — переменная запуска
+    field: str = "id"
+
+
+@dataclass
+class WorkflowStep:
+    number: int
+    action: str
+    kind: str  # 'api', 'local' или 'manual'
+    method: Optional[str] = None
+    path: Optional[str] = None
+    params: Dict[str, Any] = field(default_factory=dict)
+    description: str = ""
+    entity: Optional[str] = None
+    bindings: Dict[str, Binding] = field(default_factory=dict)
+    depends_on: List[int] = field(default_factory=list)
+    raw: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def resource(self) -> Optional[str]:
+        if self.kind == "manual":
+            return self.entity
+        return step_resource(self.path) if self.path else None
+
+
+@dataclass
+class Workflow:
+    name: str
+    goal: str
+    steps: Dict[int, WorkflowStep]
+    raw: Dict[str, Any] = field(default_factory=dict)
+
+    def levels(self) -> List[List[int]]:
+        """Номера шагов по уровням: шаги одного уровня независимы"""
+        level_of: Dict[int, int] = {}
+        for number in sorted(self.steps):
+            deps = self.steps[number].depends_on
+            level_of[number] = 1 + max((level_of[d] for d in deps), default=-1)
+        levels: List[List[int]] = [[] for _ in range(max(level_of.values(), default=-1) + 1)]
+        for number, level in level_of.items():
+            levels[level].append(number)
+        return levels
+
+
+@dataclass
+class StepResult:
+    step: int
+    action: str
+    status: str  # 'ok', 'failed', 'skipped'
+    output: Any = None
+    error: Optional[str] = None
+    started: float = 0.0  # секунды от начала запуска
+    seconds: float = 0.0
+    calls: int = 0
+    cached: int = 0  # вызовов, взятых из StepMemo
+    fan_out: bool = False
+    digest: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+    def rows(self) -> List[Dict]:
+        """Строки ответа; для fan-out — строки всех вызовов подряд"""
+        if self.fan_out:
+            return [row for item in self.output or [] for row in extract_rows(item["output"])]
+        if isinstance(self.output, dict) and not extract_rows(self.output):
+            return [self.output]
+        return extract_rows(self.output)
+
+
+@dataclass
+class WorkflowRun:
+    workflow: str
+    results: Dict[int, StepResult]
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(r.ok for r in self.results.values())
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Тайминги и статус по шагам"""
+        return [
+            {
+                "step": r.step, "action": r.action, "status": r.status, "calls": r.calls, "cached": r.cached,
+                "started": round(r.started, 4), "seconds": round(r.seconds, 4), "error": r.error
+            }
+            for r in sorted(self.results.values(), key=lambda r: r.step)
+        ]
+
+
+# ----------------------------------------------------------------------
+# Разбор
+# ----------------------------------------------------------------------
+
+def _placeholders(value) -> List[str]:
+    if isinstance(value, str):
+        return _PLACEHOLDER_RE.findall(value)
+    if isinstance(value, dict):
+        return [name for v in value.values() for name in _placeholders(v)]
+    if isinstance(value, list):
+        return [name for v in value for name in _placeholders(v)]
+    return []
+
+
+def _bind(name: str, step: WorkflowStep, earlier: List[WorkflowStep], variables: Dict[str, Any]) -> Binding:
+    if name in variables:
+        return Binding(name)
+    ref = _STEP_REF_RE.match(name)
+    if ref:
+        number = int(ref.group(1))
+        if number not in {s.number for s in earlier}:
+            raise WorkflowError(f"Шаг {step.number}: {{{name}}} ссылается не на предыдущий шаг")
+        return Binding(name, number, ref.group(2))
+
+    # {campaign_id} / {campaignId}: самый длинный префикс, совпадающий с сущностью предыдущего шага
+    snake = _snake(name)
+    parts = snake.split("_")
+    for cut in range(len(parts) - 1, 0, -1):
+        resource, field_name = "_".join(parts[:cut]), "_".join(parts[cut:])
+        for producer in reversed(earlier):
+            if producer.kind != "local" and producer.resource == resource:
+                return Binding(name, producer.number, field_name)
+    raise WorkflowError(f"Шаг {step.number}: не удалось связать {{{name}}} ни с переменной, ни с предыдущим шагом")
+
+
+def parse_workflow(data: Dict[str, Any], variables: Optional[Dict[str, Any]] = None) -> Workflow:
+    """
+    Разобрать workflow и вывести зависимости шагов
+
+    Args:
+        data: содержимое workflows/*.json
+        variables: значения подстановок, известные заранее
+
+    Returns:
+        Workflow со связанными шагами
+    """
+    variables = variables or {}
+    steps: Dict[int, WorkflowStep] = {}
+    for index, raw in enumerate(data.get("steps", []), 1):
+        number = int(raw.get("step", index))
+        if number in steps:
+            raise WorkflowError(f"Повторяющийся номер шага: {number}")
+        action = str(raw.get("action", "")).strip()
+        step = WorkflowStep(number, action, "api", params=dict(raw.get("params") or {}),
+                            description=raw.get("description", ""), raw=raw)
+        match = _ACTION_RE.match(action)
+        if match:
+            step.method, step.path = match.group(1), match.group(2)
+        elif action == LOCAL_ACTION:
+            step.kind = "local"
+        elif action == MANUAL_ACTION:
+            step.kind = "manual"
+            entity = _snake(raw.get("entity", ""))
+            step.entity = _ENTITY_ALIASES.get(entity, entity) or None
+            if step.entity:
+                step.method, step.path = "GET", f"/info/{step.entity}"
+        else:
+            raise WorkflowError(f"Шаг {number}: неизвестное действие '{action}'")
+        steps[number] = step
+
+    steps = {n: steps[n] for n in sorted(steps)}
+    ordered = list(steps.values())
+    for i, step in enumerate(ordered):
+        earlier = ordered[:i]
+        if step.kind == "local":
+            # Локальный анализ работает с результатами всех предыдущих шагов
+            step.depends_on = [s.number for s in earlier]
+            continue
+        for name in dict.fromkeys(_placeholders(step.params) + _placeholders(step.path or "")):
+            step.bindings[name] = _bind(name, step, earlier, variables)
+        step.depends_on = sorted({b.step for b in step.bindings.values() if b.step is not None})
+
+    return Workflow(data.get("name", ""), data.get("goal", ""), steps, data)
+
+
+def load_workflow(path, variables: Optional[Dict[str, Any]] = None) -> Workflow:
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_workflow(json.load(f), variables)
+
+
+def _substitute(value, values: Dict[str, Any]):
+    if isinstance(value, str):
+        whole = _PLACEHOLDER_RE.fullmatch(value)
+        if whole:
+            # Единственная подстановка сохраняет тип значения (число остаётся числом)
+            return values[whole.group(1)]
+        return _PLACEHOLDER_RE.sub(lambda m: str(values[m.group(1)]), value)
+    if isinstance(value, dict):
+        return {k: _substitute(v, values) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_substitute(v, values) for v in value]
+    return value
+
+
+# ----------------------------------------------------------------------
+# Локальный анализ по умолчанию
+# ----------------------------------------------------------------------
+
+def local_analysis(step: WorkflowStep, inputs: Dict[int, StepResult]) -> Dict[str, Any]:
+    """
+    Слить строки статистики предыдущих шагов и пересчитать ROI, EPC, CR, CPC
+
+    Строки статистики — строки с clicks; метрики суммируются по id и
+    пересчитываются из сумм (как при слиянии шардов).
+    """
+    stats_rows = []
+    sources = {}
+    for number, result in sorted(inputs.items()):
+        rows = result.rows()
+        sources[str(number)] = len(rows)
+        stats_rows.append([row for row in rows if isinstance(row, dict) and "clicks" in row])
+    frame = merge_shards(stats_rows)
+    rows = sorted(frame.to_rows(), key=lambda r: (r.get("roi") is None, -(r.get("roi") or 0)))
+    return {"rows": rows, "sources": sources}
+
+
+# ----------------------------------------------------------------------
+# Исполнение
+# ----------------------------------------------------------------------
+
+class WorkflowEngine:
+    """Исполнитель DAG шагов workflow через BinomAPI"""
+
+    def __init__(self, api, max_concurrency: int = 4, fan_out_concurrency: int = 4,
+                 local_handlers: Optional[Dict[str, Callable]] = None, memo: Optional[StepMemo] = None):
+        """
+        Args:
+            api: экземпляр BinomAPI (нужен метод request)
+            max_concurrency: одновременных запросов к API на весь запуск
+            fan_out_concurrency: одновременных вызовов одного fan-out шага
+            local_handlers: action → обработчик(step, inputs) локальных шагов
+            memo: кеш результатов шагов (None — без кеша)
+        """
+        self.api = api
+        self.memo = memo
+        self.max_concurrency = max_concurrency
+        self.fan_out_concurrency = fan_out_concurrency
+        self.local_handlers = {LOCAL_ACTION: local_analysis}
+        self.local_handlers.update(local_handlers or {})
+        self._api_slots = threading.BoundedSemaphore(max_concurrency)
+
+    def _call(self, step: WorkflowStep, values: Dict[str, Any]) -> Tuple[Any, bool]:
+        """Один вызов API; возвращает (ответ, взят ли из кеша)"""
+        # Кешируются только чтения: изменяющие запросы выполняются всегда
+        key = None
+        if self.memo is not None and step.method == "GET":
+            # Ответ зависит от трекера: смена BINOM_URL или ключа не должна давать попаданий
+            key = self.memo.key(step.raw, {"values": values, "api": api_identity(self.api)})
+            hit, output = self.memo.get(key)
+            if hit:
+                return output, True
+
+        path = _substitute(step.path, values)
+        params = _substitute(step.params, values)
+        with self._api_slots:
+            if step.method == "GET":
+                output = self.api.request(step.method, path, params=params or None)
+            else:
+                output = self.api.request(step.method, path, data=params or None)
+        if key is not None:
+            self.memo.put(key, output)
+        return output, False
+
+    def _run_local_step(self, step: WorkflowStep, results: Dict[int, StepResult]) -> Tuple[Any, bool]:
+        handler = self.local_handlers.get(step.action)
+        if handler is None:
+            raise WorkflowError(f"Нет обработчика для {step.action}")
+        inputs = {n: results[n] for n in step.depends_on}
+
+        key = None
+        if self.memo is not None:
+            # Адрес результата — входы по дайджестам и сам обработчик, включая его исходный код
+            try:
+                source = inspect.getsource(handler)
+            except (OSError, TypeError):
+                source = None
+            material = {
+                "inputs": {str(n): r.digest for n, r in inputs.items()},
+                "handler": f"{getattr(handler, '__module__', '')}.{getattr(handler, '__qualname__', '')}",
+                "source": source,
+            }
+            key = self.memo.key(step.raw, material)
+            hit, output = self.memo.get(key, expires=False)
+            if hit:
+                return output, True
+
+        output = handler(step, inputs)
+        if key is not None:
+            self.memo.put(key, output)
+        return output, False
+
+    def _binding_values(self, binding: Binding, results: Dict[int, StepResult],
+                        variables: Dict[str, Any]) -> Tuple[List[Any], bool]:
+        """Значения подстановки и признак того, что это список (fan-out)"""
+        if binding.step is None:
+            return [variables[binding.name]], False
+        result = results[binding.step]
+        if isinstance(result.output, dict) and binding.field in result.output and not result.fan_out:
+            return [result.output[binding.field]], False
+        values = [row.get(binding.field) for row in result.rows() if isinstance(row, dict)]
+        return list(dict.fromkeys(v for v in values if v is not None)), True
+
+    def _resolve(self, step: WorkflowStep, results: Dict[int, StepResult],
+                 variables: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], bool]:
+        """Наборы значений подстановок: один набор или по набору на элемент fan-out"""
+        names = list(step.bindings)
+        choices = []
+        fan_out = False
+        for name in names:
+            values, is_list = self._binding_values(step.bindings[name], results, variables)
+            choices.append(values)
+            fan_out = fan_out or is_list
+        return [dict(zip(names, combo)) for combo in itertools.product(*choices)], fan_out
+
+    def _run_api_step(self, step: WorkflowStep, results: Dict[int, StepResult],
+                      variables: Dict[str, Any]) -> Tuple[Any, int, int, bool]:
+        value_sets, fan_out = self._resolve(step, results, variables)
+        if not fan_out:
+            output, hit = self._call(step, value_sets[0])
+            return output, 1, int(hit), False
+
+        def call(values):
+            output, hit = self._call(step, values)
+            return {"bindings": values, "output": output}, hit
+
+        with ThreadPoolExecutor(max_workers=self.fan_out_concurrency) as pool:
+            calls = list(pool.map(call, value_sets))
+        return [item for item, _ in calls], len(calls), sum(hit for _, hit in calls), True
+
+    def _run_step(self, step: WorkflowStep, results: Dict[int, StepResult],
+                  variables: Dict[str, Any], run_started: float) -> StepResult:
+        started = time.perf_counter()
+        result = StepResult(step.number, step.action, "ok", started=started - run_started)
+        try:
+            if step.kind == "local":
+                result.output, hit = self._run_local_step(step, results)
+                result.cached = int(hit)
+            elif step.path is None:
+                # Ручной шаг без сущности: проверять нечего
+                result.output = None
+            else:
+                result.output, result.calls, result.cached, result.fan_out = \
+                    self._run_api_step(step, results, variables)
+            result.digest = digest(result.output)
+        except Exception as e:
+            result.status = "failed"
+            result.error = str(e)
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def run(self, workflow, variables: Optional[Dict[str, Any]] = None) -> WorkflowRun:
+        """
+        Выполнить workflow
+
+        Args:
+            workflow: Workflow, путь к json или содержимое json
+            variables: значения подстановок, известные заранее
+
+        Returns:
+            WorkflowRun с результатом и таймингом каждого шага
+        """
+        variables = variables or {}
+        if isinstance(workflow, (str, Path)):
+            workflow = load_workflow(workflow, variables)
+        elif isinstance(workflow, dict):
+            workflow = parse_workflow(workflow, variables)
+
+        run_started = time.perf_counter()
+        results: Dict[int, StepResult] = {}
+        pending = dict(workflow.steps)
+        running = {}
+        with ThreadPoolExecutor(max_workers=max(1, len(pending))) as pool:
+            while pending or running:
+                for number, step in list(pending.items()):
+                    if not all(d in results for d in step.depends_on):
+                        continue
+                    del pending[number]
+                    failed = [d for d in step.depends_on if not results[d].ok]
+                    if failed:
+                        results[number] = StepResult(number, step.action, "skipped",
+                                                     error=f"Зависит от неуспешных шагов {failed}",
+                                                     started=time.perf_counter() - run_started)
+                        continue
+                    future = pool.submit(self._run_step, step, dict(results), variables, run_started)
+                    running[future] = number
+
+                if not running:
+                    # Оставшиеся шаги зависят от только что пропущенных: следующий проход пропустит и их
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+
+        return WorkflowRun(workflow.name, results, time.perf_counter() - run_started)
+
+
+def main(argv=None):
+    import argparse
+    import sys
+    from datetime import timedelta
+
+    sys.path.insert(0, str(Path(__file__).parent))
+    from binom_api import BinomAPI
+
+    parser = argparse.ArgumentParser(description="Выполнение workflow Binom API")
+    parser.add_argument("workflow", help="Путь к workflows/*.json")
+    parser.add_argument("--var", action="append", default=[], help="Подстановка name=value")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--plan", action="store_true", help="Только показать уровни DAG")
+    parser.add_argument("--no-memo", action="store_true", help="Не использовать кеш шагов")
+    parser.add_argument("--freshness-minutes", type=float, default=15, help="Актуальность ответов API в кеше")
+    args = parser.parse_args(argv)
+
+    variables = {}
+    for item in args.var:
+        name, _, value = item.partition("=")
+        variables[name] = int(value) if value.isdigit() else value
+
+    workflow = load_workflow(args.workflow, variables)
+    for level, numbers in enumerate(workflow.levels()):
+        print(f"Уровень {level}: " + ", ".join(f"{n} {workflow.steps[n].action}" for n in numbers))
+    if args.plan:
+        return
+
+    memo = None if args.no_memo else StepMemo(freshness=timedelta(minutes=args.freshness_minutes))
+    run = WorkflowEngine(BinomAPI(), max_concurrency=args.concurrency, memo=memo).run(workflow, variables)
+    for entry in run.report():
+        mark = {"ok": "✅", "failed": "❌", "skipped": "⏭️"}[entry["status"]]
+        print(f"{mark} {entry['step']} {entry['action']}: {entry['calls']} вызовов "
+              f"(из кеша {entry['cached']}), "
+              f"{entry['seconds']:.2f}s" + (f" — {entry['error']}" if entry["error"] else ""))
+    print(f"Итого {run.seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
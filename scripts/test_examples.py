@@ -2,95 +2,185 @@
 """
 This script automatically finds and tests all code examples (Python and cURL)
 within the markdown documentation.
+
+Examples run concurrently in a sandbox: Python snippets are forked from a
+pre-warmed forkserver, identical snippets are executed once, and by default
+every example is pointed at a local mock Binom API instead of the live tracker.
 """
 
+import argparse
+import json
 import os
 import re
-import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent / 'core'))
 
-def find_md_files():
-    """Finds all markdown files in the docs/endpoints directory."""
-    docs_path = Path("/home/ubuntu/binom-api-encyclopedia/docs/endpoints")
-    return list(docs_path.rglob("*.md"))
+from example_sandbox import PRODUCTION_BASE_URL, Snippet, SnippetRunner, rewrite_base_url, snippet_digest
 
-def test_code_examples():
-    """Finds, extracts, and tests code examples from markdown files."""
-    md_files = find_md_files()
-    total_tests = 0
-    passed_tests = 0
+DOCS_PATH = Path(__file__).parent.parent / "docs" / "endpoints"
 
-    print(f"--- Starting Code Example Test Suite for {len(md_files)} files ---\n")
+# Regex to find python and curl code blocks
+CODE_BLOCK_REGEX = re.compile(r"```(python|curl)\n(.*?)\n```", re.DOTALL)
 
-    # Regex to find python and curl code blocks
-    code_block_regex = re.compile(r"```(python|curl)\n(.*?)\n```", re.DOTALL)
 
+def find_md_files(docs_path=DOCS_PATH):
+    """Finds all markdown files in the docs/endpoints directory."""
+    return sorted(Path(docs_path).rglob("*.md"))
+
+def collect_snippets(md_files, base_url=PRODUCTION_BASE_URL):
+    """Extracts code blocks and deduplicates identical snippets by hash."""
+    snippets = {}
     for md_file in md_files:
-        print(f"--- Testing file: {md_file.name} ---")
         try:
             content = md_file.read_text(encoding="utf-8")
-            code_blocks = code_block_regex.findall(content)
-
-            if not code_blocks:
-                print("    No runnable code examples found.")
-                continue
-
-            for lang, code in code_blocks:
-                total_tests += 1
-                print(f"  - Found {lang} example. Running test...")
-                
-                # Replace placeholder API key if present
-                code = code.replace("os.getenv('binomPublic')", f'"{os.getenv("binomPublic")}"')
-
-                success = False
-                output = ""
-
-                try:
-                    if lang == "python":
-                        # Execute Python code
-                        result = subprocess.run(
-                            ["python3", "-c", code],
-                            capture_output=True, text=True, timeout=30
-                        )
-                    elif lang == "curl":
-                        # Execute cURL command
-                        # Add -s -S for silent but show errors
-                        if "api-key" not in code:
-                            code = code.replace("curl", 'curl -H "api-key: ' + os.getenv("binomPublic") + '"')
-                        result = subprocess.run(
-                            code, shell=True, capture_output=True, text=True, timeout=30
-                        )
-
-                    if result.returncode == 0:
-                        success = True
-                        passed_tests += 1
-                        output = result.stdout.strip()
-                        if not output:
-                            output = "(No output, but exited successfully)"
-                    else:
-                        output = result.stderr.strip()
-
-                except subprocess.TimeoutExpired:
-                    output = "Test timed out after 30 seconds."
-                except Exception as e:
-                    output = f"An unexpected error occurred: {e}"
-
-                if success:
-                    print(f"    ✅ PASS: {output[:150]}")
-                else:
-                    print(f"    ❌ FAIL: {output[:150]}")
-
         except Exception as e:
             print(f"  Error processing file {md_file}: {e}")
-        print("\n")
-
-    print("--- Code Example Test Suite Finished ---")
-    print(f"Summary: {passed_tests} / {total_tests} tests passed.")
+            continue
+
+        for position, (lang, code) in enumerate(CODE_BLOCK_REGEX.findall(content), 1):
+            code = rewrite_base_url(code, base_url)
+            digest = snippet_digest(lang, code)
+            snippet = snippets.get(digest)
+            if snippet is None:
+                snippet = snippets[digest] = Snippet(lang, code)
+            snippet.locations.append(f"{md_file}#{lang}-{position}")
+    return list(snippets.values())
+
+def write_json_report(path, snippets, results, duration):
+    """Writes per-snippet results, including every file the snippet appears in."""
+    by_digest = {result.digest: result for result in results}
+    report = {
+        "duration_seconds": duration,
+        "unique_snippets": len(snippets),
+        "total_examples": sum(len(s.locations) for s in snippets),
+        "passed": sum(1 for r in results if r.passed),
+        "failed": sum(1 for r in results if not r.passed),
+        "snippets": [
+            {
+                "digest": snippet.digest,
+                "lang": snippet.lang,
+                "locations": snippet.locations,
+                "passed": by_digest[snippet.digest].passed,
+                "returncode": by_digest[snippet.digest].returncode,
+                "timed_out": by_digest[snippet.digest].timed_out,
+                "duration_seconds": by_digest[snippet.digest].duration,
+                "stdout": by_digest[snippet.digest].stdout[-2000:],
+                "stderr": by_digest[snippet.digest].stderr[-2000:]
+            }
+            for snippet in snippets
+        ]
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+def write_junit_report(path, snippets, results, duration):
+    """Writes a JUnit XML report with one testcase per example location."""
+    by_digest = {result.digest: result for result in results}
+    cases = [(snippet, location) for snippet in snippets for location in snippet.locations]
+    failures = sum(1 for snippet, _ in cases if not by_digest[snippet.digest].passed)
+
+    suite = ET.Element("testsuite", {
+        "name": "docs-code-examples",
+        "tests": str(len(cases)),
+        "failures": str(failures),
+        "time": f"{duration:.3f}"
+    })
+    for snippet, location in cases:
+        result = by_digest[snippet.digest]
+        file_name, _, block = location.rpartition("#")
+        case = ET.SubElement(suite, "testcase", {
+            "classname": Path(file_name).stem,
+            "name": block,
+            "file": file_name,
+            "time": f"{result.duration:.3f}"
+        })
+        if not result.passed:
+            failure = ET.SubElement(case, "failure", {
+                "message": "timeout" if result.timed_out else f"exit code {result.returncode}"
+            })
+            failure.text = result.stderr[-2000:]
+        if result.stdout:
+            ET.SubElement(case, "system-out").text = result.stdout[-2000:]
+
+    ET.ElementTree(suite).write(path, encoding="utf-8", xml_declaration=True)
+
+def test_code_examples(docs_path=DOCS_PATH, workers=8, timeout=30, base_url=None, api_key=None,
+                       json_report=None, junit_report=None):
+    """Finds, extracts, and tests code examples from markdown files."""
+    md_files = find_md_files(docs_path)
+
+    mock = None
+    if base_url is None:
+        from mock_server import MockBinomServer
+        mock = MockBinomServer().start()
+        base_url = mock.base_url
+        api_key = api_key or "mock-api-key"
+
+    try:
+        snippets = collect_snippets(md_files, base_url)
+        total_examples = sum(len(s.locations) for s in snippets)
+        print(f"--- Starting Code Example Test Suite for {len(md_files)} files ---")
+        print(f"    {total_examples} examples, {len(snippets)} unique, {workers} workers, base URL {base_url}\n")
+
+        runner = SnippetRunner(workers=workers, timeout=timeout, env={
+            "binomPublic": api_key or "",
+            "BINOM_BASE_URL": base_url
+        })
+
+        started = time.perf_counter()
+        results = []
+        for result in runner.run_all(snippets):
+            results.append(result)
+            output = (result.stdout if result.passed else result.stderr).strip()
+            if result.passed and not output:
+                output = "(No output, but exited successfully)"
+            status = "✅ PASS" if result.passed else "❌ FAIL"
+            print(f"  {status} [{result.lang} {result.digest[:8]}] {output[:150]}")
+        duration = time.perf_counter() - started
+    finally:
+        if mock is not None:
+            mock.stop()
+
+    if json_report:
+        write_json_report(json_report, snippets, results, duration)
+    if junit_report:
+        write_junit_report(junit_report, snippets, results, duration)
+
+    by_digest = {result.digest: result for result in results}
+    passed = sum(len(s.locations) for s in snippets if by_digest[s.digest].passed)
+    print("\n--- Code Example Test Suite Finished ---")
+    print(f"Summary: {passed} / {total_examples} tests passed "
+          f"({len(snippets)} unique snippets in {duration:.1f}s).")
+    return passed, total_examples
+
+# Not a pytest test: it runs the documentation examples on demand
+test_code_examples.__test__ = False
 
 if __name__ == "__main__":
-    if not os.getenv("binomPublic"):
+    parser = argparse.ArgumentParser(description="Run code examples from the endpoint documentation")
+    parser.add_argument("--docs", default=str(DOCS_PATH), help="Directory with endpoint markdown files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Concurrent examples")
+    parser.add_argument("--timeout", type=float, default=30, help="Per-example timeout in seconds")
+    parser.add_argument("--live", action="store_true", help="Run against the live API instead of the local mock")
+    parser.add_argument("--json", dest="json_report", help="Write a JSON report to this path")
+    parser.add_argument("--junit", dest="junit_report", help="Write a JUnit XML report to this path")
+    args = parser.parse_args()
+
+    if args.live and not os.getenv("binomPublic"):
         print("CRITICAL ERROR: `binomPublic` environment variable not set.")
-    else:
-        test_code_examples()
-
+        sys.exit(1)
+
+    passed, total = test_code_examples(
+        docs_path=args.docs,
+        workers=args.workers,
+        timeout=args.timeout,
+        base_url=PRODUCTION_BASE_URL if args.live else None,
+        api_key=os.getenv("binomPublic") if args.live else None,
+        json_report=args.json_report,
+        junit_report=args.junit_report
+    )
+    sys.exit(0 if passed == total else 1)
@@ -2,15 +2,33 @@
 """
 This script intelligently fetches real API responses for all documented endpoints.
 It reads the request_schema from encyclopedia.json to generate valid dummy data for POST/PUT requests.
+
+Requests run concurrently with a per-category concurrency limit: each category has its
+own queue, and its next request is submitted only when one of its in-flight requests
+finishes, so a busy category never ties up pool workers. Dummy payloads are
+generated from a seeded RNG, so every run sends the same data for the same endpoint.
+Endpoints whose saved response is still fresh and whose schema hash is unchanged are
+skipped, which turns a routine refresh into a few seconds of work.
 """
 
+import argparse
+import hashlib
 import os
+import sys
 import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 import requests
 import random
 import string
 
+sys.path.insert(0, str(Path(__file__).parent / 'core'))
+
+from encyclopedia_index import EncyclopediaIndex
+
 API_KEY = os.getenv("binomPublic")
 BASE_URL = "https://pierdun.com/public/api/v1"
 HEADERS = {
@@ -23,99 +41,241 @@ STATS_PARAMS = {
     "timezone": "UTC"
 }
 
+OUTPUT_DIR = Path("/home/ubuntu/binom-api-encyclopedia/docs/examples/responses")
+MANIFEST_NAME = ".fetch_manifest.json"
+
+DEFAULT_SEED = 20250927
+DEFAULT_MAX_AGE_HOURS = 24
+DEFAULT_WORKERS = 8
+# Concurrent requests per endpoint category; anything not listed uses "default"
+CATEGORY_CONCURRENCY = {
+    "default": 4,
+    "other": 6,
+    "conversions": 2,
+    "info": 2
+}
+
 def get_endpoints_from_encyclopedia():
-    """Returns a dictionary of endpoints with their details from encyclopedia.json."""
+    """Returns a lazily-loaded index of endpoints from encyclopedia.json."""
     encyclopedia_path = Path("/home/ubuntu/binom-api-encyclopedia/encyclopedia.json")
-    with open(encyclopedia_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return data["endpoints"]
+    return EncyclopediaIndex(encyclopedia_path)
+
+def endpoint_rng(seed, method, endpoint):
+    """Returns an RNG seeded per endpoint, so payloads do not depend on fetch order."""
+    digest = hashlib.sha256(f"{seed}:{method} {endpoint}".encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
 
-def generate_value_from_schema(schema):
+def generate_value_from_schema(schema, rng=random):
     """Generates a dummy value based on a JSON schema property."""
     if not isinstance(schema, dict):
         return None
-    
+
     schema_type = schema.get("type")
     if schema_type == "string":
-        return ''.join(random.choices(string.ascii_lowercase, k=10))
+        return ''.join(rng.choices(string.ascii_lowercase, k=10))
     elif schema_type == "integer":
-        return random.randint(1, 100)
+        return rng.randint(1, 100)
     elif schema_type == "number":
-        return round(random.uniform(1.0, 100.0), 2)
+        return round(rng.uniform(1.0, 100.0), 2)
     elif schema_type == "boolean":
-        return random.choice([True, False])
+        return rng.choice([True, False])
     elif schema_type == "array":
         return []
     elif schema_type == "object":
         return {}
     return None
 
-def generate_dummy_data_from_schema(schema):
+def generate_dummy_data_from_schema(schema, rng=random):
     """Generates dummy data for POST/PUT requests based on the request_schema."""
     if not schema or "properties" not in schema:
         return {}
-    
+
     data = {}
     for key, prop_schema in schema["properties"].items():
-        data[key] = generate_value_from_schema(prop_schema)
+        data[key] = generate_value_from_schema(prop_schema, rng)
     return data
 
-def fetch_and_save_examples():
-    """Fetches real API responses and saves them to files."""
-    endpoints_details = get_endpoints_from_encyclopedia()
-    output_dir = Path("/home/ubuntu/binom-api-encyclopedia/docs/examples/responses")
+def schema_hash(method, record, params, seed):
+    """Hashes everything that determines the request sent for an endpoint."""
+    material = {
+        "method": method,
+        "request_schema": record.get("request_schema") or {},
+        "response_schema": record.get("response_schema") or {},
+        "params": params,
+        "seed": seed
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode("utf-8")).hexdigest()
+
+def output_path_for(output_dir, endpoint):
+    output_filename = endpoint.replace("/", "_").strip("_") + ".json"
+    return output_dir / output_filename
+
+def load_manifest(output_dir):
+    try:
+        with open(output_dir / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def save_manifest(output_dir, manifest):
+    tmp_path = output_dir / (MANIFEST_NAME + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, output_dir / MANIFEST_NAME)
+
+def is_fresh(output_path, entry, current_hash, max_age_seconds):
+    """A saved response is reused when it is recent enough and the schema did not change."""
+    if not entry or entry.get("schema_hash") != current_hash:
+        return False
+    try:
+        age = time.time() - output_path.stat().st_mtime
+    except OSError:
+        return False
+    return age <= max_age_seconds
+
+def category_limit(limits, category):
+    return max(1, limits.get(category, limits.get("default", 4)))
+
+def run_by_category(pool, jobs, limits, submit):
+    """
+    Runs jobs with at most limits[category] in flight per category.
+
+    Jobs wait in one queue per category and are handed to the pool only when their
+    category has a free slot, so workers never block waiting on a category.
+    Yields (job, future) as jobs complete.
+    """
+    queues = {}
+    for job in jobs:
+        queues.setdefault(job["category"], deque()).append(job)
+
+    in_flight = {}
+    running = {category: 0 for category in queues}
+
+    def fill(category):
+        queue = queues[category]
+        while queue and running[category] < category_limit(limits, category):
+            job = queue.popleft()
+            in_flight[submit(pool, job)] = job
+            running[category] += 1
+
+    for category in queues:
+        fill(category)
+    while in_flight:
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            job = in_flight.pop(future)
+            running[job["category"]] -= 1
+            fill(job["category"])
+            yield job, future
+
+_thread_local = threading.local()
+
+def get_session():
+    """One keep-alive session per worker thread."""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = _thread_local.session = requests.Session()
+        session.headers.update(HEADERS)
+    return session
+
+def fetch_endpoint(method, endpoint, params, payload, output_path, base_url=BASE_URL):
+    """Performs one request and saves the response; returns (saved, message)."""
+    url = base_url + endpoint
+    try:
+        if method in ["POST", "PUT"]:
+            response = get_session().request(method, url, json=payload, params=params, timeout=30)
+        else:
+            response = get_session().request(method, url, params=params, timeout=30)
+    except requests.exceptions.RequestException as e:
+        return False, f"❌ FAILED ({method}) for {endpoint}: Request failed with exception: {e}"
+
+    if response.status_code not in [200, 201, 204]:
+        return False, f"❌ FAILED ({method}) for {endpoint}: Status {response.status_code} - {response.text[:100]}..."
+    if not response.content:
+        return False, f"✅ SUCCESS ({method}): Received empty response for {endpoint}"
+    try:
+        data = response.json()
+    except json.JSONDecodeError:
+        return False, f"✅ SUCCESS ({method}): Received non-JSON response for {endpoint}"
+
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, output_path)
+    return True, f"✅ SUCCESS ({method}): Saved example for {endpoint} to {output_path}"
+
+def fetch_and_save_examples(index=None, output_dir=OUTPUT_DIR, base_url=BASE_URL, workers=DEFAULT_WORKERS,
+                            seed=DEFAULT_SEED, max_age_hours=DEFAULT_MAX_AGE_HOURS, force=False,
+                            category_limits=None):
+    """Fetches real API responses concurrently and saves them to files."""
+    started = time.perf_counter()
+    index = index or get_endpoints_from_encyclopedia()
+    output_dir = Path(output_dir)
     output_dir.mkdir(exist_ok=True)
+    manifest = {} if force else load_manifest(output_dir)
+    limits = category_limits or CATEGORY_CONCURRENCY
+    max_age_seconds = max_age_hours * 3600
 
-    print(f"--- Starting to fetch {len(endpoints_details)} API examples (Intelligent) ---")
+    print(f"--- Starting to fetch {len(index)} API examples (Intelligent) ---")
+
+    jobs = []
+    skipped_fresh = 0
+    for method, endpoint in index.keys():
 
-    for endpoint, details in endpoints_details.items():
-        method = details.get("method", "GET")
-        
         if "{" in endpoint:
             print(f"SKIPPING dynamic endpoint: {endpoint}")
             continue
 
+        record = index.get(endpoint, method) or {}
         params = STATS_PARAMS if "stats" in endpoint else {}
-        url = BASE_URL + endpoint
-
-        try:
-            response = None
-            if method == "GET":
-                response = requests.get(url, headers=HEADERS, params=params)
-            elif method in ["POST", "PUT"]:
-                request_schema = details.get("request_schema", {})
-                dummy_data = generate_dummy_data_from_schema(request_schema)
-                if method == "POST":
-                    response = requests.post(url, headers=HEADERS, json=dummy_data, params=params)
-                else: # PUT
-                    response = requests.put(url, headers=HEADERS, json=dummy_data, params=params)
-            else: # For DELETE and other methods
-                response = requests.request(method, url, headers=HEADERS, params=params)
-
-            if response is not None:
-                if response.status_code in [200, 201, 204]:
-                    output_filename = endpoint.replace("/", "_").strip("_") + ".json"
-                    output_path = output_dir / output_filename
-                    if response.content:
-                        try:
-                            with open(output_path, "w", encoding="utf-8") as f:
-                                json.dump(response.json(), f, indent=4, ensure_ascii=False)
-                            print(f"✅ SUCCESS ({method}): Saved example for {endpoint} to {output_path}")
-                        except json.JSONDecodeError:
-                             print(f"✅ SUCCESS ({method}): Received non-JSON response for {endpoint}")
-                    else:
-                        print(f"✅ SUCCESS ({method}): Received empty response for {endpoint}")
-                else:
-                    print(f"❌ FAILED ({method}) for {endpoint}: Status {response.status_code} - {response.text[:100]}...")
-
-        except requests.exceptions.RequestException as e:
-            print(f"❌ FAILED ({method}) for {endpoint}: Request failed with exception: {e}")
+        current_hash = schema_hash(method, record, params, seed)
+        output_path = output_path_for(output_dir, endpoint)
+
+        if is_fresh(output_path, manifest.get(f"{method} {endpoint}"), current_hash, max_age_seconds):
+            skipped_fresh += 1
+            continue
+
+        payload = None
+        if method in ["POST", "PUT"]:
+            payload = generate_dummy_data_from_schema(record.get("request_schema", {}),
+                                                      endpoint_rng(seed, method, endpoint))
+        jobs.append({"method": method, "endpoint": endpoint, "params": params, "payload": payload,
+                     "output_path": output_path, "category": record.get("category", "default"),
+                     "schema_hash": current_hash})
 
+    def submit(pool, job):
+        return pool.submit(fetch_endpoint, job["method"], job["endpoint"], job["params"],
+                           job["payload"], job["output_path"], base_url)
+
+    saved = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for job, future in run_by_category(pool, jobs, limits, submit):
+            ok, message = future.result()
+            print(message)
+            if ok:
+                saved += 1
+                manifest[f"{job['method']} {job['endpoint']}"] = {
+                    "schema_hash": job["schema_hash"],
+                    "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+                }
+
+    save_manifest(output_dir, manifest)
+    elapsed = time.perf_counter() - started
     print("\n--- Finished fetching API examples (Intelligent) ---")
+    print(f"Requested: {len(jobs)}, saved: {saved}, fresh (skipped): {skipped_fresh}, time: {elapsed:.1f}s")
+    return {"requested": len(jobs), "saved": saved, "skipped_fresh": skipped_fresh, "seconds": elapsed}
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch real API responses for documented endpoints")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Total concurrent requests")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed for dummy request payloads")
+    parser.add_argument("--max-age-hours", type=float, default=DEFAULT_MAX_AGE_HOURS,
+                        help="Reuse saved responses younger than this when the schema is unchanged")
+    parser.add_argument("--force", action="store_true", help="Refetch every endpoint")
+    args = parser.parse_args()
+
     if not API_KEY:
         print("CRITICAL ERROR: `binomPublic` environment variable not set.")
     else:
-        fetch_and_save_examples()
-
+        fetch_and_save_examples(workers=args.workers, seed=args.seed,
+                                max_age_hours=args.max_age_hours, force=args.force)
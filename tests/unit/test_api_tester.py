@@ -0,0 +1,129 @@
+"""
+Unit tests for live response contract validation
+
+Tests single-request checks, list sampling and per-field drift aggregation.
+"""
+
+import random
+import pytest
+import sys
+from pathlib import Path
+
+# Add validation to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'validation'))
+
+import api_tester
+from api_tester import APITester, sample_lists
+
+
+OFFER_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "required": ["id", "name"],
+        "properties": {"id": {"type": "integer"}, "name": {"type": "string"}}
+    }
+}
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+        self.text = ""
+
+    def json(self):
+        return self.payload
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Serves queued payloads in place of requests.get and records each call"""
+    class CallLog(list):
+        payload = []
+
+    log = CallLog()
+
+    def fake_get(url, **kwargs):
+        log.append(url)
+        return FakeResponse(log.payload)
+
+    monkeypatch.setattr(api_tester.requests, "get", fake_get)
+    return log
+
+
+class TestSampling:
+    """Tests for list sampling"""
+
+    def test_long_lists_are_sampled_in_order(self):
+        """Should keep sample_size items of every long list, in original order"""
+        data = {"rows": list(range(1000)), "nested": [{"x": list(range(20))}]}
+        sampled, count = sample_lists(data, 10, random.Random(0))
+        assert len(sampled["rows"]) == 10
+        assert sampled["rows"] == sorted(sampled["rows"])
+        assert len(sampled["nested"][0]["x"]) == 10
+        assert count == 2
+
+    def test_no_sampling(self):
+        """Should return data untouched when sample_size is None"""
+        data = list(range(1000))
+        assert sample_lists(data, None, random.Random(0)) == (data, 0)
+
+
+class TestContractCheck:
+    """Tests for APITester.check_contract"""
+
+    def test_single_request_per_endpoint(self, calls):
+        """Should issue exactly one request for the status and schema check"""
+        calls.payload = [{"id": 1, "name": "a"}]
+        tester = APITester()
+        ok, message = tester.validate_response_format("info/offer", OFFER_SCHEMA)
+        assert ok, message
+        assert len(calls) == 1
+
+    def test_encyclopedia_schema_is_used(self, calls):
+        """Should validate against the endpoint's documented response_schema"""
+        calls.payload = {"unexpected": True}
+        tester = APITester()
+        result = tester.check_contract("info/offer")
+        assert result["success"]
+        expected = tester.schema_validator.validator_for("response", "GET", "/info/offer")
+        assert result["valid"] == expected.is_valid(calls.payload)
+
+    def test_verified_schema_mismatch_is_reported(self, calls):
+        """Should flag a live response that breaks the verified schema and record its drift"""
+        calls.payload = {"status": "success", "data": [{"id": "7", "name": "Offer"}]}
+        tester = APITester()
+        result = tester.check_contract("info/offer")
+        assert result["success"]
+        assert not result["valid"]
+        assert [(e["field"], e["rule"]) for e in result["errors"]] == [("$.data[].id", "type")]
+        assert {(d["endpoint"], d["field"]) for d in tester.drift.summary()} == {("GET /info/offer", "$.data[].id")}
+
+        calls.payload = {"status": "success", "data": [{"id": 7, "name": "Offer"}]}
+        assert tester.check_contract("info/offer")["valid"]
+
+    def test_drift_is_aggregated_per_field(self, calls):
+        """Should count violations per field across items and responses"""
+        calls.payload = [{"id": "1", "name": "a"}, {"id": "2"}, {"id": 3, "name": "c"}]
+        tester = APITester(sample_size=None)
+        tester.check_contract("info/offer", expected_schema=OFFER_SCHEMA)
+        result = tester.check_contract("info/offer", expected_schema=OFFER_SCHEMA)
+        assert not result["valid"]
+
+        drift = {(d["field"], d["rule"]): d["count"] for d in tester.drift.summary()}
+        assert drift[("$[].id", "type")] == 4
+        assert drift[("$[]", "required")] == 2
+        assert tester.drift.responses == 2
+
+    def test_sampling_bounds_validation(self, calls):
+        """Should validate only sample_size items of a huge list"""
+        calls.payload = [{"id": "bad", "name": "x"}] * 5000
+        tester = APITester(sample_size=25)
+        result = tester.check_contract("info/offer", expected_schema=OFFER_SCHEMA)
+        assert result["sampled_lists"] == 1
+        assert len(result["errors"]) == 25
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
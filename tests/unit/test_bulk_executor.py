@@ -0,0 +1,158 @@
+"""
+Unit tests for the bulk campaign update executor
+
+Tests AIMD concurrency control, per-campaign ordering, retries and streaming.
+"""
+
+import threading
+import time
+import pytest
+import requests
+import sys
+from pathlib import Path
+
+# Add scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+
+import binom_api
+from binom_api import BinomAPI
+from bulk_executor import AIMDLimiter, BulkCampaignUpdater, error_status
+
+
+class FakeAPI:
+    """Records update_campaign calls; raises 429 for the first rate_limited calls"""
+
+    def __init__(self, latency=0.01, rate_limited=0, fail_ids=()):
+        self.latency = latency
+        self.rate_limited = rate_limited
+        self.fail_ids = set(fail_ids)
+        self.calls = []
+        self.retry_flags = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.metrics = None
+        self.tracker = "test"
+        self._lock = threading.Lock()
+
+    def update_campaign(self, campaign_id, payload, retry_errors=None):
+        with self._lock:
+            self.retry_flags.append(retry_errors)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            limited = self.rate_limited > 0
+            if limited:
+                self.rate_limited -= 1
+        try:
+            time.sleep(self.latency)
+            if limited:
+                raise Exception("API Error 429: Too Many Requests")
+            if campaign_id in self.fail_ids:
+                raise Exception("API Error 400: Bad Request")
+            with self._lock:
+                self.calls.append((campaign_id, payload))
+            return {"id": campaign_id}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class TestAIMDLimiter:
+    """Tests for the concurrency controller"""
+
+    def test_additive_increase_and_multiplicative_decrease(self):
+        """Should grow slowly on fast responses and halve on overload"""
+        limiter = AIMDLimiter(initial=2, maximum=8, latency_target=1.0)
+        for _ in range(20):
+            limiter.on_success(0.01)
+        assert 4 <= limiter.limit <= 8
+        before = limiter._limit
+        limiter.on_overload()
+        assert limiter._limit == pytest.approx(before / 2)
+
+    def test_slow_responses_count_as_overload(self):
+        """Should back off when latency exceeds the target"""
+        limiter = AIMDLimiter(initial=8, latency_target=0.5)
+        limiter.on_success(2.0)
+        assert limiter.limit == 4
+
+    def test_error_status(self):
+        """Should read the HTTP status from BinomAPI errors"""
+        assert error_status(Exception("API Error 429: slow down")) == 429
+        assert error_status(Exception("Ошибка запроса: timeout")) is None
+
+
+class TestBulkCampaignUpdater:
+    """Tests for bulk execution"""
+
+    def test_all_items_are_processed_concurrently(self):
+        """Should run updates in parallel up to the adaptive limit"""
+        api = FakeAPI(latency=0.02)
+        updater = BulkCampaignUpdater(api, max_concurrency=8, initial_concurrency=4)
+        results = list(updater.run((i, {"n": i}) for i in range(40)))
+
+        assert sorted(r.campaign_id for r in results) == list(range(40))
+        assert all(r.ok for r in results)
+        assert 1 < api.max_in_flight <= 8
+
+    def test_per_campaign_ordering(self):
+        """Should apply updates of one campaign strictly in submission order"""
+        api = FakeAPI(latency=0.005)
+        items = [(i % 3, {"seq": i}) for i in range(30)]
+        results = list(BulkCampaignUpdater(api, max_concurrency=8).run(items))
+
+        for campaign_id in range(3):
+            applied = [payload["seq"] for cid, payload in api.calls if cid == campaign_id]
+            assert applied == [seq for seq in range(30) if seq % 3 == campaign_id]
+            sequences = [r.sequence for r in results if r.campaign_id == campaign_id]
+            assert sequences == sorted(sequences)
+
+    def test_rate_limits_are_retried(self):
+        """Should retry 429 responses with backoff and shrink concurrency"""
+        api = FakeAPI(rate_limited=2)
+        updater = BulkCampaignUpdater(api, initial_concurrency=4, backoff=0.01)
+        results = list(updater.run([(1, {}), (2, {})]))
+
+        assert all(r.ok for r in results)
+        assert sum(r.attempts for r in results) == 4
+        assert updater.limiter.limit < 4
+        assert set(api.retry_flags) == {False}
+
+    def test_limiter_sees_every_rate_limit_from_binom_api(self, monkeypatch):
+        """Should turn off client retries so each 429 reaches the limiter before the next attempt"""
+        sent = []
+        overloads = []
+
+        def respond(**kwargs):
+            sent.append(kwargs["method"])
+            response = requests.Response()
+            response.status_code = 429 if len(sent) <= 2 else 200
+            response._content = b"Too Many Requests" if len(sent) <= 2 else b'{"id": 1}'
+            response.request = requests.Request(kwargs["method"], kwargs["url"]).prepare()
+            return response
+
+        class CountingLimiter(AIMDLimiter):
+            def on_overload(self):
+                overloads.append(len(sent))
+                super().on_overload()
+
+        monkeypatch.setattr(binom_api.requests, "request", respond)
+        api = BinomAPI(api_key="k", base_url="http://x")
+        updater = BulkCampaignUpdater(api, backoff=0.01, limiter=CountingLimiter(initial=4))
+        [result] = list(updater.run([(1, {"name": "x"})]))
+
+        assert result.ok
+        assert result.attempts == 3
+        assert sent == ["PUT"] * 3
+        assert overloads == [1, 2]
+
+    def test_errors_are_reported_per_item(self):
+        """Should stream failures as results instead of raising"""
+        api = FakeAPI(fail_ids={2})
+        results = {r.campaign_id: r for r in BulkCampaignUpdater(api).run([(1, {}), (2, {})])}
+        assert results[1].ok
+        assert results[2].status == "error"
+        assert results[2].http_status == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
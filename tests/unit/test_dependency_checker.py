@@ -0,0 +1,124 @@
+"""
+Unit tests for the endpoint dependency graph
+
+Tests graph derivation, cycle detection, topological levels and level-wise probing.
+"""
+
+import json
+import threading
+import time
+import pytest
+import sys
+from pathlib import Path
+
+# Add validation to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'validation'))
+
+import dependency_checker
+from api_tester import ProbeCache
+from dependency_checker import DependencyChecker, DependencyCycleError, resource_of
+
+
+class RecordingProbe:
+    """Fake probe that fails given endpoints and tracks peak concurrency"""
+
+    def __init__(self, failing=(), delay=0.0):
+        self.failing = set(failing)
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, endpoint):
+        with self._lock:
+            self.calls.append(endpoint)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if endpoint in self.failing:
+            return False, "Endpoint not found"
+        return True, "Success"
+
+
+def make_checker(probe, path=None):
+    return DependencyChecker(path, probe_cache=ProbeCache(probe, ttl=60))
+
+
+class TestGraph:
+    """Tests for the dependency DAG"""
+
+    def test_resource_of(self):
+        """Should map endpoints and their views to resources"""
+        assert resource_of("/offer/{id}/rename") == "offer"
+        assert resource_of("stats/campaign") == "campaign"
+        assert resource_of("info/traffic_source") == "traffic_source"
+        assert resource_of("PUT /domains/check") == "domain"
+
+    def test_creation_chain(self):
+        """Should order affiliate_network before offer before campaign"""
+        checker = make_checker(RecordingProbe())
+        level = checker.level_of
+        assert level["affiliate_network"] < level["offer"] < level["campaign"]
+        assert checker.required_resources("campaign/create") >= {"traffic_source", "offer", "affiliate_network"}
+
+    def test_encyclopedia_references_become_edges(self):
+        """Should add edges for {campaignId} path params and *Id request fields"""
+        checker = make_checker(RecordingProbe())
+        assert "campaign" in checker.graph["magic_checker"]
+        assert "campaign" in checker.required_resources("magic_checker/add/{campaignId}")
+        assert "magic_checker/add/{campaignId}" in checker.get_affected_endpoints("campaign")
+
+    def test_cycle_detection(self, tmp_path, monkeypatch):
+        """Should raise DependencyCycleError naming the cycle"""
+        monkeypatch.setitem(dependency_checker.RESOURCE_DEPENDENCIES, "affiliate_network", ["campaign"])
+        empty = tmp_path / "encyclopedia.json"
+        empty.write_text(json.dumps({"endpoints": {}}))
+        with pytest.raises(DependencyCycleError) as excinfo:
+            make_checker(RecordingProbe(), empty)
+        cycle = excinfo.value.cycle
+        assert cycle[0] == cycle[-1]
+        assert {"affiliate_network", "offer", "campaign"} <= set(cycle)
+
+
+class TestProbing:
+    """Tests for availability probing"""
+
+    def test_probes_run_concurrently_per_level(self):
+        """Should check every resource in roughly one round trip per level"""
+        probe = RecordingProbe(delay=0.05)
+        checker = make_checker(probe)
+        started = time.perf_counter()
+        report = checker.check_all()
+        elapsed = time.perf_counter() - started
+
+        assert all(entry["available"] for entry in report.values())
+        assert len(probe.calls) == len(set(probe.calls))
+        assert probe.peak > 1
+        assert elapsed < 0.05 * (len(checker.levels()) + 2)
+
+    def test_unavailable_prerequisite_blocks_dependents(self):
+        """Should fail dependents without probing them"""
+        probe = RecordingProbe(failing={"offer/affiliate_network/list"})
+        checker = make_checker(probe)
+        ok, message = checker.check("campaign/create")
+        assert not ok
+        assert "offer/affiliate_network/list" in message
+        assert checker.list_endpoint("offer") not in probe.calls
+
+        assert checker.check("landing/update") == (True, "No dependencies to check")
+
+    def test_results_are_cached(self):
+        """Should reuse cached probes across checks"""
+        probe = RecordingProbe()
+        checker = make_checker(probe)
+        checker.check_many(["campaign/create", "stats/campaign", "rotation/list/filtered"])
+        calls = len(probe.calls)
+        checker.check("campaign/create")
+        assert len(probe.calls) == calls
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,121 @@
+"""
+Unit tests for EncyclopediaIndex
+
+Tests sidecar index building, lazy record decoding and invalidation.
+"""
+
+import json
+import os
+import pytest
+import sys
+from pathlib import Path
+
+# Add scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+
+from encyclopedia_index import EncyclopediaIndex
+
+
+SAMPLE = {
+    "metadata": {"title": "Тестовая энциклопедия", "version": "1.0"},
+    "endpoints": {
+        "/info/offer": {
+            "path": "/info/offer",
+            "method": "GET",
+            "summary": "Список офферов",
+            "category": "info",
+            "tags": ["info", "offer"]
+        },
+        "/campaign/{id}": {
+            "path": "/campaign/{id}",
+            "method": "PUT",
+            "summary": "Обновить кампанию",
+            "category": "campaign",
+            "tags": ["campaign"]
+        }
+    },
+    "categories": {"info": {"endpoints": 1}, "campaign": {"endpoints": 1}}
+}
+
+
+@pytest.fixture
+def encyclopedia_file(tmp_path):
+    path = tmp_path / "encyclopedia.json"
+    path.write_text(json.dumps(SAMPLE, indent=2, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+class TestEncyclopediaIndex:
+    """Tests for EncyclopediaIndex"""
+
+    def test_records_match_full_load(self, encyclopedia_file):
+        """Should decode every record identically to json.load"""
+        index = EncyclopediaIndex(encyclopedia_file)
+        for path, record in SAMPLE["endpoints"].items():
+            assert index.get(path) == record
+
+    def test_sidecar_written(self, encyclopedia_file):
+        """Should write the sidecar index next to the source"""
+        index = EncyclopediaIndex(encyclopedia_file)
+        assert index.index_path.exists()
+        assert len(index) == 2
+
+    def test_method_lookup(self, encyclopedia_file):
+        """Should honour method and resolve it without decoding records"""
+        index = EncyclopediaIndex(encyclopedia_file)
+        assert index.get("/campaign/{id}", "GET") is None
+        assert index.get("/campaign/{id}", "put")["summary"] == "Обновить кампанию"
+        assert index.method_of("/info/offer") == "GET"
+        assert index.cache_misses == 1
+
+    def test_category_and_tag(self, encyclopedia_file):
+        """Should group endpoints by category and tag"""
+        index = EncyclopediaIndex(encyclopedia_file)
+        assert index.by_category("info") == [("GET", "/info/offer")]
+        assert ("PUT", "/campaign/{id}") in index.by_tag("campaign")
+        assert index.by_tag("missing") == []
+
+    def test_raw_bytes(self, encyclopedia_file):
+        """Should return the undecoded bytes of a record"""
+        index = EncyclopediaIndex(encyclopedia_file)
+        raw = index.raw("/info/offer")
+        assert json.loads(raw) == SAMPLE["endpoints"]["/info/offer"]
+        assert index.cache_misses == 0
+
+    def test_sections(self, encyclopedia_file):
+        """Should decode top-level sections on demand"""
+        index = EncyclopediaIndex(encyclopedia_file)
+        assert index.section("metadata")["title"] == "Тестовая энциклопедия"
+        assert index.section("absent") is None
+
+    def test_lru_eviction(self, encyclopedia_file):
+        """Should keep at most cache_size decoded records"""
+        index = EncyclopediaIndex(encyclopedia_file, cache_size=1)
+        index.get("/info/offer")
+        index.get("/campaign/{id}")
+        index.get("/info/offer")
+        assert index.cache_misses == 3
+        assert index.cache_hits == 0
+
+    def test_mtime_invalidation(self, encyclopedia_file):
+        """Should rebuild the index when the source changes"""
+        index = EncyclopediaIndex(encyclopedia_file)
+        assert index.get("/info/offer")["summary"] == "Список офферов"
+
+        data = json.loads(json.dumps(SAMPLE))
+        data["endpoints"]["/info/offer"]["summary"] = "Обновлено"
+        encyclopedia_file.write_text(json.dumps(data), encoding="utf-8")
+        stat = encyclopedia_file.stat()
+        os.utime(encyclopedia_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        assert index.get("/info/offer")["summary"] == "Обновлено"
+
+    def test_reuses_existing_sidecar(self, encyclopedia_file):
+        """Should load a fresh sidecar instead of rebuilding"""
+        EncyclopediaIndex(encyclopedia_file)
+        second = EncyclopediaIndex(encyclopedia_file)
+        assert second.refresh() is False
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
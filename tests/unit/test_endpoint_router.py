@@ -0,0 +1,99 @@
+"""
+Unit tests for EndpointRouter
+
+Tests matching concrete request URLs to encyclopedia path templates.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# Add scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+
+from endpoint_router import EndpointRouter
+
+
+ROUTES = [
+    ("GET", "/rotation/{id}/clone"),
+    ("PATCH", "/rotation/{id}"),
+    ("GET", "/tags/{subject}/{id}"),
+    ("DELETE", "/tags/{id}"),
+    ("POST", "/tags/{id}/link"),
+    ("POST", "/tags/{subject}/change_tags"),
+    ("GET", "/groups/{subject}/filtered"),
+    ("DELETE", "/magic_checker/campaign/{campaignId}"),
+    ("DELETE", "/magic_checker/{binomMagicCheckerId}"),
+    ("GET", "/clicklog"),
+    ("GET", "/campaign/{id}"),
+    ("PUT", "/campaign/{id}"),
+]
+
+
+@pytest.fixture
+def router():
+    return EndpointRouter(ROUTES)
+
+
+class TestEndpointRouter:
+    """Tests for EndpointRouter.match"""
+
+    def test_static_route(self, router):
+        """Should match templates without placeholders"""
+        found = router.match("/clicklog")
+        assert found.key == "GET /clicklog"
+        assert found.params == {}
+
+    def test_placeholder_capture(self, router):
+        """Should capture placeholder values by name"""
+        found = router.match("/campaign/82", "PUT")
+        assert found.template == "/campaign/{id}"
+        assert found.params == {"id": "82"}
+
+    def test_static_segment_preferred(self, router):
+        """Should prefer static segments over placeholders"""
+        found = router.match("/magic_checker/campaign/7")
+        assert found.template == "/magic_checker/campaign/{campaignId}"
+        assert found.params == {"campaignId": "7"}
+        assert router.match("/magic_checker/15").params == {"binomMagicCheckerId": "15"}
+
+    def test_backtracking(self, router):
+        """Should fall back to a placeholder branch when the static one dead-ends"""
+        found = router.match("/tags/change_tags/5")
+        assert found.template == "/tags/{subject}/{id}"
+        assert found.params == {"subject": "change_tags", "id": "5"}
+
+    def test_param_names_per_route(self, router):
+        """Should keep placeholder names of each template at shared positions"""
+        assert router.match("/tags/3").params == {"id": "3"}
+        assert router.match("/tags/campaign/3").params == {"subject": "campaign", "id": "3"}
+
+    def test_method_filter(self, router):
+        """Should honour the HTTP method"""
+        assert router.match("/rotation/5", "GET") is None
+        assert router.match("/rotation/5", "patch").method == "PATCH"
+
+    def test_full_url_normalization(self, router):
+        """Should strip scheme, host, API base path, query and trailing slash"""
+        found = router.match("https://pierdun.com/public/api/v1/rotation/9/clone/?x=1")
+        assert found.key == "GET /rotation/{id}/clone"
+        assert found.params == {"id": "9"}
+
+    def test_no_match(self, router):
+        """Should return None for unknown paths"""
+        assert router.match("/unknown/path") is None
+        assert router.match("/rotation/5/clone/extra") is None
+
+    def test_template_fallback(self, router):
+        """Should collapse identifier segments for undocumented paths"""
+        assert router.template_for("/campaign/82") == "/campaign/{id}"
+        assert router.template_for("/stats/offer/123") == "/stats/offer/{id}"
+        assert router.template_for("/info/offer") == "/info/offer"
+
+    def test_len(self, router):
+        """Should count registered method/template pairs"""
+        assert len(router) == len(ROUTES)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
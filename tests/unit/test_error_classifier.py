@@ -0,0 +1,252 @@
+"""
+Unit tests for the compiled error classifier
+
+Tests classification of failed responses from the error catalog, endpoint
+error patterns and encyclopedia error_handling blocks, and the automatic
+retry/skip decisions BinomAPI makes with it.
+"""
+
+import json
+import pytest
+import sys
+from pathlib import Path
+
+import requests
+
+# Add scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+
+import binom_api
+from binom_api import BinomAPI
+from bulk_executor import error_status
+from error_classifier import (AuthError, ClientError, ErrorClassifier, NotFoundError,
+                              RateLimitError, TransientError, FAIL, RETRY, SKIP)
+
+
+CATALOG = {
+    "HTTP 502": {
+        "name": "Server Error (Bad Gateway)",
+        "description": "Временные проблемы инфраструктуры",
+        "recovery_strategies": [
+            {"strategy": "Exponential Backoff Retry", "details": "Повторить через 1, 2 секунды. Максимум 2 попытки."},
+            {"strategy": "Circuit Breaker", "details": "Пауза 5 минут"}
+        ]
+    },
+    "Bad request": {
+        "name": "Client Error (Bad Request)",
+        "description": "Неверный запрос",
+        "recovery_strategies": [{"strategy": "Validate Schema", "details": "Сверить тело со схемой"}]
+    },
+    "Request timeout (30s)": {
+        "name": "Request Timeout",
+        "description": "Сервер не ответил за 30 секунд",
+        "recovery_strategies": [{"strategy": "Increase Timeout", "details": "До 60 секунд"}]
+    }
+}
+
+PATTERNS = {
+    "GET /landing/{id}": {"most_common_error": "HTTP 502", "frequency": "9/9 times", "error_rate": "100.0%"},
+    "GET /offer/{id}": {"most_common_error": "HTTP 502", "frequency": "1/10 times", "error_rate": "10.0%"}
+}
+
+COMMON_ERRORS = {
+    "400": {"description": "Bad Request - Missing required parameters", "solution": "Include datePreset"},
+    "404": {"description": "Not Found - Invalid endpoint or resource ID", "solution": "Check endpoint path"}
+}
+
+
+@pytest.fixture
+def classifier(tmp_path):
+    endpoints = {}
+    for method, path in [("GET", "/offer/{id}"), ("POST", "/offer"), ("GET", "/landing/{id}")]:
+        endpoints[f"{method} {path}"] = {"method": method, "path": path,
+                                          "error_handling": {"common_errors": COMMON_ERRORS}}
+    files = {"encyclopedia.json": {"endpoints": endpoints}, "catalog.json": CATALOG,
+             "patterns.json": PATTERNS}
+    for name, content in files.items():
+        (tmp_path / name).write_text(json.dumps(content, ensure_ascii=False), encoding="utf-8")
+    return ErrorClassifier(tmp_path / "encyclopedia.json", tmp_path / "catalog.json",
+                           tmp_path / "patterns.json", backoff=0)
+
+
+def fake_response(status, body=b"", headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.headers.update(headers or {})
+    response.request = requests.Request("GET", "http://x").prepare()
+    return response
+
+
+class TestErrorClassifier:
+    """Tests for ErrorClassifier lookups"""
+
+    def test_server_error_uses_catalog_strategy(self, classifier):
+        """Should retry a 502 on a GET with the catalog's attempt limit and strategies"""
+        result = classifier.classify(502, "GET", "/offer/82", "<html>Bad Gateway</html>")
+        assert result.kind == "server_error"
+        assert result.action == RETRY
+        assert result.max_retries == 2
+        assert result.endpoint == "GET /offer/{id}"
+        assert result.catalog_key == "HTTP 502"
+        assert result.strategies == ("Exponential Backoff Retry", "Circuit Breaker")
+        assert result.known_error_rate == pytest.approx(0.1)
+
+    def test_non_idempotent_server_error_is_not_retried(self, classifier):
+        """Should skip instead of retrying a POST that may already have been applied"""
+        result = classifier.classify(502, "POST", "/offer")
+        assert result.action == SKIP
+        assert result.max_retries == 0
+        assert classifier.classify(429, "POST", "/offer").action == RETRY
+
+    def test_known_failing_endpoint_is_not_retried(self, classifier):
+        """Should skip errors an endpoint fails with almost every time"""
+        result = classifier.classify(502, "GET", "/landing/5")
+        assert result.action == SKIP
+        assert result.known_error_rate == 1.0
+
+    def test_body_refines_client_errors(self, classifier):
+        """Should pick the error kind from the response body"""
+        assert classifier.classify(400, "POST", "/offer", '{"error": "name is required"}').kind == "validation"
+        assert classifier.classify(400, "POST", "/offer", "Offer already exists").kind == "conflict"
+        plain = classifier.classify(400, "POST", "/offer", "nope")
+        assert plain.kind == "bad_request"
+        assert plain.solution == "Include datePreset"
+        assert plain.strategies == ("Validate Schema",)
+        assert classifier.classify(502, "GET", "/offer/1", "upstream timed out").kind == "timeout"
+
+    def test_auth_and_unknown_endpoints(self, classifier):
+        """Should fail on auth errors and fall back to generic entries for undocumented paths"""
+        assert classifier.classify(401, "GET", "/offer/1").action == FAIL
+        result = classifier.classify(503, "GET", "/undocumented/7")
+        assert result.endpoint is None
+        assert result.action == RETRY
+        assert classifier.classify(418, "GET", "/offer/1").kind == "client_error"
+
+    def test_transport_errors(self, classifier):
+        """Should classify timeouts with the catalog's timeout entry"""
+        result = classifier.classify_exception("GET", "/offer/1", requests.exceptions.ReadTimeout("slow"))
+        assert result.kind == "timeout"
+        assert result.catalog_key == "Request timeout (30s)"
+        assert classifier.classify_exception("GET", "/offer/1", requests.exceptions.ConnectionError()).kind == \
+            "connection"
+
+    def test_status_kind_wins_over_body(self, classifier):
+        """Should keep the status-derived kind for 401/403/404/429 whatever the body says"""
+        auth = classifier.classify(401, "GET", "/offer/1", "Invalid API key")
+        assert (auth.kind, auth.action) == ("auth", FAIL)
+        assert isinstance(auth.error("x"), AuthError)
+        forbidden = classifier.classify(403, "GET", "/offer/1", "invalid permissions: api key is required")
+        assert (forbidden.kind, forbidden.action) == ("auth", FAIL)
+        missing = classifier.classify(404, "GET", "/offer/1", "Offer is missing")
+        assert missing.kind == "not_found"
+        assert isinstance(missing.error("x"), NotFoundError)
+        limited = classifier.classify(429, "POST", "/offer", "missing quota, invalid rate")
+        assert (limited.kind, limited.action) == ("rate_limited", RETRY)
+        assert limited.max_retries > 0
+        assert classifier.classify(418, "GET", "/offer/1", "field is required").kind == "validation"
+
+    def test_connect_failures_are_retried_for_any_method(self, classifier):
+        """Should retry a POST only when the connection was never established"""
+        errors = [requests.exceptions.ConnectTimeout("connect timed out"),
+                  requests.exceptions.ConnectionError(ConnectionRefusedError(111, "refused"))]
+        for error in errors:
+            result = classifier.classify_exception("POST", "/offer", error)
+            assert (result.kind, result.action) == ("connect", RETRY)
+
+    def test_connection_reset_is_not_retried_for_post(self, classifier):
+        """Should skip a POST whose connection dropped after the body may have been sent"""
+        reset = requests.exceptions.ConnectionError(
+            ConnectionResetError(104, "Connection reset by peer"))
+        result = classifier.classify_exception("POST", "/offer", reset)
+        assert (result.kind, result.action) == ("connection", SKIP)
+        assert result.max_retries == 0
+        assert classifier.classify_exception("GET", "/offer/1", reset).action == RETRY
+
+    def test_typed_errors(self, classifier):
+        """Should build exceptions typed by kind, keeping the status"""
+        assert isinstance(classifier.classify(404, "GET", "/offer/1").error("x"), NotFoundError)
+        assert isinstance(classifier.classify(403, "GET", "/offer/1").error("x"), AuthError)
+        assert isinstance(classifier.classify(429, "GET", "/offer/1").error("x"), RateLimitError)
+        assert isinstance(classifier.classify(400, "GET", "/offer/1").error("x"), ClientError)
+        assert isinstance(classifier.classify(500, "GET", "/offer/1").error("x"), TransientError)
+
+    def test_retry_after_header(self, classifier):
+        """Should prefer Retry-After over exponential backoff"""
+        result = classifier.classify(429, "GET", "/offer/1")
+        assert result.delay(0, "3") == 3.0
+        assert result.delay(2, "soon") == 0.0
+
+
+class TestBinomAPIRetries:
+    """Tests for automatic retry/skip decisions in BinomAPI"""
+
+    def test_transient_errors_are_retried(self, classifier, monkeypatch):
+        """Should retry a 502 and return the successful response"""
+        responses = [fake_response(502, b"Bad Gateway"), fake_response(200, b'{"id": 1}')]
+        monkeypatch.setattr(binom_api.requests, "request", lambda **kwargs: responses.pop(0))
+        api = BinomAPI(api_key="k", base_url="http://x", error_classifier=classifier)
+        assert api.request("GET", "/offer/1") == {"id": 1}
+        assert responses == []
+
+    def test_retries_stop_at_catalog_limit(self, classifier, monkeypatch):
+        """Should raise a typed error with the status once retries run out"""
+        sent = []
+
+        def failing(**kwargs):
+            sent.append(kwargs["url"])
+            return fake_response(502, b"Bad Gateway")
+
+        monkeypatch.setattr(binom_api.requests, "request", failing)
+        api = BinomAPI(api_key="k", base_url="http://x", error_classifier=classifier)
+        with pytest.raises(TransientError) as excinfo:
+            api.request("GET", "/offer/1")
+        assert len(sent) == 3
+        assert excinfo.value.attempts == 3
+        assert str(excinfo.value) == "API Error 502: Bad Gateway"
+        assert error_status(excinfo.value) == 502
+
+    def test_client_errors_are_not_retried(self, classifier, monkeypatch):
+        """Should raise a 400 right away"""
+        sent = []
+
+        def failing(**kwargs):
+            sent.append(kwargs["method"])
+            return fake_response(400, b"name is required")
+
+        monkeypatch.setattr(binom_api.requests, "request", failing)
+        api = BinomAPI(api_key="k", base_url="http://x", error_classifier=classifier)
+        with pytest.raises(ClientError) as excinfo:
+            api.request("POST", "/offer", data={})
+        assert sent == ["POST"]
+        assert excinfo.value.classification.kind == "validation"
+
+    def test_retries_can_be_disabled(self, classifier, monkeypatch):
+        """Should raise on the first failure when retry_errors is off"""
+        monkeypatch.setattr(binom_api.requests, "request", lambda **kwargs: fake_response(503))
+        api = BinomAPI(api_key="k", base_url="http://x", error_classifier=classifier, retry_errors=False)
+        with pytest.raises(TransientError) as excinfo:
+            api.request("GET", "/offer/1")
+        assert excinfo.value.attempts == 1
+
+    def test_retries_can_be_disabled_per_call(self, classifier, monkeypatch):
+        """Should skip retries for one call while the client default stays on"""
+        sent = []
+
+        def failing(**kwargs):
+            sent.append(kwargs["method"])
+            return fake_response(502, b"Bad Gateway")
+
+        monkeypatch.setattr(binom_api.requests, "request", failing)
+        api = BinomAPI(api_key="k", base_url="http://x", error_classifier=classifier)
+        with pytest.raises(TransientError) as excinfo:
+            api.update_campaign(1, {"name": "x"}, retry_errors=False)
+        assert sent == ["PUT"]
+        assert excinfo.value.attempts == 1
+        with pytest.raises(TransientError):
+            api.request("GET", "/offer/1")
+        assert len(sent) == 4
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
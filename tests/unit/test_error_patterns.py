@@ -0,0 +1,207 @@
+"""
+Unit tests for streaming error-pattern aggregation
+
+Tests the space-saving sketch, decayed per-endpoint counters, parsing of
+JSONL traces and log lines, and the error_patterns.json output.
+"""
+
+import gzip
+import json
+import logging
+import pytest
+import sys
+from pathlib import Path
+
+# Add scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+
+from endpoint_router import EndpointRouter
+from error_classifier import ErrorClassifier
+from error_patterns import ErrorPatternAggregator, SpaceSaving
+from tracing import JsonlTraceSink, RequestTrace, SampledLoggingSink
+
+
+HOUR = 3600.0
+ERROR_KEYS = {502: "HTTP 502", 400: "Bad request", "timeout": "Request timeout (30s)"}
+
+
+@pytest.fixture
+def aggregator(tmp_path):
+    router = EndpointRouter([("GET", "/campaign/{id}"), ("POST", "/landing"), ("GET", "/info/offer")])
+    return ErrorPatternAggregator(tmp_path / "error_patterns.json", half_life=HOUR, top_k=2,
+                                  router=router, error_keys=ERROR_KEYS)
+
+
+def trace_line(method, endpoint, status=200, error=None, started_at=0.0):
+    return json.dumps(RequestTrace(method, endpoint, "http://x" + endpoint, started_at=started_at,
+                                   status=status, error=error).to_dict())
+
+
+class TestSpaceSaving:
+    """Tests for the top-k sketch"""
+
+    def test_keeps_heavy_hitters_within_k_counters(self):
+        """Should keep the frequent items and bound the overcount of the rest"""
+        sketch = SpaceSaving(3)
+        stream = ["a"] * 50 + ["b"] * 30 + [f"noise{i}" for i in range(20)] + ["a"] * 10
+        for item in stream:
+            sketch.add(item)
+        top = sketch.top()
+        assert len(sketch.counts) == 3
+        assert [item for item, _, _ in top[:2]] == ["a", "b"]
+        for item, count, error in top:
+            assert count - error <= stream.count(item) <= count
+
+    def test_weighted_adds(self):
+        """Should accumulate weights"""
+        sketch = SpaceSaving(2)
+        sketch.add("x", 2.5)
+        sketch.add("x", 0.5)
+        assert sketch.top() == [("x", 3.0, 0.0)]
+
+
+class TestErrorPatternAggregator:
+    """Tests for ErrorPatternAggregator"""
+
+    def test_counts_per_endpoint_template(self, aggregator):
+        """Should group requests by template and name errors like the catalog"""
+        lines = [trace_line("GET", "/campaign/1"), trace_line("GET", "/campaign/2", 502),
+                 trace_line("GET", "/campaign/3", 502), trace_line("GET", "/campaign/4", 400),
+                 trace_line("GET", "/info/offer")]
+        assert aggregator.consume(lines) == 5
+
+        patterns = aggregator.patterns()
+        assert list(patterns) == ["GET /campaign/{id}"]
+        campaign = patterns["GET /campaign/{id}"]
+        assert campaign["most_common_error"] == "HTTP 502"
+        assert campaign["frequency"] == "2/4 times"
+        assert campaign["error_rate"] == "75.0%"
+        assert campaign["total_errors"] == 3
+        assert [e["error"] for e in campaign["top_errors"]] == ["HTTP 502", "Bad request"]
+
+    def test_old_errors_decay(self, aggregator):
+        """Should weigh recent requests over ones several half-lives old"""
+        aggregator.consume([trace_line("POST", "/landing", 502, started_at=0.0) for _ in range(8)])
+        aggregator.consume([trace_line("POST", "/landing", 200, started_at=3 * HOUR) for _ in range(8)])
+
+        landing = aggregator.patterns()["POST /landing"]
+        assert landing["decayed_errors"] == pytest.approx(1.0)
+        assert landing["decayed_requests"] == pytest.approx(9.0)
+        assert landing["error_rate"] == "11.1%"
+        assert landing["total_requests"] == 16
+
+    def test_landmark_rescaling_keeps_results(self, aggregator):
+        """Should give the same rates after the landmark moves"""
+        aggregator.add("POST", "/landing", 502, timestamp=0.0)
+        aggregator.add("POST", "/landing", 200, timestamp=600 * HOUR)
+        aggregator.add("POST", "/landing", 502, timestamp=600 * HOUR)
+        landing = aggregator.patterns()["POST /landing"]
+        assert landing["decayed_requests"] == pytest.approx(2.0)
+        assert landing["error_rate"] == "50.0%"
+
+    def test_memory_is_bounded(self, tmp_path):
+        """Should keep at most max_endpoints endpoints and top_k messages each"""
+        aggregator = ErrorPatternAggregator(None, top_k=3, max_endpoints=10, router=EndpointRouter(),
+                                            error_keys={})
+        for n in range(500):
+            aggregator.add("GET", f"/resource{n}/list", error=f"Error {n % 50}: boom {n}", timestamp=n)
+            aggregator.add("GET", "/busy/list", error=f"OSError: failure kind {n % 7}x", timestamp=n)
+        assert len(aggregator) == 10
+        assert all(len(stats.messages.counts) <= 3 for stats in aggregator._stats.values())
+        assert "GET /busy/list" in aggregator.patterns()
+
+    def test_transport_errors_and_log_lines(self, aggregator, tmp_path):
+        """Should parse timeouts from traces and SampledLoggingSink lines"""
+        aggregator.add_line(trace_line("GET", "/info/offer", None, "ReadTimeout: read timed out"))
+        log_path = tmp_path / "api.log"
+        handler = logging.FileHandler(log_path)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s"))
+        log = logging.getLogger("test_error_patterns")
+        log.addHandler(handler)
+        log.setLevel(logging.INFO)
+        sink = SampledLoggingSink(log, sample_rate=1.0)
+        sink.after_request(RequestTrace("GET", "/campaign/9", "u", status=502, timings={"total": 0.01}))
+        sink.after_request(RequestTrace("GET", "/campaign/9", "u", status=200, timings={"total": 0.01}))
+        handler.close()
+        log.removeHandler(handler)
+
+        assert aggregator.consume_file(log_path) == 2
+        assert aggregator.add_line("not a trace") is False
+        patterns = aggregator.patterns()
+        assert patterns["GET /info/offer"]["most_common_error"] == "Request timeout (30s)"
+        assert patterns["GET /campaign/{id}"]["error_rate"] == "50.0%"
+
+    def test_writes_file_readable_by_classifier(self, aggregator, tmp_path):
+        """Should rewrite error_patterns.json in the format ErrorClassifier compiles"""
+        path = tmp_path / "traces.jsonl.gz"
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            for _ in range(10):
+                f.write(trace_line("POST", "/landing", 502) + "\n")
+        aggregator.consume_file(path)
+        written = aggregator.write()
+
+        encyclopedia = tmp_path / "encyclopedia.json"
+        encyclopedia.write_text(json.dumps({"endpoints": {
+            "POST /landing": {"method": "POST", "path": "/landing"}
+        }}), encoding="utf-8")
+        classifier = ErrorClassifier(encyclopedia, tmp_path / "missing.json", written)
+        assert classifier.classify(502, "POST", "/landing").known_error_rate == 1.0
+
+    def test_hook_flushes_periodically(self, aggregator):
+        """Should rewrite the output from after_request once flush_seconds pass"""
+        aggregator.flush_seconds = 0
+        aggregator.after_request(RequestTrace("POST", "/landing", "u", started_at=1.0, status=502))
+        data = json.loads(aggregator.output_path.read_text(encoding="utf-8"))
+        assert data["POST /landing"]["most_common_error"] == "HTTP 502"
+
+    def test_reads_jsonl_trace_sink_output(self, aggregator, tmp_path):
+        """Should consume files written by JsonlTraceSink"""
+        sink = JsonlTraceSink(tmp_path / "traces.jsonl")
+        sink.after_request(RequestTrace("GET", "/campaign/5", "u", started_at=1.0, status=400))
+        sink.close()
+        assert aggregator.consume_file(tmp_path / "traces.jsonl") == 1
+        assert aggregator.patterns()["GET /campaign/{id}"]["most_common_error"] == "Bad request"
+
+    def test_sampled_successes_are_reweighted(self, aggregator, tmp_path):
+        """Should weight sampled successes by 1/sample_rate so error_rate matches the true rate"""
+        path = tmp_path / "traces.jsonl"
+        sink = JsonlTraceSink(path, sample_rate=0.01, seed=3)
+        log_path = tmp_path / "api.log"
+        handler = logging.FileHandler(log_path)
+        log = logging.getLogger("test_error_patterns.sampled")
+        log.addHandler(handler)
+        log.setLevel(logging.INFO)
+        log_sink = SampledLoggingSink(log, sample_rate=0.01, seed=3)
+        # 2.07% ошибок: 207 из 10000
+        for n in range(10000):
+            trace = RequestTrace("GET", "/campaign/5", "u", started_at=1.0, status=502 if n % 100 < 2 or
+                                 (n % 1000 == 999 and n < 7000) else 200, timings={"total": 0.01})
+            sink.after_request(trace)
+            log_sink.after_request(trace)
+        sink.close()
+        handler.close()
+        log.removeHandler(handler)
+
+        aggregator.consume_file(path)
+        stats = aggregator.patterns()["GET /campaign/{id}"]
+        assert stats["total_errors"] == 207
+        assert 1.5 < float(stats["error_rate"].rstrip("%")) < 3.0
+
+        from_log = ErrorPatternAggregator(None, half_life=HOUR, router=aggregator.router, error_keys=ERROR_KEYS)
+        from_log.consume_file(log_path)
+        assert from_log.patterns()["GET /campaign/{id}"]["error_rate"] == stats["error_rate"]
+
+    def test_invalid_sample_rate_is_refused(self, aggregator):
+        """Should skip records whose sample_rate cannot be used as a weight"""
+        record = json.loads(trace_line("GET", "/info/offer", 502))
+        for rate in (0, -1, 2, "x"):
+            assert aggregator.add_record({**record, "sample_rate": rate}) is False
+        assert aggregator.skipped == 4
+        assert aggregator.add_line("GET /info/offer -> 200 out=0B in=0B rate=0") is False
+        assert aggregator.patterns() == {}
+        with pytest.raises(ValueError):
+            aggregator.add("GET", "/info/offer", 200, sample_rate=0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
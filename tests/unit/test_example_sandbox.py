@@ -0,0 +1,106 @@
+"""
+Unit tests for the documentation example sandbox
+
+Tests snippet dedupe, base URL rewriting, sandboxed execution and the mock API.
+"""
+
+import json
+import pytest
+import sys
+from pathlib import Path
+
+import requests
+
+# Add scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+
+from encyclopedia_index import EncyclopediaIndex
+from example_sandbox import Snippet, SnippetRunner, rewrite_base_url, snippet_digest
+from mock_server import MockBinomServer
+
+
+class TestSnippetHelpers:
+    """Tests for snippet hashing and rewriting"""
+
+    def test_digest_ignores_trailing_whitespace(self):
+        """Should treat snippets differing only in trailing whitespace as identical"""
+        assert snippet_digest("python", "print(1)  \n") == snippet_digest("python", "print(1)")
+        assert snippet_digest("python", "print(1)") != snippet_digest("curl", "print(1)")
+
+    def test_rewrite_base_url(self):
+        """Should point production URLs at the mock"""
+        code = 'url = "https://pierdun.com/public/api/v1/info/offer"'
+        rewritten = rewrite_base_url(code, "http://127.0.0.1:9000/public/api/v1")
+        assert rewritten == 'url = "http://127.0.0.1:9000/public/api/v1/info/offer"'
+
+
+class TestSnippetRunner:
+    """Tests for sandboxed execution"""
+
+    def test_python_snippet_with_env(self):
+        """Should run Python with injected environment and capture stdout"""
+        runner = SnippetRunner(workers=2, timeout=10, env={"binomPublic": "k-123"})
+        result = runner.run(Snippet("python", "import os\nprint(os.getenv('binomPublic'))"))
+        assert result.passed
+        assert result.stdout.strip() == "k-123"
+
+    def test_python_failure(self):
+        """Should report exceptions and sys.exit codes as failures"""
+        runner = SnippetRunner(timeout=10)
+        assert not runner.run(Snippet("python", "raise ValueError('boom')")).passed
+        assert runner.run(Snippet("python", "import sys\nsys.exit(3)")).returncode == 3
+
+    def test_timeout(self):
+        """Should kill snippets that exceed the timeout"""
+        runner = SnippetRunner(timeout=0.5)
+        result = runner.run(Snippet("python", "import time\ntime.sleep(5)"))
+        assert result.timed_out
+        assert not result.passed
+
+    def test_shell_snippet(self):
+        """Should run shell snippets with injected environment"""
+        runner = SnippetRunner(timeout=10, env={"binomPublic": "k-456"})
+        result = runner.run(Snippet("curl", "echo $binomPublic"))
+        assert result.passed
+        assert result.stdout.strip() == "k-456"
+
+    def test_run_all(self):
+        """Should return one result per snippet"""
+        snippets = [Snippet("python", f"print({i})") for i in range(4)]
+        results = list(SnippetRunner(workers=4, timeout=10).run_all(snippets))
+        assert sorted(r.stdout.strip() for r in results) == ["0", "1", "2", "3"]
+
+
+@pytest.fixture
+def mock_api(tmp_path):
+    path = tmp_path / "encyclopedia.json"
+    path.write_text(json.dumps({"endpoints": {
+        "/rotation/{id}/clone": {"path": "/rotation/{id}/clone", "method": "GET",
+                                 "response_example": {"id": 5}}
+    }}), encoding="utf-8")
+    with MockBinomServer(EncyclopediaIndex(path)) as server:
+        yield server
+
+
+class TestMockBinomServer:
+    """Tests for the local mock API"""
+
+    def test_documented_endpoint(self, mock_api):
+        """Should answer with the response example of the matched template"""
+        response = requests.get(f"{mock_api.base_url}/rotation/7/clone", headers={"api-key": "x"}, timeout=5)
+        assert response.status_code == 200
+        assert response.json() == {"id": 5}
+
+    def test_requires_api_key(self, mock_api):
+        """Should reject requests without the api-key header"""
+        response = requests.get(f"{mock_api.base_url}/rotation/7/clone", timeout=5)
+        assert response.status_code == 401
+
+    def test_unknown_endpoint(self, mock_api):
+        """Should return 404 for undocumented endpoints"""
+        response = requests.get(f"{mock_api.base_url}/unknown", headers={"api-key": "x"}, timeout=5)
+        assert response.status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,110 @@
+"""
+Unit tests for batch contribution validation
+
+Tests probe deduplication, the TTL cache and result ordering.
+"""
+
+import pytest
+import threading
+import sys
+from pathlib import Path
+
+# Add validation to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'validation'))
+
+import hybrid_validator
+from hybrid_validator import HybridValidator, ProbeCache
+from trust_system import SimpleTrustSystem
+
+
+@pytest.fixture
+def validator(tmp_path, monkeypatch):
+    monkeypatch.setattr(hybrid_validator, "SimpleTrustSystem",
+                        lambda: SimpleTrustSystem(tmp_path / "trust.db", tmp_path / "none.json"))
+    validator = HybridValidator()
+    probed = []
+
+    def probe(endpoint):
+        probed.append(endpoint)
+        if endpoint == "info/broken":
+            return False, "Endpoint not found"
+        return True, "Success"
+
+    validator.probe_cache.probe = probe
+    validator.probed = probed
+    validator.trust_system.record_contributions([("trusted", True)] * 30)
+    return validator
+
+
+class TestProbeCache:
+    """Tests for ProbeCache"""
+
+    def test_results_expire(self):
+        """Should reuse a probe until its ttl runs out"""
+        calls = []
+        cache = ProbeCache(lambda e: calls.append(e) or (True, "Success"), ttl=60)
+        cache.get("a")
+        cache.get("a")
+        assert calls == ["a"]
+        cache.ttl = -1
+        cache.clear()
+        cache.get("a")
+        cache.get("a")
+        assert calls == ["a", "a", "a"]
+
+    def test_locks_do_not_accumulate(self):
+        """Should drop per-endpoint locks once no caller is probing"""
+        started, release = threading.Event(), threading.Event()
+
+        def probe(endpoint):
+            if endpoint == "slow":
+                started.set()
+                release.wait(5)
+            return True, "Success"
+
+        cache = ProbeCache(probe, ttl=60)
+        for i in range(100):
+            cache.get(f"endpoint/{i}")
+        assert cache._locks == {}
+
+        worker = threading.Thread(target=cache.get, args=("slow",))
+        worker.start()
+        started.wait(5)
+        assert set(cache._locks) == {"slow"}
+        release.set()
+        worker.join(5)
+        assert cache._locks == {}
+
+
+class TestValidateBatch:
+    """Tests for HybridValidator.validate_batch"""
+
+    def test_each_endpoint_probed_once(self, validator):
+        """Should probe every distinct endpoint once for the whole queue"""
+        queue = [({"endpoint": "info/offer"}, "trusted")] * 50 + [({"endpoint": "stats/campaign"}, "trusted")] * 10
+        results = validator.validate_batch(queue)
+        assert all(r["passed"] for r in results)
+        assert {"info/offer", "stats/campaign"} <= set(validator.probed)
+        assert len(validator.probed) == len(set(validator.probed))
+
+        probes = len(validator.probed)
+        validator.validate_batch(queue)
+        assert len(validator.probed) == probes
+
+    def test_matches_single_validation(self, validator):
+        """Should give the same results, in input order, as validate_contribution"""
+        queue = [
+            ({"endpoint": "info/offer"}, "trusted"),
+            ({"endpoint": "info/broken"}, "trusted"),
+            ({"endpoint": "campaign/create"}, "stranger"),
+            ({"endpoint": "campaign/create"}, "trusted"),
+        ]
+        batch = validator.validate_batch(queue)
+        single = [validator.validate_contribution(c, agent) for c, agent in queue]
+        assert batch == single
+        assert [r["passed"] for r in batch] == [True, False, False, True]
+        assert batch[1]["errors"] == ["API Test Failed: Endpoint not found"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
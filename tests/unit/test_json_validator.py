@@ -0,0 +1,119 @@
+"""
+Unit tests for the compiled JSON Schema validator
+
+Tests validator caching, endpoint schema loading and bulk validation.
+"""
+
+import json
+import pytest
+import sys
+from pathlib import Path
+
+# Add validation to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'validation'))
+
+from json_validator import BinomAPIValidator, compile_schema
+
+
+WORKFLOW = {"name": "w", "goal": "g", "steps": []}
+
+
+@pytest.fixture(scope="module")
+def validator():
+    return BinomAPIValidator()
+
+
+class TestCompiledValidators:
+    """Tests for schema compilation"""
+
+    def test_validators_are_cached(self):
+        """Should reuse the validator for equal schemas regardless of key order"""
+        a = compile_schema({"type": "object", "required": ["x"]})
+        b = compile_schema({"required": ["x"], "type": "object"})
+        assert a is b
+
+    def test_endpoint_schemas_are_loaded(self, validator):
+        """Should compile request and response schemas from the encyclopedia"""
+        assert validator.validator_for("response", "GET", "/info/offer") is not None
+        assert validator.validator_for("request", "POST", "/traffic_source") is not None
+        assert validator.schema_errors == {}
+
+    def test_verified_overrides_use_success_schema(self, validator):
+        """Should validate live-verified responses against their "success" schema, not accept anything"""
+        for method, path in [("GET", "/info/offer"), ("GET", "/stats/campaign"),
+                             ("POST", "/traffic_source"), ("POST", "/landing/integrated")]:
+            name = f"response:{method} {path}"
+            ok, message = validator.validate_data("garbage string", name)
+            assert not ok, name
+            assert "success" not in validator.schemas[name]
+        assert validator.validate_data({"status": "success", "data": [{"id": 1, "name": "o"}]},
+                                       "response:GET /info/offer") == (True, "Valid")
+        assert not validator.validate_data({"status": "success", "data": [{"id": "1"}]},
+                                           "response:GET /info/offer")[0]
+
+    def test_templated_paths_use_router(self, tmp_path):
+        """Should resolve concrete paths to templated schemas and respect the method"""
+        encyclopedia = {"endpoints": {
+            "/campaign/{id}": {"method": "PUT", "path": "/campaign/{id}",
+                               "response_schema": {"type": "object"}},
+            "/campaign/{id}/clone": {"method": "POST", "path": "/campaign/{id}/clone",
+                                     "response_schema": {"type": "array"}}
+        }}
+        path = tmp_path / "encyclopedia.json"
+        path.write_text(json.dumps(encyclopedia), encoding="utf-8")
+        custom = BinomAPIValidator(path, tmp_path / "missing.json")
+        assert custom.validator_for("response", "PUT", "/campaign/5").schema == {"type": "object"}
+        assert custom.validator_for("response", "POST", "campaign/5/clone").schema == {"type": "array"}
+        assert custom.validator_for("response", "GET", "/campaign/5") is None
+
+
+class TestValidation:
+    """Tests for single and bulk validation"""
+
+    def test_validate_data_messages(self, validator):
+        """Should keep the existing result messages"""
+        assert validator.validate_data(WORKFLOW, "workflow") == (True, "Valid")
+        ok, message = validator.validate_data({"name": "w"}, "workflow")
+        assert not ok and message.startswith("Schema validation failed:")
+        assert validator.validate_data({}, "nope") == (False, "Unknown schema: nope")
+
+    def test_bulk_files_parallel_matches_serial(self, validator, tmp_path):
+        """Should return the same results from the process pool as serially"""
+        files = []
+        for i in range(40):
+            path = tmp_path / f"w{i}.json"
+            path.write_text(json.dumps(WORKFLOW if i % 5 else {"name": "bad"}), encoding="utf-8")
+            files.append(path)
+        (tmp_path / "broken.json").write_text("{", encoding="utf-8")
+        files.append(tmp_path / "broken.json")
+
+        parallel = validator.validate_files(files, "workflow", workers=2)
+        serial = validator.validate_files(files, "workflow", workers=1)
+        assert parallel == serial
+        assert sum(not r["valid"] for r in serial) == 9
+        assert serial[-1]["message"].startswith("Invalid JSON")
+        assert validator.last_stats["validations"] == 41
+        assert validator.last_stats["validations_per_second"] > 0
+
+    def test_response_examples(self, validator):
+        """Should validate encyclopedia response examples against their schemas"""
+        results = validator.validate_endpoint_examples()
+        assert results
+        assert all(r["valid"] for r in results)
+
+    def test_response_examples_use_constructor_path(self, tmp_path):
+        """Should validate examples from the encyclopedia the validator was built for"""
+        encyclopedia = {"endpoints": {"/offer/{id}": {
+            "method": "GET", "path": "/offer/{id}",
+            "response_schema": {"type": "object", "required": ["id"]},
+            "response_example": {"name": "no id"}
+        }}}
+        path = tmp_path / "encyclopedia.json"
+        path.write_text(json.dumps(encyclopedia), encoding="utf-8")
+        custom = BinomAPIValidator(path, tmp_path / "missing-endpoint-schemas.json")
+        results = custom.validate_endpoint_examples()
+        assert [(r["endpoint"], r["valid"]) for r in results] == [("GET /offer/{id}", False)]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
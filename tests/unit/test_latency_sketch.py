@@ -0,0 +1,97 @@
+"""
+Unit tests for the streaming latency sketch
+
+Tests quantile accuracy, merging, serialization and distribution shift detection.
+"""
+
+import random
+import pytest
+import sys
+from pathlib import Path
+
+# Add scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+
+from latency_sketch import LatencySketch, distribution_shift, merge_all
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+class TestLatencySketch:
+    """Tests for DDSketch quantiles"""
+
+    def test_relative_accuracy(self):
+        """Should keep quantiles within the configured relative error"""
+        rng = random.Random(7)
+        values = [rng.lognormvariate(5, 1) for _ in range(20000)]
+        sketch = LatencySketch(relative_accuracy=0.01)
+        sketch.update(values)
+
+        for q in (0.5, 0.95, 0.99):
+            exact = exact_quantile(values, q)
+            assert sketch.quantile(q) == pytest.approx(exact, rel=0.011)
+        assert sketch.count == 20000
+        assert sketch.quantile(1) == max(values)
+
+    def test_bounded_memory(self):
+        """Should never keep more than max_bins buckets"""
+        sketch = LatencySketch(max_bins=64)
+        sketch.update(1.5 ** i for i in range(200))
+        assert len(sketch.bins) <= 64
+        assert sketch.quantile(0.99) == pytest.approx(1.5 ** 197, rel=0.02)
+
+    def test_merge_matches_single_sketch(self):
+        """Should produce the same quantiles when merging partial sketches"""
+        rng = random.Random(3)
+        values = [rng.uniform(10, 1000) for _ in range(5000)]
+        whole = LatencySketch()
+        whole.update(values)
+        parts = [LatencySketch() for _ in range(4)]
+        for i, value in enumerate(values):
+            parts[i % 4].add(value)
+
+        merged = merge_all(parts)
+        assert merged.quantiles() == whole.quantiles()
+        assert merged.count == whole.count
+
+    def test_serialization_roundtrip(self):
+        """Should restore an identical sketch from bytes"""
+        sketch = LatencySketch()
+        sketch.update([0, 12.5, 300, 4000])
+        restored = LatencySketch.from_bytes(sketch.to_bytes())
+        assert restored.quantiles() == sketch.quantiles()
+        assert restored.zero_count == 1
+        assert restored.min == 0 and restored.max == 4000
+
+    def test_empty_and_invalid(self):
+        """Should return None for empty sketches and reject negative values"""
+        assert LatencySketch().quantile(0.5) is None
+        with pytest.raises(ValueError):
+            LatencySketch().add(-1)
+
+
+class TestDistributionShift:
+    """Tests for trend detection"""
+
+    def _sketch(self, values):
+        sketch = LatencySketch()
+        sketch.update(values)
+        return sketch
+
+    def test_shift_directions(self):
+        """Should detect degrading, improving and stable latency"""
+        baseline = self._sketch([100, 110, 120, 130, 140, 150])
+        assert distribution_shift(self._sketch([300, 320, 340, 360, 380]), baseline) == "degrading"
+        assert distribution_shift(self._sketch([40, 45, 50, 55, 60]), baseline) == "improving"
+        assert distribution_shift(self._sketch([105, 115, 125, 135, 145]), baseline) == "stable"
+
+    def test_insufficient_data(self):
+        """Should not guess a trend from a handful of samples"""
+        assert distribution_shift(self._sketch([100]), self._sketch([100] * 10)) == "insufficient_data"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
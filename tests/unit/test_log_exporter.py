@@ -0,0 +1,163 @@
+"""
+Unit tests for the clicklog / conversions log exporter
+
+Tests date windowing, paging, output formats and resumable cursors.
+"""
+
+import csv
+import gzip
+import io
+import json
+import pytest
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+
+from log_exporter import LogExporter, date_windows, extract_rows
+
+
+class FakeLogAPI:
+    """Serves `per_window` synthetic clicks for every requested window"""
+
+    def __init__(self, per_window=25, fail_at=None):
+        self.per_window = per_window
+        self.fail_at = fail_at
+        self.requests = []
+        self.ranges = []
+
+    def get_clicklog(self, date_from, date_to, limit=1000, offset=0, timezone="UTC"):
+        self.requests.append((date_from, offset))
+        self.ranges.append((date_from, date_to))
+        if self.fail_at is not None and len(self.requests) == self.fail_at:
+            raise Exception("API Error 502: Bad Gateway")
+        rows = [{"id": f"{date_from:%Y%m%d}-{i}", "cost": i} for i in range(self.per_window)]
+        return {"data": rows[offset:offset + limit]}
+
+
+def read_jsonl_gz(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+START = datetime(2025, 9, 1)
+
+
+class TestHelpers:
+    """Tests for windowing and response parsing"""
+
+    def test_date_windows(self):
+        """Should cover the range with consecutive windows"""
+        windows = date_windows(START, START + timedelta(hours=60), timedelta(days=1))
+        assert len(windows) == 3
+        assert windows[-1] == (START + timedelta(hours=48), START + timedelta(hours=60))
+
+    def test_extract_rows(self):
+        """Should accept bare lists and wrapped rows"""
+        assert extract_rows([{"a": 1}]) == [{"a": 1}]
+        assert extract_rows({"data": [{"a": 1}]}) == [{"a": 1}]
+        assert extract_rows({"success": True}) == []
+
+
+class TestLogExporter:
+    """Tests for streaming export"""
+
+    def test_jsonl_export_pages_through_windows(self, tmp_path):
+        """Should page through every window and write one gzip file per window"""
+        api = FakeLogAPI(per_window=25)
+        summary = LogExporter(api, "clicks", tmp_path, page_size=10, workers=3).export(
+            START, START + timedelta(days=3))
+
+        assert summary["rows"] == 75
+        assert len(summary["files"]) == 3
+        rows = read_jsonl_gz(summary["files"][0])
+        assert [r["id"] for r in rows] == [f"20250901-{i}" for i in range(25)]
+        assert len(api.requests) == 9
+
+    def test_csv_export(self, tmp_path):
+        """Should write a single header followed by all rows"""
+        api = FakeLogAPI(per_window=5)
+        summary = LogExporter(api, "clicks", tmp_path, fmt="csv", page_size=2).export(
+            START, START + timedelta(days=1))
+        with gzip.open(summary["files"][0], "rt", encoding="utf-8") as f:
+            rows = list(csv.DictReader(io.StringIO(f.read())))
+        assert [r["id"] for r in rows] == [f"20250901-{i}" for i in range(5)]
+
+    def test_resume_after_failure(self, tmp_path):
+        """Should continue from the cursor without duplicating rows"""
+        failing = FakeLogAPI(per_window=25, fail_at=3)
+        with pytest.raises(Exception):
+            LogExporter(failing, "clicks", tmp_path, page_size=10, workers=1).export(
+                START, START + timedelta(days=1))
+
+        api = FakeLogAPI(per_window=25)
+        summary = LogExporter(api, "clicks", tmp_path, page_size=10, workers=1).export(
+            START, START + timedelta(days=1))
+
+        assert api.requests == [(START, 20)]
+        assert [r["id"] for r in read_jsonl_gz(summary["files"][0])] == [f"20250901-{i}" for i in range(25)]
+
+        again = FakeLogAPI()
+        assert LogExporter(again, "clicks", tmp_path).export(START, START + timedelta(days=1))["skipped_windows"] == 1
+        assert again.requests == []
+
+    def test_csv_header_widens_for_late_columns(self, tmp_path):
+        """Should keep columns that first appear on a later page"""
+        api = FakeLogAPI(per_window=5)
+        fetch = api.get_clicklog
+
+        def late_columns(*args, **kwargs):
+            response = fetch(*args, **kwargs)
+            for row in response["data"]:
+                if row["cost"] >= 3:
+                    row["sub_id"] = f"s{row['cost']}"
+            return response
+
+        api.get_clicklog = late_columns
+        summary = LogExporter(api, "clicks", tmp_path, fmt="csv", page_size=2).export(
+            START, START + timedelta(days=1))
+        with gzip.open(summary["files"][0], "rt", encoding="utf-8") as f:
+            rows = list(csv.DictReader(io.StringIO(f.read())))
+        assert [r["id"] for r in rows] == [f"20250901-{i}" for i in range(5)]
+        assert [r["sub_id"] for r in rows] == ["", "", "", "s3", "s4"]
+        cursor = json.loads((tmp_path / "clicks" / "cursor.json").read_text(encoding="utf-8"))
+        state = next(iter(cursor.values()))
+        assert state["fieldnames"] == ["id", "cost", "sub_id"]
+        assert not state.get("pending")
+
+    def test_ranges_do_not_share_files(self, tmp_path):
+        """Should write overlapping export ranges to separate files"""
+        day = LogExporter(FakeLogAPI(per_window=5), "clicks", tmp_path).export(START, START + timedelta(days=1))
+        two = LogExporter(FakeLogAPI(per_window=3), "clicks", tmp_path).export(START, START + timedelta(days=2))
+        assert day["files"][0] not in two["files"]
+        assert len(read_jsonl_gz(day["files"][0])) == 5
+        assert len(read_jsonl_gz(two["files"][0])) == 3
+
+    def test_window_boundaries_do_not_overlap(self, tmp_path):
+        """Should request each window with an inclusive dateTo one second before the next window"""
+        api = FakeLogAPI(per_window=1)
+        LogExporter(api, "clicks", tmp_path, workers=1).export(START, START + timedelta(days=2))
+        assert sorted(set(api.ranges)) == [
+            (START, START + timedelta(days=1, seconds=-1)),
+            (START + timedelta(days=1), START + timedelta(days=2, seconds=-1)),
+        ]
+
+    def test_cursor_is_scoped_to_format_and_range(self, tmp_path):
+        """Should not reuse a finished cursor for another format or date range"""
+        LogExporter(FakeLogAPI(per_window=5), "clicks", tmp_path).export(START, START + timedelta(days=1))
+
+        as_csv = FakeLogAPI(per_window=5)
+        summary = LogExporter(as_csv, "clicks", tmp_path, fmt="csv").export(START, START + timedelta(days=1))
+        assert summary["skipped_windows"] == 0
+        assert summary["rows"] == 5
+
+        wider = FakeLogAPI(per_window=5)
+        summary = LogExporter(wider, "clicks", tmp_path).export(START, START + timedelta(days=2))
+        assert summary["skipped_windows"] == 0
+        assert summary["rows"] == 10
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
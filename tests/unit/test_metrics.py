@@ -0,0 +1,132 @@
+"""
+Unit tests for the Prometheus metrics exporter
+
+Tests counters, histograms, text rendering and BinomAPI instrumentation.
+"""
+
+import json
+import pytest
+import sys
+from pathlib import Path
+
+import requests
+
+# Add scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+
+from binom_api import BinomAPI
+from encyclopedia_index import EncyclopediaIndex
+from endpoint_router import EndpointRouter
+from metrics import ClientMetrics, MetricsRegistry, default_metrics
+from mock_server import MockBinomServer
+
+
+class TestRegistry:
+    """Tests for metric primitives and rendering"""
+
+    def test_counter_and_histogram_render(self):
+        """Should render cumulative buckets, sums and counts"""
+        registry = MetricsRegistry()
+        counter = registry.counter("jobs", "Jobs done", ("kind",))
+        histogram = registry.histogram("job_seconds", "Job time", ("kind",), buckets=(0.1, 1))
+        counter.inc(("a",), 2)
+        histogram.observe(("a",), 0.05)
+        histogram.observe(("a",), 0.5)
+        histogram.observe(("a",), 5)
+
+        text = registry.render()
+        assert '# TYPE jobs_total counter' in text
+        assert 'jobs_total{kind="a"} 2' in text
+        assert 'job_seconds_bucket{kind="a",le="0.1"} 1' in text
+        assert 'job_seconds_bucket{kind="a",le="1"} 2' in text
+        assert 'job_seconds_bucket{kind="a",le="+Inf"} 3' in text
+        assert 'job_seconds_count{kind="a"} 3' in text
+        assert 'job_seconds_sum{kind="a"} 5.55' in text
+
+    def test_output_parses_with_prometheus_client(self):
+        """Should name HELP/TYPE like the samples so the text format 0.0.4 parser keeps them together"""
+        parser = pytest.importorskip("prometheus_client.parser")
+        metrics = ClientMetrics(router=EndpointRouter([("GET", "/campaign/{id}")]))
+        metrics.observe_request("GET", "/campaign/5", 200, "main", 0.2, bytes_in=512)
+        metrics.rate_limit_wait("main", 1.5)
+
+        families = {family.name: family for family in
+                    parser.text_string_to_metric_families(metrics.registry.render())}
+        requests_family = families["binom_api_requests"]
+        assert requests_family.type == "counter"
+        assert requests_family.documentation == "Запросы к Binom API"
+        assert [(s.name, s.labels["endpoint"], s.value) for s in requests_family.samples] == \
+            [("binom_api_requests_total", "/campaign/{id}", 1)]
+        assert families["binom_api_rate_limit_wait_seconds"].samples[0].value == 1.5
+        latency = families["binom_api_request_duration_seconds"]
+        assert latency.type == "histogram"
+        assert {s.name for s in latency.samples} == {"binom_api_request_duration_seconds_bucket",
+                                                     "binom_api_request_duration_seconds_sum",
+                                                     "binom_api_request_duration_seconds_count"}
+        assert all(family.type != "unknown" for family in families.values())
+
+    def test_label_escaping(self):
+        """Should escape quotes in label values"""
+        registry = MetricsRegistry()
+        registry.counter("x", "X", ("name",)).inc(('say "hi"',))
+        assert 'x_total{name="say \\"hi\\""} 1' in registry.render()
+
+    def test_textfile_and_http(self, tmp_path):
+        """Should expose the same text via textfile and /metrics"""
+        registry = MetricsRegistry()
+        registry.counter("up", "Up").inc()
+        path = tmp_path / "binom.prom"
+        registry.write_textfile(path)
+        assert "up_total 1" in path.read_text(encoding="utf-8")
+
+        server = registry.serve(port=0)
+        try:
+            host, port = server.server_address[:2]
+            response = requests.get(f"http://{host}:{port}/metrics", timeout=5)
+            assert response.status_code == 200
+            assert "up_total 1" in response.text
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+class TestClientInstrumentation:
+    """Tests for BinomAPI request metrics"""
+
+    @pytest.fixture
+    def mock_api(self, tmp_path):
+        path = tmp_path / "encyclopedia.json"
+        path.write_text(json.dumps({"endpoints": {
+            "/campaign/{id}": {"path": "/campaign/{id}", "method": "GET", "response_example": {"id": 1}}
+        }}), encoding="utf-8")
+        index = EncyclopediaIndex(path)
+        with MockBinomServer(index) as server:
+            yield server, EndpointRouter.from_index(index)
+
+    def test_requests_are_labelled_by_template(self, mock_api):
+        """Should count requests per endpoint template, method, status and tracker"""
+        server, router = mock_api
+        metrics = ClientMetrics(router=router)
+        api = BinomAPI(api_key="k", base_url=server.base_url, tracker="PierDun", metrics=metrics)
+
+        api.get_campaign_details(1)
+        api.get_campaign_details(2)
+        with pytest.raises(Exception):
+            api.get_offers()
+
+        assert metrics.requests.value(("/campaign/{id}", "GET", "200", "PierDun")) == 2
+        assert metrics.requests.value(("/info/offer", "GET", "404", "PierDun")) == 1
+        assert metrics.latency.count(("/campaign/{id}", "GET", "200", "PierDun")) == 2
+        assert metrics.bytes_in.value(("/campaign/{id}", "GET", "PierDun")) == 2 * len(b'{"id": 1}')
+
+    def test_disabled_by_default(self, monkeypatch):
+        """Should keep metrics off unless enabled through the environment"""
+        monkeypatch.delenv("BINOM_METRICS_TEXTFILE", raising=False)
+        monkeypatch.delenv("BINOM_METRICS_PORT", raising=False)
+        assert default_metrics() is None
+        assert BinomAPI(api_key="k").metrics is None
+        assert BinomAPI(api_key="k").tracker == "pierdun.com"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,161 @@
+"""
+Unit tests for the monitoring time-series store
+
+Tests appends, rollups, retention, range queries and current_status export.
+"""
+
+import json
+import pytest
+import sys
+from pathlib import Path
+
+# Add scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+
+from monitoring_store import MonitoringStore
+
+T0 = 1_700_000_000 - (1_700_000_000 % 86400)
+
+
+@pytest.fixture
+def store():
+    with MonitoringStore(":memory:") as s:
+        yield s
+
+
+class TestRollups:
+    """Tests for append and aggregated queries"""
+
+    def test_minute_rollup(self, store):
+        """Should aggregate checks of the same minute into one bucket"""
+        store.append("GET /info/offer", "healthy", 100, timestamp=T0 + 1)
+        store.append("GET /info/offer", "healthy", 300, timestamp=T0 + 30)
+        store.append("GET /info/offer", "server_error", 200, "HTTP 502", timestamp=T0 + 70)
+
+        points = store.query("GET /info/offer", T0, T0 + 120, resolution="1m")
+        assert [p["checks"] for p in points] == [2, 1]
+        assert points[0]["avg_response_time_ms"] == 200
+        assert points[0]["min_response_time_ms"] == 100
+        assert points[0]["max_response_time_ms"] == 300
+        assert points[1]["errors"] == 1
+
+        hourly = store.query("GET /info/offer", T0, T0 + 3600, resolution="1h")
+        assert hourly[0]["checks"] == 3
+        assert hourly[0]["availability"] == pytest.approx(200 / 3)
+
+    def test_raw_query_and_auto_resolution(self, store):
+        """Should return raw checks and pick coarser rollups for long spans"""
+        store.append("GET /info/offer", "healthy", 50, timestamp=T0)
+        raw = store.query("GET /info/offer", T0, T0 + 1, resolution="raw")
+        assert raw[0]["status"] == "healthy"
+        assert MonitoringStore.pick_resolution(3600) == "1m"
+        assert MonitoringStore.pick_resolution(7 * 86400) == "1h"
+        assert MonitoringStore.pick_resolution(5 * 365 * 86400) == "1d"
+
+    def test_import_history(self, store):
+        """Should import the monitoring_history.json format"""
+        count = store.import_history({
+            "GET /info/offer": [{"timestamp": "2025-09-26T23:45:44.609940", "status": "healthy",
+                                 "response_time_ms": 724.0, "error": None}],
+            "POST /offer": [{"timestamp": "2025-09-26T23:45:55.904430", "status": "client_error",
+                             "response_time_ms": 217.1, "error": "Bad request"}],
+        })
+        assert count == 2
+        assert store.endpoints() == ["GET /info/offer", "POST /offer"]
+
+
+class TestRetention:
+    """Tests for retention policies"""
+
+    def test_old_data_is_dropped(self):
+        """Should delete raw checks and rollups past their retention"""
+        with MonitoringStore(":memory:", retention={"raw": 3600, "1m": 7200}) as store:
+            store.append("GET /info/offer", "healthy", 10, timestamp=T0)
+            store.append("GET /info/offer", "healthy", 10, timestamp=T0 + 10000)
+            store.apply_retention(now=T0 + 10000)
+
+            assert len(store.query("GET /info/offer", T0, T0 + 20000, resolution="raw")) == 1
+            assert len(store.query("GET /info/offer", T0, T0 + 20000, resolution="1m")) == 1
+            assert len(store.query("GET /info/offer", T0, T0 + 20000, resolution="1h")) == 2
+
+
+class TestCurrentStatus:
+    """Tests for the current_status.json snapshot"""
+
+    def test_snapshot_format(self, store, tmp_path):
+        """Should export the existing current_status.json structure"""
+        store.append("GET /info/offer", "server_error", 200, "HTTP 502", timestamp=T0)
+        store.append("GET /info/offer", "healthy", 100, timestamp=T0 + 60)
+        store.append("POST /offer", "client_error", 217, "Bad request", timestamp=T0 + 60)
+
+        path = tmp_path / "current_status.json"
+        store.export_current_status(path, now=T0 + 120)
+        status = json.loads(path.read_text(encoding="utf-8"))
+
+        assert status["summary"] == {"total_endpoints": 2, "healthy": 1, "unhealthy": 0, "unknown": 1}
+        offer = status["endpoints"]["GET /info/offer"]
+        assert offer["current_status"] == "healthy"
+        assert offer["response_time_ms"] == 100
+        assert offer["stability_score"] == 50.0
+        assert offer["checks_count"] == 2
+        assert offer["trend"] == "insufficient_data"
+        assert set(offer["latency_ms"]) == {"p50", "p95", "p99"}
+
+    def test_dashboard_data(self, store):
+        """Should bundle the status snapshot with a range query per dashboard range"""
+        store.append("GET /info/offer", "server_error", 200, "HTTP 502", timestamp=T0 - 2 * 86400)
+        store.append("GET /info/offer", "healthy", 100, timestamp=T0 + 60)
+        store.append("POST /offer", "client_error", 217, "Bad request", timestamp=T0 + 60)
+
+        data = store.dashboard_data(now=T0 + 120)
+        assert data["status"] == store.current_status(now=T0 + 120)
+        assert data["health"] == {"GET /info/offer": "healthy", "POST /offer": "unknown"}
+        assert {label: r["resolution"] for label, r in data["ranges"].items()} == \
+            {"24h": "1h", "7d": "1h", "30d": "1d"}
+        assert [p["checks"] for p in data["ranges"]["24h"]["series"]["GET /info/offer"]] == [1]
+        week = data["ranges"]["7d"]["series"]["GET /info/offer"]
+        assert [p["availability"] for p in week] == [0.0, 100.0]
+
+        custom = store.dashboard_data({"2h": 2}, now=T0 + 120)
+        assert list(custom["ranges"]) == ["2h"]
+
+    def test_dashboard_html_reads_dashboard_data(self):
+        """Should render monitoring/dashboard.html from dashboard_data.json rather than a baked snapshot"""
+        html = (Path(__file__).parent.parent.parent / "monitoring" / "dashboard.html").read_text(encoding="utf-8")
+        assert 'const DATA_URL = "dashboard_data.json"' in html
+        for key in ("data.ranges", "data.status.summary", "data.health", "range.series"):
+            assert key in html
+
+
+class TestLatency:
+    """Tests for latency sketches and trend"""
+
+    def test_quantiles_per_tracker(self, store):
+        """Should keep separate, mergeable sketches per tracker"""
+        store.append_many(
+            [{"endpoint": "GET /info/offer", "status": "healthy", "response_time_ms": 100,
+              "timestamp": T0 + i, "tracker": "PierDun"} for i in range(50)] +
+            [{"endpoint": "GET /info/offer", "status": "healthy", "response_time_ms": 1000,
+              "timestamp": T0 + i, "tracker": "Newareay"} for i in range(50)]
+        )
+        store.append("GET /info/offer", "healthy", 100, timestamp=T0 + 60, tracker="PierDun")
+
+        assert store.latency(tracker="PierDun", start=T0, end=T0 + 3600)["p99"] == pytest.approx(100, rel=0.01)
+        assert store.latency(tracker="Newareay", start=T0, end=T0 + 3600)["p50"] == pytest.approx(1000, rel=0.01)
+        assert store.sketch("GET /info/offer", start=T0, end=T0 + 3600).count == 101
+
+    def test_trend_from_distribution_shift(self, store):
+        """Should report degrading when recent latency shifts upward"""
+        now = T0 + 12 * 3600
+        store.append_many(
+            [{"endpoint": "GET /info/offer", "status": "healthy", "response_time_ms": 100 + i,
+              "timestamp": T0 + i * 600} for i in range(30)] +
+            [{"endpoint": "GET /info/offer", "status": "healthy", "response_time_ms": 400 + i,
+              "timestamp": now - i * 60} for i in range(10)]
+        )
+        status = store.current_status(now=now)
+        assert status["endpoints"]["GET /info/offer"]["trend"] == "degrading"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
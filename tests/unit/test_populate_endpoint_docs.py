@@ -0,0 +1,119 @@
+"""
+Unit tests for incremental endpoint docs generation
+
+Tests that populate_all_docs skips records whose manifest entry is current
+and regenerates changed records, externally edited files and --force runs.
+"""
+
+import json
+import pytest
+import sys
+from pathlib import Path
+
+# Add the repository root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import populate_endpoint_docs
+
+
+SAMPLE = {
+    "endpoints": {
+        "/info/offer": {"path": "/info/offer", "method": "GET", "summary": "Список офферов",
+                        "category": "info"},
+        "/campaign/{id}": {"path": "/campaign/{id}", "method": "PUT", "summary": "Обновить кампанию",
+                           "category": "campaign"}
+    }
+}
+
+OFFER_DOC = Path("docs/endpoints/info/get_info_offer.md")
+CAMPAIGN_DOC = Path("docs/endpoints/campaign/put_campaign_id.md")
+
+
+def write_encyclopedia(data):
+    Path("encyclopedia.json").write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """A repository layout with placeholder docs, as populate_all_docs expects"""
+    monkeypatch.chdir(tmp_path)
+    write_encyclopedia(SAMPLE)
+    for doc in (OFFER_DOC, CAMPAIGN_DOC):
+        doc.parent.mkdir(parents=True, exist_ok=True)
+        doc.write_text("placeholder\n", encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def rendered(monkeypatch):
+    """Records the path of every endpoint the generator renders"""
+    calls = []
+    original = populate_endpoint_docs.create_endpoint_doc
+
+    def render(endpoint_data):
+        calls.append(endpoint_data["path"])
+        return original(endpoint_data)
+
+    monkeypatch.setattr(populate_endpoint_docs, "create_endpoint_doc", render)
+    return calls
+
+
+class TestPopulateAllDocs:
+    """Tests for manifest-driven incremental generation"""
+
+    def test_first_run_populates_and_records_manifest(self, workspace, rendered):
+        """Should render every endpoint and record it in the manifest"""
+        populate_endpoint_docs.populate_all_docs()
+
+        assert sorted(rendered) == ["/campaign/{id}", "/info/offer"]
+        assert OFFER_DOC.read_text(encoding="utf-8").startswith("# GET /info/offer")
+        manifest = json.loads(Path(populate_endpoint_docs.MANIFEST_PATH).read_text(encoding="utf-8"))
+        assert {entry["endpoint"] for entry in manifest["files"].values()} == \
+            {"GET /info/offer", "PUT /campaign/{id}"}
+
+    def test_unchanged_record_is_skipped(self, workspace, rendered):
+        """Should not render records whose hash and output file match the manifest"""
+        populate_endpoint_docs.populate_all_docs()
+        rendered.clear()
+        mtime = OFFER_DOC.stat().st_mtime_ns
+
+        populate_endpoint_docs.populate_all_docs()
+        assert rendered == []
+        assert OFFER_DOC.stat().st_mtime_ns == mtime
+
+    def test_changed_record_is_rewritten(self, workspace, rendered):
+        """Should regenerate only the endpoint whose record changed"""
+        populate_endpoint_docs.populate_all_docs()
+        rendered.clear()
+
+        changed = json.loads(json.dumps(SAMPLE))
+        changed["endpoints"]["/info/offer"]["summary"] = "Все офферы"
+        write_encyclopedia(changed)
+        populate_endpoint_docs.populate_all_docs()
+
+        assert rendered == ["/info/offer"]
+        assert "Все офферы" in OFFER_DOC.read_text(encoding="utf-8")
+
+    def test_externally_edited_file_is_regenerated(self, workspace, rendered):
+        """Should restore a generated file that was edited by hand"""
+        populate_endpoint_docs.populate_all_docs()
+        generated = OFFER_DOC.read_text(encoding="utf-8")
+        rendered.clear()
+
+        OFFER_DOC.write_text(generated + "\nmanual note\n", encoding="utf-8")
+        populate_endpoint_docs.populate_all_docs()
+
+        assert rendered == ["/info/offer"]
+        assert OFFER_DOC.read_text(encoding="utf-8") == generated
+
+    def test_force_rebuilds_everything(self, workspace, rendered):
+        """Should render every endpoint regardless of the manifest"""
+        populate_endpoint_docs.populate_all_docs()
+        rendered.clear()
+
+        populate_endpoint_docs.populate_all_docs(force=True)
+        assert sorted(rendered) == ["/campaign/{id}", "/info/offer"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
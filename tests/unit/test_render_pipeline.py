@@ -0,0 +1,81 @@
+"""
+Unit tests for RenderPipeline
+
+Tests rendering, unchanged-output skipping and atomic writes.
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# Add scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+
+from render_pipeline import RenderJob, RenderPipeline
+
+
+def render_page(title):
+    """Module-level renderer so it can be sent to worker processes"""
+    return f"# {title}\n"
+
+
+def render_broken(title):
+    raise ValueError("broken template")
+
+
+def make_jobs(directory, count):
+    return [RenderJob(str(directory / "sub" / f"page_{i}.md"), render_page, (f"Page {i}",))
+            for i in range(count)]
+
+
+class TestRenderPipeline:
+    """Tests for RenderPipeline.run"""
+
+    def test_writes_files(self, tmp_path):
+        """Should render and write every file, creating directories"""
+        stats = RenderPipeline(workers=1).run(make_jobs(tmp_path, 3))
+        assert stats.rendered == 3
+        assert stats.written == 3
+        assert (tmp_path / "sub" / "page_1.md").read_text(encoding="utf-8") == "# Page 1\n"
+
+    def test_skips_unchanged(self, tmp_path):
+        """Should not rewrite files whose content is unchanged"""
+        pipeline = RenderPipeline(workers=1)
+        pipeline.run(make_jobs(tmp_path, 3))
+        (tmp_path / "sub" / "page_0.md").write_text("stale", encoding="utf-8")
+
+        stats = pipeline.run(make_jobs(tmp_path, 3))
+        assert stats.unchanged == 2
+        assert stats.written_paths == [str(tmp_path / "sub" / "page_0.md")]
+
+    def test_process_pool(self, tmp_path):
+        """Should produce the same output through the process pool"""
+        pipeline = RenderPipeline(workers=2, min_parallel=0, chunksize=2, write_batch_size=2,
+                                  min_pool_seconds=0, sample_size=1)
+        stats = pipeline.run(make_jobs(tmp_path, 5))
+        assert stats.parallel
+        assert stats.written == 5
+        assert (tmp_path / "sub" / "page_4.md").read_text(encoding="utf-8") == "# Page 4\n"
+
+    def test_cheap_jobs_stay_in_process(self, tmp_path):
+        """Should skip the process pool when the sampled jobs are cheaper than starting it"""
+        stats = RenderPipeline(workers=4, min_parallel=0).run(make_jobs(tmp_path, 200))
+        assert not stats.parallel
+        assert stats.written == 200
+
+    def test_render_errors_collected(self, tmp_path):
+        """Should report render errors without aborting other jobs"""
+        jobs = make_jobs(tmp_path, 1) + [RenderJob(str(tmp_path / "bad.md"), render_broken, ("x",))]
+        stats = RenderPipeline(workers=1).run(jobs)
+        assert stats.written == 1
+        assert len(stats.errors) == 1
+        assert not (tmp_path / "bad.md").exists()
+
+    def test_no_temp_files_left(self, tmp_path):
+        """Should leave no temporary files after atomic writes"""
+        RenderPipeline(workers=1).run(make_jobs(tmp_path, 2))
+        assert sorted(p.name for p in (tmp_path / "sub").iterdir()) == ["page_0.md", "page_1.md"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,159 @@
+"""
+Unit tests for SearchIndex
+
+Tests tokenization, BM25 ranking and binary round-trip of the search index.
+"""
+
+import json
+import os
+import pytest
+import sys
+from pathlib import Path
+
+# Add scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+
+from search_index import SearchIndex, endpoint_tokens, load_or_build, tokenize
+
+
+RECORDS = [
+    {
+        "path": "/rotation/offer/pause",
+        "method": "PUT",
+        "summary": "Update Pause",
+        "description": "Pause offer in rotation.",
+        "tags": ["rotation", "offer"],
+        "use_cases": ["Pause an offer without editing the rotation"]
+    },
+    {
+        "path": "/campaign/offer/pause",
+        "method": "PUT",
+        "summary": "Update Pause",
+        "description": "Pause offer in campaign.",
+        "tags": ["campaign", "offer"]
+    },
+    {
+        "path": "/conversions/log",
+        "method": "GET",
+        "summary": "Conversions log",
+        "description": "Export conversion log entries.",
+        "tags": ["conversions"],
+        "parameters": [{"name": "datePreset", "description": "Date range preset"}]
+    },
+]
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    for record in RECORDS:
+        key = f"{record['method']} {record['path']}"
+        index.add_document(key, "endpoint", record["summary"], endpoint_tokens(record))
+    return index
+
+
+class TestTokenize:
+    """Tests for tokenize function"""
+
+    def test_snake_and_camel_case(self):
+        """Should split snake_case and camelCase identifiers"""
+        tokens = tokenize("traffic_source datePreset")
+        assert "traffic" in tokens
+        assert "source" in tokens
+        assert "datepreset" in tokens
+        assert "preset" in tokens
+
+    def test_stopwords_and_plurals(self):
+        """Should drop stopwords and normalize plurals"""
+        assert tokenize("how do I pause the offers") == ["pause", "offer"]
+        assert tokenize("categories") == ["category"]
+
+
+class TestSearchIndex:
+    """Tests for SearchIndex ranking and serialization"""
+
+    def test_ranking(self, index):
+        """Should rank the rotation pause endpoint first"""
+        hits = index.search("how do I pause an offer in a rotation")
+        assert hits[0].doc_id == "PUT /rotation/offer/pause"
+        assert hits[1].doc_id == "PUT /campaign/offer/pause"
+
+    def test_parameters_indexed(self, index):
+        """Should find endpoints by parameter names"""
+        hits = index.search("datePreset")
+        assert [h.doc_id for h in hits] == ["GET /conversions/log"]
+
+    def test_limit_and_kind(self, index):
+        """Should respect limit and kind filter"""
+        assert len(index.search("offer pause", limit=1)) == 1
+        assert index.search("offer", kind="doc") == []
+
+    def test_unknown_terms(self, index):
+        """Should return no hits for unknown terms"""
+        assert index.search("nonexistentterm") == []
+
+    def test_binary_round_trip(self, index, tmp_path):
+        """Should produce identical results after save/load"""
+        path = tmp_path / "search.bin"
+        index.save(path)
+        loaded = SearchIndex.load(path)
+        assert len(loaded) == len(index)
+        query = "pause offer rotation"
+        assert [(h.doc_id, round(h.score, 6)) for h in loaded.search(query)] == \
+               [(h.doc_id, round(h.score, 6)) for h in index.search(query)]
+
+    def test_rejects_foreign_data(self):
+        """Should reject data without the index header"""
+        with pytest.raises(ValueError):
+            SearchIndex.from_bytes(b"not an index")
+
+
+class TestLoadOrBuild:
+    """Tests for invalidation of the saved index"""
+
+    @pytest.fixture
+    def repo(self, tmp_path):
+        (tmp_path / "encyclopedia.json").write_text(
+            json.dumps({"endpoints": {"/conversions/log": RECORDS[2]}}), encoding="utf-8")
+        (tmp_path / "docs").mkdir()
+        (tmp_path / "docs" / "guide.md").write_text("# Guide\n\nCampaign basics.\n", encoding="utf-8")
+        return tmp_path
+
+    def build(self, repo):
+        return load_or_build(repo / "search.bin", root=repo, doc_roots=("docs",))
+
+    def bump_mtime(self, path):
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def test_reuses_fresh_index(self, repo):
+        """Should load the saved index when sources are unchanged"""
+        self.build(repo)
+        saved = (repo / "search.bin").stat().st_mtime_ns
+        assert len(self.build(repo)) == 2
+        assert (repo / "search.bin").stat().st_mtime_ns == saved
+
+    def test_rebuilds_when_encyclopedia_changes(self, repo):
+        """Should rebuild after encyclopedia.json is edited"""
+        assert self.build(repo).search("rotation") == []
+        source = repo / "encyclopedia.json"
+        source.write_text(json.dumps({"endpoints": {"/rotation/offer/pause": RECORDS[0]}}), encoding="utf-8")
+        self.bump_mtime(source)
+        assert [h.doc_id for h in self.build(repo).search("rotation")] == ["PUT /rotation/offer/pause"]
+
+    def test_rebuilds_when_docs_change(self, repo):
+        """Should rebuild after a markdown file is added or edited"""
+        self.build(repo)
+        (repo / "docs" / "postback.md").write_text("# Postback\n\nPostback setup.\n", encoding="utf-8")
+        assert [h.doc_id for h in self.build(repo).search("postback")] == ["docs/postback.md"]
+
+        guide = repo / "docs" / "guide.md"
+        guide.write_text("# Guide\n\nLanding pages.\n", encoding="utf-8")
+        self.bump_mtime(guide)
+        index = self.build(repo)
+        assert index.search("campaign", kind="doc") == []
+        assert [h.doc_id for h in index.search("landing")] == ["docs/guide.md"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
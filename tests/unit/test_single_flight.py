@@ -0,0 +1,105 @@
+"""
+Unit tests for single-flight request coalescing
+
+Tests SingleFlight semantics and coalescing of concurrent BinomAPI GETs.
+"""
+
+import threading
+import time
+import pytest
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+# Add scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+
+import binom_api
+from binom_api import BinomAPI
+from single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Tests for the coalescing primitive"""
+
+    def test_concurrent_calls_share_one_execution(self):
+        """Should run fn once for concurrent callers with the same key"""
+        flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def fn():
+            calls.append(1)
+            release.wait(5)
+            return "value"
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            futures = [pool.submit(flight.do, "k", fn) for _ in range(5)]
+            while flight._calls.get("k") is None or flight._calls["k"].waiters < 4:
+                time.sleep(0.001)
+            release.set()
+            results = [f.result() for f in futures]
+
+        assert len(calls) == 1
+        assert [value for value, _ in results] == ["value"] * 5
+        assert sum(shared for _, shared in results) == 4
+        assert flight.in_flight() == 0
+
+    def test_errors_propagate_and_key_is_released(self):
+        """Should raise the leader's error and allow a fresh call afterwards"""
+        flight = SingleFlight()
+        with pytest.raises(ValueError):
+            flight.do("k", lambda: (_ for _ in ()).throw(ValueError("boom")))
+        assert flight.do("k", lambda: 42) == (42, False)
+
+
+def fake_response(body=b'{"id": 1}', status=200):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.request = requests.Request("GET", "http://x").prepare()
+    return response
+
+
+class TestBinomAPICoalescing:
+    """Tests for coalesced GETs in BinomAPI"""
+
+    def test_identical_gets_are_coalesced(self, monkeypatch):
+        """Should send one request for identical concurrent GETs and return independent results"""
+        sent = []
+
+        def slow_request(**kwargs):
+            sent.append(kwargs["url"])
+            time.sleep(0.2)
+            return fake_response()
+
+        monkeypatch.setattr(binom_api.requests, "request", slow_request)
+        api = BinomAPI(api_key="k", base_url="http://x")
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(lambda _: api.get_campaign_details(7), range(4)))
+
+        assert sent == ["http://x/campaign/7"]
+        assert results == [{"id": 1}] * 4
+        results[0]["id"] = 2
+        assert results[1] == {"id": 1}
+
+    def test_writes_are_not_coalesced(self, monkeypatch):
+        """Should always send PUT requests individually"""
+        sent = []
+
+        def slow_request(**kwargs):
+            sent.append(kwargs["method"])
+            time.sleep(0.05)
+            return fake_response()
+
+        monkeypatch.setattr(binom_api.requests, "request", slow_request)
+        api = BinomAPI(api_key="k", base_url="http://x")
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            list(pool.map(lambda _: api.update_campaign(7, {"a": 1}), range(3)))
+        assert sent == ["PUT"] * 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,138 @@
+"""
+Unit tests for the closed-day stats cache
+
+Tests day closing, cache reuse, presets and BinomAPI integration.
+"""
+
+import pytest
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+# Add scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+
+from binom_api import BinomAPI
+from stats_cache import ClosedDayStatsCache, preset_days
+
+NOW = datetime(2025, 9, 30, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def cache():
+    c = ClosedDayStatsCache(":memory:", settlement_lag=timedelta(hours=24))
+    yield c
+    c.close()
+
+
+class TestClosedDays:
+    """Tests for settlement and presets"""
+
+    def test_is_closed_respects_settlement_lag(self, cache):
+        """Should only close days whose end is older than the settlement lag"""
+        assert cache.is_closed(date(2025, 9, 28), NOW)
+        assert not cache.is_closed(date(2025, 9, 29), NOW)
+        assert not cache.is_closed(date(2025, 9, 30), NOW)
+
+    def test_default_lag_leaves_today_and_yesterday_open(self):
+        """Should close every day before yesterday with the default settlement lag"""
+        default = ClosedDayStatsCache(":memory:")
+        try:
+            open_days = [d for d in preset_days("last_7_days", NOW) if not default.is_closed(d, NOW)]
+            assert open_days == [date(2025, 9, 29), date(2025, 9, 30)]
+        finally:
+            default.close()
+
+    def test_preset_days(self):
+        """Should expand last_N_days to N days ending today"""
+        days = preset_days("last_30_days", NOW)
+        assert len(days) == 30
+        assert days[0] == date(2025, 9, 1) and days[-1] == date(2025, 9, 30)
+        assert preset_days("yesterday", NOW) == [date(2025, 9, 29)]
+        assert preset_days("this_month", NOW) is None
+
+
+class TestCollect:
+    """Tests for cache-backed collection"""
+
+    def test_only_open_days_are_refetched(self, cache):
+        """Should fetch everything once, then only open days"""
+        fetched = []
+
+        def fetch_day(day):
+            fetched.append(day)
+            return [{"id": "1", "clicks": day.day}]
+
+        days = preset_days("last_30_days", NOW)
+        first = cache.collect("pierdun", "stats/campaign", days, fetch_day, now=NOW)
+        assert len(fetched) == 30
+        fetched.clear()
+
+        second = cache.collect("pierdun", "stats/campaign", days, fetch_day, now=NOW)
+        assert fetched == [date(2025, 9, 29), date(2025, 9, 30)]
+        assert second == first
+        assert cache.hits == 28
+
+    def test_keys_are_isolated(self, cache):
+        """Should not share days between trackers or entities"""
+        cache.put("a", "stats/campaign", date(2025, 9, 1), [{"id": "1"}])
+        assert cache.get("b", "stats/campaign", date(2025, 9, 1)) is None
+        assert cache.get("a", "stats/campaign?campaignId=5", date(2025, 9, 1)) is None
+
+
+class TestBinomAPIIntegration:
+    """Tests for get_stats_campaigns with a cache"""
+
+    def test_last_days_are_merged_from_cache(self, cache, monkeypatch):
+        """Should fetch per day, merge additive metrics and serve closed days locally"""
+        calls = []
+
+        def fake_request(self, method, endpoint, params=None, data=None):
+            calls.append(params["dateFrom"])
+            return [{"id": "7", "name": "Camp", "clicks": "10", "leads": "1", "cost": "5", "revenue": "10"}]
+
+        monkeypatch.setattr(BinomAPI, "_make_request", fake_request)
+        api = BinomAPI(api_key="k", stats_cache=cache)
+        rows = api.get_stats_campaigns(date_preset="last_7_days")
+        assert len(calls) == 7
+        assert rows[0]["clicks"] == 70
+        assert rows[0]["roi"] == pytest.approx(100.0)
+
+        calls.clear()
+        api.get_stats_campaigns(date_preset="last_7_days")
+        assert len(calls) == 2
+
+    def test_limit_applies_after_merge(self, cache, monkeypatch):
+        """Should rank campaigns by period totals, not by each day's top-N"""
+        def fake_request(self, method, endpoint, params=None, data=None):
+            # Campaign 1 spikes on a single day; campaign 2 is steady and wins over the week
+            spike = 100 if params["dateFrom"].startswith("2025-09-24") else 0
+            rows = [{"id": "1", "clicks": str(spike)}, {"id": "2", "clicks": "30"}]
+            rows.sort(key=lambda row: int(row["clicks"]), reverse=True)
+            return rows[params["offset"]:params["offset"] + params["limit"]]
+
+        monkeypatch.setattr(BinomAPI, "_make_request", fake_request)
+        monkeypatch.setattr("stats_cache.utc_today", lambda now=None: NOW.date())
+        api = BinomAPI(api_key="k", stats_cache=cache)
+        rows = api.get_stats_campaigns(date_preset="last_7_days", limit=1)
+        assert [(row["id"], row["clicks"]) for row in rows] == [("2", 210)]
+
+    def test_days_are_paged_in_full(self, cache, monkeypatch):
+        """Should page through a day with more rows than one request returns"""
+        offsets = []
+
+        def fake_request(self, method, endpoint, params=None, data=None):
+            offsets.append(params["offset"])
+            rows = [{"id": str(i), "clicks": "1"} for i in range(5)]
+            return rows[params["offset"]:params["offset"] + params["limit"]]
+
+        monkeypatch.setattr(BinomAPI, "_make_request", fake_request)
+        monkeypatch.setattr(BinomAPI, "STATS_PAGE_SIZE", 2)
+        api = BinomAPI(api_key="k", stats_cache=cache)
+        rows = api.get_stats_campaigns(date_preset="today", limit=10)
+        assert offsets == [0, 2, 4]
+        assert len(rows) == 5
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,121 @@
+"""
+Unit tests for the time-window sharded stats fetcher
+
+Tests shard splitting, re-aggregation of additive metrics and derived metrics.
+"""
+
+import time
+import pytest
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+
+from rate_limiter import TokenBucket
+from stats_fetcher import ShardedStatsFetcher, derive_metrics, merge_shards
+
+
+START = datetime(2025, 9, 1)
+
+
+class FakeStatsAPI:
+    """One campaign row per shard: 100 clicks, 2 leads, cost 10, revenue 15"""
+
+    metrics = None
+    tracker = "test"
+
+    def __init__(self):
+        self.calls = []
+
+    def get_stats_campaigns(self, date_preset="last_30_days", limit=1000, date_from=None, date_to=None):
+        self.calls.append((date_from, date_to))
+        return [{"id": "7", "name": "Camp", "clicks": "100", "leads": "2", "cost": "10.0",
+                 "revenue": "15.0", "cr": "2.0", "roi": "50.0"}]
+
+
+class TestMerge:
+    """Tests for shard re-aggregation"""
+
+    def test_additive_metrics_are_summed_and_derived_recomputed(self):
+        """Should sum additive metrics and recompute CR/ROI/EPC from the sums"""
+        frame = merge_shards([
+            [{"id": "1", "name": "A", "clicks": "100", "leads": "1", "cost": "50", "revenue": "0", "roi": "-100"}],
+            [{"id": "1", "name": "A", "clicks": "300", "leads": "9", "cost": "50", "revenue": "200", "roi": "300"},
+             {"id": "2", "name": "B", "clicks": "10", "leads": "0", "cost": "0", "revenue": "0"}],
+        ])
+        row = frame.row(1)
+        assert row["clicks"] == 400
+        assert row["leads"] == 10
+        assert row["cr"] == pytest.approx(2.5)
+        assert row["roi"] == pytest.approx(100.0)
+        assert row["epc"] == pytest.approx(0.5)
+        assert row["name"] == "A"
+        assert frame.row(2)["roi"] is None
+        assert len(frame) == 2 and frame.shards == 2
+
+    def test_only_listed_metrics_are_summed(self):
+        """Should keep camelCase IDs and ratios from the first row and recompute known ratios"""
+        day = {"id": "1", "trafficSourceId": 12, "clicks": "10", "leads": "2", "cost": "5",
+               "lp_views": "8", "lp_clicks": "4", "lp_ctr": 50.0, "ecpa": 2.5, "approve": 40.0}
+        frame = merge_shards([[dict(day)], [dict(day)]])
+        row = frame.row(1)
+        assert row["trafficSourceId"] == 12
+        assert row["clicks"] == 20
+        assert row["lp_ctr"] == pytest.approx(50.0)
+        assert row["ecpa"] == pytest.approx(2.5)
+        assert row["approve"] == 40.0
+        assert frame.unmerged_metrics == []
+
+    def test_differing_unlisted_metrics_are_reported(self):
+        """Should report numeric columns it cannot merge instead of summing them"""
+        frame = merge_shards([
+            [{"id": "1", "clicks": "10", "unique_clicks": "7"}],
+            [{"id": "1", "clicks": "20", "unique_clicks": "8"}],
+        ])
+        assert frame.row(1)["unique_clicks"] == "7"
+        assert frame.unmerged_metrics == ["unique_clicks"]
+
+    def test_derive_metrics_handles_zero_clicks(self):
+        """Should leave ratios undefined when the denominator is zero"""
+        assert derive_metrics({"clicks": 0, "cost": 0}) == {"cr": None, "roi": None, "epc": None, "cpc": None,
+                                                            "lp_ctr": None, "ecpa": None}
+        assert derive_metrics({"clicks": 10, "cost": 5})["cr"] is None
+
+
+class TestFetcher:
+    """Tests for sharded fetching"""
+
+    def test_day_shards_do_not_overlap(self):
+        """Should request each day once with an inclusive end one second before the next shard"""
+        api = FakeStatsAPI()
+        frame = ShardedStatsFetcher(api, shard="day", workers=4).fetch(START, START + timedelta(days=7))
+
+        assert len(api.calls) == 7
+        assert sorted(api.calls)[0] == (START, START + timedelta(days=1) - timedelta(seconds=1))
+        row = frame.to_rows()[0]
+        assert row["clicks"] == 700
+        assert row["cr"] == pytest.approx(2.0)
+        assert row["roi"] == pytest.approx(50.0)
+
+    def test_hour_shards(self):
+        """Should split into hourly shards"""
+        fetcher = ShardedStatsFetcher(FakeStatsAPI(), shard="hour")
+        assert len(fetcher.shards(START, START + timedelta(hours=30))) == 30
+
+
+class TestTokenBucket:
+    """Tests for the rate limiter"""
+
+    def test_burst_then_rate(self):
+        """Should let a burst through and then pace requests"""
+        bucket = TokenBucket(rate=50, burst=2)
+        started = time.monotonic()
+        waits = [bucket.acquire() for _ in range(4)]
+        assert waits[:2] == [0.0, 0.0]
+        assert time.monotonic() - started >= 0.035
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,133 @@
+"""
+Unit tests for memoized workflow steps
+
+Tests content-addressed keys, freshness and incremental re-runs.
+"""
+
+import json
+import time
+import pytest
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+# Add scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+
+from step_memo import StepMemo
+from workflow_engine import WorkflowEngine
+from test_workflow_engine import FakeAPI, WORKFLOWS
+
+
+def analytics(**local_params):
+    with open(WORKFLOWS / 'analytics_workflow.json', encoding='utf-8') as f:
+        workflow = json.load(f)
+    workflow["steps"][3].update(local_params)
+    return workflow
+
+
+class TestStepMemo:
+    """Tests for StepMemo"""
+
+    def test_key_ignores_number_and_description(self, tmp_path):
+        """Should address results by what determines them"""
+        memo = StepMemo(tmp_path)
+        base = {"step": 1, "action": "GET /info/offer", "description": "a"}
+        assert memo.key(base, {}) == memo.key({**base, "step": 9, "description": "b"}, {})
+        assert memo.key(base, {}) != memo.key({**base, "params": {"status": "active"}}, {})
+        assert memo.key(base, {"values": {"id": 1}}) != memo.key(base, {"values": {"id": 2}})
+
+    def test_freshness(self, tmp_path):
+        """Should expire API results but not non-expiring ones"""
+        memo = StepMemo(tmp_path, freshness=timedelta(seconds=0.05))
+        memo.put("ab" * 32, [1, 2])
+        assert memo.get("ab" * 32) == (True, [1, 2])
+        time.sleep(0.1)
+        assert memo.get("ab" * 32) == (False, None)
+        assert memo.get("ab" * 32, expires=False) == (True, [1, 2])
+
+
+class TestIncrementalRuns:
+    """Tests for re-runs with WorkflowEngine(memo=...)"""
+
+    def test_rerun_uses_cache(self, tmp_path):
+        """Should make no API calls when nothing changed"""
+        api = FakeAPI(campaigns=4, delay=0)
+        engine = WorkflowEngine(api, memo=StepMemo(tmp_path))
+        first = engine.run(analytics())
+        calls = len(api.calls)
+        second = engine.run(analytics())
+        assert len(api.calls) == calls
+        assert [r["cached"] for r in second.report()] == [1, 4, 1, 1]
+        assert second.results[4].output == first.results[4].output
+
+    def test_changed_local_step_reruns_only_suffix(self, tmp_path):
+        """Should recompute only the changed local step"""
+        api = FakeAPI(campaigns=4, delay=0)
+        seen = []
+
+        def top_roi(step, inputs):
+            seen.append(step.number)
+            return {"limit": step.raw.get("limit"), "stats": len(inputs[2].rows())}
+
+        engine = WorkflowEngine(api, memo=StepMemo(tmp_path), local_handlers={"LOCAL_ANALYSIS": top_roi})
+        engine.run(analytics(limit=5))
+        calls = len(api.calls)
+        run = engine.run(analytics(limit=10))
+        assert len(api.calls) == calls
+        assert seen == [4, 4]
+        assert run.results[4].cached == 0
+        assert run.results[4].output == {"limit": 10, "stats": 4}
+
+    def test_changed_params_refetch_step(self, tmp_path):
+        """Should re-fetch a step whose params changed and reuse content-identical downstream results"""
+        api = FakeAPI(campaigns=3, delay=0)
+        engine = WorkflowEngine(api, memo=StepMemo(tmp_path))
+        engine.run(analytics())
+        workflow = analytics()
+        workflow["steps"][1]["params"]["datePreset"] = "last_30_days"
+        api.calls.clear()
+        run = engine.run(workflow)
+        assert sorted(e for _, e, _ in api.calls) == ["/stats/campaign"] * 3
+        # The fake API returns the same stats, so the analysis inputs have the same digests
+        assert [r["cached"] for r in run.report()] == [1, 0, 1, 1]
+
+        # Expired API results are fetched again; new data invalidates the analysis
+        engine.memo.freshness = timedelta(0)
+        api.campaigns = 2
+        run = engine.run(workflow)
+        assert [r["cached"] for r in run.report()] == [0, 0, 0, 0]
+        assert run.results[2].calls == 2
+
+    def test_switching_tracker_misses_cache(self, tmp_path):
+        """Should not serve one tracker's responses to another base URL or API key"""
+        api = FakeAPI(campaigns=2, delay=0)
+        api.base_url, api.api_key = "https://a.example/public/api/v1", "key-a"
+        engine = WorkflowEngine(api, memo=StepMemo(tmp_path))
+        engine.run(analytics())
+
+        api.base_url = "https://b.example/public/api/v1"
+        run = engine.run(analytics())
+        assert [r["cached"] for r in run.report()][:3] == [0, 0, 0]
+
+        api.api_key = "key-b"
+        run = engine.run(analytics())
+        assert [r["cached"] for r in run.report()][:3] == [0, 0, 0]
+
+        api.api_key = "key-a"
+        run = engine.run(analytics())
+        assert [r["cached"] for r in run.report()][:3] == [1, 2, 1]
+        assert "key-a" not in "".join(p.read_text(encoding="utf-8") for p in tmp_path.glob("*/*.json"))
+
+    def test_writes_are_not_memoized(self, tmp_path):
+        """Should always execute non-GET steps"""
+        api = FakeAPI(delay=0)
+        engine = WorkflowEngine(api, memo=StepMemo(tmp_path))
+        workflow = {"steps": [{"step": 1, "action": "POST /offer", "params": {"name": "x"}}]}
+        engine.run(workflow)
+        engine.run(workflow)
+        assert len(api.calls) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,149 @@
+"""
+Unit tests for BinomAPI request tracing
+
+Tests hook invocation, timing breakdown, JSONL and sampled logging sinks.
+"""
+
+import json
+import logging
+import pytest
+import sys
+from pathlib import Path
+
+# Add scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+
+from binom_api import BinomAPI
+from encyclopedia_index import EncyclopediaIndex
+from mock_server import MockBinomServer
+import tracing
+from tracing import JsonlTraceSink, RequestHook, RequestTrace, SampledLoggingSink, debug_logger
+
+
+class RecordingHook(RequestHook):
+    def __init__(self):
+        self.before, self.after = [], []
+
+    def before_request(self, trace):
+        self.before.append(trace.endpoint)
+
+    def after_request(self, trace):
+        self.after.append(trace)
+
+
+@pytest.fixture
+def mock_api(tmp_path):
+    path = tmp_path / "encyclopedia.json"
+    path.write_text(json.dumps({"endpoints": {
+        "/campaign/{id}": {"path": "/campaign/{id}", "method": "PUT", "response_example": {"ok": True}}
+    }}), encoding="utf-8")
+    with MockBinomServer(EncyclopediaIndex(path)) as server:
+        yield server
+
+
+def make_trace(status=200, total=0.1, error=None):
+    return RequestTrace("GET", "/info/offer", "http://x/info/offer", status=status, error=error,
+                        timings={"ttfb": total * 0.8, "body": total * 0.2, "total": total})
+
+
+class TestHooks:
+    """Tests for hook invocation from BinomAPI"""
+
+    def test_hooks_receive_timings_and_sizes(self, mock_api):
+        """Should call hooks around the request with sizes and timing breakdown"""
+        hook = RecordingHook()
+        api = BinomAPI(api_key="k", base_url=mock_api.base_url, hooks=[hook])
+        api.update_campaign(5, {"name": "x"})
+
+        assert hook.before == ["/campaign/5"]
+        trace = hook.after[0]
+        assert trace.status == 200
+        assert trace.bytes_out == len(b'{"name": "x"}')
+        assert trace.bytes_in > 0
+        assert trace.timings["ttfb"] + trace.timings["body"] == pytest.approx(trace.timings["total"])
+
+    def test_failed_requests_are_traced(self, mock_api):
+        """Should trace HTTP errors before raising"""
+        hook = RecordingHook()
+        api = BinomAPI(api_key="k", base_url=mock_api.base_url, hooks=[hook])
+        with pytest.raises(Exception):
+            api.get_offers()
+        assert hook.after[0].status == 404
+
+
+class TestSinks:
+    """Tests for the built-in sinks"""
+
+    def test_jsonl_sink(self, tmp_path):
+        """Should append one JSON line per sampled request without payloads"""
+        path = tmp_path / "traces.jsonl"
+        sink = JsonlTraceSink(path)
+        trace = make_trace()
+        trace.data = {"secret": "payload"}
+        sink.after_request(trace)
+        sink.after_request(make_trace(status=500))
+        sink.close()
+
+        records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert [r["status"] for r in records] == [200, 500]
+        assert "data" not in records[0]
+
+    def test_sampling_keeps_errors_and_slow_calls(self, tmp_path):
+        """Should always keep failures and slow calls while sampling the rest"""
+        path = tmp_path / "traces.jsonl"
+        sink = JsonlTraceSink(path, sample_rate=0.0, slow_ms=500)
+        sink.after_request(make_trace(total=0.1))
+        sink.after_request(make_trace(total=1.0))
+        sink.after_request(make_trace(status=None, error="ConnectTimeout"))
+        sink.close()
+        records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert len(records) == 2
+        assert [r["sample_rate"] for r in records] == [1.0, 1.0]
+
+    def test_sampled_records_carry_their_rate(self, tmp_path, caplog):
+        """Should record the keep probability in every sampled trace and log line"""
+        path = tmp_path / "traces.jsonl"
+        sink = JsonlTraceSink(path, sample_rate=0.25, seed=1)
+        log_sink = SampledLoggingSink(sample_rate=0.25, seed=1)
+        with caplog.at_level(logging.INFO, logger="binom_api"):
+            for _ in range(40):
+                sink.after_request(make_trace())
+                log_sink.after_request(make_trace())
+            sink.after_request(make_trace(status=502))
+            log_sink.after_request(make_trace(status=502))
+        sink.close()
+        records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert {r["sample_rate"] for r in records if r["status"] == 200} == {0.25}
+        assert records[-1]["sample_rate"] == 1.0
+        assert all(" rate=0.25" in m for m in caplog.messages if "-> 200" in m)
+        assert caplog.messages[-1].endswith(" rate=1")
+
+    def test_logging_sink(self, caplog):
+        """Should log sampled requests with timings"""
+        sink = SampledLoggingSink(sample_rate=1.0)
+        with caplog.at_level(logging.INFO, logger="binom_api"):
+            sink.after_request(make_trace())
+        assert "GET /info/offer -> 200" in caplog.text
+        assert "total=100.0ms" in caplog.text
+
+    def test_debug_logging_is_scoped_to_the_client(self, mock_api, capsys, monkeypatch):
+        """Should print a debug client's traces without touching the shared 'binom_api' logger"""
+        # The debug handler binds stderr when created; create it under capsys
+        monkeypatch.setattr(tracing, "_debug_logger", None)
+        shared = logging.getLogger("binom_api")
+        level, handlers = shared.level, list(shared.handlers)
+
+        quiet = BinomAPI(api_key="k", base_url=mock_api.base_url)
+        debug = BinomAPI(api_key="k", base_url=mock_api.base_url, debug=True)
+        BinomAPI(api_key="k", base_url=mock_api.base_url, debug=True)
+        assert (shared.level, shared.handlers) == (level, handlers)
+        assert len(debug_logger().handlers) == 1
+
+        quiet.update_campaign(1, {"name": "x"})
+        assert "PUT /campaign/1" not in capsys.readouterr().err
+        debug.update_campaign(2, {"name": "x"})
+        assert "PUT /campaign/2 -> 200" in capsys.readouterr().err
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,87 @@
+"""
+Unit tests for the SQLite trust store
+
+Tests atomic updates, threshold queries, concurrency and legacy import.
+"""
+
+import json
+import threading
+import pytest
+import sys
+from pathlib import Path
+
+# Add validation to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'validation'))
+
+from trust_system import SimpleTrustSystem
+
+
+@pytest.fixture
+def trust(tmp_path):
+    system = SimpleTrustSystem(tmp_path / "trust.db", trust_file_path=tmp_path / "missing.json")
+    yield system
+    system.close()
+
+
+class TestTrustStore:
+    """Tests for SimpleTrustSystem"""
+
+    def test_unknown_agent_is_neutral(self, trust):
+        """Should report neutral defaults without creating the agent"""
+        stats = trust.get_agent_stats("nobody")
+        assert stats["trust_score"] == 0.5
+        assert stats["level"] == "new"
+        assert not trust.is_trusted("nobody")
+        assert trust.count_above(0) == 0
+
+    def test_record_contribution_updates_score(self, trust):
+        """Should update counters and the smoothed score"""
+        for _ in range(20):
+            stats = trust.record_contribution("good", True)
+        assert stats["total_contributions"] == 20
+        assert stats["trust_score"] == pytest.approx(21 / 22)
+        assert stats["level"] == "auto_approve"
+        assert trust.is_trusted("good")
+
+    def test_threshold_queries(self, trust):
+        """Should return agents above a threshold, best first"""
+        trust.record_contributions([("a", True)] * 30 + [("b", True)] * 5 + [("b", False)] * 5 + [("c", False)] * 3)
+        assert [a["agent_id"] for a in trust.agents_above()] == ["a"]
+        assert [a["agent_id"] for a in trust.agents_above(0.0)] == ["a", "b", "c"]
+        assert trust.count_above(0.4) == 2
+        assert trust.global_stats() == {"total_contributions": 43,
+                                        "successful_contributions": 35,
+                                        "failed_contributions": 8}
+
+    def test_concurrent_writers_lose_no_updates(self, trust):
+        """Should apply every update from concurrent threads"""
+        def worker():
+            for _ in range(50):
+                trust.record_contribution("shared", True)
+            trust.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert trust.get_agent_stats("shared")["total_contributions"] == 200
+        assert trust.global_stats()["total_contributions"] == 200
+
+    def test_legacy_json_import(self, tmp_path):
+        """Should import agent_trust.json into an empty database once"""
+        legacy = tmp_path / "agent_trust.json"
+        legacy.write_text(json.dumps({"agents": {"old": {
+            "successful_contributions": 8, "failed_contributions": 2,
+            "created_at": "2025-01-01T00:00:00"}}}))
+        trust = SimpleTrustSystem(tmp_path / "trust.db", trust_file_path=legacy)
+        assert trust.get_agent_stats("old")["total_contributions"] == 10
+        trust.close()
+
+        reopened = SimpleTrustSystem(tmp_path / "trust.db", trust_file_path=legacy)
+        assert reopened.get_agent_stats("old")["total_contributions"] == 10
+        reopened.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,154 @@
+"""
+Unit tests for the concurrent example fetcher
+
+Tests seeded payloads, freshness skipping, the fetch manifest and
+per-category scheduling in update_examples_intelligent.
+"""
+
+import json
+import os
+import pytest
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add scripts and scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts'))
+
+import update_examples_intelligent as fetcher
+from encyclopedia_index import EncyclopediaIndex
+
+
+REQUEST_SCHEMA = {"properties": {"name": {"type": "string"}, "cost": {"type": "number"},
+                                 "active": {"type": "boolean"}}}
+
+SAMPLE = {
+    "endpoints": {
+        "/info/offer": {"path": "/info/offer", "method": "GET", "category": "info"},
+        "/offer": {"path": "/offer", "method": "POST", "category": "offer",
+                   "request_schema": REQUEST_SCHEMA},
+        "/offer/{id}": {"path": "/offer/{id}", "method": "GET", "category": "offer"}
+    }
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    path = tmp_path / "encyclopedia.json"
+    path.write_text(json.dumps(SAMPLE), encoding="utf-8")
+    return EncyclopediaIndex(path, index_path=tmp_path / "encyclopedia.index.json")
+
+
+@pytest.fixture
+def fake_fetch(monkeypatch):
+    """Replaces the HTTP call with one that saves {"endpoint": ...} and records payloads"""
+    calls = []
+
+    def fetch(method, endpoint, params, payload, output_path, base_url=fetcher.BASE_URL):
+        calls.append((method, endpoint, payload))
+        output_path.write_text(json.dumps({"endpoint": endpoint}), encoding="utf-8")
+        return True, f"saved {endpoint}"
+
+    monkeypatch.setattr(fetcher, "fetch_endpoint", fetch)
+    return calls
+
+
+class TestSeededPayloads:
+    """Tests for deterministic dummy payloads"""
+
+    def test_same_seed_gives_same_payload(self):
+        """Should generate identical payloads for the same seed and endpoint"""
+        first = fetcher.generate_dummy_data_from_schema(REQUEST_SCHEMA, fetcher.endpoint_rng(7, "POST", "/offer"))
+        second = fetcher.generate_dummy_data_from_schema(REQUEST_SCHEMA, fetcher.endpoint_rng(7, "POST", "/offer"))
+        assert first == second
+        assert set(first) == {"name", "cost", "active"}
+
+    def test_payload_depends_on_seed_and_endpoint(self):
+        """Should vary payloads across seeds and endpoints, independent of order"""
+        base = fetcher.generate_dummy_data_from_schema(REQUEST_SCHEMA, fetcher.endpoint_rng(7, "POST", "/offer"))
+        assert base != fetcher.generate_dummy_data_from_schema(REQUEST_SCHEMA,
+                                                               fetcher.endpoint_rng(8, "POST", "/offer"))
+        assert base != fetcher.generate_dummy_data_from_schema(REQUEST_SCHEMA,
+                                                               fetcher.endpoint_rng(7, "POST", "/lander"))
+
+
+class TestFetchAndSave:
+    """Tests for freshness skipping and the manifest"""
+
+    def test_manifest_records_fetched_endpoints(self, tmp_path, index, fake_fetch):
+        """Should fetch static endpoints and record their schema hashes"""
+        out = tmp_path / "responses"
+        summary = fetcher.fetch_and_save_examples(index, output_dir=out, workers=2)
+
+        assert summary["requested"] == 2
+        assert summary["saved"] == 2
+        assert sorted(endpoint for _, endpoint, _ in fake_fetch) == ["/info/offer", "/offer"]
+        manifest = json.loads((out / fetcher.MANIFEST_NAME).read_text(encoding="utf-8"))
+        assert set(manifest) == {"GET /info/offer", "POST /offer"}
+        record = index.get("/offer", "POST")
+        assert manifest["POST /offer"]["schema_hash"] == fetcher.schema_hash("POST", record, {},
+                                                                             fetcher.DEFAULT_SEED)
+
+    def test_fresh_responses_are_skipped(self, tmp_path, index, fake_fetch):
+        """Should skip endpoints whose saved response is fresh and schema unchanged"""
+        out = tmp_path / "responses"
+        fetcher.fetch_and_save_examples(index, output_dir=out)
+        fake_fetch.clear()
+
+        summary = fetcher.fetch_and_save_examples(index, output_dir=out)
+        assert summary["skipped_fresh"] == 2
+        assert fake_fetch == []
+
+    def test_stale_or_changed_responses_are_refetched(self, tmp_path, index, fake_fetch):
+        """Should refetch on age, seed change or --force"""
+        out = tmp_path / "responses"
+        fetcher.fetch_and_save_examples(index, output_dir=out)
+
+        old = time.time() - 2 * 3600
+        os.utime(fetcher.output_path_for(out, "/info/offer"), (old, old))
+        fake_fetch.clear()
+        summary = fetcher.fetch_and_save_examples(index, output_dir=out, max_age_hours=1)
+        assert [endpoint for _, endpoint, _ in fake_fetch] == ["/info/offer"]
+        assert summary["skipped_fresh"] == 1
+
+        assert fetcher.fetch_and_save_examples(index, output_dir=out, seed=1)["requested"] == 2
+        assert fetcher.fetch_and_save_examples(index, output_dir=out, seed=1, force=True)["requested"] == 2
+
+
+class TestRunByCategory:
+    """Tests for per-category scheduling"""
+
+    def test_limits_in_flight_per_category_without_blocking_workers(self):
+        """Should respect category limits while other categories keep the pool busy"""
+        lock = threading.Lock()
+        running = {"slow": 0, "fast": 0}
+        peak = {"slow": 0, "fast": 0}
+        order = []
+
+        def work(job):
+            with lock:
+                running[job["category"]] += 1
+                peak[job["category"]] = max(peak[job["category"]], running[job["category"]])
+                order.append(job["category"])
+            time.sleep(0.02 if job["category"] == "slow" else 0.001)
+            with lock:
+                running[job["category"]] -= 1
+            return job["n"]
+
+        jobs = [{"category": "slow", "n": i} for i in range(6)] + [{"category": "fast", "n": i} for i in range(6)]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(fetcher.run_by_category(pool, jobs, {"slow": 1, "default": 3},
+                                                   lambda p, job: p.submit(work, job)))
+
+        assert len(results) == 12
+        assert peak == {"slow": 1, "fast": 3}
+        # Fast jobs finish while the slow category still has queued work
+        assert order.index("fast") < 2
+        assert order[-1] == "slow"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
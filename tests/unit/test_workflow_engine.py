@@ -0,0 +1,118 @@
+"""
+Unit tests for the workflow execution engine
+
+Tests dependency inference, concurrent steps, bounded fan-out and step reports.
+"""
+
+import threading
+import time
+import pytest
+import sys
+from pathlib import Path
+
+# Add scripts/core to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'scripts' / 'core'))
+
+from workflow_engine import WorkflowEngine, WorkflowError, load_workflow, parse_workflow
+
+
+WORKFLOWS = Path(__file__).parent.parent.parent / 'workflows'
+
+
+class FakeAPI:
+    """Serves campaigns, offers and per-campaign stats; tracks concurrency"""
+
+    def __init__(self, campaigns=5, delay=0.02, failing=()):
+        self.campaigns = campaigns
+        self.delay = delay
+        self.failing = set(failing)
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def request(self, method, endpoint, params=None, data=None):
+        with self._lock:
+            self.calls.append((method, endpoint, params))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if endpoint in self.failing:
+                raise Exception("API Error 500: boom")
+            if endpoint == "/info/campaign":
+                return [{"id": i, "name": f"C{i}"} for i in range(1, self.campaigns + 1)]
+            if endpoint == "/info/offer":
+                return [{"id": 100, "name": "Offer"}]
+            if endpoint == "/stats/campaign":
+                cid = params["campaignId"]
+                return [{"id": cid, "clicks": 100, "leads": cid, "cost": 10, "revenue": 5 * cid}]
+            return {}
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class TestParsing:
+    """Tests for workflow parsing"""
+
+    def test_analytics_dependencies(self):
+        """Should bind {campaign_id} to the campaign list step"""
+        workflow = load_workflow(WORKFLOWS / 'analytics_workflow.json')
+        binding = workflow.steps[2].bindings["campaign_id"]
+        assert (binding.step, binding.field) == (1, "id")
+        assert workflow.levels() == [[1, 3], [2], [4]]
+
+    def test_variables_remove_dependency(self):
+        """Should treat a known variable as a constant"""
+        workflow = load_workflow(WORKFLOWS / 'analytics_workflow.json', {"campaign_id": 7})
+        assert workflow.steps[2].depends_on == []
+
+    def test_creation_workflow_steps_verify_entities(self):
+        """Should turn manual steps into independent list checks"""
+        workflow = load_workflow(WORKFLOWS / 'creation_workflow.json')
+        assert [s.path for s in workflow.steps.values()] == [
+            "/info/traffic_source", "/info/landing", "/info/offer", "/info/campaign"]
+        assert workflow.levels() == [[1, 2, 3, 4]]
+
+    def test_unbound_placeholder(self):
+        """Should reject placeholders with no producer"""
+        with pytest.raises(WorkflowError):
+            parse_workflow({"steps": [{"step": 1, "action": "GET /stats/offer", "params": {"offerId": "{offer_id}"}}]})
+
+
+class TestExecution:
+    """Tests for WorkflowEngine.run"""
+
+    def test_runs_analytics_workflow(self):
+        """Should fan out stats per campaign and analyse the merged rows"""
+        api = FakeAPI(campaigns=6)
+        run = WorkflowEngine(api, max_concurrency=3, fan_out_concurrency=3).run(WORKFLOWS / 'analytics_workflow.json')
+        assert run.ok
+        assert run.results[2].calls == 6
+        stats_params = sorted(p["campaignId"] for m, e, p in api.calls if e == "/stats/campaign")
+        assert stats_params == [1, 2, 3, 4, 5, 6]
+        rows = run.results[4].output["rows"]
+        assert rows[0]["id"] == 6 and rows[0]["roi"] == pytest.approx(200.0)
+        assert api.peak <= 3
+
+    def test_independent_steps_overlap(self):
+        """Should start steps 1 and 3 together and report per-step timing"""
+        api = FakeAPI(delay=0.05)
+        run = WorkflowEngine(api).run(WORKFLOWS / 'analytics_workflow.json')
+        report = {entry["step"]: entry for entry in run.report()}
+        assert abs(report[1]["started"] - report[3]["started"]) < 0.04
+        assert report[2]["started"] >= report[1]["started"] + report[1]["seconds"] - 0.001
+        assert all(entry["seconds"] > 0 for entry in report.values() if entry["calls"])
+
+    def test_failure_skips_dependents(self):
+        """Should skip steps that depend on a failed one"""
+        api = FakeAPI(failing={"/info/campaign"})
+        run = WorkflowEngine(api).run(WORKFLOWS / 'analytics_workflow.json')
+        statuses = {r.step: r.status for r in run.results.values()}
+        assert statuses == {1: "failed", 2: "skipped", 3: "ok", 4: "skipped"}
+        assert "500" in run.results[1].error
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
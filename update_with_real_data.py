@@ -5,6 +5,12 @@
 
 import json
 import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent / 'scripts' / 'core'))
+
+from render_pipeline import RenderJob, RenderPipeline, print_stats
 
 def process_real_data():
     """Обработка и интеграция реальных данных"""
@@ -73,30 +79,29 @@ def process_real_data():
     
     print("✅ Энциклопедия обновлена реальными данными!")
 
-def create_enhanced_documentation(real_data):
+def create_enhanced_documentation(real_data, pipeline=None):
     """Создание улучшенной документации с реальными данными"""
     
     print("📝 Создание улучшенной документации...")
     
+    jobs = []
     for endpoint_key, endpoint_data in real_data.items():
         method = endpoint_data['method']
         path = endpoint_data['path']
         category = endpoint_data['category']
         
-        # Создаем улучшенную документацию
-        enhanced_doc = generate_real_endpoint_doc(endpoint_data)
-        
-        # Сохраняем в соответствующую категорию
+        # Сохраняем в соответствующую категорию (директория создаётся конвейером)
         filename = f"{method.lower()}_{path.replace('/', '_').replace('{', '').replace('}', '').replace('__', '_').strip('_')}.md"
         filepath = f"docs/endpoints/{category}/{filename}"
         
-        # Создаем директорию если не существует
-        os.makedirs(f"docs/endpoints/{category}", exist_ok=True)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(enhanced_doc)
-        
+        jobs.append(RenderJob(filepath, generate_real_endpoint_doc, (endpoint_data,)))
+    
+    stats = (pipeline or RenderPipeline()).run(jobs)
+    for filepath in stats.written_paths:
         print(f"✅ Создан: {filepath}")
+    print_stats(stats, "Улучшенная документация")
+    
+    return stats
 
 def generate_real_endpoint_doc(endpoint_data):
     """Генерация документации с реальными данными"""
@@ -1,15 +1,150 @@
 """
 API Tester for Binom API Encyclopedia
 Tests real API endpoints to ensure documentation accuracy
+
+Each endpoint is requested once; the same response is used for the status
+check and for contract validation against the endpoint's response_schema
+from encyclopedia.json. Long lists are sampled so huge responses validate
+in bounded time, and schema mismatches are aggregated per field into a
+drift report.
 """
 
 import os
+import random
+import re
 import requests
 import json
-from typing import Tuple, Dict, Any
+import threading
+import time
+from typing import Tuple, Dict, Any, List, Optional
+
+from json_validator import BinomAPIValidator, compile_schema
+
+# List items validated per array; None validates everything
+DEFAULT_SAMPLE_SIZE = 50
+
+# Validation errors collected per response before stopping
+MAX_ERRORS = 100
+
+# How long a live endpoint probe result is reused
+PROBE_TTL = 60.0
+
+_INDEX_RE = re.compile(r"\[\d+\]")
+
+
+def sample_lists(data, sample_size: Optional[int], rng: random.Random):
+    """
+    Copy of data where every list longer than sample_size is reduced to a
+    random sample of its items (original order kept). Returns (data, sampled_count).
+    """
+    if sample_size is None:
+        return data, 0
+    if isinstance(data, list):
+        sampled = 0
+        items = data
+        if len(data) > sample_size:
+            indexes = sorted(rng.sample(range(len(data)), sample_size))
+            items = [data[i] for i in indexes]
+            sampled = 1
+        result = []
+        for item in items:
+            item, nested = sample_lists(item, sample_size, rng)
+            result.append(item)
+            sampled += nested
+        return result, sampled
+    if isinstance(data, dict):
+        sampled = 0
+        result = {}
+        for key, value in data.items():
+            result[key], nested = sample_lists(value, sample_size, rng)
+            sampled += nested
+        return result, sampled
+    return data, 0
+
+
+def field_path(error) -> str:
+    """Field of a validation error with list indexes collapsed: data[].name"""
+    path = "$"
+    for part in error.absolute_path:
+        path += "[]" if isinstance(part, int) else f".{part}"
+    return path
+
+
+class DriftReport:
+    """Schema mismatches aggregated per endpoint, field and kind of violation"""
+
+    def __init__(self, max_examples: int = 3):
+        self.max_examples = max_examples
+        self.fields: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self.responses = 0
+
+    def record(self, endpoint: str, errors: List) -> None:
+        self.responses += 1
+        for error in errors:
+            key = (endpoint, field_path(error), error.validator)
+            entry = self.fields.setdefault(key, {
+                "endpoint": endpoint,
+                "field": key[1],
+                "rule": error.validator,
+                "expected": error.validator_value,
+                "count": 0,
+                "examples": []
+            })
+            entry["count"] += 1
+            if len(entry["examples"]) < self.max_examples:
+                entry["examples"].append(_INDEX_RE.sub("[]", error.message)[:200])
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Drifted fields, most frequent first"""
+        return sorted(self.fields.values(), key=lambda e: (-e["count"], e["endpoint"], e["field"]))
+
+
+class ProbeCache:
+    """Endpoint probe results (e.g. APITester.test_endpoint) reused for ttl seconds"""
+
+    def __init__(self, probe, ttl: float = PROBE_TTL):
+        self.probe = probe
+        self.ttl = ttl
+        self.probes = 0
+        self._results = {}
+        # endpoint -> [lock, callers holding or waiting]; dropped when the last caller leaves
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint):
+        with self._lock:
+            cached = self._results.get(endpoint)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+            entry = self._locks.setdefault(endpoint, [threading.Lock(), 0])
+            entry[1] += 1
+
+        # Concurrent callers for the same endpoint wait for one probe
+        try:
+            with entry[0]:
+                with self._lock:
+                    cached = self._results.get(endpoint)
+                    if cached is not None and cached[0] > time.monotonic():
+                        return cached[1]
+                result = self.probe(endpoint)
+                with self._lock:
+                    self.probes += 1
+                    self._results[endpoint] = (time.monotonic() + self.ttl, result)
+                return result
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[endpoint]
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
 
 class APITester:
-    def __init__(self):
+    def __init__(self, schema_validator: Optional[BinomAPIValidator] = None,
+                 sample_size: Optional[int] = DEFAULT_SAMPLE_SIZE, seed: int = 0):
         self.api_key = os.getenv('binomPublic')
         self.base_url = "https://pierdun.com/public/api/v1"
         self.headers = {
@@ -22,18 +157,29 @@ class APITester:
             "timezone": "UTC",
             "limit": 10
         }
+        self.sample_size = sample_size
+        self.rng = random.Random(seed)
+        self.drift = DriftReport()
+        self._schema_validator = schema_validator
 
-    def test_endpoint(self, endpoint: str, method: str = "GET", data: Dict = None) -> Tuple[bool, str]:
+    @property
+    def schema_validator(self) -> BinomAPIValidator:
+        # Compiling every encyclopedia schema is only worth it once contracts are checked
+        if self._schema_validator is None:
+            self._schema_validator = BinomAPIValidator()
+        return self._schema_validator
+
+    def request(self, endpoint: str, method: str = "GET", data: Dict = None) -> Tuple[Optional[requests.Response], str]:
         """
-        Test a single API endpoint
-        Returns: (success: bool, error_message: str)
+        Send one request to an endpoint
+        Returns: (response or None, error_message) - the message is "Success" for HTTP 200
         """
         try:
             url = f"{self.base_url}/{endpoint.lstrip('/')}"
-            
+
             # Add default parameters for stats endpoints
             params = self.default_params.copy() if 'stats' in endpoint else {}
-            
+
             if method.upper() == "GET":
                 response = requests.get(url, headers=self.headers, params=params, timeout=30)
             elif method.upper() == "POST":
@@ -43,30 +189,38 @@ class APITester:
             elif method.upper() == "DELETE":
                 response = requests.delete(url, headers=self.headers, timeout=30)
             else:
-                return False, f"Unsupported HTTP method: {method}"
+                return None, f"Unsupported HTTP method: {method}"
 
             # Check response status
             if response.status_code == 200:
-                return True, "Success"
+                return response, "Success"
             elif response.status_code == 401:
-                return False, "Authentication failed - check API key"
+                return response, "Authentication failed - check API key"
             elif response.status_code == 400:
-                return False, f"Bad request - {response.text}"
+                return response, f"Bad request - {response.text}"
             elif response.status_code == 404:
-                return False, "Endpoint not found"
+                return response, "Endpoint not found"
             elif response.status_code == 429:
-                return False, "Rate limited"
+                return response, "Rate limited"
             elif response.status_code == 500:
-                return False, f"Server error - {response.text}"
+                return response, f"Server error - {response.text}"
             else:
-                return False, f"HTTP {response.status_code}: {response.text}"
+                return response, f"HTTP {response.status_code}: {response.text}"
 
         except requests.exceptions.Timeout:
-            return False, "Request timeout"
+            return None, "Request timeout"
         except requests.exceptions.ConnectionError:
-            return False, "Connection error"
+            return None, "Connection error"
         except Exception as e:
-            return False, f"Unexpected error: {str(e)}"
+            return None, f"Unexpected error: {str(e)}"
+
+    def test_endpoint(self, endpoint: str, method: str = "GET", data: Dict = None) -> Tuple[bool, str]:
+        """
+        Test a single API endpoint
+        Returns: (success: bool, error_message: str)
+        """
+        response, message = self.request(endpoint, method, data)
+        return response is not None and response.status_code == 200, message
 
     def test_multiple_endpoints(self, endpoints: list) -> Dict[str, Dict]:
         """
@@ -81,35 +235,67 @@ class APITester:
             }
         return results
 
-    def validate_response_format(self, endpoint: str, expected_schema: Dict) -> Tuple[bool, str]:
+    def check_contract(self, endpoint: str, method: str = "GET", data: Dict = None,
+                       expected_schema: Dict = None) -> Dict[str, Any]:
         """
-        Validate that API response matches expected schema
+        Request an endpoint once and validate the response against its schema
+        (expected_schema, or the endpoint's response_schema from the encyclopedia).
+        Mismatches are added to self.drift.
         """
+        result = {"endpoint": endpoint, "success": False, "valid": False, "message": "",
+                  "errors": [], "sampled_lists": 0}
+        response, message = self.request(endpoint, method, data)
+        if response is None or response.status_code != 200:
+            result["message"] = f"API test failed: {message}"
+            return result
+        result["success"] = True
+
         try:
-            success, error = self.test_endpoint(endpoint)
-            if not success:
-                return False, f"API test failed: {error}"
+            response_data = response.json()
+        except json.JSONDecodeError:
+            result["message"] = "Response is not valid JSON"
+            return result
 
-            # Get actual response
-            url = f"{self.base_url}/{endpoint.lstrip('/')}"
-            params = self.default_params.copy() if 'stats' in endpoint else {}
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
-            
-            if response.status_code != 200:
-                return False, f"API returned {response.status_code}"
-
-            try:
-                response_data = response.json()
-            except json.JSONDecodeError:
-                return False, "Response is not valid JSON"
-
-            # Basic schema validation (simplified)
-            if isinstance(response_data, list) and len(response_data) > 0:
-                return True, "Response format valid (array)"
-            elif isinstance(response_data, dict):
-                return True, "Response format valid (object)"
-            else:
-                return False, "Unexpected response format"
+        if expected_schema is not None:
+            validator = compile_schema(expected_schema)
+        else:
+            validator = self.schema_validator.validator_for("response", method, endpoint)
+        if validator is None:
+            result["valid"] = isinstance(response_data, (list, dict))
+            result["message"] = "No response_schema documented"
+            return result
+
+        checked, result["sampled_lists"] = sample_lists(response_data, self.sample_size, self.rng)
+        errors = []
+        for error in validator.iter_errors(checked):
+            errors.append(error)
+            if len(errors) >= MAX_ERRORS:
+                break
+        self.drift.record(f"{method.upper()} /{endpoint.lstrip('/')}", errors)
+
+        result["errors"] = [{"field": field_path(e), "rule": e.validator, "message": e.message[:200]}
+                            for e in errors]
+        result["valid"] = not errors
+        result["message"] = "Response matches schema" if not errors else f"{len(errors)} schema violation(s)"
+        return result
+
+    def check_contracts(self, endpoints: list, method: str = "GET") -> Dict[str, Any]:
+        """
+        Check the contract of several endpoints
+        Returns: per-endpoint results and the per-field drift summary
+        """
+        results = {endpoint: self.check_contract(endpoint, method) for endpoint in endpoints}
+        return {"results": results, "drift": self.drift.summary()}
 
+    def validate_response_format(self, endpoint: str, expected_schema: Dict = None) -> Tuple[bool, str]:
+        """
+        Validate that API response matches expected schema
+        """
+        try:
+            result = self.check_contract(endpoint, expected_schema=expected_schema)
         except Exception as e:
             return False, f"Validation error: {str(e)}"
+        if not result["valid"] and result["errors"]:
+            first = result["errors"][0]
+            return False, f"{result['message']}: {first['field']}: {first['message']}"
+        return result["valid"], result["message"]
@@ -1,67 +1,282 @@
 """
 Dependency Checker for API Endpoints
 Validates endpoint dependencies and relationships
+
+Dependencies form a DAG of resources (a resource must exist before the
+resources that use it, e.g. affiliate_network -> offer -> campaign). The
+graph combines Binom's data model with references found in the
+encyclopedia: {campaignId}-style path parameters and *Id fields of request
+schemas. Availability is probed through each resource's list endpoint,
+level by level in topological order with the probes of one level running
+concurrently, so checking every resource takes about one round trip per
+level. Resources whose prerequisite is unavailable are reported as blocked
+without being probed.
 """
 
 import json
-from typing import Dict, Tuple, List
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Tuple, List, Optional, Set
+
+from api_tester import APITester, ProbeCache, PROBE_TTL
+
+ENCYCLOPEDIA_PATH = Path(__file__).resolve().parent.parent / "encyclopedia.json"
+
+# Binom data model: resource -> resources that must exist before it
+RESOURCE_DEPENDENCIES = {
+    "offer": ["affiliate_network"],
+    "rotation": ["offer", "landing"],
+    "campaign": ["traffic_source", "offer", "landing"],
+}
+
+# Path prefixes that name a view of a resource rather than the resource itself
+VIEW_PREFIXES = ("info", "stats")
+
+RESOURCE_ALIASES = {
+    "offers": "offer",
+    "landings": "landing",
+    "campaigns": "campaign",
+    "domains": "domain",
+    "conversions": "conversion",
+    "groups": "group",
+    "users": "user",
+}
+
+_REFERENCE_RE = re.compile(r"^([A-Za-z][A-Za-z0-9]*?)(?:Id|Ids|_id|_ids)$")
+_PATH_PARAM_RE = re.compile(r"\{([^}]+)\}")
+
+
+class DependencyCycleError(ValueError):
+    """The dependency graph contains a cycle"""
+
+    def __init__(self, cycle: List[str]):
+        self.cycle = cycle
+        super().__init__("Dependency cycle: " + " -> ".join(cycle))
+
+
+def _snake(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def resource_of(endpoint: str) -> str:
+    """Resource an endpoint works with: /offer/{id}/rename -> offer, stats/campaign -> campaign"""
+    segments = [s for s in endpoint.split(" ")[-1].strip("/").split("/") if s]
+    if len(segments) > 1 and segments[0] in VIEW_PREFIXES:
+        segments = segments[1:]
+    resource = segments[0] if segments else ""
+    return RESOURCE_ALIASES.get(resource, resource)
+
+
+def _schema_fields(schema, fields: Set[str]) -> Set[str]:
+    if isinstance(schema, dict):
+        for name, value in (schema.get("properties") or {}).items():
+            fields.add(name)
+            _schema_fields(value, fields)
+        _schema_fields(schema.get("items"), fields)
+    return fields
+
+
+def _references(record: Dict) -> Set[str]:
+    names = set(_PATH_PARAM_RE.findall(record.get("path", "")))
+    names |= _schema_fields(record.get("request_schema"), set())
+    references = set()
+    for name in names:
+        match = _REFERENCE_RE.match(name)
+        if match:
+            references.add(RESOURCE_ALIASES.get(_snake(match.group(1)), _snake(match.group(1))))
+    return references
+
 
 class DependencyChecker:
-    def __init__(self):
-        self.dependencies = {
-            # Critical dependencies between endpoints
-            "campaign/create": {
-                "required_endpoints": ["info/traffic_source"],
-                "affects": ["campaign/update", "stats/campaign"]
-            },
-            "offer/create": {
-                "required_endpoints": ["info/affiliate_network"],
-                "affects": ["offer/update", "stats/offer"]
-            },
-            "landing/create": {
-                "required_endpoints": [],
-                "affects": ["landing/update", "stats/landing"]
-            }
-        }
+    def __init__(self, encyclopedia_path=None, probe_cache: ProbeCache = None, workers: int = 16):
+        """
+        encyclopedia_path: encyclopedia.json used to derive references and list endpoints
+        probe_cache: shared endpoint probe cache (default: APITester.test_endpoint, cached for PROBE_TTL)
+        workers: probes running at once within a level
+        """
+        self.probe_cache = probe_cache or ProbeCache(APITester().test_endpoint, PROBE_TTL)
+        self.workers = workers
+        self.endpoints = self._load_endpoints(encyclopedia_path or ENCYCLOPEDIA_PATH)
+        self._list_paths = {r["path"].strip("/") for r in self.endpoints
+                            if r.get("method", "GET").upper() == "GET" and "{" not in r["path"]}
+
+        self.core_resources = set(RESOURCE_DEPENDENCIES).union(*RESOURCE_DEPENDENCIES.values())
+
+        # endpoint path -> resources it references; resource -> prerequisite resources
+        self.references: Dict[str, Set[str]] = {}
+        self.graph: Dict[str, Set[str]] = {}
+        for resource, requirements in RESOURCE_DEPENDENCIES.items():
+            self._add_resource(resource)
+            for required in requirements:
+                self._add_resource(required)
+                self.graph[resource].add(required)
+        for record in self.endpoints:
+            self._add_resource(resource_of(record["path"]))
+
+        for record in self.endpoints:
+            resource = resource_of(record["path"])
+            # Only references to known resources become edges ({adminId} is not one)
+            references = {r for r in _references(record) if r in self.graph and r != resource}
+            self.references.setdefault(record["path"].strip("/"), set()).update(references)
+            self.graph[resource].update(references)
+
+        self._levels = self._topological_levels()
+        self.level_of = {resource: n for n, level in enumerate(self._levels) for resource in level}
+
+    @staticmethod
+    def _load_endpoints(encyclopedia_path) -> List[Dict]:
+        try:
+            with open(encyclopedia_path, 'r', encoding='utf-8') as f:
+                return list(json.load(f).get("endpoints", {}).values())
+        except (OSError, json.JSONDecodeError):
+            return []
+
+    def _add_resource(self, resource: str):
+        if resource:
+            self.graph.setdefault(resource, set())
+
+    def _find_cycle(self, nodes: Set[str]) -> List[str]:
+        # Every remaining node has a remaining prerequisite, so walking them must revisit one
+        node = min(nodes)
+        path = []
+        seen = {}
+        while node not in seen:
+            seen[node] = len(path)
+            path.append(node)
+            node = min(r for r in self.graph[node] if r in nodes)
+        return list(reversed(path[seen[node]:] + [node]))
+
+    def _topological_levels(self) -> List[List[str]]:
+        """Kahn's algorithm; level n only depends on levels < n"""
+        remaining = {resource: set(requirements) for resource, requirements in self.graph.items()}
+        levels = []
+        while remaining:
+            level = sorted(r for r, requirements in remaining.items() if not requirements)
+            if not level:
+                raise DependencyCycleError(self._find_cycle(set(remaining)))
+            levels.append(level)
+            for resource in level:
+                del remaining[resource]
+            for requirements in remaining.values():
+                requirements.difference_update(level)
+        return levels
+
+    def levels(self) -> List[List[str]]:
+        """Resources grouped by topological level"""
+        return [list(level) for level in self._levels]
+
+    def list_endpoint(self, resource: str) -> Optional[str]:
+        """Endpoint probed to check that a resource is available (None if there is nothing to probe)"""
+        for candidate in (f"info/{resource}", f"{resource}/list/filtered", f"{resource}/list"):
+            if candidate in self._list_paths:
+                return candidate
+        nested = sorted(p for p in self._list_paths if p.endswith(f"/{resource}/list"))
+        if nested:
+            return nested[0]
+        # Core entities are listed through /info/<resource> even where the encyclopedia lacks it
+        if resource in self.core_resources:
+            return f"info/{resource}"
+        own = sorted((p for p in self._list_paths if resource_of(p) == resource), key=lambda p: (len(p), p))
+        return own[0] if own else None
+
+    def ancestors(self, resource: str) -> Set[str]:
+        """All resources that must exist before this one"""
+        found: Set[str] = set()
+        stack = list(self.graph.get(resource, ()))
+        while stack:
+            required = stack.pop()
+            if required not in found:
+                found.add(required)
+                stack.extend(self.graph.get(required, ()))
+        return found
+
+    def required_resources(self, endpoint: str) -> Set[str]:
+        """Resources an endpoint needs: its references, its resource's prerequisites and theirs"""
+        resource = resource_of(endpoint)
+        direct = set(self.graph.get(resource, ())) | self.references.get(endpoint.strip("/"), set())
+        required = set(direct)
+        for dependency in direct:
+            required |= self.ancestors(dependency)
+        required.discard(resource)
+        return required
+
+    def probe_resources(self, resources: Set[str]) -> Dict[str, Tuple[bool, str]]:
+        """
+        Probe the list endpoints of resources level by level
+        Returns: {resource: (available, message)}
+        """
+        results: Dict[str, Tuple[bool, str]] = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for level in self._levels:
+                to_probe = []
+                for resource in level:
+                    if resource not in resources:
+                        continue
+                    blocked = sorted(r for r in self.graph[resource] if r in results and not results[r][0])
+                    if blocked:
+                        results[resource] = (False, f"Blocked by unavailable {', '.join(blocked)}")
+                    elif self.list_endpoint(resource) is None:
+                        results[resource] = (True, "No list endpoint to probe")
+                    else:
+                        to_probe.append(resource)
+                probes = pool.map(lambda r: self.probe_cache.get(self.list_endpoint(r)), to_probe)
+                results.update(zip(to_probe, probes))
+        return results
 
     def check(self, endpoint: str) -> Tuple[bool, str]:
         """
         Check endpoint dependencies
         Returns: (dependencies_ok: bool, error_message: str)
         """
+        return self.check_many([endpoint])[endpoint]
+
+    def check_many(self, endpoints: List[str]) -> Dict[str, Tuple[bool, str]]:
+        """
+        Check dependencies of several endpoints, probing each required resource once
+        Returns: {endpoint: (dependencies_ok, error_message)}
+        """
         try:
-            # Normalize endpoint path
-            endpoint = endpoint.lstrip('/')
-            
-            # Check if endpoint has dependencies
-            if endpoint not in self.dependencies:
-                return True, "No dependencies to check"
-            
-            required_endpoints = self.dependencies[endpoint].get("required_endpoints", [])
-            
-            # For now, assume all required endpoints are available
-            # In a full implementation, we would test each required endpoint
-            for required_ep in required_endpoints:
-                # Simplified check - in reality we'd test the endpoint
-                if not self._is_endpoint_available(required_ep):
-                    return False, f"Required endpoint not available: {required_ep}"
-            
-            return True, "All dependencies satisfied"
-            
+            required = {endpoint: self.required_resources(endpoint) for endpoint in endpoints}
+            availability = self.probe_resources(set().union(*required.values()) if required else set())
         except Exception as e:
-            return False, f"Dependency check error: {str(e)}"
+            return {endpoint: (False, f"Dependency check error: {str(e)}") for endpoint in endpoints}
+
+        results = {}
+        for endpoint, resources in required.items():
+            if not resources:
+                results[endpoint] = (True, "No dependencies to check")
+                continue
+            missing = sorted(r for r in resources if not availability[r][0])
+            if missing:
+                results[endpoint] = (False, "Required endpoint not available: " +
+                                     ", ".join(self.list_endpoint(r) or r for r in missing))
+            else:
+                results[endpoint] = (True, "All dependencies satisfied")
+        return results
+
+    def check_all(self) -> Dict[str, Dict]:
+        """Probe every resource; returns {resource: {available, message, endpoint, level}}"""
+        availability = self.probe_resources(set(self.graph))
+        return {
+            resource: {
+                "available": available,
+                "message": message,
+                "endpoint": self.list_endpoint(resource),
+                "level": self.level_of[resource]
+            }
+            for resource, (available, message) in availability.items()
+        }
 
     def _is_endpoint_available(self, endpoint: str) -> bool:
-        """
-        Check if an endpoint is available
-        Simplified implementation - always returns True for now
-        """
-        # In a full implementation, this would test the actual endpoint
-        return True
+        """Check if an endpoint is available (live probe, cached)"""
+        return self.probe_cache.get(endpoint)[0]
 
     def get_affected_endpoints(self, endpoint: str) -> List[str]:
         """Get list of endpoints affected by changes to this endpoint"""
-        endpoint = endpoint.lstrip('/')
-        if endpoint in self.dependencies:
-            return self.dependencies[endpoint].get("affects", [])
-        return []
+        resource = resource_of(endpoint)
+        dependents = {r for r in self.graph if resource in self.ancestors(r)}
+        return sorted({
+            r["path"].strip("/") for r in self.endpoints
+            if resource_of(r["path"]) in dependents or resource in self.references.get(r["path"].strip("/"), ())
+        })
@@ -4,20 +4,60 @@ Hybrid Validator for Binom API Encyclopedia Contributions
 
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from api_tester import APITester
+from api_tester import APITester, ProbeCache, PROBE_TTL
 from trust_system import SimpleTrustSystem
 from dependency_checker import DependencyChecker
 
+
 class HybridValidator:
-    def __init__(self):
+    def __init__(self, probe_ttl: float = PROBE_TTL, workers: int = 8):
         self.api_tester = APITester()
         self.trust_system = SimpleTrustSystem()
-        self.dependency_checker = DependencyChecker()
+        self.probe_cache = ProbeCache(self.api_tester.test_endpoint, probe_ttl)
+        self.dependency_checker = DependencyChecker(probe_cache=self.probe_cache)
+        self.workers = workers
 
     def validate_contribution(self, contribution, agent_id):
         """Validates a contribution from an AI agent."""
+        endpoint = contribution["endpoint"]
+        return self._result(
+            self.probe_cache.get(endpoint),
+            lambda: self.dependency_checker.check(endpoint),
+            lambda: self.trust_system.is_trusted(agent_id)
+        )
+
+    def validate_batch(self, contributions, workers: int = None):
+        """
+        Validates queued (contribution, agent_id) pairs.
+        Each endpoint is probed and dependency-checked once for the whole batch,
+        agents' trust is looked up in one query. Results keep the input order.
+        """
+        contributions = list(contributions)
+        endpoints = list(dict.fromkeys(c["endpoint"] for c, _ in contributions))
+
+        with ThreadPoolExecutor(max_workers=workers or self.workers) as pool:
+            probes = dict(zip(endpoints, pool.map(self.probe_cache.get, endpoints)))
+        # Later stages only run for contributions that passed the earlier ones
+        dependencies = self.dependency_checker.check_many([e for e in endpoints if probes[e][0]])
+        trust = self.trust_system.get_agents_stats(
+            agent_id for contribution, agent_id in contributions
+            if dependencies.get(contribution["endpoint"], (False,))[0]
+        )
+        threshold = self.trust_system.auto_approve_threshold
+
+        return [
+            self._result(
+                probes[contribution["endpoint"]],
+                lambda endpoint=contribution["endpoint"]: dependencies[endpoint],
+                lambda agent_id=agent_id: trust[agent_id]["trust_score"] >= threshold
+            )
+            for contribution, agent_id in contributions
+        ]
+
+    def _result(self, probe, check_dependencies, check_trust):
         validation_results = {
             "passed": False,
             "errors": []
@@ -27,19 +67,19 @@ class HybridValidator:
         # ...
 
         # 2. API Endpoint Testing
-        api_test_passed, api_error = self.api_tester.test_endpoint(contribution["endpoint"])
+        api_test_passed, api_error = probe
         if not api_test_passed:
             validation_results["errors"].append(f"API Test Failed: {api_error}")
             return validation_results
 
         # 3. Dependency Check
-        dependencies_ok, dep_error = self.dependency_checker.check(contribution["endpoint"])
+        dependencies_ok, dep_error = check_dependencies()
         if not dependencies_ok:
             validation_results["errors"].append(f"Dependency Check Failed: {dep_error}")
             return validation_results
 
         # 4. Agent Trust Score
-        if not self.trust_system.is_trusted(agent_id):
+        if not check_trust():
             validation_results["errors"].append("Agent not trusted for auto-approval.")
             # Even if not trusted, the contribution can be valid but needs manual review
             # For now, we fail validation for non-trusted agents
@@ -1,18 +1,81 @@
 #!/usr/bin/env python3
 """
 JSON Schema Validator for Binom API Encyclopedia
+
+Validators are compiled once per distinct schema (the meta-schema check runs
+only at compile time) and cached, so repeated validations only pay for the
+instance check. Bulk validation of files fans out to worker processes.
 """
 
 import json
+import time
 import jsonschema
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+WORKFLOWS_DIR = REPO_ROOT / "workflows"
+ENCYCLOPEDIA_PATH = REPO_ROOT / "encyclopedia.json"
+ENDPOINT_SCHEMAS_PATH = REPO_ROOT / "schemas" / "endpoint-schemas.json"
+
+sys.path.append(str(REPO_ROOT / "scripts" / "core"))
+from endpoint_router import EndpointRouter
+
+# Below this many files the process pool costs more than it saves
+MIN_PARALLEL_FILES = 32
+
+
+@lru_cache(maxsize=1024)
+def _compile(schema_json):
+    schema = json.loads(schema_json)
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+def compile_schema(schema):
+    """Returns a cached validator instance for a schema (checked against its meta-schema once)."""
+    return _compile(json.dumps(schema, sort_keys=True))
+
+def first_error(validator, data):
+    """Returns the most relevant validation error, or None (same choice as jsonschema.validate)."""
+    return best_match(validator.iter_errors(data))
+
+def check_data(validator, data):
+    error = first_error(validator, data)
+    if error is not None:
+        return False, f"Schema validation failed: {str(error)}"
+    return True, "Valid"
+
+def check_file(validator, filepath):
+    try:
+        with open(filepath, 'r') as f:
+            data = json.load(f)
+
+        return check_data(validator, data)
+
+    except json.JSONDecodeError as e:
+        return False, f"Invalid JSON: {str(e)}"
+    except Exception as e:
+        return False, f"Error: {str(e)}"
 
 class BinomAPIValidator:
-    
-    def __init__(self):
+
+    def __init__(self, encyclopedia_path=None, endpoint_schemas_path=None):
         self.schemas = self.load_schemas()
-    
+        self.validators = {name: compile_schema(schema) for name, schema in self.schemas.items()}
+        self.schema_errors = {}
+        self.last_stats = None
+        # Шаблонные пути (/campaign/{id}) по виду схемы: "request" / "response"
+        self._routers = {"request": EndpointRouter(), "response": EndpointRouter()}
+        self.encyclopedia_path = encyclopedia_path or ENCYCLOPEDIA_PATH
+        self.load_endpoint_schemas(self.encyclopedia_path,
+                                   endpoint_schemas_path or ENDPOINT_SCHEMAS_PATH)
+
     def load_schemas(self):
         """Load validation schemas"""
         return {
@@ -38,48 +101,155 @@ class BinomAPIValidator:
                 }
             }
         }
-    
+
+    def _register(self, name, schema):
+        if not isinstance(schema, dict) or not schema:
+            return
+        try:
+            self.validators[name] = compile_schema(schema)
+            self.schemas[name] = schema
+            kind, _, endpoint = name.partition(":")
+            if "{" in endpoint and kind in self._routers:
+                method, _, path = endpoint.partition(" ")
+                self._routers[kind].add(method, path)
+        except jsonschema.SchemaError as e:
+            self.schema_errors[name] = str(e)
+
+    def load_endpoint_schemas(self, encyclopedia_path, endpoint_schemas_path):
+        """
+        Compile request/response schemas as "request:METHOD /path" and "response:METHOD /path".
+        schemas/endpoint-schemas.json (verified against the live API) overrides the encyclopedia;
+        its response_schema maps outcomes to schemas, and the "success" schema is the one used.
+        """
+        try:
+            with open(encyclopedia_path, 'r', encoding='utf-8') as f:
+                endpoints = json.load(f).get("endpoints", {})
+        except (OSError, json.JSONDecodeError):
+            endpoints = {}
+        for record in endpoints.values():
+            key = f"{record.get('method', 'GET').upper()} {record.get('path')}"
+            self._register(f"request:{key}", record.get("request_schema"))
+            self._register(f"response:{key}", record.get("response_schema"))
+
+        try:
+            with open(endpoint_schemas_path, 'r', encoding='utf-8') as f:
+                verified = json.load(f).get("schemas", {})
+        except (OSError, json.JSONDecodeError):
+            verified = {}
+        for entry in verified.values():
+            key = entry.get("endpoint")
+            if key:
+                self._register(f"request:{key}", entry.get("request_schema"))
+                self._register(f"response:{key}", (entry.get("response_schema") or {}).get("success"))
+
+    def validator_for(self, kind, method, path):
+        """
+        Compiled validator for an endpoint's request or response schema, or None.
+        Concrete paths such as /campaign/5 match templated ones such as /campaign/{id}.
+        """
+        name = f"{kind}:{method.upper()} /{path.lstrip('/')}"
+        validator = self.validators.get(name)
+        if validator is None and kind in self._routers:
+            match = self._routers[kind].match(path, method)
+            if match is not None:
+                return self.validators.get(f"{kind}:{match.key}")
+        return validator
+
+    def validate_data(self, data, schema_name):
+        """Validate already-parsed data against a named schema"""
+        validator = self.validators.get(schema_name)
+        if validator is None:
+            return False, f"Unknown schema: {schema_name}"
+        return check_data(validator, data)
+
     def validate_json_file(self, filepath, schema_name):
         """Validate a JSON file against a schema"""
+        validator = self.validators.get(schema_name)
+        if validator is None:
+            return False, f"Unknown schema: {schema_name}"
+        return check_file(validator, filepath)
+
+    def validate_files(self, files, schema_name, workers=None):
+        """
+        Validate many files against one schema, in parallel for large batches.
+        Sets self.last_stats with the count, elapsed time and validations/sec.
+        """
+        files = [str(f) for f in files]
+        if schema_name not in self.validators:
+            return [{"file": f, "valid": False, "message": f"Unknown schema: {schema_name}"} for f in files]
+        started = time.perf_counter()
+
+        if workers != 1 and len(files) >= MIN_PARALLEL_FILES:
+            workers = workers or os.cpu_count() or 1
+            chunksize = max(1, len(files) // (workers * 4))
+            # Workers get the schema itself and compile it once per process
+            schema_json = json.dumps(self.schemas[schema_name], sort_keys=True)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                outcomes = list(pool.map(_validate_file_worker, [schema_json] * len(files), files,
+                                         chunksize=chunksize))
+        else:
+            outcomes = [self.validate_json_file(f, schema_name) for f in files]
+
+        self._record_stats(len(files), time.perf_counter() - started)
+        return [
+            {"file": f, "valid": is_valid, "message": message}
+            for f, (is_valid, message) in zip(files, outcomes)
+        ]
+
+    def validate_endpoint_examples(self):
+        """Validate every encyclopedia response_example against its response_schema"""
         try:
-            with open(filepath, 'r') as f:
-                data = json.load(f)
-            
-            if schema_name in self.schemas:
-                jsonschema.validate(data, self.schemas[schema_name])
-                return True, "Valid"
-            else:
-                return False, f"Unknown schema: {schema_name}"
-                
-        except json.JSONDecodeError as e:
-            return False, f"Invalid JSON: {str(e)}"
-        except jsonschema.ValidationError as e:
-            return False, f"Schema validation failed: {str(e)}"
-        except Exception as e:
-            return False, f"Error: {str(e)}"
-    
-    def validate_all_workflows(self):
-        """Validate all workflow files"""
-        workflows_dir = Path("/home/ubuntu/binom-api-encyclopedia/workflows")
+            with open(self.encyclopedia_path, 'r', encoding='utf-8') as f:
+                endpoints = json.load(f).get("endpoints", {})
+        except (OSError, json.JSONDecodeError):
+            endpoints = {}
+
+        started = time.perf_counter()
         results = []
-        
-        if workflows_dir.exists():
-            for json_file in workflows_dir.glob("*.json"):
-                is_valid, message = self.validate_json_file(json_file, "workflow")
-                results.append({
-                    "file": str(json_file),
-                    "valid": is_valid,
-                    "message": message
-                })
-        
+        for record in endpoints.values():
+            example = record.get("response_example")
+            key = f"{record.get('method', 'GET').upper()} {record.get('path')}"
+            if example is None or f"response:{key}" not in self.validators:
+                continue
+            is_valid, message = self.validate_data(example, f"response:{key}")
+            results.append({"endpoint": key, "valid": is_valid, "message": message})
+        self._record_stats(len(results), time.perf_counter() - started)
         return results
 
+    def _record_stats(self, count, seconds):
+        self.last_stats = {
+            "validations": count,
+            "seconds": seconds,
+            "validations_per_second": count / seconds if seconds > 0 else float("inf")
+        }
+
+    def validate_all_workflows(self, workers=None):
+        """Validate all workflow files"""
+        workflows_dir = WORKFLOWS_DIR
+
+        if workflows_dir.exists():
+            return self.validate_files(sorted(workflows_dir.glob("*.json")), "workflow", workers)
+        return []
+
+def _validate_file_worker(schema_json, filepath):
+    return check_file(_compile(schema_json), filepath)
+
 if __name__ == "__main__":
     validator = BinomAPIValidator()
     results = validator.validate_all_workflows()
-    
+
     print("Validation Results:")
     print("=" * 50)
     for result in results:
         status = "✅ PASS" if result["valid"] else "❌ FAIL"
         print(f"{status} {result['file']}: {result['message']}")
+    if validator.last_stats:
+        print(f"\n{validator.last_stats['validations']} files in {validator.last_stats['seconds']:.3f}s "
+              f"({validator.last_stats['validations_per_second']:.0f} validations/sec)")
+
+    example_results = validator.validate_endpoint_examples()
+    failed = [r for r in example_results if not r["valid"]]
+    print(f"\nResponse examples: {len(example_results) - len(failed)}/{len(example_results)} valid "
+          f"({validator.last_stats['validations_per_second']:.0f} validations/sec)")
+    for result in failed:
+        print(f"❌ FAIL {result['endpoint']}: {result['message']}")
@@ -1,40 +1,142 @@
 """
 Trust System for AI Agents
 Manages agent reputation and auto-approval permissions
+
+Agent counters live in a WAL-mode SQLite database. Every contribution is a
+single upsert inside a transaction, so concurrent validators can record
+results without rewriting a shared file, readers never block the writer,
+and trust-score queries use an index.
+
+Benchmark:
+    python validation/trust_system.py --agents 100000 --contributions 10000000
 """
 
 import json
 import os
-from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+VALIDATION_DIR = Path(__file__).resolve().parent
+DEFAULT_DB_PATH = VALIDATION_DIR / "agent_trust.db"
+LEGACY_TRUST_FILE = VALIDATION_DIR / "agent_trust.json"
+
+# Agents with fewer contributions keep the "new" level whatever their score
+MIN_CONTRIBUTIONS = 5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS agents (
+    agent_id TEXT PRIMARY KEY,
+    successful_contributions INTEGER NOT NULL DEFAULT 0,
+    failed_contributions INTEGER NOT NULL DEFAULT 0,
+    total_contributions INTEGER NOT NULL DEFAULT 0,
+    -- Laplace-smoothed success rate: a new agent starts at a neutral 0.5
+    trust_score REAL GENERATED ALWAYS AS
+        ((successful_contributions + 1.0) / (total_contributions + 2)) STORED,
+    last_contribution TEXT,
+    created_at TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS agents_trust_score ON agents (trust_score);
+CREATE TABLE IF NOT EXISTS global_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total_contributions INTEGER NOT NULL DEFAULT 0,
+    successful_contributions INTEGER NOT NULL DEFAULT 0,
+    failed_contributions INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO global_stats (id) VALUES (1);
+"""
+
+_UPSERT = """
+INSERT INTO agents (agent_id, successful_contributions, failed_contributions, total_contributions,
+                    last_contribution, created_at)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (agent_id) DO UPDATE SET
+    successful_contributions = successful_contributions + excluded.successful_contributions,
+    failed_contributions = failed_contributions + excluded.failed_contributions,
+    total_contributions = total_contributions + excluded.total_contributions,
+    last_contribution = excluded.last_contribution
+"""
+
+_UPDATE_GLOBAL = """
+UPDATE global_stats SET
+    total_contributions = total_contributions + ?,
+    successful_contributions = successful_contributions + ?,
+    failed_contributions = failed_contributions + ?
+WHERE id = 1
+"""
+
+_AGENT_COLUMNS = ("agent_id, successful_contributions, failed_contributions, total_contributions, "
+                  "trust_score, last_contribution, created_at")
+
 
 class SimpleTrustSystem:
-    def __init__(self, trust_file_path: str = None):
-        self.trust_file_path = trust_file_path or "/home/ubuntu/binom-api-encyclopedia/validation/agent_trust.json"
-        self.trust_data = self._load_trust_data()
-        
+    def __init__(self, db_path: str = None, trust_file_path: str = None):
+        """
+        db_path: SQLite database (created on first use)
+        trust_file_path: legacy agent_trust.json, imported once into an empty database
+        """
+        self.db_path = str(db_path or DEFAULT_DB_PATH)
+        self._local = threading.local()
+
         # Trust thresholds
         self.auto_approve_threshold = 0.85
         self.trusted_threshold = 0.75
         self.new_agent_threshold = 0.5
 
-    def _load_trust_data(self) -> Dict:
-        """Load trust data from file or create new"""
-        if os.path.exists(self.trust_file_path):
-            try:
-                with open(self.trust_file_path, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                pass
-        
-        return {
-            "agents": {},
-            "global_stats": {
-                "total_contributions": 0,
-                "successful_contributions": 0,
-                "failed_contributions": 0
-            }
-        }
+        conn = self._connection()
+        conn.executescript(_SCHEMA)
+        legacy = Path(trust_file_path) if trust_file_path else LEGACY_TRUST_FILE
+        if legacy.exists() and not conn.execute("SELECT 1 FROM agents LIMIT 1").fetchone():
+            self.import_json(legacy)
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread: WAL lets each read without waiting for writers
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _write(self, agent_rows: List[Tuple], successful: int, failed: int):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(_UPSERT, agent_rows)
+            conn.execute(_UPDATE_GLOBAL, (successful + failed, successful, failed))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _level(self, trust_score: float, total_contributions: int) -> str:
+        if total_contributions < MIN_CONTRIBUTIONS:
+            return "new"
+        if trust_score >= self.auto_approve_threshold:
+            return "auto_approve"
+        if trust_score >= self.trusted_threshold:
+            return "trusted"
+        if trust_score >= self.new_agent_threshold:
+            return "standard"
+        return "untrusted"
+
+    def _stats(self, row) -> Dict:
+        stats = dict(row)
+        stats["level"] = self._level(stats["trust_score"], stats["total_contributions"])
+        return stats
 
     def is_trusted(self, agent_id: str) -> bool:
         """Check if agent is trusted for auto-approval"""
@@ -42,16 +144,184 @@ class SimpleTrustSystem:
         return stats["trust_score"] >= self.auto_approve_threshold
 
     def get_agent_stats(self, agent_id: str) -> Dict:
-        """Get agent statistics"""
-        if agent_id not in self.trust_data["agents"]:
-            self.trust_data["agents"][agent_id] = {
-                "successful_contributions": 0,
-                "failed_contributions": 0,
-                "total_contributions": 0,
-                "trust_score": 0.5,  # Start with neutral trust
-                "level": "new",
-                "last_contribution": None,
-                "created_at": datetime.now().isoformat()
-            }
-        
-        return self.trust_data["agents"][agent_id]
+        """Get agent statistics (neutral defaults for an unknown agent)"""
+        row = self._connection().execute(
+            f"SELECT {_AGENT_COLUMNS} FROM agents WHERE agent_id = ?", (agent_id,)
+        ).fetchone()
+        if row is not None:
+            return self._stats(row)
+        return self._new_agent_stats(agent_id)
+
+    def _new_agent_stats(self, agent_id: str) -> Dict:
+        return {
+            "agent_id": agent_id,
+            "successful_contributions": 0,
+            "failed_contributions": 0,
+            "total_contributions": 0,
+            "trust_score": 0.5,  # Start with neutral trust
+            "level": "new",
+            "last_contribution": None,
+            "created_at": None
+        }
+
+    def get_agents_stats(self, agent_ids: Iterable[str]) -> Dict[str, Dict]:
+        """Statistics for many agents with a few IN queries instead of one lookup each"""
+        agent_ids = list(dict.fromkeys(agent_ids))
+        found = {}
+        conn = self._connection()
+        for start in range(0, len(agent_ids), 500):
+            chunk = agent_ids[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            for row in conn.execute(f"SELECT {_AGENT_COLUMNS} FROM agents WHERE agent_id IN ({placeholders})", chunk):
+                found[row["agent_id"]] = self._stats(row)
+        return {agent_id: found.get(agent_id) or self._new_agent_stats(agent_id) for agent_id in agent_ids}
+
+    def record_contribution(self, agent_id: str, success: bool) -> Dict:
+        """Atomically record one validated contribution and return the agent's new stats"""
+        now = datetime.now().isoformat()
+        successful = 1 if success else 0
+        self._write([(agent_id, successful, 1 - successful, 1, now, now)], successful, 1 - successful)
+        return self.get_agent_stats(agent_id)
+
+    def record_contributions(self, contributions: Iterable[Tuple[str, bool]]) -> int:
+        """Record many (agent_id, success) results in one transaction; returns how many"""
+        successes = Counter()
+        failures = Counter()
+        for agent_id, success in contributions:
+            (successes if success else failures)[agent_id] += 1
+
+        now = datetime.now().isoformat()
+        rows = [
+            (agent_id, successes[agent_id], failures[agent_id], successes[agent_id] + failures[agent_id], now, now)
+            for agent_id in successes.keys() | failures.keys()
+        ]
+        successful = sum(successes.values())
+        failed = sum(failures.values())
+        if rows:
+            self._write(rows, successful, failed)
+        return successful + failed
+
+    def agents_above(self, threshold: float = None, limit: int = None) -> List[Dict]:
+        """Agents with trust_score >= threshold (default: auto-approval), best first"""
+        threshold = self.auto_approve_threshold if threshold is None else threshold
+        query = f"SELECT {_AGENT_COLUMNS} FROM agents WHERE trust_score >= ? ORDER BY trust_score DESC"
+        params: Tuple = (threshold,)
+        if limit is not None:
+            query += " LIMIT ?"
+            params += (limit,)
+        return [self._stats(row) for row in self._connection().execute(query, params)]
+
+    def count_above(self, threshold: float = None) -> int:
+        threshold = self.auto_approve_threshold if threshold is None else threshold
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM agents WHERE trust_score >= ?", (threshold,)
+        ).fetchone()[0]
+
+    def global_stats(self) -> Dict:
+        row = self._connection().execute(
+            "SELECT total_contributions, successful_contributions, failed_contributions FROM global_stats"
+        ).fetchone()
+        return dict(row)
+
+    def import_json(self, trust_file_path) -> int:
+        """Import agents from the legacy agent_trust.json format; returns the number imported"""
+        try:
+            with open(trust_file_path, 'r') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return 0
+
+        rows = []
+        for agent_id, stats in data.get("agents", {}).items():
+            successful = stats.get("successful_contributions", 0)
+            failed = stats.get("failed_contributions", 0)
+            rows.append((agent_id, successful, failed, successful + failed,
+                         stats.get("last_contribution"), stats.get("created_at") or datetime.now().isoformat()))
+        if rows:
+            self._write(rows, sum(r[1] for r in rows), sum(r[2] for r in rows))
+        return len(rows)
+
+
+def benchmark(db_path: str, agents: int, contributions: int, batch: int = 100000, readers: int = 4) -> Dict:
+    """Fill a trust database and time bulk writes, single updates, lookups and threshold queries"""
+    rng = random.Random(0)
+    trust = SimpleTrustSystem(db_path)
+    agent_ids = [f"agent-{i:06d}" for i in range(agents)]
+    # Per-agent success rates spread over the whole score range
+    rates = [rng.random() for _ in range(agents)]
+    results = {}
+
+    started = time.perf_counter()
+    remaining = contributions
+    while remaining > 0:
+        size = min(batch, remaining)
+        picks = rng.choices(range(agents), k=size)
+        trust.record_contributions((agent_ids[i], rng.random() < rates[i]) for i in picks)
+        remaining -= size
+    elapsed = time.perf_counter() - started
+    results["bulk_contributions_per_sec"] = contributions / elapsed
+
+    single = 2000
+    started = time.perf_counter()
+    for _ in range(single):
+        i = rng.randrange(agents)
+        trust.record_contribution(agent_ids[i], rng.random() < rates[i])
+    results["single_updates_per_sec"] = single / (time.perf_counter() - started)
+
+    lookups = 20000
+    started = time.perf_counter()
+    for _ in range(lookups):
+        trust.is_trusted(agent_ids[rng.randrange(agents)])
+    results["lookups_per_sec"] = lookups / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    results["auto_approved_agents"] = trust.count_above()
+    trust.agents_above(limit=100)
+    results["threshold_query_ms"] = (time.perf_counter() - started) * 1000
+
+    # Readers keep querying while this thread writes
+    stop = threading.Event()
+    reads = Counter()
+
+    def reader(n):
+        local_rng = random.Random(n)
+        while not stop.is_set():
+            trust.get_agent_stats(agent_ids[local_rng.randrange(agents)])
+            reads[n] += 1
+        trust.close()
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    for _ in range(single):
+        i = rng.randrange(agents)
+        trust.record_contribution(agent_ids[i], rng.random() < rates[i])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for thread in threads:
+        thread.join()
+    results["concurrent_updates_per_sec"] = single / elapsed
+    results["concurrent_reads_per_sec"] = sum(reads.values()) / elapsed
+
+    results["db_size_mb"] = os.path.getsize(db_path) / 1e6
+    trust.close()
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Benchmark the SQLite trust store")
+    parser.add_argument("--agents", type=int, default=100000)
+    parser.add_argument("--contributions", type=int, default=10000000)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--db", help="Database path (default: a temporary file)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db or os.path.join(tmp, "agent_trust.db")
+        print(f"Benchmark: {args.agents} agents, {args.contributions} contributions")
+        for name, value in benchmark(db_path, args.agents, args.contributions, readers=args.readers).items():
+            print(f"  {name}: {value:,.1f}")